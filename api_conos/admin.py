@@ -1,5 +1,177 @@
+import datetime
+
 from django.contrib import admin
-from .models import PedidoCono
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F, Max, Min, Q, QuerySet, Value
+from django.db.models.functions import Concat, Lower
+from django.utils.functional import cached_property
+
+from .catalogo import obtener_catalogo
+from .clientes import precio_pedido, registrar_cambio_cliente, registrar_pedidos_cliente
+from .models import (
+    PedidoCono, PrecioVariante, MultiplicadorTamanio, PrecioTopping, VersionCatalogo
+)
+from .precios import capturar_precio, construir_cono
+from .validacion import obtener_validador
+
+# Mayor carácter de Unicode: cota superior de los textos que empiezan por un prefijo
+_FIN_PREFIJO = '\U0010ffff'
+
+
+def _estimar_filas(modelo, using) -> int:
+    """
+    Estimación del número de filas de la tabla sin recorrerla
+
+    Usa las estadísticas del planificador en PostgreSQL y MySQL; en el resto
+    (y si aún no hay estadísticas) el rango de ids, que es una cota superior.
+    """
+    conexion = connections[using]
+    tabla = modelo._meta.db_table
+    consultas = {
+        'postgresql': ('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [tabla]),
+        'mysql': (
+            'SELECT TABLE_ROWS FROM information_schema.TABLES '
+            'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+            [tabla]
+        ),
+    }
+    if conexion.vendor in consultas:
+        try:
+            with conexion.cursor() as cursor:
+                cursor.execute(*consultas[conexion.vendor])
+                fila = cursor.fetchone()
+            if fila and fila[0] is not None and fila[0] > 0:
+                return int(fila[0])
+        except DatabaseError:
+            pass
+    ids = modelo._default_manager.using(using).values_list('pk', flat=True)
+    minimo = ids.order_by('pk').first()
+    if minimo is None:
+        return 0
+    return ids.order_by('-pk').first() - minimo + 1
+
+
+class PaginadorConteoEstimado(Paginator):
+    """
+    Paginador que no cuenta la tabla completa
+
+    Cuenta exactamente hasta `limite_conteo` pedidos con un COUNT acotado
+    (LIMIT), que recorre como mucho ese número de entradas del índice. Si el
+    listado los supera, sin filtros se usa la estimación de _estimar_filas y
+    con filtros el propio límite (se pagina hasta ese número de pedidos).
+    """
+    limite_conteo = 100000
+
+    @cached_property
+    def count(self):
+        consulta = self.object_list.order_by()
+        acotado = consulta[:self.limite_conteo + 1].count()
+        if acotado <= self.limite_conteo:
+            return acotado
+        if consulta.query.where:
+            return self.limite_conteo
+        return max(_estimar_filas(consulta.model, consulta.db), self.limite_conteo)
+
+
+def _inicio_periodo(fecha: datetime.date, tipo: str) -> datetime.date:
+    if tipo == 'year':
+        return fecha.replace(month=1, day=1)
+    if tipo == 'month':
+        return fecha.replace(day=1)
+    return fecha
+
+
+def _siguiente_periodo(inicio: datetime.date, tipo: str) -> datetime.date:
+    if tipo == 'year':
+        return inicio.replace(year=inicio.year + 1)
+    if tipo == 'month':
+        return (inicio + datetime.timedelta(days=32)).replace(day=1)
+    return inicio + datetime.timedelta(days=1)
+
+
+class ConsultaPedidosAdmin(QuerySet):
+    """
+    QuerySet del changelist con dates() resuelto sobre el índice de fechas
+
+    La navegación por fechas del admin (date_hierarchy) pide los años, meses
+    o días con pedidos con dates(), que en SQL es un SELECT DISTINCT sobre la
+    fecha truncada y recorre todos los pedidos filtrados. Aquí se obtienen
+    con un salto por periodo: la primera fecha >= inicio del periodo, una
+    búsqueda en el índice (fecha_pedido, id) o (variante, fecha_pedido, id)
+    por cada año, mes o día que aparece en la navegación.
+    """
+
+    def aggregate(self, *args, **kwargs):
+        """
+        Resuelve Min/Max de un campo con una búsqueda ordenada por agregado
+
+        El date_hierarchy pide Min y Max de la fecha en la misma consulta, que
+        SQLite resuelve recorriendo el índice completo; por separado, cada uno
+        lee un extremo del índice.
+        """
+        if args or not kwargs or not all(
+            type(agregado) in (Min, Max) and not agregado.filter and len(agregado.source_expressions) == 1
+            and isinstance(agregado.source_expressions[0], F)
+            for agregado in kwargs.values()
+        ):
+            return super().aggregate(*args, **kwargs)
+        resultado = {}
+        for nombre, agregado in kwargs.items():
+            campo = agregado.source_expressions[0].name
+            orden = campo if isinstance(agregado, Min) else f'-{campo}'
+            resultado[nombre] = (
+                self.exclude(**{f'{campo}__isnull': True}).order_by(orden).values_list(campo, flat=True).first()
+            )
+        return resultado
+
+    def dates(self, field_name, kind, order='ASC'):
+        if kind not in ('year', 'month', 'day'):
+            return super().dates(field_name, kind, order)
+
+        def primera_desde(inicio):
+            consulta = self
+            if inicio is not None:
+                # La cota del periodo va primero: con varias cotas inferiores
+                # sobre la misma columna SQLite busca en el índice por la primera
+                desde = self.model._default_manager.using(self.db).filter(**{f'{field_name}__gte': inicio})
+                consulta = desde & self
+            return consulta.order_by(field_name).values_list(field_name, flat=True).first()
+
+        periodos = []
+        fecha = primera_desde(None)
+        while fecha is not None:
+            inicio = _inicio_periodo(fecha, kind)
+            periodos.append(inicio)
+            fecha = primera_desde(_siguiente_periodo(inicio, kind))
+        if order == 'DESC':
+            periodos.reverse()
+        return periodos
+
+
+class ListadoPedidos(ChangeList):
+    """ChangeList que precalcula el precio de los pedidos de la página sin precio guardado"""
+
+    def get_results(self, request):
+        super().get_results(request)
+        pendientes = [pedido for pedido in self.result_list if pedido.precio_final is None]
+        if not pendientes:
+            return
+        # Pedidos anteriores a los snapshots: un cono por composición distinta
+        catalogo = obtener_catalogo()
+        precios = {}
+        for pedido in pendientes:
+            clave = (pedido.variante, pedido.tamanio_cono, tuple(pedido.toppings or ()))
+            if clave not in precios:
+                try:
+                    precios[clave] = construir_cono(*clave[:2], list(clave[2]), catalogo).precio_total
+                except (ValueError, TypeError):
+                    precios[clave] = None
+            pedido.precio_listado = precios[clave]
+        # result_list es un QuerySet: se fija la lista ya evaluada
+        self.result_list = list(self.result_list)
+
 
 @admin.register(PedidoCono)
 class PedidoConoAdmin(admin.ModelAdmin):
@@ -9,6 +181,8 @@ class PedidoConoAdmin(admin.ModelAdmin):
         'variante', 
         'tamanio_cono', 
         'toppings_display', 
+        'total_toppings',
+        'precio',
         'fecha_pedido'
     ]
     
@@ -18,10 +192,17 @@ class PedidoConoAdmin(admin.ModelAdmin):
         'fecha_pedido'
     ]
     
+    # La búsqueda usa índices (ver get_search_results), no LIKE '%texto%'
     search_fields = [
         'cliente', 
         'variante'
     ]
+    search_help_text = 'Busca por el inicio del nombre del cliente, por variante o por id del pedido'
+    
+    date_hierarchy = 'fecha_pedido'
+    ordering = ['-fecha_pedido', '-id']
+    paginator = PaginadorConteoEstimado
+    show_full_result_count = False
     
     readonly_fields = ['fecha_pedido']
     
@@ -42,11 +223,125 @@ class PedidoConoAdmin(admin.ModelAdmin):
         return obj.toppings_display
     toppings_display.short_description = 'Toppings Extra'
     
+    @admin.display(description='Toppings')
+    def total_toppings(self, obj):
+        return len(obj.toppings or ())
+    
+    @admin.display(description='Precio', ordering='precio_final')
+    def precio(self, obj):
+        """Precio guardado en el pedido, sin reconstruir el cono (ver ListadoPedidos)"""
+        precio = obj.precio_final
+        if precio is None:
+            precio = getattr(obj, 'precio_listado', None)
+        return None if precio is None else round(precio, 2)
+    
+    def get_changelist(self, request, **kwargs):
+        return ListadoPedidos
+    
+    def get_queryset(self, request):
+        consulta = super().get_queryset(request)
+        return ConsultaPedidosAdmin(
+            model=consulta.model, query=consulta.query, using=consulta._db, hints=consulta._hints
+        )
+    
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Búsqueda con índices: prefijo del cliente sin distinguir mayúsculas,
+        variante y id del pedido
+        
+        Cada palabra debe coincidir con alguno de los tres. El prefijo se busca
+        como rango sobre LOWER(cliente), que usa el índice funcional del
+        modelo; el término se pasa a minúsculas con la misma función de la
+        base de datos para que ambos lados coincidan.
+        """
+        if not search_term:
+            return queryset, False
+        queryset = queryset.alias(cliente_minusculas=Lower('cliente'))
+        for termino in search_term.split():
+            minusculas = Lower(Value(termino))
+            condicion = Q(
+                cliente_minusculas__gte=minusculas,
+                cliente_minusculas__lt=Concat(minusculas, Value(_FIN_PREFIJO))
+            )
+            variantes = [
+                valor for valor, etiqueta in PedidoCono.VARIANTES_CHOICES
+                if etiqueta.lower().startswith(termino.lower())
+            ]
+            if variantes:
+                condicion |= Q(variante__in=variantes)
+            if termino.isdigit():
+                condicion |= Q(pk=int(termino))
+            queryset = queryset.filter(condicion)
+        return queryset, False
+    
+    def save_model(self, request, obj, form, change):
+        """
+        Guarda el pedido y ajusta los totales de su cliente (ver api_conos/clientes.py)
+        
+        Como en la API, el precio y su snapshot se capturan con el catálogo
+        vigente al crear el pedido y al cambiar su composición.
+        """
+        if not change or {'variante', 'tamanio_cono', 'toppings'} & set(form.changed_data):
+            for campo, valor in capturar_precio(
+                obj.variante, obj.tamanio_cono, obj.toppings, obtener_catalogo()
+            ).items():
+                setattr(obj, campo, valor)
+        with transaction.atomic():
+            if not change:
+                super().save_model(request, obj, form, change)
+                registrar_pedidos_cliente([obj])
+                return
+            anterior = PedidoCono.objects.get(pk=obj.pk)
+            super().save_model(request, obj, form, change)
+            registrar_cambio_cliente((anterior.cliente, precio_pedido(anterior)), obj)
+    
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            registrar_pedidos_cliente([obj], signo=-1)
+    
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            pedidos = list(queryset)
+            super().delete_queryset(request, queryset)
+            registrar_pedidos_cliente(pedidos, signo=-1)
+    
     def get_form(self, request, obj=None, **kwargs):
         form = super().get_form(request, obj, **kwargs)
         # Agregar ayuda para el campo toppings
         if 'toppings' in form.base_fields:
             form.base_fields['toppings'].help_text = (
-                f"Toppings disponibles: {', '.join(PedidoCono.TOPPINGS_PERMITIDOS)}"
+                f"Toppings disponibles: {', '.join(obtener_validador().toppings_permitidos)}"
             )
-        return form
\ No newline at end of file
+        return form
+
+
+@admin.register(PrecioVariante)
+class PrecioVarianteAdmin(admin.ModelAdmin):
+    list_display = ['variante', 'precio_base']
+    list_editable = ['precio_base']
+
+
+@admin.register(MultiplicadorTamanio)
+class MultiplicadorTamanioAdmin(admin.ModelAdmin):
+    list_display = ['tamanio', 'multiplicador']
+    list_editable = ['multiplicador']
+
+
+@admin.register(PrecioTopping)
+class PrecioToppingAdmin(admin.ModelAdmin):
+    list_display = ['topping', 'precio']
+    list_editable = ['precio']
+    search_fields = ['topping']
+
+
+@admin.register(VersionCatalogo)
+class VersionCatalogoAdmin(admin.ModelAdmin):
+    list_display = ['version', 'actualizado']
+    readonly_fields = ['version', 'actualizado']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ApiConosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api_conos'
+
+    def ready(self):
+        # Registrar las señales que versionan el catálogo de precios
+        from . import signals  # noqa: F401
+        # Registrar el system check de las relaciones que borra eliminar_pedidos
+        from . import correcciones  # noqa: F401
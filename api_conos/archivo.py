@@ -0,0 +1,238 @@
+import threading
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from django.apps.registry import Apps
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from .models import ParticionArchivo, PedidoCono
+
+CONFIGURACION_POR_DEFECTO = {
+    'HORIZONTE_DIAS': 180,
+    'LOTE': 1000,
+}
+
+# Registro propio para los modelos de las particiones: no forman parte de la
+# app, así makemigrations no los ve y se pueden crear en tiempo de ejecución
+_apps_archivo = Apps(installed_apps=())
+_modelos = {}
+_lock_modelos = threading.Lock()
+
+def obtener_configuracion_archivo():
+    """Configuración del archivo de pedidos (settings.ARCHIVO_PEDIDOS sobre los valores por defecto)"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'ARCHIVO_PEDIDOS', {})}
+
+def fecha_corte() -> date:
+    """Fecha desde la cual los pedidos permanecen en la tabla principal"""
+    return timezone.localdate() - timedelta(days=obtener_configuracion_archivo()['HORIZONTE_DIAS'])
+
+def inicio_mes(fecha: date) -> date:
+    return fecha.replace(day=1)
+
+def nombre_tabla(mes: date) -> str:
+    return f'{PedidoCono._meta.db_table}_{mes:%Y%m}'
+
+def modelo_particion(tabla: str):
+    """
+    Obtiene el modelo de una tabla de archivo
+
+    Mismo esquema y orden de columnas que PedidoCono (para poder combinar las
+    consultas con UNION), con el id conservado y fecha_pedido sin auto_now_add.
+
+    Args:
+        tabla (str): Nombre de la tabla de la partición
+
+    Returns:
+        type: Modelo no gestionado de la partición
+    """
+    modelo = _modelos.get(tabla)
+    if modelo is not None:
+        return modelo
+    with _lock_modelos:
+        if tabla not in _modelos:
+            atributos = {
+                '__module__': __name__,
+                'Meta': type('Meta', (), {
+                    'app_label': PedidoCono._meta.app_label,
+                    'db_table': tabla,
+                    'managed': False,
+                    'apps': _apps_archivo,
+                }),
+                'id': models.BigIntegerField(primary_key=True),
+                'cliente': models.CharField(max_length=100),
+                'variante': models.CharField(max_length=20),
+                'toppings': models.JSONField(default=list),
+                'tamanio_cono': models.CharField(max_length=20),
+                'fecha_pedido': models.DateField(db_index=True),
+                'precio_final': models.FloatField(null=True),
+                'snapshot_precio': models.JSONField(null=True),
+            }
+            _modelos[tabla] = type(f'PedidoConoArchivo_{tabla}', (models.Model,), atributos)
+    return _modelos[tabla]
+
+def _asegurar_tabla(mes: date):
+    """Crea la tabla de la partición si aún no existe (fuera de cualquier transacción)"""
+    tabla = nombre_tabla(mes)
+    modelo = modelo_particion(tabla)
+    if tabla not in connection.introspection.table_names():
+        with connection.schema_editor() as editor:
+            editor.create_model(modelo)
+    return modelo
+
+def _resumen_de(pedidos) -> Dict:
+    """Resumen acumulable de un grupo de pedidos"""
+    ingresos = 0.0
+    sin_precio = 0
+    for pedido in pedidos:
+        if pedido.precio_final is None:
+            sin_precio += 1
+        else:
+            ingresos += pedido.precio_final
+    return {
+        'por_variante': Counter(pedido.variante for pedido in pedidos),
+        'por_tamanio': Counter(pedido.tamanio_cono for pedido in pedidos),
+        'ingresos': ingresos,
+        'sin_precio': sin_precio,
+    }
+
+def _acumular(resumen: Dict, nuevo: Dict) -> Dict:
+    return {
+        'por_variante': dict(Counter(resumen.get('por_variante', {})) + nuevo['por_variante']),
+        'por_tamanio': dict(Counter(resumen.get('por_tamanio', {})) + nuevo['por_tamanio']),
+        'ingresos': resumen.get('ingresos', 0.0) + nuevo['ingresos'],
+        'sin_precio': resumen.get('sin_precio', 0) + nuevo['sin_precio'],
+    }
+
+def archivar_lote(corte: date, lote: int) -> int:
+    """
+    Mueve al archivo un lote de los pedidos más antiguos que la fecha de corte
+
+    Cada lote se copia a sus particiones y se borra de la tabla principal en
+    una sola transacción, por lo que el proceso se puede interrumpir y
+    reanudar en cualquier momento sin duplicar ni perder pedidos.
+
+    Args:
+        corte (date): Se archivan los pedidos con fecha anterior
+        lote (int): Máximo de pedidos por lote
+
+    Returns:
+        int: Cantidad de pedidos archivados (0 cuando no queda nada por archivar)
+    """
+    pedidos = list(
+        PedidoCono.objects.filter(fecha_pedido__lt=corte).order_by('fecha_pedido', 'id')[:lote]
+    )
+    if not pedidos:
+        return 0
+
+    por_mes = defaultdict(list)
+    for pedido in pedidos:
+        por_mes[inicio_mes(pedido.fecha_pedido)].append(pedido)
+    modelos = {mes: _asegurar_tabla(mes) for mes in por_mes}
+
+    campos = [campo.attname for campo in PedidoCono._meta.concrete_fields]
+    with transaction.atomic():
+        for mes, grupo in por_mes.items():
+            modelo = modelos[mes]
+            modelo.objects.bulk_create([
+                modelo(**{campo: getattr(pedido, campo) for campo in campos})
+                for pedido in grupo
+            ])
+
+            particion, _ = ParticionArchivo.objects.select_for_update().get_or_create(
+                mes=mes,
+                defaults={
+                    'tabla': nombre_tabla(mes),
+                    'fecha_min': grupo[0].fecha_pedido,
+                    'fecha_max': grupo[-1].fecha_pedido,
+                    'id_min': grupo[0].id,
+                    'id_max': grupo[0].id,
+                }
+            )
+            particion.fecha_min = min(particion.fecha_min, grupo[0].fecha_pedido)
+            particion.fecha_max = max(particion.fecha_max, grupo[-1].fecha_pedido)
+            particion.id_min = min(particion.id_min, min(pedido.id for pedido in grupo))
+            particion.id_max = max(particion.id_max, max(pedido.id for pedido in grupo))
+            particion.total_pedidos += len(grupo)
+            particion.resumen = _acumular(particion.resumen, _resumen_de(grupo))
+            particion.save()
+
+        PedidoCono.objects.filter(id__in=[pedido.id for pedido in pedidos]).delete()
+
+    return len(pedidos)
+
+def particiones_en_rango(desde: Optional[date], hasta: Optional[date] = None) -> List[ParticionArchivo]:
+    """
+    Particiones con pedidos dentro del rango de fechas
+
+    Sin ninguno de los dos límites no se consulta el archivo.
+
+    Args:
+        desde (date): Fecha mínima opcional
+        hasta (date): Fecha máxima opcional
+
+    Returns:
+        list: Particiones que se solapan con el rango
+    """
+    if desde is None and hasta is None:
+        return []
+    particiones = ParticionArchivo.objects.all()
+    if desde is not None:
+        particiones = particiones.filter(fecha_max__gte=desde)
+    if hasta is not None:
+        particiones = particiones.filter(fecha_min__lte=hasta)
+    return list(particiones.only('tabla'))
+
+def queryset_particion(particion: ParticionArchivo):
+    return modelo_particion(particion.tabla).objects.all()
+
+def _como_pedido(archivado) -> PedidoCono:
+    """Convierte una fila archivada en un PedidoCono de solo lectura"""
+    pedido = PedidoCono(**{
+        campo.attname: getattr(archivado, campo.attname)
+        for campo in PedidoCono._meta.concrete_fields
+    })
+    pedido._state.adding = False
+    pedido._state.db = archivado._state.db
+    return pedido
+
+def buscar_archivado(pk) -> Optional[PedidoCono]:
+    """
+    Busca un pedido archivado por id
+
+    Args:
+        pk: Id del pedido
+
+    Returns:
+        PedidoCono: El pedido archivado, o None si no está en el archivo
+    """
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    for particion in ParticionArchivo.objects.filter(id_min__lte=pk, id_max__gte=pk).only('tabla'):
+        archivado = queryset_particion(particion).filter(pk=pk).first()
+        if archivado is not None:
+            return _como_pedido(archivado)
+    return None
+
+def resumen_archivo() -> Dict:
+    """
+    Totales de los pedidos archivados a partir del resumen de cada partición
+
+    Returns:
+        dict: total, por_variante, por_tamanio, ingresos y sin_precio
+    """
+    total = {
+        'total': 0, 'por_variante': Counter(), 'por_tamanio': Counter(),
+        'ingresos': 0.0, 'sin_precio': 0
+    }
+    for total_pedidos, resumen in ParticionArchivo.objects.values_list('total_pedidos', 'resumen'):
+        total['total'] += total_pedidos
+        total['por_variante'].update(resumen.get('por_variante', {}))
+        total['por_tamanio'].update(resumen.get('por_tamanio', {}))
+        total['ingresos'] += resumen.get('ingresos', 0.0)
+        total['sin_precio'] += resumen.get('sin_precio', 0)
+    return total
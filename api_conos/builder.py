@@ -1,9 +1,29 @@
+from typing import NamedTuple, Tuple
 from .base import ConoBase
 
+class ConoConstruido(NamedTuple):
+    """Registro inmutable con el resultado de construir un cono personalizado"""
+    tipo_base: str
+    variante: str
+    tamanio: str
+    ingredientes_base: Tuple[str, ...]
+    toppings_agregados: Tuple[str, ...]
+    toppings_rechazados: Tuple[str, ...]
+    ingredientes_finales: Tuple[str, ...]
+    precio_base: float
+    precio_toppings: float
+    precio_total: float
+
 class ConoPersonalizadoBuilder:
     """Builder para construir conos personalizados paso a paso"""
     
-    # Precios de los toppings adicionales
+    __slots__ = (
+        'cono', 'toppings_agregados', 'toppings_rechazados',
+        '_toppings_set', 'precio_toppings', '_catalogo', '_precios'
+    )
+    
+    # Precios por defecto de los toppings adicionales (el catálogo vigente
+    # se administra en la base de datos, ver api_conos/catalogo.py)
     _precios_toppings = {
         'queso_extra': 2.5,
         'papas_al_hilo': 3.0,
@@ -22,32 +42,46 @@ class ConoPersonalizadoBuilder:
         'salsa_barbacoa': 1.0
     }
     
-    def __init__(self, cono_base: ConoBase):
+    def __init__(self, cono_base: ConoBase, catalogo=None):
         """
         Inicializa el builder con un cono base
         
         Args:
             cono_base (ConoBase): Cono base creado por el factory
+            catalogo (SnapshotCatalogo): Snapshot de precios a utilizar; si se
+                omite se usan los precios por defecto definidos en el código
         """
         self.cono = cono_base
+        self._catalogo = catalogo
+        self._precios = (
+            catalogo.precios_toppings if catalogo is not None else self._precios_toppings
+        )
         self.toppings_agregados = []
+        self.toppings_rechazados = []
+        # Conjunto paralelo a toppings_agregados para deduplicar en O(1)
+        self._toppings_set = set()
         self.precio_toppings = 0.0
     
     def agregar_topping(self, topping):
         """
         Agrega un topping al cono
         
+        Los toppings repetidos se ignoran y los que no existen en el catálogo
+        se registran en toppings_rechazados.
+        
         Args:
             topping (str): Nombre del topping a agregar
         
         Returns:
             ConoPersonalizadoBuilder: Self para method chaining
         """
-        if topping in self._precios_toppings:
-            if topping not in self.toppings_agregados:
-                self.toppings_agregados.append(topping)
-                self.cono.ingredientes.append(topping)
-                self.precio_toppings += self._precios_toppings[topping]
+        precio = self._precios.get(topping)
+        if precio is None:
+            self.toppings_rechazados.append(topping)
+        elif topping not in self._toppings_set:
+            self._toppings_set.add(topping)
+            self.toppings_agregados.append(topping)
+            self.precio_toppings += precio
         return self
     
     def agregar_multiples_toppings(self, toppings):
@@ -71,27 +105,38 @@ class ConoPersonalizadoBuilder:
         Returns:
             float: Precio total
         """
-        return self.cono.calcular_precio_base() + self.precio_toppings
+        return self._calcular_precio_base() + self.precio_toppings
+    
+    def _calcular_precio_base(self):
+        """Precio base del cono según el catálogo del builder"""
+        if self._catalogo is not None:
+            return self._catalogo.precio_base_de(self.cono)
+        return self.cono.calcular_precio_base()
     
     def construir(self):
         """
         Construye y retorna el cono personalizado final
         
         Returns:
-            dict: Información completa del cono construido
+            ConoConstruido: Registro inmutable con la información completa del cono
         """
-        return {
-            'tipo_base': self.cono.__class__.__name__,
-            'variante': self.cono.__class__.__name__.replace('Cono', ''),
-            'tamanio': self.cono.tamanio,
-            'ingredientes_base': [ing for ing in self.cono.ingredientes 
-                                if ing not in self.toppings_agregados],
-            'toppings_agregados': self.toppings_agregados.copy(),
-            'ingredientes_finales': self.cono.ingredientes.copy(),
-            'precio_base': self.cono.calcular_precio_base(),
-            'precio_toppings': self.precio_toppings,
-            'precio_total': self.calcular_precio_total()
-        }
+        # Los ingredientes base preceden a los toppings en ingredientes_finales,
+        # por lo que el límite entre ambos es posicional
+        ingredientes_base = self.cono.ingredientes
+        toppings = tuple(self.toppings_agregados)
+        precio_base = self._calcular_precio_base()
+        return ConoConstruido(
+            tipo_base=self.cono.__class__.__name__,
+            variante=self.cono.__class__.__name__.replace('Cono', ''),
+            tamanio=self.cono.tamanio,
+            ingredientes_base=ingredientes_base,
+            toppings_agregados=toppings,
+            toppings_rechazados=tuple(self.toppings_rechazados),
+            ingredientes_finales=ingredientes_base + toppings,
+            precio_base=precio_base,
+            precio_toppings=self.precio_toppings,
+            precio_total=precio_base + self.precio_toppings
+        )
     
     @classmethod
     def obtener_precios_toppings(cls):
@@ -132,7 +177,7 @@ class ConoDirector:
             toppings (list): Lista de toppings deseados
         
         Returns:
-            dict: Información del cono construido
+            ConoConstruido: Información del cono construido
         """
         return (self.builder
                 .agregar_multiples_toppings(toppings)
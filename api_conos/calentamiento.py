@@ -0,0 +1,149 @@
+import time
+from importlib import import_module
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.urls import get_resolver
+from django.utils.module_loading import import_string
+
+from .logger import WARNING, obtener_logger
+
+CONFIGURACION_POR_DEFECTO = {
+    'HABILITADO': True,
+    # Abrir y probar las conexiones de cada worker antes de su primera petición
+    'CONEXIONES': True,
+}
+
+def obtener_configuracion_calentamiento():
+    """Configuración del calentamiento (settings.CALENTAMIENTO sobre los valores por defecto)"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'CALENTAMIENTO', {})}
+
+def _cargar_urls():
+    """Importa el URLconf (y con él las vistas, el router y DRF) y construye los índices del resolver"""
+    resolver = get_resolver()
+    resolver.url_patterns
+    resolver.reverse_dict
+
+def _cargar_middleware():
+    """Importa los backends que los middlewares cargan por nombre en la primera petición"""
+    if 'django.contrib.sessions' in settings.INSTALLED_APPS:
+        import_module(settings.SESSION_ENGINE)
+        import_string(settings.SESSION_SERIALIZER)
+    if 'django.contrib.messages' in settings.INSTALLED_APPS:
+        import_string(settings.MESSAGE_STORAGE)
+
+def _cargar_drf():
+    """Resuelve las clases de DRF configuradas por nombre, que se importan en el primer acceso"""
+    from rest_framework.settings import api_settings
+    from .views import PedidoConoViewSet
+    for nombre in (
+        'DEFAULT_RENDERER_CLASSES', 'DEFAULT_PARSER_CLASSES', 'DEFAULT_AUTHENTICATION_CLASSES',
+        'DEFAULT_PERMISSION_CLASSES', 'DEFAULT_THROTTLE_CLASSES', 'DEFAULT_CONTENT_NEGOTIATION_CLASS',
+        'DEFAULT_PAGINATION_CLASS', 'DEFAULT_FILTER_BACKENDS', 'DEFAULT_VERSIONING_CLASS',
+    ):
+        getattr(api_settings, nombre)
+    vista = PedidoConoViewSet()
+    vista.get_renderers()
+    vista.get_parsers()
+    vista.get_authenticators()
+
+def _cargar_catalogo():
+    """Construye el snapshot del catálogo, sus tablas de precios y el validador"""
+    from .catalogo import obtener_catalogo
+    from .models import PedidoCono
+    from .precios import construir_cono
+    from .validacion import obtener_validador
+    catalogo = obtener_catalogo()
+    obtener_validador()
+    # Un cono por variante recorre la fábrica y el builder
+    tamanio = PedidoCono.TAMANIOS_CHOICES[0][0]
+    for variante in catalogo.variantes:
+        construir_cono(variante, tamanio, [], catalogo)
+
+def _cargar_serializadores():
+    """Construye los campos de los serializadores y los caches de _meta de los modelos"""
+    from .formatos import JSONRendererPedidos
+    from .serializers import PedidoConoSerializer
+    # Solo los campos: serializar un pedido sumaría operaciones al logger
+    PedidoConoSerializer().fields
+    JSONRendererPedidos().render({'calentamiento': True})
+
+ETAPAS: Tuple[Tuple[str, Callable[[], object]], ...] = (
+    ('urls', _cargar_urls),
+    ('middleware', _cargar_middleware),
+    ('drf', _cargar_drf),
+    ('catalogo', _cargar_catalogo),
+    ('serializadores', _cargar_serializadores),
+    ('logger', obtener_logger),
+)
+
+def _medir(etapas: Iterable[Tuple[str, Callable[[], object]]]) -> Dict[str, float]:
+    """Ejecuta las etapas y devuelve su duración en ms; una etapa fallida no detiene el arranque"""
+    tiempos = {}
+    for nombre, etapa in etapas:
+        inicio = time.perf_counter()
+        try:
+            etapa()
+        except Exception as e:
+            obtener_logger().registrar_operacion(
+                'calentamiento', f'Falló la etapa {nombre} del calentamiento: {e}', nivel=WARNING
+            )
+        tiempos[nombre] = round((time.perf_counter() - inicio) * 1000, 2)
+    return tiempos
+
+def calentar_aplicacion() -> Dict[str, float]:
+    """
+    Importa y construye lo que necesita la primera petición de un worker
+
+    Se ejecuta una vez al cargar la aplicación WSGI. Con gunicorn --preload
+    eso ocurre en el proceso maestro antes del fork, y los workers heredan
+    las vistas, el catálogo y los serializadores ya construidos, compartidos
+    copy-on-write. Las conexiones abiertas durante el calentamiento se
+    cierran para que no crucen el fork.
+
+    Returns:
+        dict: Duración en ms de cada etapa
+    """
+    if not obtener_configuracion_calentamiento()['HABILITADO']:
+        return {}
+    tiempos = _medir(ETAPAS)
+    connections.close_all()
+    obtener_logger().registrar_operacion(
+        'calentamiento',
+        f'Aplicación calentada en {sum(tiempos.values()):.1f} ms',
+        datos_extra=tiempos
+    )
+    return tiempos
+
+def _alias_a_preparar() -> List[str]:
+    from .replica import obtener_configuracion_replica
+    alias = [DEFAULT_DB_ALIAS]
+    replica = obtener_configuracion_replica()
+    if replica['HABILITADA'] and replica['ALIAS'] in settings.DATABASES:
+        alias.append(replica['ALIAS'])
+    return alias
+
+def _preparar_conexion(alias: str):
+    from .models import PedidoCono
+    # Abre la conexión y lee la tabla de pedidos (índice de la clave primaria)
+    PedidoCono.objects.using(alias).exists()
+
+def preparar_conexiones() -> Dict[str, float]:
+    """
+    Abre y prueba las conexiones de base de datos del worker
+
+    Se ejecuta en cada worker después del fork (post_fork en gunicorn.conf.py).
+    Las conexiones de Django son por hilo: se preparan las del hilo que
+    llama, que en los workers sync de gunicorn es el que atiende las
+    peticiones. Solo se conservan entre peticiones con CONN_MAX_AGE > 0.
+
+    Returns:
+        dict: Duración en ms de la preparación de cada alias
+    """
+    configuracion = obtener_configuracion_calentamiento()
+    if not (configuracion['HABILITADO'] and configuracion['CONEXIONES']):
+        return {}
+    return _medir(
+        (alias, lambda alias=alias: _preparar_conexion(alias)) for alias in _alias_a_preparar()
+    )
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Mapping, NamedTuple
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from .base import ConoBase
+from .builder import ConoPersonalizadoBuilder
+from .factory import ConoFactory
+from .models import MultiplicadorTamanio, PrecioTopping, PrecioVariante, VersionCatalogo
+
+_monotonic = time.monotonic
+
+class MapeoInmutable(dict):
+    """
+    Diccionario de solo lectura
+
+    A diferencia de MappingProxyType conserva la velocidad de búsqueda de un
+    dict, lo que importa en el cálculo de precios de cada pedido.
+    """
+
+    __slots__ = ()
+
+    def _solo_lectura(self, *args, **kwargs):
+        raise TypeError('El catálogo es inmutable; use CatalogoConos.reconstruir()')
+
+    __setitem__ = __delitem__ = __ior__ = _solo_lectura
+    clear = pop = popitem = setdefault = update = _solo_lectura
+
+    def __reduce__(self):
+        return (MapeoInmutable, (dict(self),))
+
+class SnapshotCatalogo(NamedTuple):
+    """
+    Vista inmutable y versionada del catálogo de conos
+
+    `version` es la de los precios en la base de datos y `generacion` cuenta
+    las variantes registradas en este proceso con ConoFactory.registrar_tipo().
+    """
+    version: int
+    generacion: int
+    etag: str
+    variantes: Mapping[str, Mapping]
+    precios_base: Mapping[tuple, float]
+    multiplicadores: Mapping[str, float]
+    precios_toppings: Mapping[str, float]
+    json_tipos: bytes
+    json_toppings: bytes
+
+    def precio_base_de(self, cono: ConoBase) -> float:
+        """
+        Calcula el precio base de un cono según los precios del snapshot
+
+        Args:
+            cono (ConoBase): Cono creado por el factory
+
+        Returns:
+            float: Precio base multiplicado por el factor del tamaño
+        """
+        precio = self.precios_base.get((type(cono), cono.tamanio))
+        if precio is None:
+            # Variante registrada sin precio en el catálogo o tamaño desconocido
+            precio = type(cono).precio_base * self.multiplicadores.get(cono.tamanio, 1.0)
+        return precio
+
+    @property
+    def version_publica(self) -> str:
+        """Versión expuesta a los clientes: la de los precios y, si la hay, la generación local"""
+        return f'{self.version}.{self.generacion}' if self.generacion else str(self.version)
+
+def _serializar(datos) -> bytes:
+    """Serializa igual que el JSONRenderer de DRF (compacto y sin escapar unicode)"""
+    return json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class CatalogoConos:
+    """
+    Servicio de catálogo de conos
+
+    Mantiene en memoria un snapshot inmutable del catálogo de precios guardado
+    en la base de datos, junto con las respuestas JSON ya serializadas. Los
+    lectores solo leen la referencia al snapshot vigente, sin tomar locks; como
+    mucho una vez cada CATALOGO_INTERVALO_VERIFICACION segundos un lector
+    consulta la fila de VersionCatalogo y, si la versión cambió, reconstruye
+    el snapshot y lo publica de forma atómica.
+    """
+
+    _snapshot = None
+    _generacion = 0
+    _proxima_verificacion = 0.0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _intervalo_verificacion() -> float:
+        return getattr(settings, 'CATALOGO_INTERVALO_VERIFICACION', 5.0)
+
+    @staticmethod
+    def _precios_por_defecto():
+        """
+        Precios definidos en el código, usados cuando la base de datos no los tiene
+
+        Returns:
+            tuple: (precios_variantes, multiplicadores, precios_toppings)
+        """
+        return (
+            {
+                variante: cono_class.precio_base
+                for variante, cono_class in ConoFactory._tipos_disponibles.items()
+            },
+            dict(ConoBase.MULTIPLICADORES_TAMANIO),
+            dict(ConoPersonalizadoBuilder._precios_toppings)
+        )
+
+    @classmethod
+    def _leer_precios(cls):
+        """
+        Lee los precios vigentes; las tablas vacías usan los valores por defecto
+
+        Returns:
+            tuple: (precios_variantes, multiplicadores, precios_toppings)
+        """
+        precios_variantes, multiplicadores, precios_toppings = cls._precios_por_defecto()
+        precios_variantes.update(PrecioVariante.objects.values_list('variante', 'precio_base'))
+        multiplicadores = dict(
+            MultiplicadorTamanio.objects.order_by('multiplicador').values_list('tamanio', 'multiplicador')
+        ) or multiplicadores
+        precios_toppings = dict(
+            PrecioTopping.objects.order_by('id').values_list('topping', 'precio')
+        ) or precios_toppings
+        return precios_variantes, multiplicadores, precios_toppings
+
+    @classmethod
+    def _construir(cls, version: int, precios=None) -> SnapshotCatalogo:
+        """Construye un snapshot nuevo con los precios indicados (o los del código)"""
+        if precios is None:
+            precios = cls._precios_por_defecto()
+        precios_variantes, multiplicadores, precios_toppings = precios
+
+        variantes = {}
+        # Precio base ya multiplicado por (clase, tamaño) para resolverlo con una búsqueda
+        precios_base = {}
+        for variante, cono_class in ConoFactory._tipos_disponibles.items():
+            precio_base = precios_variantes.get(variante, cono_class.precio_base)
+            for tamanio, multiplicador in multiplicadores.items():
+                precios_base[(cono_class, tamanio)] = precio_base * multiplicador
+            variantes[variante] = MapeoInmutable({
+                'clase': cono_class,
+                'precio_base': precio_base,
+                'ingredientes_base': tuple(cono_class.INGREDIENTES_BASE),
+                'descripcion': cono_class.__doc__
+            })
+
+        tipos = {
+            variante: {
+                'precio_base': info['precio_base'],
+                'ingredientes_base': list(info['ingredientes_base']),
+                'descripcion': info['descripcion']
+            }
+            for variante, info in variantes.items()
+        }
+        json_tipos = _serializar({'tipos_disponibles': tipos, 'total_tipos': len(tipos)})
+        json_toppings = _serializar({
+            'toppings_disponibles': precios_toppings,
+            'total_toppings': len(precios_toppings)
+        })
+        # El ETag depende solo del contenido, así coincide entre workers
+        huella = hashlib.blake2b(json_tipos + b'\0' + json_toppings, digest_size=8).hexdigest()
+
+        return SnapshotCatalogo(
+            version=version,
+            generacion=cls._generacion,
+            etag=f'"catalogo-{huella}"',
+            variantes=MapeoInmutable(variantes),
+            precios_base=MapeoInmutable(precios_base),
+            multiplicadores=MapeoInmutable(multiplicadores),
+            precios_toppings=MapeoInmutable(precios_toppings),
+            json_tipos=json_tipos,
+            json_toppings=json_toppings
+        )
+
+    @classmethod
+    def _cargar(cls, snapshot):
+        """Consulta la versión y reconstruye si cambió (se ejecuta con el lock tomado)"""
+        cls._proxima_verificacion = time.monotonic() + cls._intervalo_verificacion()
+        try:
+            version = VersionCatalogo.obtener_version()
+            if (snapshot is not None and version == snapshot.version
+                    and snapshot.generacion == cls._generacion):
+                return snapshot
+            snapshot = cls._construir(version, cls._leer_precios())
+        except DatabaseError:
+            # Sin base de datos disponible se conserva el snapshot vigente
+            if snapshot is None:
+                snapshot = cls._construir(version=0)
+        cls._snapshot = snapshot
+        return snapshot
+
+    @classmethod
+    def obtener_snapshot(cls) -> SnapshotCatalogo:
+        """
+        Obtiene el snapshot vigente del catálogo
+
+        Returns:
+            SnapshotCatalogo: Snapshot inmutable vigente
+        """
+        snapshot = cls._snapshot
+        if snapshot is not None and time.monotonic() < cls._proxima_verificacion:
+            return snapshot
+
+        # Solo un hilo verifica la versión; los demás siguen con el snapshot
+        # vigente sin esperar (salvo en la primera carga)
+        if not cls._lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            if cls._snapshot is not snapshot:
+                return cls._snapshot
+            return cls._cargar(snapshot)
+        finally:
+            cls._lock.release()
+
+    @classmethod
+    def reconstruir(cls, nueva_generacion: bool = False) -> SnapshotCatalogo:
+        """
+        Reconstruye el snapshot desde la base de datos y lo publica atómicamente
+
+        Args:
+            nueva_generacion (bool): Las variantes del proceso cambiaron; el
+                snapshot nuevo tiene otra versión aunque los precios no cambien
+
+        Returns:
+            SnapshotCatalogo: Nuevo snapshot vigente
+        """
+        with cls._lock:
+            if nueva_generacion:
+                cls._generacion += 1
+            return cls._cargar(snapshot=None)
+
+    @classmethod
+    def invalidar(cls):
+        """Fuerza la verificación de la versión en la próxima lectura"""
+        cls._proxima_verificacion = 0.0
+
+# Función de conveniencia para obtener el snapshot vigente del catálogo
+def obtener_catalogo() -> SnapshotCatalogo:
+    """
+    Función de conveniencia para obtener el snapshot vigente del catálogo
+
+    Returns:
+        SnapshotCatalogo: Snapshot inmutable vigente
+    """
+    # Camino rápido sin llamadas adicionales mientras el snapshot está vigente
+    snapshot = CatalogoConos._snapshot
+    if snapshot is not None and _monotonic() < CatalogoConos._proxima_verificacion:
+        return snapshot
+    return CatalogoConos.obtener_snapshot()
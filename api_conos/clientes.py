@@ -0,0 +1,323 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.db.models import Count, F, Sum
+
+from .archivo import queryset_particion
+from .catalogo import obtener_catalogo
+from .models import PedidoCono, ResumenCliente
+from .precios import construir_cono
+
+CONFIGURACION_POR_DEFECTO = {
+    'MAX_ENTRADAS': 10000,
+    'TTL_S': 30,
+    'LIMITE': 10,
+    'MAX_LIMITE': 100,
+}
+
+# Columnas del historial: todas salen de la fila, sin reconstruir el cono. El
+# índice del historial no las incluye (toppings es JSON): el plan es un
+# recorrido ordenado del índice más una lectura de la tabla por pedido devuelto
+CAMPOS_HISTORIAL = ('id', 'fecha_pedido', 'variante', 'tamanio_cono', 'toppings', 'precio_final')
+
+def obtener_configuracion_historial():
+    """Configuración del historial de clientes (settings.HISTORIAL_CLIENTES sobre los valores por defecto)"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'HISTORIAL_CLIENTES', {})}
+
+class HistorialGuardado(NamedTuple):
+    """Historial de un cliente en memoria con los `limite` pedidos más recientes"""
+    limite: int
+    completo: bool
+    datos: dict
+    expira: float
+
+class CacheHistorial:
+    """
+    Caché en memoria del historial de cada cliente
+
+    Diccionario ordenado acotado a MAX_ENTRADAS clientes (se descartan los
+    menos usados) cuyas entradas caducan a los TTL_S segundos. Las
+    escrituras de un cliente invalidan su entrada en este proceso al
+    confirmarse; en los demás procesos la entrada vive como mucho TTL_S.
+    """
+
+    def __init__(self, max_entradas: int, ttl: float):
+        """
+        Args:
+            max_entradas (int): Máximo de clientes guardados en memoria
+            ttl (float): Segundos de validez de cada historial
+        """
+        self.max_entradas = max(1, max_entradas)
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._invalidaciones = 0
+        self._lock = threading.Lock()
+
+    def obtener(self, cliente: str, limite: int) -> Optional[dict]:
+        """Historial con los `limite` pedidos más recientes, o None si no está, caducó o tiene menos"""
+        with self._lock:
+            guardado = self._entradas.get(cliente)
+            if guardado is None:
+                return None
+            if guardado.expira <= time.monotonic():
+                del self._entradas[cliente]
+                return None
+            if guardado.limite < limite and not guardado.completo:
+                return None
+            self._entradas.move_to_end(cliente)
+        return {**guardado.datos, 'pedidos': guardado.datos['pedidos'][:limite]}
+
+    def invalidaciones(self) -> int:
+        """Contador de invalidaciones: se lee antes de consultar la base de datos"""
+        return self._invalidaciones
+
+    def guardar(self, cliente: str, limite: int, datos: dict, invalidaciones: int):
+        """
+        Guarda un historial leído de la base de datos
+
+        No se guarda si hubo invalidaciones desde que se empezó a leer: la
+        lectura pudo ser anterior a una escritura ya confirmada.
+        """
+        guardado = HistorialGuardado(
+            limite, len(datos['pedidos']) < limite, datos, time.monotonic() + self.ttl
+        )
+        with self._lock:
+            if invalidaciones != self._invalidaciones:
+                return
+            self._entradas[cliente] = guardado
+            self._entradas.move_to_end(cliente)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, clientes: Iterable[str]):
+        """Descarta el historial de los clientes indicados"""
+        with self._lock:
+            self._invalidaciones += 1
+            for cliente in clientes:
+                self._entradas.pop(cliente, None)
+
+    def limpiar(self):
+        """Vacía la caché"""
+        with self._lock:
+            self._invalidaciones += 1
+            self._entradas.clear()
+
+_cache = None
+_lock_cache = threading.Lock()
+
+def obtener_cache_historial() -> CacheHistorial:
+    """
+    Obtiene la caché de historiales del proceso
+
+    Returns:
+        CacheHistorial: Instancia única por proceso
+    """
+    global _cache
+    if _cache is None:
+        with _lock_cache:
+            if _cache is None:
+                configuracion = obtener_configuracion_historial()
+                _cache = CacheHistorial(
+                    max_entradas=configuracion['MAX_ENTRADAS'],
+                    ttl=configuracion['TTL_S']
+                )
+    return _cache
+
+def precio_pedido(pedido, catalogo=None, precios=None) -> float:
+    """
+    Precio con el que el pedido cuenta en el gasto del cliente
+
+    El precio guardado en el pedido; en pedidos anteriores a los snapshots,
+    el del catálogo vigente (una construcción por composición en `precios`).
+    """
+    if pedido.precio_final is not None:
+        return pedido.precio_final
+    clave = (pedido.variante, pedido.tamanio_cono, tuple(pedido.toppings or ()))
+    if precios is not None and clave in precios:
+        return precios[clave]
+    try:
+        precio = construir_cono(*clave[:2], list(clave[2]), catalogo or obtener_catalogo()).precio_total
+    except (ValueError, TypeError):
+        precio = 0.0
+    if precios is not None:
+        precios[clave] = precio
+    return precio
+
+def aplicar_totales(totales: Dict[str, list], using: str = DEFAULT_DB_ALIAS):
+    """
+    Suma a los resúmenes de los clientes sus cambios [pedidos, gasto]
+
+    Un UPDATE con incrementos por cliente (lo crea si aún no existe), dentro
+    de la transacción de la escritura de sus pedidos. El historial de los
+    clientes se invalida en la caché cuando la transacción se confirma.
+    """
+    if not totales:
+        return
+    with transaction.atomic(using=using):
+        for cliente, (pedidos, gasto) in totales.items():
+            if not pedidos and not gasto:
+                continue
+            resumenes = ResumenCliente.objects.using(using).filter(cliente=cliente)
+            if resumenes.update(total_pedidos=F('total_pedidos') + pedidos, gasto_total=F('gasto_total') + gasto):
+                continue
+            try:
+                with transaction.atomic(using=using):
+                    ResumenCliente.objects.using(using).create(
+                        cliente=cliente, total_pedidos=pedidos, gasto_total=gasto
+                    )
+            except IntegrityError:
+                # Otro proceso creó el resumen entre el UPDATE y el INSERT
+                resumenes.update(total_pedidos=F('total_pedidos') + pedidos, gasto_total=F('gasto_total') + gasto)
+        clientes = list(totales)
+        transaction.on_commit(lambda: obtener_cache_historial().invalidar(clientes), using=using)
+
+def registrar_pedidos_cliente(pedidos: Iterable, signo: int = 1, using: str = DEFAULT_DB_ALIAS):
+    """Suma (signo=1) o resta (signo=-1) pedidos ya cargados de los totales de sus clientes"""
+    totales = defaultdict(lambda: [0, 0.0])
+    precios = {}
+    for pedido in pedidos:
+        total = totales[pedido.cliente]
+        total[0] += signo
+        total[1] += signo * precio_pedido(pedido, precios=precios)
+    aplicar_totales(totales, using=using)
+
+def registrar_cambio_cliente(anterior, pedido, using: str = DEFAULT_DB_ALIAS):
+    """
+    Ajusta los totales tras modificar un pedido
+
+    Args:
+        anterior (tuple): (cliente, precio) del pedido antes del cambio
+        pedido (PedidoCono): Pedido ya guardado
+    """
+    cliente, precio = anterior
+    totales = defaultdict(lambda: [0, 0.0])
+    totales[cliente][0] -= 1
+    totales[cliente][1] -= precio
+    totales[pedido.cliente][0] += 1
+    totales[pedido.cliente][1] += precio_pedido(pedido)
+    aplicar_totales(totales, using=using)
+
+def totales_por_cliente(queryset) -> Dict[str, list]:
+    """
+    [pedidos, gasto] de cada cliente de un queryset, agrupados en la base de datos
+
+    Para las escrituras en bloque, que no cargan los pedidos. Solo los
+    pedidos anteriores a los snapshots se leen, para darles el mismo precio
+    que precio_pedido().
+    """
+    queryset = queryset.order_by()
+    filas = queryset.values('cliente').annotate(
+        pedidos=Count('pk'), gasto=Sum('precio_final')
+    ).values_list('cliente', 'pedidos', 'gasto')
+    totales = {cliente: [pedidos, gasto or 0.0] for cliente, pedidos, gasto in filas}
+    precios = {}
+    for pedido in queryset.filter(precio_final__isnull=True).only(
+        'cliente', 'variante', 'tamanio_cono', 'toppings', 'precio_final'
+    ).iterator():
+        totales[pedido.cliente][1] += precio_pedido(pedido, precios=precios)
+    return totales
+
+def diferencia_totales(despues: Dict[str, list], antes: Dict[str, list]) -> Dict[str, list]:
+    """Cambio [pedidos, gasto] de cada cliente entre dos resultados de totales_por_cliente"""
+    vacio = [0, 0.0]
+    return {
+        cliente: [
+            despues.get(cliente, vacio)[0] - antes.get(cliente, vacio)[0],
+            despues.get(cliente, vacio)[1] - antes.get(cliente, vacio)[1],
+        ]
+        for cliente in despues.keys() | antes.keys()
+    }
+
+def reconstruir_resumenes(
+    incluir_archivo: bool = True, lote: int = 1000, using: str = DEFAULT_DB_ALIAS, apps=global_apps
+) -> Dict[str, list]:
+    """
+    Sustituye los resúmenes de todos los clientes por los totales recalculados
+
+    Todo ocurre en una transacción que primero toma el bloqueo de escritura
+    de los resúmenes (en SQLite, el DELETE; en PostgreSQL, LOCK TABLE) y solo
+    después agrega los pedidos y el archivo. Una escritura confirmada antes
+    ya está en la agregación; una en curso espera en aplicar_totales() a que
+    termine la reconstrucción y suma su cambio a los totales nuevos.
+
+    Args:
+        incluir_archivo (bool): Recorrer también las particiones del archivo
+        lote (int): Resúmenes por INSERT
+        using (str): Alias de la base de datos
+        apps: Registro de modelos (el histórico desde una migración)
+
+    Returns:
+        dict: [pedidos, gasto] guardados para cada cliente
+    """
+    PedidoCono = apps.get_model('api_conos', 'PedidoCono')
+    ResumenCliente = apps.get_model('api_conos', 'ResumenCliente')
+    ParticionArchivo = apps.get_model('api_conos', 'ParticionArchivo')
+    conexion = connections[using]
+    with transaction.atomic(using=using):
+        if conexion.vendor == 'postgresql':
+            with conexion.cursor() as cursor:
+                cursor.execute(
+                    f'LOCK TABLE {conexion.ops.quote_name(ResumenCliente._meta.db_table)} IN EXCLUSIVE MODE'
+                )
+        ResumenCliente.objects.using(using).all().delete()
+
+        fuentes = [PedidoCono.objects.using(using).all()]
+        if incluir_archivo:
+            fuentes += [
+                queryset_particion(particion).using(using)
+                for particion in ParticionArchivo.objects.using(using).all()
+            ]
+        totales = defaultdict(lambda: [0, 0.0])
+        for queryset in fuentes:
+            for cliente, (pedidos, gasto) in totales_por_cliente(queryset).items():
+                totales[cliente][0] += pedidos
+                totales[cliente][1] += gasto
+
+        ResumenCliente.objects.using(using).bulk_create(
+            [
+                ResumenCliente(cliente=cliente, total_pedidos=pedidos, gasto_total=gasto)
+                for cliente, (pedidos, gasto) in totales.items()
+            ],
+            batch_size=max(1, lote)
+        )
+        transaction.on_commit(obtener_cache_historial().limpiar, using=using)
+    return dict(totales)
+
+def historial_cliente(cliente: str, limite: int) -> dict:
+    """
+    Últimos `limite` pedidos de un cliente exacto y sus totales de por vida
+
+    Primero busca en la caché del proceso. Si no está, lee el resumen por su
+    índice único y los pedidos recorriendo el índice (cliente, fecha_pedido,
+    id) desde el final: se leen de la tabla, por id, solo las `limite` filas
+    devueltas, sin ordenar. Los pedidos anteriores a los snapshots toman el precio del
+    catálogo vigente, una vez por composición.
+    """
+    cache = obtener_cache_historial()
+    datos = cache.obtener(cliente, limite)
+    if datos is not None:
+        return datos
+
+    invalidaciones = cache.invalidaciones()
+    resumen = ResumenCliente.objects.filter(cliente=cliente).values_list('total_pedidos', 'gasto_total').first()
+    filas = PedidoCono.objects.filter(cliente=cliente).order_by('-fecha_pedido', '-id').values(*CAMPOS_HISTORIAL)
+    pedidos = list(filas[:limite])
+    precios = {}
+    for pedido in pedidos:
+        if pedido['precio_final'] is None:
+            pedido['precio_final'] = precio_pedido(PedidoCono(**pedido), precios=precios)
+        pedido['precio_final'] = round(pedido['precio_final'], 2)
+    total_pedidos, gasto_total = resumen or (0, 0.0)
+    datos = {
+        'cliente': cliente,
+        'total_pedidos': total_pedidos,
+        'gasto_total': round(gasto_total, 2),
+        'pedidos': pedidos,
+    }
+    cache.guardar(cliente, limite, datos, invalidaciones)
+    return datos
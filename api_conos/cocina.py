@@ -0,0 +1,291 @@
+import heapq
+import math
+from datetime import datetime, timezone as tz
+from itertools import count
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import PreparacionCocina
+
+CONFIGURACION_POR_DEFECTO = {
+    'HABILITADA': True,
+    'ESTACIONES': 2,
+    'MAX_LOTE': 4,
+    'MAX_ESPERA_S': 300,
+    'TIEMPO_BASE_S': 60,
+    'TIEMPO_PEDIDO_S': 20,
+    'TIEMPO_TOPPING_S': 10,
+    'MAX_PENDIENTES': 500,
+}
+
+def obtener_configuracion_cocina():
+    """Configuración de la cola de cocina (settings.COCINA sobre los valores por defecto)"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'COCINA', {})}
+
+class PedidoCocina(NamedTuple):
+    """Lo que la cocina necesita de un pedido: su receta base, sus toppings y su llegada (segundos)"""
+    id: int
+    variante: str
+    tamanio: str
+    toppings: frozenset
+    llegada: float
+
+class Lote(NamedTuple):
+    """Pedidos de la misma receta base preparados juntos en una estación"""
+    variante: str
+    tamanio: str
+    pedidos: tuple
+    toppings: frozenset
+    estacion: int
+    inicio: float
+    fin: float
+
+def duracion_lote(pedidos: Sequence[PedidoCocina], configuracion: Dict) -> float:
+    """
+    Tiempo de preparación de un lote
+
+    La base (preparar_base de la variante en su tamaño) se prepara una vez
+    por lote, cada pedido se arma por separado y cada topping distinto del
+    lote se prepara una vez para todos los pedidos que lo llevan.
+    """
+    toppings = frozenset().union(*(pedido.toppings for pedido in pedidos))
+    return (
+        configuracion['TIEMPO_BASE_S']
+        + len(pedidos) * configuracion['TIEMPO_PEDIDO_S']
+        + len(toppings) * configuracion['TIEMPO_TOPPING_S']
+    )
+
+def siguiente_fifo(pendientes: List[PedidoCocina], ahora: float, configuracion: Dict) -> List[PedidoCocina]:
+    """Política de referencia: el pedido más antiguo, solo"""
+    return [pendientes[0]]
+
+def siguiente_lote(pendientes: List[PedidoCocina], ahora: float, configuracion: Dict) -> List[PedidoCocina]:
+    """
+    Elige el próximo lote entre los pendientes (en orden de llegada)
+
+    Si el pedido más antiguo ya no puede esperar a otro lote sin pasar de
+    MAX_ESPERA_S, el lote sale de su receta base; si no, de la receta con más
+    pedidos pendientes, que es la que más tiempo de base ahorra. Se completa
+    hasta MAX_LOTE con pedidos de la misma receta: primero los que están por
+    pasar del máximo de espera, después los que añaden menos toppings nuevos
+    (y comparten más con el lote) y, a igualdad, los más antiguos.
+    """
+    maximo = configuracion['MAX_LOTE']
+    grupos = {}
+    for pedido in pendientes:
+        grupos.setdefault((pedido.variante, pedido.tamanio), []).append(pedido)
+
+    # Un lote completo sin toppings: lo que tarda en liberarse una estación
+    holgura = configuracion['TIEMPO_BASE_S'] + maximo * configuracion['TIEMPO_PEDIDO_S']
+    limite_urgente = ahora + holgura - configuracion['MAX_ESPERA_S']
+    mas_antiguo = pendientes[0]
+    if mas_antiguo.llegada <= limite_urgente:
+        grupo = grupos[(mas_antiguo.variante, mas_antiguo.tamanio)]
+    else:
+        grupo = max(grupos.values(), key=lambda pedidos: (min(len(pedidos), maximo), -pedidos[0].llegada))
+
+    lote = [grupo[0]]
+    toppings = set(grupo[0].toppings)
+    candidatos = grupo[1:]
+    while len(lote) < maximo and candidatos:
+        elegido = min(candidatos, key=lambda pedido: (
+            pedido.llegada > limite_urgente,
+            len(pedido.toppings - toppings),
+            -len(pedido.toppings & toppings),
+            pedido.llegada
+        ))
+        candidatos.remove(elegido)
+        lote.append(elegido)
+        toppings |= elegido.toppings
+    return lote
+
+POLITICAS: Dict[str, Callable] = {
+    'fifo': siguiente_fifo,
+    'lotes': siguiente_lote,
+}
+
+def _quitar(pendientes: List[PedidoCocina], elegidos: List[PedidoCocina]) -> List[PedidoCocina]:
+    ids = {pedido.id for pedido in elegidos}
+    return [pedido for pedido in pendientes if pedido.id not in ids]
+
+def planificar(pendientes: Iterable[PedidoCocina], ahora: float, configuracion: Dict,
+               politica: str = 'lotes') -> List[Lote]:
+    """
+    Plan de preparación de los pedidos pendientes
+
+    Reparte los lotes que elige la política entre ESTACIONES estaciones, que
+    se suponen libres en `ahora`; cada lote empieza cuando se libera la
+    primera estación.
+
+    Returns:
+        list: Lotes en orden de inicio
+    """
+    siguiente = POLITICAS[politica]
+    restantes = sorted(pendientes, key=lambda pedido: (pedido.llegada, pedido.id))
+    libres = [(ahora, estacion) for estacion in range(configuracion['ESTACIONES'])]
+    lotes = []
+    while restantes:
+        inicio, estacion = heapq.heappop(libres)
+        elegidos = siguiente(restantes, inicio, configuracion)
+        restantes = _quitar(restantes, elegidos)
+        fin = inicio + duracion_lote(elegidos, configuracion)
+        lotes.append(Lote(
+            elegidos[0].variante, elegidos[0].tamanio, tuple(elegidos),
+            frozenset().union(*(pedido.toppings for pedido in elegidos)), estacion, inicio, fin
+        ))
+        heapq.heappush(libres, (fin, estacion))
+    return lotes
+
+def _percentil(valores_ordenados: List[float], p: float) -> float:
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not valores_ordenados:
+        return 0.0
+    return valores_ordenados[max(1, math.ceil(p / 100 * len(valores_ordenados))) - 1]
+
+def _distribucion(valores: List[float]) -> Dict[str, float]:
+    valores = sorted(valores)
+    return {
+        'media': round(sum(valores) / len(valores), 1) if valores else 0.0,
+        'p50': round(_percentil(valores, 50), 1),
+        'p95': round(_percentil(valores, 95), 1),
+        'p99': round(_percentil(valores, 99), 1),
+        'max': round(valores[-1], 1) if valores else 0.0,
+    }
+
+_LLEGADA, _ESTACION_LIBRE = 0, 1
+
+def simular(flujo: Iterable[PedidoCocina], configuracion: Dict, politica: str = 'lotes') -> Dict:
+    """
+    Simulación de eventos discretos de la cocina
+
+    Los eventos son las llegadas de los pedidos y el fin de cada lote. En
+    cada instante con eventos, mientras haya una estación libre y pedidos
+    pendientes, la política elige un lote entre los pedidos ya llegados (sin
+    conocer los futuros), igual que en planificar().
+
+    Returns:
+        dict: Rendimiento (pedidos por hora entre la primera llegada y el
+            último pedido preparado), utilización de las estaciones y
+            percentiles de la espera hasta empezar y del tiempo en cocina
+    """
+    siguiente = POLITICAS[politica]
+    llegadas = sorted(flujo, key=lambda pedido: (pedido.llegada, pedido.id))
+    secuencia = count()
+    eventos = [(pedido.llegada, next(secuencia), _LLEGADA, pedido) for pedido in llegadas]
+    heapq.heapify(eventos)
+    libres = list(range(configuracion['ESTACIONES']))
+    pendientes = []
+    esperas, en_cocina = [], []
+    lotes = 0
+    ocupado = 0.0
+    ultimo_fin = llegadas[0].llegada if llegadas else 0.0
+
+    while eventos:
+        ahora, _, tipo, dato = heapq.heappop(eventos)
+        if tipo == _LLEGADA:
+            pendientes.append(dato)
+        else:
+            libres.append(dato)
+        if eventos and eventos[0][0] == ahora:
+            continue
+        while libres and pendientes:
+            estacion = libres.pop()
+            elegidos = siguiente(pendientes, ahora, configuracion)
+            pendientes = _quitar(pendientes, elegidos)
+            duracion = duracion_lote(elegidos, configuracion)
+            fin = ahora + duracion
+            for pedido in elegidos:
+                esperas.append(ahora - pedido.llegada)
+                en_cocina.append(fin - pedido.llegada)
+            lotes += 1
+            ocupado += duracion
+            ultimo_fin = max(ultimo_fin, fin)
+            heapq.heappush(eventos, (fin, next(secuencia), _ESTACION_LIBRE, estacion))
+
+    total = len(llegadas)
+    duracion_total = ultimo_fin - llegadas[0].llegada if llegadas else 0.0
+    return {
+        'politica': politica,
+        'pedidos': total,
+        'lotes': lotes,
+        'pedidos_por_lote': round(total / lotes, 2) if lotes else 0.0,
+        'duracion_s': round(duracion_total, 1),
+        'pedidos_por_hora': round(total / duracion_total * 3600, 1) if duracion_total else 0.0,
+        'utilizacion': round(ocupado / (duracion_total * configuracion['ESTACIONES']), 3) if duracion_total else 0.0,
+        'espera_s': _distribucion(esperas),
+        'en_cocina_s': _distribucion(en_cocina),
+        'sobre_max_espera': sum(1 for espera in esperas if espera > configuracion['MAX_ESPERA_S']),
+    }
+
+def recibir_pedidos(pedidos: Iterable) -> None:
+    """Registra en la cola de cocina los pedidos recién creados"""
+    if not obtener_configuracion_cocina()['HABILITADA']:
+        return
+    PreparacionCocina.objects.bulk_create([PreparacionCocina(pedido_id=pedido.id) for pedido in pedidos])
+
+def _pedidos_cocina(filas) -> List[PedidoCocina]:
+    return [
+        PedidoCocina(pedido_id, variante, tamanio, frozenset(toppings or ()), recibido.timestamp())
+        for pedido_id, recibido, variante, tamanio, toppings in filas
+    ]
+
+_CAMPOS = ('pedido_id', 'recibido', 'pedido__variante', 'pedido__tamanio_cono', 'pedido__toppings')
+
+def pendientes_cocina(limite: Optional[int] = None) -> List[PedidoCocina]:
+    """Pedidos pendientes de preparar, los más antiguos primero (índice parcial cocina_pendientes_idx)"""
+    consulta = PreparacionCocina.objects.filter(preparado__isnull=True).order_by('recibido').values_list(*_CAMPOS)
+    return _pedidos_cocina(consulta[:limite or obtener_configuracion_cocina()['MAX_PENDIENTES']])
+
+def flujo_registrado(desde=None, hasta=None) -> List[PedidoCocina]:
+    """Llegadas registradas en la cocina entre dos instantes, para reproducirlas en simular()"""
+    consulta = PreparacionCocina.objects.order_by('recibido')
+    if desde is not None:
+        consulta = consulta.filter(recibido__gte=desde)
+    if hasta is not None:
+        consulta = consulta.filter(recibido__lt=hasta)
+    return _pedidos_cocina(consulta.values_list(*_CAMPOS).iterator())
+
+def marcar_preparados(ids: Iterable[int]) -> int:
+    """Marca como preparados los pedidos pendientes indicados; devuelve cuántos cambiaron"""
+    return PreparacionCocina.objects.filter(pedido_id__in=list(ids), preparado__isnull=True).update(
+        preparado=timezone.now()
+    )
+
+def _instante(segundos: float) -> str:
+    return datetime.fromtimestamp(segundos, tz=tz.utc).isoformat()
+
+def plan_cocina(limite: Optional[int] = None) -> Dict:
+    """
+    Plan de la cola de cocina para los pedidos pendientes
+
+    Returns:
+        dict: Lotes con sus pedidos, toppings, estación e instantes estimados,
+            y la duración del plan frente a preparar los pedidos en orden de llegada
+    """
+    configuracion = obtener_configuracion_cocina()
+    pendientes = pendientes_cocina(limite)
+    ahora = timezone.now().timestamp()
+    lotes = planificar(pendientes, ahora, configuracion)
+    fifo = planificar(pendientes, ahora, configuracion, politica='fifo')
+    return {
+        'pendientes': len(pendientes),
+        'estaciones': configuracion['ESTACIONES'],
+        'max_espera_s': configuracion['MAX_ESPERA_S'],
+        'duracion_estimada_s': round(max((lote.fin for lote in lotes), default=ahora) - ahora, 1),
+        'duracion_fifo_s': round(max((lote.fin for lote in fifo), default=ahora) - ahora, 1),
+        'lotes': [
+            {
+                'variante': lote.variante,
+                'tamanio_cono': lote.tamanio,
+                'pedidos': [pedido.id for pedido in lote.pedidos],
+                'toppings': sorted(lote.toppings),
+                'estacion': lote.estacion,
+                'inicio_estimado': _instante(lote.inicio),
+                'fin_estimado': _instante(lote.fin),
+                'espera_max_s': round(lote.inicio - min(pedido.llegada for pedido in lote.pedidos), 1),
+            }
+            for lote in lotes
+        ],
+    }
@@ -0,0 +1,459 @@
+from datetime import date
+from typing import Dict, List, Tuple
+
+from django.core import checks
+from django.db import NotSupportedError, connections, models, transaction
+from django.db.models import F, Func, Sum, Value
+from django.utils.dateparse import parse_date
+
+from .catalogo import obtener_catalogo
+from .clientes import aplicar_totales, diferencia_totales, totales_por_cliente
+from .logger import obtener_logger
+from .models import ClaveIdempotencia, PedidoCono, PreparacionCocina
+
+# Criterios aceptados en el filtro de las correcciones en bloque
+CRITERIOS_FILTRO = ('ids', 'fecha_desde', 'fecha_hasta', 'variante', 'tamanio', 'cliente', 'topping')
+# Cambios aceptados por actualizar_pedidos
+CAMBIOS_PERMITIDOS = ('tamanio_cono', 'quitar_topping')
+MAX_IDS_FILTRO = 10000
+# Ids por consulta al releer los pedidos sin snapshot tras una corrección
+LOTE_IDS = 1000
+
+# Relaciones hacia PedidoCono que eliminar_pedidos resuelve antes del DELETE
+# directo de los pedidos: (modelo, campo, on_delete)
+RELACIONES_PEDIDO = {
+    (ClaveIdempotencia, 'pedido', models.SET_NULL),
+    (PreparacionCocina, 'pedido', models.CASCADE),
+}
+
+def relaciones_pedido_sin_resolver() -> List[str]:
+    """
+    Relaciones hacia PedidoCono que no coinciden con RELACIONES_PEDIDO
+
+    El DELETE de los pedidos no pasa por el Collector de Django (que los
+    cargaría en memoria), así que una relación nueva quedaría sin resolver.
+
+    Returns:
+        list: 'Modelo.campo' de las relaciones nuevas, quitadas o cambiadas
+    """
+    relaciones = {
+        (campo.related_model, campo.field.name, campo.on_delete)
+        for campo in PedidoCono._meta.get_fields(include_hidden=True)
+        if campo.is_relation and campo.auto_created and not campo.concrete
+    }
+    return sorted({f'{modelo.__name__}.{nombre}' for modelo, nombre, _ in relaciones ^ RELACIONES_PEDIDO})
+
+@checks.register(checks.Tags.models)
+def verificar_relaciones_pedido(app_configs=None, **kwargs):
+    """System check: eliminar_pedidos resuelve todas las relaciones hacia PedidoCono"""
+    cambiadas = relaciones_pedido_sin_resolver()
+    if not cambiadas:
+        return []
+    return [checks.Error(
+        f'Las relaciones hacia PedidoCono cambiaron ({", ".join(cambiadas)})',
+        hint='Actualizar eliminar_pedidos y RELACIONES_PEDIDO en api_conos/correcciones.py',
+        obj=PedidoCono,
+        id='api_conos.E001',
+    )]
+
+class ExpresionJSON(Func):
+    """
+    Expresión sobre columnas JSON con SQL propio para SQLite y PostgreSQL
+
+    Las subclases definen as_sqlite y as_postgresql a partir de las
+    expresiones compiladas (sql, params) de sus argumentos, que pueden
+    repetirse en la sentencia.
+    """
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError(
+            f'{type(self).__name__} no está disponible en la base de datos {connection.vendor}'
+        )
+
+    def _compilar(self, compiler) -> List[Tuple[str, list]]:
+        return [compiler.compile(expresion) for expresion in self.get_source_expressions()]
+
+class ContieneTopping(ExpresionJSON):
+    """Verdadero si la lista de toppings contiene el topping"""
+    output_field = models.BooleanField()
+
+    def __init__(self, campo, topping):
+        super().__init__(F(campo), Value(topping))
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        (toppings, p_toppings), (topping, p_topping) = self._compilar(compiler)
+        return (
+            f'EXISTS (SELECT 1 FROM json_each({toppings}) WHERE json_each.value = {topping})',
+            [*p_toppings, *p_topping]
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        (toppings, p_toppings), (topping, p_topping) = self._compilar(compiler)
+        return f'({toppings} @> jsonb_build_array({topping}::text))', [*p_toppings, *p_topping]
+
+class SinTopping(ExpresionJSON):
+    """Lista de toppings sin las apariciones del topping, en el mismo orden"""
+    output_field = models.JSONField()
+
+    def __init__(self, campo, topping):
+        super().__init__(F(campo), Value(topping))
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        (toppings, p_toppings), (topping, p_topping) = self._compilar(compiler)
+        return (
+            f'(SELECT json_group_array(json_each.value) FROM json_each({toppings}) '
+            f'WHERE json_each.value <> {topping})',
+            [*p_toppings, *p_topping]
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        (toppings, p_toppings), (topping, p_topping) = self._compilar(compiler)
+        return f'({toppings} - {topping}::text)', [*p_toppings, *p_topping]
+
+class PrecioToppingsSin(ExpresionJSON):
+    """
+    Suma de los precios del snapshot sin el topping
+
+    Se suma en el orden guardado en el snapshot, el mismo en que el builder
+    acumuló precio_toppings (en PostgreSQL jsonb ordena las claves).
+    """
+    output_field = models.FloatField()
+
+    def __init__(self, campo, topping):
+        super().__init__(F(campo), Value(topping))
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        (snapshot, p_snapshot), (topping, p_topping) = self._compilar(compiler)
+        return (
+            f"(SELECT total(json_each.value) FROM json_each({snapshot}, '$.toppings') "
+            f'WHERE json_each.key <> {topping})',
+            [*p_snapshot, *p_topping]
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        (snapshot, p_snapshot), (topping, p_topping) = self._compilar(compiler)
+        return (
+            f"(SELECT COALESCE(SUM(precios.value::float8), 0) FROM jsonb_each_text({snapshot} -> 'toppings') "
+            f'AS precios WHERE precios.key <> {topping}::text)',
+            [*p_snapshot, *p_topping]
+        )
+
+class ValorSnapshot(ExpresionJSON):
+    """Valor numérico de una clave del snapshot de precios (columna o expresión)"""
+    output_field = models.FloatField()
+
+    def __init__(self, snapshot, clave):
+        super().__init__(F(snapshot) if isinstance(snapshot, str) else snapshot)
+        self.clave = clave
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        [(snapshot, params)] = self._compilar(compiler)
+        return f"json_extract({snapshot}, '$.{self.clave}')", params
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        [(snapshot, params)] = self._compilar(compiler)
+        return f"(({snapshot} ->> '{self.clave}')::float8)", params
+
+class SnapshotActualizado(ExpresionJSON):
+    """
+    Snapshot de precios con claves numéricas reemplazadas y, opcionalmente,
+    un topping quitado de sus precios
+
+    Args:
+        campo (str): Columna del snapshot
+        valores (dict): Clave de primer nivel -> expresión numérica
+        quitar_topping (str): Topping a quitar de snapshot['toppings']
+    """
+    output_field = models.JSONField()
+
+    def __init__(self, campo, valores: Dict[str, Func], quitar_topping=None):
+        self.claves = list(valores)
+        self.quitar_topping = quitar_topping
+        super().__init__(F(campo), *valores.values())
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        (snapshot, p_snapshot), *valores = self._compilar(compiler)
+        params = list(p_snapshot)
+        asignaciones = []
+        if self.quitar_topping is not None:
+            # Se reconstruye el objeto en lugar de usar json_remove: JSONField
+            # guarda las claves no ASCII escapadas (\u00f1) y las rutas JSON de
+            # SQLite no las reconocen; json_each sí las decodifica
+            asignaciones.append(
+                "'$.toppings', json((SELECT json_group_object(json_each.key, json_each.value) "
+                f"FROM json_each({snapshot}, '$.toppings') WHERE json_each.key <> %s))"
+            )
+            params.extend([*p_snapshot, self.quitar_topping])
+        for clave, (sql, p_valor) in zip(self.claves, valores):
+            asignaciones.append(f"'$.{clave}', {sql}")
+            params.extend(p_valor)
+        return f"json_set({snapshot}, {', '.join(asignaciones)})", params
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        (snapshot, params), *valores = self._compilar(compiler)
+        params = list(params)
+        if self.quitar_topping is not None:
+            snapshot = f"({snapshot} #- ARRAY['toppings', %s::text])"
+            params.append(self.quitar_topping)
+        for clave, (sql, p_valor) in zip(self.claves, valores):
+            snapshot = f"jsonb_set({snapshot}, '{{{clave}}}', to_jsonb(({sql})::float8))"
+            params.extend(p_valor)
+        return snapshot, params
+
+def _texto(filtro, nombre) -> str:
+    valor = filtro[nombre]
+    if not isinstance(valor, str) or not valor.strip():
+        raise ValueError(f'{nombre}: se esperaba un texto no vacío')
+    return valor.strip()
+
+def _fecha(filtro, nombre) -> date:
+    valor = filtro[nombre]
+    try:
+        fecha = parse_date(valor) if isinstance(valor, str) else None
+    except ValueError:
+        fecha = None
+    if fecha is None:
+        raise ValueError(f'{nombre}: se esperaba una fecha con formato AAAA-MM-DD')
+    return fecha
+
+def _opcion(valor, opciones, nombre) -> str:
+    validas = [clave for clave, _ in opciones]
+    if valor not in validas:
+        raise ValueError(f'{nombre}: se esperaba uno de {", ".join(validas)}')
+    return valor
+
+def _filtro_registrado(filtro) -> Dict:
+    """Filtro para el log, con la cantidad de ids en lugar de la lista"""
+    if 'ids' not in filtro:
+        return filtro
+    return {**{k: v for k, v in filtro.items() if k != 'ids'}, 'total_ids': len(filtro['ids'])}
+
+def filtrar_pedidos(filtro) -> models.QuerySet:
+    """
+    Construye el queryset de pedidos de una corrección en bloque
+
+    Args:
+        filtro (dict): Criterios combinados con AND: ids (lista), fecha_desde y
+            fecha_hasta (AAAA-MM-DD, inclusivas), variante, tamanio, cliente
+            (coincidencia exacta) y topping (pedidos que lo contienen)
+
+    Returns:
+        QuerySet: Pedidos de la tabla principal (los archivados son de solo lectura)
+
+    Raises:
+        ValueError: Si el filtro está vacío o tiene criterios inválidos
+    """
+    if not isinstance(filtro, dict) or not filtro:
+        raise ValueError('Se esperaba un filtro con al menos un criterio')
+    desconocidos = set(filtro) - set(CRITERIOS_FILTRO)
+    if desconocidos:
+        raise ValueError(
+            f'Criterios desconocidos: {", ".join(sorted(desconocidos))}. '
+            f'Criterios permitidos: {", ".join(CRITERIOS_FILTRO)}'
+        )
+
+    queryset = PedidoCono.objects.order_by()
+    if 'ids' in filtro:
+        ids = filtro['ids']
+        if (
+            not isinstance(ids, list) or not ids or len(ids) > MAX_IDS_FILTRO
+            or not all(isinstance(pedido_id, int) and not isinstance(pedido_id, bool) for pedido_id in ids)
+        ):
+            raise ValueError(f'ids: se esperaba una lista de 1 a {MAX_IDS_FILTRO} enteros')
+        queryset = queryset.filter(pk__in=ids)
+    if 'fecha_desde' in filtro:
+        queryset = queryset.filter(fecha_pedido__gte=_fecha(filtro, 'fecha_desde'))
+    if 'fecha_hasta' in filtro:
+        queryset = queryset.filter(fecha_pedido__lte=_fecha(filtro, 'fecha_hasta'))
+    if 'variante' in filtro:
+        queryset = queryset.filter(
+            variante=_opcion(filtro['variante'], PedidoCono.VARIANTES_CHOICES, 'variante')
+        )
+    if 'tamanio' in filtro:
+        queryset = queryset.filter(
+            tamanio_cono=_opcion(filtro['tamanio'], PedidoCono.TAMANIOS_CHOICES, 'tamanio')
+        )
+    if 'cliente' in filtro:
+        queryset = queryset.filter(cliente=_texto(filtro, 'cliente'))
+    if 'topping' in filtro:
+        queryset = queryset.filter(ContieneTopping('toppings', _texto(filtro, 'topping')))
+    return queryset
+
+def _asignaciones(queryset, cambios) -> Tuple[models.QuerySet, Dict]:
+    """
+    Valida los cambios y construye las asignaciones del UPDATE
+
+    precio_final y snapshot_precio se recalculan en la misma sentencia a
+    partir de los precios capturados en el snapshot: una corrección no
+    reprecia el pedido con el catálogo vigente, salvo el multiplicador del
+    nuevo tamaño. Los pedidos sin snapshot solo cambian sus columnas (su
+    precio se calcula al leerlos).
+    """
+    if not isinstance(cambios, dict) or not cambios:
+        raise ValueError('Se esperaba al menos un cambio')
+    desconocidos = set(cambios) - set(CAMBIOS_PERMITIDOS)
+    if desconocidos:
+        raise ValueError(
+            f'Cambios desconocidos: {", ".join(sorted(desconocidos))}. '
+            f'Cambios permitidos: {", ".join(CAMBIOS_PERMITIDOS)}'
+        )
+
+    asignaciones = {}
+    precios = {}
+    precio_base = ValorSnapshot('snapshot_precio', 'precio_base')
+    precio_toppings = ValorSnapshot('snapshot_precio', 'precio_toppings')
+    topping = None
+
+    if 'tamanio_cono' in cambios:
+        tamanio = _opcion(cambios['tamanio_cono'], PedidoCono.TAMANIOS_CHOICES, 'tamanio_cono')
+        multiplicador = obtener_catalogo().multiplicadores.get(tamanio, 1.0)
+        # Solo los pedidos con otro tamaño; el precio unitario es el capturado
+        queryset = queryset.exclude(tamanio_cono=tamanio)
+        asignaciones['tamanio_cono'] = tamanio
+        precio_base = ValorSnapshot('snapshot_precio', 'precio_unitario') * Value(multiplicador)
+        precios['multiplicador'] = Value(multiplicador, output_field=models.FloatField())
+        precios['precio_base'] = precio_base
+
+    if 'quitar_topping' in cambios:
+        topping = _texto(cambios, 'quitar_topping')
+        queryset = queryset.filter(ContieneTopping('toppings', topping))
+        asignaciones['toppings'] = SinTopping('toppings', topping)
+        precio_toppings = PrecioToppingsSin('snapshot_precio', topping)
+        precios['precio_toppings'] = precio_toppings
+
+    # Mismo orden de la suma que el builder: precio_base + precio_toppings
+    precios['precio_total'] = precio_base + precio_toppings
+    snapshot = SnapshotActualizado('snapshot_precio', precios, quitar_topping=topping)
+    asignaciones['snapshot_precio'] = snapshot
+    # Se lee del snapshot nuevo: SQLite guarda los números JSON con 15 dígitos
+    asignaciones['precio_final'] = ValorSnapshot(snapshot, 'precio_total')
+    return queryset, asignaciones
+
+def actualizar_pedidos(filtro, cambios, simular=False) -> Dict:
+    """
+    Aplica una corrección a todos los pedidos del filtro con un solo UPDATE
+
+    Antes, una consulta agrupada por cliente calcula con la misma expresión
+    cuánto cambia el gasto de cada uno, para sumarlo a sus totales. Los
+    pedidos sin snapshot (su precio se calcula al leerlos) se comparan con
+    totales_por_cliente antes y después del UPDATE.
+
+    Args:
+        filtro (dict): Criterios de filtrar_pedidos
+        cambios (dict): tamanio_cono (nuevo tamaño) y/o quitar_topping
+        simular (bool): Solo cuenta los pedidos afectados
+
+    Returns:
+        dict: Pedidos actualizados (o que se actualizarían)
+
+    Raises:
+        ValueError: Si el filtro o los cambios son inválidos
+    """
+    queryset, asignaciones = _asignaciones(filtrar_pedidos(filtro), cambios)
+    if simular:
+        return {'pedidos_actualizados': queryset.count(), 'simulado': True}
+
+    with transaction.atomic(using=queryset.db):
+        # Cambio de gasto por cliente, con la misma expresión del UPDATE
+        gastos = queryset.filter(precio_final__isnull=False).order_by().values('cliente').annotate(
+            diferencia=Sum(asignaciones['precio_final'] - F('precio_final'))
+        ).values_list('cliente', 'diferencia')
+        totales = {cliente: [0, diferencia or 0.0] for cliente, diferencia in gastos}
+        # Después del UPDATE el filtro puede no encontrarlos: se releen por id
+        sin_snapshot = queryset.filter(precio_final__isnull=True)
+        ids_sin_snapshot = list(sin_snapshot.values_list('pk', flat=True))
+        antes = totales_por_cliente(sin_snapshot) if ids_sin_snapshot else {}
+
+        actualizados = queryset.update(**asignaciones)
+
+        despues = {}
+        for inicio in range(0, len(ids_sin_snapshot), LOTE_IDS):
+            lote = PedidoCono.objects.using(queryset.db).filter(pk__in=ids_sin_snapshot[inicio:inicio + LOTE_IDS])
+            for cliente, (pedidos, gasto) in totales_por_cliente(lote).items():
+                total = despues.setdefault(cliente, [0, 0.0])
+                total[0] += pedidos
+                total[1] += gasto
+        for cliente, (_, diferencia) in diferencia_totales(despues, antes).items():
+            totales.setdefault(cliente, [0, 0.0])[1] += diferencia
+        aplicar_totales(totales, using=queryset.db)
+    if actualizados:
+        obtener_logger().registrar_operacion(
+            tipo_operacion='correccion_lote',
+            detalle=f'{actualizados} pedidos corregidos en bloque',
+            datos_extra={'filtro': _filtro_registrado(filtro), 'cambios': cambios, 'pedidos_actualizados': actualizados}
+        )
+    return {'pedidos_actualizados': actualizados, 'simulado': False}
+
+def _borrar_sin_cargar(queryset) -> int:
+    """
+    Borra las filas del queryset con un único DELETE ... WHERE id IN (SELECT ...)
+
+    A diferencia de QuerySet.delete() no carga los objetos ni resuelve sus
+    relaciones: quien llama debe haberlas resuelto antes.
+
+    Returns:
+        int: Filas borradas
+    """
+    conexion = connections[queryset.db]
+    opciones = queryset.model._meta
+    seleccion, parametros = queryset.order_by().values('pk').query.get_compiler(using=queryset.db).as_sql()
+    sql = 'DELETE FROM {} WHERE {} IN ({})'.format(
+        conexion.ops.quote_name(opciones.db_table), conexion.ops.quote_name(opciones.pk.column), seleccion
+    )
+    with conexion.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        return cursor.rowcount
+
+def eliminar_pedidos(filtro, simular=False) -> Dict:
+    """
+    Elimina todos los pedidos del filtro con sentencias sobre el conjunto
+
+    En una transacción se desvinculan las claves de idempotencia de los
+    pedidos (on_delete=SET_NULL), se borra su paso por la cocina
+    (on_delete=CASCADE), se borran los pedidos, sin cargarlos en memoria
+    como haría QuerySet.delete() con sus relaciones (ver RELACIONES_PEDIDO),
+    y se descuentan de los totales de sus clientes.
+
+    Args:
+        filtro (dict): Criterios de filtrar_pedidos
+        simular (bool): Solo cuenta los pedidos afectados
+
+    Returns:
+        dict: Pedidos eliminados (o que se eliminarían)
+
+    Raises:
+        ValueError: Si el filtro es inválido
+        RuntimeError: Si hay relaciones hacia PedidoCono fuera de RELACIONES_PEDIDO
+    """
+    queryset = filtrar_pedidos(filtro)
+    if simular:
+        return {'pedidos_eliminados': queryset.count(), 'simulado': True}
+
+    cambiadas = relaciones_pedido_sin_resolver()
+    if cambiadas:
+        # El system check api_conos.E001 ya lo avisa; aquí se evita borrar a medias
+        raise RuntimeError(
+            f'Las relaciones hacia PedidoCono cambiaron ({", ".join(cambiadas)}); '
+            'actualizar eliminar_pedidos y RELACIONES_PEDIDO'
+        )
+    with transaction.atomic(using=queryset.db):
+        totales = {
+            cliente: [-pedidos, -gasto] for cliente, (pedidos, gasto) in totales_por_cliente(queryset).items()
+        }
+        ClaveIdempotencia.objects.using(queryset.db).filter(
+            pedido__in=queryset.values('pk')
+        ).update(pedido=None)
+        # Sin relaciones ni señales: Django lo borra con un solo DELETE
+        PreparacionCocina.objects.using(queryset.db).filter(
+            pedido__in=queryset.values('pk')
+        ).delete()
+        # Nada referencia ya los pedidos (RELACIONES_PEDIDO): no hace falta el Collector
+        eliminados = _borrar_sin_cargar(queryset)
+        aplicar_totales(totales, using=queryset.db)
+    if eliminados:
+        obtener_logger().registrar_operacion(
+            tipo_operacion='eliminacion_lote',
+            detalle=f'{eliminados} pedidos eliminados en bloque',
+            datos_extra={'filtro': _filtro_registrado(filtro), 'pedidos_eliminados': eliminados}
+        )
+    return {'pedidos_eliminados': eliminados, 'simulado': False}
@@ -1,4 +1,5 @@
-from .base import ConoCarnivoro, ConoVegetariano, ConoSaludable
+import threading
+from .base import ConoBase, ConoCarnivoro, ConoVegetariano, ConoSaludable
 
 class ConoFactory:
     """Factory para crear diferentes tipos de conos según la variante"""
@@ -9,6 +10,8 @@ class ConoFactory:
         'Saludable': ConoSaludable
     }
     
+    _lock_registro = threading.Lock()
+    
     @classmethod
     def crear_cono_base(cls, variante, tamanio="Mediano"):
         """
@@ -38,16 +41,40 @@ class ConoFactory:
         """Obtiene la lista de tipos de conos disponibles"""
         return list(cls._tipos_disponibles.keys())
     
+    @classmethod
+    def registrar_tipo(cls, variante, cono_class):
+        """
+        Registra una nueva variante de cono y reconstruye el catálogo
+        
+        Args:
+            variante (str): Nombre de la variante
+            cono_class (type): Subclase de ConoBase que implementa la variante
+        
+        Raises:
+            ValueError: Si la clase no es una subclase de ConoBase
+        """
+        if not (isinstance(cono_class, type) and issubclass(cono_class, ConoBase)):
+            raise ValueError(f"La clase para '{variante}' debe ser una subclase de ConoBase")
+        
+        from .catalogo import CatalogoConos
+        
+        with cls._lock_registro:
+            # Copia y reemplazo para no mutar el diccionario que otros hilos leen
+            tipos = dict(cls._tipos_disponibles)
+            tipos[variante] = cono_class
+            cls._tipos_disponibles = tipos
+            CatalogoConos.reconstruir(nueva_generacion=True)
+    
     @classmethod
     def obtener_info_tipos(cls):
         """Obtiene información detallada de todos los tipos disponibles"""
-        info = {}
-        for variante, cono_class in cls._tipos_disponibles.items():
-            # Crear instancia temporal para obtener información
-            cono_temp = cono_class()
-            info[variante] = {
-                'precio_base': cono_temp.precio_base,
-                'ingredientes_base': cono_temp.ingredientes.copy(),
-                'descripcion': cono_temp.__class__.__doc__
+        from .catalogo import obtener_catalogo
+        
+        return {
+            variante: {
+                'precio_base': info['precio_base'],
+                'ingredientes_base': list(info['ingredientes_base']),
+                'descripcion': info['descripcion']
             }
-        return info
\ No newline at end of file
+            for variante, info in obtener_catalogo().variantes.items()
+        }
\ No newline at end of file
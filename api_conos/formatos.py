@@ -0,0 +1,302 @@
+import gzip
+import zlib
+from io import BytesIO
+from types import MappingProxyType
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError, UnsupportedMediaType
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.mediatypes import _MediaType
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dependencia opcional
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+from .models import PedidoCono
+
+# Parámetro del tipo de medio para codificar los toppings como máscara de bits,
+# p. ej. "Accept: application/msgpack; toppings=bitmask"
+PARAMETRO_TOPPINGS = 'toppings'
+TOPPINGS_BITMASK = 'bitmask'
+
+# Bit de cada topping en las máscaras: el orden fijo de TOPPINGS_PERMITIDOS,
+# no el del catálogo en la base de datos, para que agregar o borrar un
+# PrecioTopping no cambie el significado de las máscaras que ya tienen los clientes
+TOPPINGS_BITS = tuple(PedidoCono.TOPPINGS_PERMITIDOS)
+INDICE_BITS = MappingProxyType({topping: bit for bit, topping in enumerate(TOPPINGS_BITS)})
+
+# Bytes de entrada (y, con brotli >= 1.2, de salida) por paso al descomprimir
+BLOQUE_DESCOMPRESION = 16 * 1024
+
+CONFIGURACION_POR_DEFECTO = {
+    'HABILITADA': True,
+    'MIN_BYTES': 1024,
+    'NIVEL_GZIP': 6,
+    'CALIDAD_BROTLI': 5,
+}
+
+def obtener_configuracion_compresion():
+    """Configuración de la compresión de respuestas (settings.COMPRESION_RESPUESTAS sobre los valores por defecto)"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'COMPRESION_RESPUESTAS', {})}
+
+# --- Toppings como máscara de bits ---
+
+def toppings_a_mascara(toppings) -> int:
+    """
+    Codifica una lista de toppings como máscara de bits
+
+    El bit i corresponde al i-ésimo topping de PedidoCono.TOPPINGS_PERMITIDOS
+    (TOPPINGS_BITS). La máscara representa el conjunto de toppings: se
+    pierden el orden y los repetidos.
+
+    Raises:
+        KeyError: Si un topping no tiene bit asignado
+    """
+    mascara = 0
+    for topping in toppings:
+        mascara |= 1 << INDICE_BITS[topping]
+    return mascara
+
+def mascara_a_toppings(mascara: int) -> list:
+    """Decodifica una máscara de bits en la lista de toppings, en el orden de TOPPINGS_BITS"""
+    if mascara < 0 or mascara >> len(TOPPINGS_BITS):
+        raise ParseError(f'Máscara de toppings inválida: {mascara}')
+    return [topping for bit, topping in enumerate(TOPPINGS_BITS) if mascara >> bit & 1]
+
+def usa_bitmask(media_type) -> bool:
+    """Indica si el tipo de medio pide los toppings como máscara de bits"""
+    if not media_type:
+        return False
+    return _MediaType(media_type).params.get(PARAMETRO_TOPPINGS) == TOPPINGS_BITMASK
+
+def _codificar_toppings(datos):
+    """
+    Reemplaza las listas 'toppings' de una respuesta por su máscara de bits
+
+    Cubre un pedido, una lista de pedidos, la página del listado ('results')
+    y el detalle de construcción ('pedido').
+    """
+    if isinstance(datos, list):
+        return [_codificar_toppings(valor) for valor in datos]
+    if not isinstance(datos, dict):
+        return datos
+    toppings = datos.get('toppings')
+    if isinstance(toppings, list):
+        try:
+            datos = {**datos, 'toppings': toppings_a_mascara(toppings)}
+        except (KeyError, TypeError):
+            pass
+    for clave in ('results', 'pedido'):
+        if isinstance(datos.get(clave), (list, dict)):
+            datos = {**datos, clave: _codificar_toppings(datos[clave])}
+    return datos
+
+def _decodificar_toppings(datos):
+    """Reemplaza las máscaras de bits 'toppings' de un pedido (o lote) por listas"""
+    if isinstance(datos, list):
+        return [_decodificar_toppings(pedido) for pedido in datos]
+    toppings = datos.get('toppings') if isinstance(datos, dict) else None
+    if isinstance(toppings, int) and not isinstance(toppings, bool):
+        datos = dict(datos)
+        datos['toppings'] = mascara_a_toppings(datos['toppings'])
+    return datos
+
+def preparar_respuesta(datos, media_type):
+    """Aplica a los datos de una respuesta las opciones del tipo de medio aceptado"""
+    if usa_bitmask(media_type):
+        return _codificar_toppings(datos)
+    return datos
+
+# --- Renderers ---
+
+class JSONRendererPedidos(JSONRenderer):
+    """JSONRenderer que admite el parámetro toppings=bitmask"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(
+            preparar_respuesta(data, accepted_media_type), accepted_media_type, renderer_context
+        )
+
+class MessagePackRenderer(BaseRenderer):
+    """Renderer MessagePack (requiere el paquete opcional msgpack)"""
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(preparar_respuesta(data, accepted_media_type), default=str)
+
+# --- Parsers ---
+
+class CuerpoDemasiadoGrande(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'El cuerpo descomprimido supera el tamaño máximo permitido'
+    default_code = 'cuerpo_demasiado_grande'
+
+def _descomprimir_brotli(cuerpo: bytes, limite: int) -> bytes:
+    """
+    Descomprime brotli por bloques sin superar `limite` bytes de salida
+
+    La entrada se entrega en bloques de BLOQUE_DESCOMPRESION bytes y, si la
+    versión de brotli lo permite, la salida de cada paso también se acota,
+    así que como mucho se descomprime un bloque de más antes de cortar.
+    """
+    descompresor = brotli.Decompressor()
+    acota_salida = hasattr(descompresor, 'can_accept_more_data')
+    salida = bytearray()
+    for inicio in range(0, len(cuerpo), BLOQUE_DESCOMPRESION):
+        entrada = cuerpo[inicio:inicio + BLOQUE_DESCOMPRESION]
+        while True:
+            if acota_salida:
+                salida += descompresor.process(entrada, output_buffer_limit=BLOQUE_DESCOMPRESION)
+            else:
+                salida += descompresor.process(entrada)
+            if len(salida) > limite:
+                raise CuerpoDemasiadoGrande()
+            # Con la salida acotada, seguir sin entrada hasta vaciar el búfer
+            if not acota_salida or descompresor.can_accept_more_data():
+                break
+            entrada = b''
+    if not descompresor.is_finished():
+        raise ParseError('Cuerpo comprimido inválido: datos brotli incompletos')
+    return bytes(salida)
+
+def _leer_cuerpo(stream, parser_context) -> bytes:
+    """Lee el cuerpo de la petición descomprimiéndolo según Content-Encoding"""
+    request = (parser_context or {}).get('request')
+    codificacion = request.META.get('HTTP_CONTENT_ENCODING', '').strip().lower() if request else ''
+    cuerpo = stream.read() if stream is not None else b''
+    if codificacion in ('', 'identity'):
+        return cuerpo
+
+    # Límite del cuerpo descomprimido para evitar bombas de compresión
+    limite = settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 2 ** 31
+    try:
+        if codificacion == 'gzip':
+            descompresor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            datos = descompresor.decompress(cuerpo, limite + 1)
+            if len(datos) > limite:
+                raise CuerpoDemasiadoGrande()
+            # Un cuerpo truncado no llega al final del stream; uno con datos
+            # después (p. ej. varios miembros gzip concatenados) deja unused_data
+            if not descompresor.eof or descompresor.unused_data:
+                raise ParseError('Cuerpo comprimido inválido: datos gzip incompletos o sobrantes')
+        elif codificacion == 'br' and brotli is not None:
+            datos = _descomprimir_brotli(cuerpo, limite)
+        else:
+            raise UnsupportedMediaType(f'Content-Encoding "{codificacion}" no soportado')
+    except (zlib.error, getattr(brotli, 'error', zlib.error)) as e:
+        raise ParseError(f'Cuerpo comprimido inválido: {e}')
+    if len(datos) > limite:
+        raise CuerpoDemasiadoGrande()
+    return datos
+
+class JSONParserPedidos(JSONParser):
+    """JSONParser que admite cuerpos comprimidos (gzip/br) y toppings=bitmask"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        cuerpo = _leer_cuerpo(stream, parser_context)
+        datos = super().parse(BytesIO(cuerpo), media_type, parser_context)
+        return _decodificar_toppings(datos) if usa_bitmask(media_type) else datos
+
+class MessagePackParser(BaseParser):
+    """Parser MessagePack (requiere el paquete opcional msgpack)"""
+
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        cuerpo = _leer_cuerpo(stream, parser_context)
+        try:
+            datos = msgpack.unpackb(cuerpo, raw=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as e:
+            raise ParseError(f'MessagePack parse error - {e}')
+        return _decodificar_toppings(datos) if usa_bitmask(media_type) else datos
+
+def renderers_disponibles(base):
+    """Renderers del viewset: los configurados más MessagePack si está instalado"""
+    renderers = [JSONRendererPedidos if r is JSONRenderer else r for r in base]
+    if msgpack is not None:
+        renderers.append(MessagePackRenderer)
+    return renderers
+
+def parsers_disponibles(base):
+    """Parsers del viewset: los configurados más MessagePack si está instalado"""
+    parsers = [JSONParserPedidos if p is JSONParser else p for p in base]
+    if msgpack is not None:
+        parsers.append(MessagePackParser)
+    return parsers
+
+# --- Compresión de respuestas ---
+
+def elegir_codificacion(accept_encoding: str):
+    """
+    Elige la codificación de la respuesta según Accept-Encoding
+
+    Returns:
+        str: 'br' (si brotli está instalado), 'gzip' o None
+    """
+    aceptadas = {}
+    for parte in accept_encoding.split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        calidad = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith('q='):
+            try:
+                calidad = float(parametros[2:])
+            except ValueError:
+                calidad = 0.0
+        if nombre:
+            aceptadas[nombre.strip().lower()] = calidad
+    if brotli is not None and aceptadas.get('br', 0) > 0:
+        return 'br'
+    if aceptadas.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+def comprimir(contenido: bytes, codificacion: str, configuracion=None) -> bytes:
+    configuracion = configuracion or obtener_configuracion_compresion()
+    if codificacion == 'br':
+        return brotli.compress(contenido, quality=configuracion['CALIDAD_BROTLI'])
+    return gzip.compress(contenido, compresslevel=configuracion['NIVEL_GZIP'], mtime=0)
+
+def comprimir_respuesta(request, response):
+    """
+    Comprime la respuesta con brotli o gzip si el cliente lo acepta
+
+    Solo se comprimen respuestas exitosas de al menos MIN_BYTES; el ETag
+    pasa a ser débil, como en GZipMiddleware.
+    """
+    configuracion = obtener_configuracion_compresion()
+    if not configuracion['HABILITADA'] or response.streaming:
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    codificacion = elegir_codificacion(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if (codificacion is None or response.has_header('Content-Encoding')
+            or not 200 <= response.status_code < 300):
+        return response
+
+    if hasattr(response, 'render') and not response.is_rendered:
+        response.render()
+    if len(response.content) < configuracion['MIN_BYTES']:
+        return response
+
+    response.content = comprimir(response.content, codificacion, configuracion)
+    response['Content-Length'] = str(len(response.content))
+    response['Content-Encoding'] = codificacion
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    return response
@@ -0,0 +1,280 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Callable, NamedTuple, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import ClaveIdempotencia
+
+CABECERA = 'Idempotency-Key'
+CABECERA_REPETIDA = 'Idempotent-Replayed'
+MAX_LONGITUD_CLAVE = 255
+
+CONFIGURACION_POR_DEFECTO = {
+    'TTL_S': 24 * 60 * 60,
+    'MAX_ENTRADAS': 10000,
+    'ESPERA_S': 10,
+}
+
+def obtener_configuracion_idempotencia():
+    """Configuración de las claves de idempotencia (settings.IDEMPOTENCIA sobre los valores por defecto)"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'IDEMPOTENCIA', {})}
+
+class RespuestaGuardada(NamedTuple):
+    """Respuesta original asociada a una clave de idempotencia"""
+    huella: str
+    codigo_estado: int
+    datos: dict
+    expira: float
+
+def huella_peticion(datos) -> str:
+    """
+    Calcula la huella del cuerpo de una petición
+
+    Args:
+        datos: Cuerpo ya parseado de la petición
+
+    Returns:
+        str: Hash sha256 del cuerpo en forma canónica
+    """
+    canonico = json.dumps(datos, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonico.encode('utf-8')).hexdigest()
+
+class IndiceIdempotencia:
+    """
+    Índice en memoria de respuestas por clave de idempotencia
+
+    Diccionario ordenado acotado a MAX_ENTRADAS (se descartan las menos usadas)
+    cuyas entradas caducan a los TTL_S segundos. Además lleva el registro de
+    las claves con una petición en curso en este proceso, para que los
+    reintentos concurrentes esperen a la original en lugar de repetirla.
+    """
+
+    def __init__(self, max_entradas: int, ttl: float):
+        """
+        Args:
+            max_entradas (int): Máximo de respuestas guardadas en memoria
+            ttl (float): Segundos de validez de cada respuesta
+        """
+        self.max_entradas = max(1, max_entradas)
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._en_curso = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, clave: str) -> Optional[RespuestaGuardada]:
+        """Obtiene la respuesta guardada para una clave, o None si no existe o caducó"""
+        with self._lock:
+            guardada = self._entradas.get(clave)
+            if guardada is None:
+                return None
+            if guardada.expira <= time.time():
+                del self._entradas[clave]
+                return None
+            self._entradas.move_to_end(clave)
+            return guardada
+
+    def guardar(self, clave: str, guardada: RespuestaGuardada):
+        """Guarda una respuesta descartando las entradas menos usadas si se supera el máximo"""
+        with self._lock:
+            self._entradas[clave] = guardada
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def reservar(self, clave: str) -> Optional[threading.Event]:
+        """
+        Marca una clave como en curso en este proceso
+
+        Returns:
+            threading.Event: Evento a esperar si otra petición ya tiene la clave,
+                o None si la reserva quedó a nombre de quien llama
+        """
+        with self._lock:
+            evento = self._en_curso.get(clave)
+            if evento is None:
+                self._en_curso[clave] = threading.Event()
+            return evento
+
+    def liberar(self, clave: str):
+        """Libera la reserva de una clave y despierta a los reintentos que la esperan"""
+        with self._lock:
+            evento = self._en_curso.pop(clave, None)
+        if evento is not None:
+            evento.set()
+
+    def limpiar(self):
+        """Vacía el índice"""
+        with self._lock:
+            self._entradas.clear()
+
+def _respuesta_en_curso() -> Response:
+    return Response({
+        'error': 'Hay una petición en curso con la misma Idempotency-Key'
+    }, status=status.HTTP_409_CONFLICT, headers={'Retry-After': '1'})
+
+def _repetir(guardada: RespuestaGuardada, huella: str) -> Response:
+    """Devuelve la respuesta original, o un error si la clave se usó con otro cuerpo"""
+    if guardada.huella != huella:
+        return Response({
+            'error': 'La Idempotency-Key ya se usó con un cuerpo distinto'
+        }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    return Response(guardada.datos, status=guardada.codigo_estado,
+                    headers={CABECERA_REPETIDA: 'true'})
+
+def _desde_fila(fila: ClaveIdempotencia, ttl: float) -> RespuestaGuardada:
+    return RespuestaGuardada(
+        huella=fila.huella,
+        codigo_estado=fila.codigo_estado,
+        datos=fila.respuesta,
+        expira=fila.creada.timestamp() + ttl
+    )
+
+class _ClaveConfirmada(Exception):
+    """Otra transacción confirmó la misma clave mientras se intentaba reservarla"""
+
+def _procesar(indice: IndiceIdempotencia, clave: str, huella: str,
+              crear: Callable[[], Response], configuracion) -> Response:
+    """
+    Resuelve la clave contra la tabla y, si es nueva, ejecuta la creación
+
+    La fila de la clave, el pedido y su respuesta se escriben en una sola
+    transacción. Mientras no se confirma, el índice único hace esperar a los
+    reintentos de otros procesos hasta que termina: si se confirma reciben la
+    respuesta guardada y si se revierte (error o caída del proceso) la clave
+    queda libre. Ninguna reserva se da por abandonada por el tiempo que lleve.
+    """
+    ttl = configuracion['TTL_S']
+    ahora = timezone.now()
+
+    fila = ClaveIdempotencia.objects.filter(clave=clave).only(
+        'huella', 'codigo_estado', 'respuesta', 'creada'
+    ).first()
+    if fila is not None:
+        if fila.codigo_estado is not None and ahora - fila.creada < timedelta(seconds=ttl):
+            guardada = _desde_fila(fila, ttl)
+            indice.guardar(clave, guardada)
+            return _repetir(guardada, huella)
+        # Vencida, o una reserva sin respuesta confirmada por una versión
+        # anterior que guardaba la respuesta en otra transacción
+        fila.delete()
+
+    try:
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    fila = ClaveIdempotencia.objects.create(clave=clave, huella=huella, creada=ahora)
+            except IntegrityError:
+                raise _ClaveConfirmada
+
+            respuesta = crear()
+            if not status.is_success(respuesta.status_code):
+                # Los errores no se guardan: el cliente puede corregir y reintentar
+                transaction.set_rollback(True)
+                return respuesta
+
+            datos = dict(respuesta.data)
+            fila.codigo_estado = respuesta.status_code
+            fila.respuesta = datos
+            fila.pedido_id = datos.get('id')
+            fila.save(update_fields=['codigo_estado', 'respuesta', 'pedido'])
+    except _ClaveConfirmada:
+        fila = ClaveIdempotencia.objects.filter(clave=clave).first()
+        if fila is None or fila.codigo_estado is None:
+            return _respuesta_en_curso()
+        guardada = _desde_fila(fila, ttl)
+        indice.guardar(clave, guardada)
+        return _repetir(guardada, huella)
+
+    indice.guardar(clave, RespuestaGuardada(
+        huella=huella,
+        codigo_estado=respuesta.status_code,
+        datos=datos,
+        expira=ahora.timestamp() + ttl
+    ))
+    return respuesta
+
+def crear_idempotente(clave: str, datos, crear: Callable[[], Response]) -> Response:
+    """
+    Ejecuta una creación como máximo una vez por clave de idempotencia
+
+    Un reintento con la misma clave devuelve la respuesta original sin volver
+    a ejecutar la creación. La búsqueda es O(1) en el índice en memoria y, si
+    no está ahí, una consulta por el índice único de la tabla.
+
+    Args:
+        clave (str): Valor de la cabecera Idempotency-Key
+        datos: Cuerpo de la petición (para detectar reutilizaciones de la clave)
+        crear (Callable): Función que ejecuta la creación y devuelve la respuesta
+
+    Returns:
+        Response: Respuesta original, la de la creación o un error 409/422
+    """
+    if len(clave) > MAX_LONGITUD_CLAVE:
+        return Response({
+            'error': f'La Idempotency-Key no puede superar {MAX_LONGITUD_CLAVE} caracteres'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    configuracion = obtener_configuracion_idempotencia()
+    indice = obtener_indice_idempotencia()
+    huella = huella_peticion(datos)
+    limite = time.monotonic() + configuracion['ESPERA_S']
+
+    while True:
+        guardada = indice.obtener(clave)
+        if guardada is not None:
+            return _repetir(guardada, huella)
+
+        evento = indice.reservar(clave)
+        if evento is None:
+            try:
+                return _procesar(indice, clave, huella, crear, configuracion)
+            finally:
+                indice.liberar(clave)
+
+        # Reintento concurrente en este proceso: esperar a la petición original
+        restante = limite - time.monotonic()
+        if restante <= 0 or not evento.wait(restante):
+            return _respuesta_en_curso()
+
+def purgar_claves_expiradas() -> int:
+    """
+    Borra de la tabla las claves cuyo TTL ya venció
+
+    Returns:
+        int: Cantidad de claves borradas
+    """
+    ttl = obtener_configuracion_idempotencia()['TTL_S']
+    borradas, _ = ClaveIdempotencia.objects.filter(
+        creada__lt=timezone.now() - timedelta(seconds=ttl)
+    ).delete()
+    return borradas
+
+_indice = None
+_lock_indice = threading.Lock()
+
+def obtener_indice_idempotencia() -> IndiceIdempotencia:
+    """
+    Obtiene el índice de idempotencia del proceso
+
+    Returns:
+        IndiceIdempotencia: Instancia única del índice
+    """
+    global _indice
+    if _indice is None:
+        with _lock_indice:
+            if _indice is None:
+                configuracion = obtener_configuracion_idempotencia()
+                _indice = IndiceIdempotencia(
+                    max_entradas=configuracion['MAX_ENTRADAS'],
+                    ttl=configuracion['TTL_S']
+                )
+    return _indice
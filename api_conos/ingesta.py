@@ -0,0 +1,189 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, TimeoutError as TiempoAgotado
+from typing import Callable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .clientes import registrar_pedidos_cliente
+from .cocina import recibir_pedidos
+from .logger import ERROR, obtener_logger
+from .models import PedidoCono
+
+CONFIGURACION_POR_DEFECTO = {
+    'HABILITADA': False,
+    'MAX_FILAS': 64,
+    'MAX_ESPERA_MS': 5,
+    'TIMEOUT_S': 10,
+}
+
+def obtener_configuracion_ingesta():
+    """Configuración de la ingesta agrupada (settings.INGESTA_AGRUPADA sobre los valores por defecto)"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'INGESTA_AGRUPADA', {})}
+
+def registrar_creados(pedidos: List[PedidoCono]):
+    """
+    Efectos de la creación de pedidos que se confirman en su misma transacción:
+    la entrada en la cola de cocina y los totales de sus clientes
+    """
+    recibir_pedidos(pedidos)
+    registrar_pedidos_cliente(pedidos)
+
+class ColaIngesta:
+    """
+    Cola de ingesta de pedidos con commits agrupados (group commit)
+
+    Las peticiones encolan pedidos ya validados y esperan su confirmación. Un
+    hilo escritor agrupa hasta MAX_FILAS pedidos o MAX_ESPERA_MS milisegundos y
+    los inserta en una sola transacción; cada petición recibe su pedido con el
+    id asignado solo después del commit, por lo que la durabilidad es la misma
+    que con una transacción por petición. `al_insertar` recibe los pedidos
+    insertados dentro de esa misma transacción.
+    """
+
+    def __init__(self, max_filas: int, max_espera_ms: float,
+                 al_insertar: Optional[Callable[[List[PedidoCono]], None]] = None):
+        """
+        Args:
+            max_filas (int): Máximo de pedidos por transacción
+            max_espera_ms (float): Espera máxima para completar un grupo
+            al_insertar (callable): Escrituras que acompañan a los pedidos de
+                cada transacción (ver registrar_creados)
+        """
+        self.max_filas = max(1, max_filas)
+        self.max_espera = max(0.0, max_espera_ms) / 1000
+        self.al_insertar = al_insertar
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._escritor, name='ingesta-pedidos', daemon=True)
+        self._hilo.start()
+
+    def encolar(self, pedido: PedidoCono, timeout: float = None) -> PedidoCono:
+        """
+        Encola un pedido y espera a que se confirme su inserción
+
+        Args:
+            pedido (PedidoCono): Pedido validado y sin guardar
+            timeout (float): Segundos máximos de espera
+
+        Returns:
+            PedidoCono: El mismo pedido con su id asignado
+
+        Raises:
+            TimeoutError: Si el escritor no tomó el pedido a tiempo (no se guarda)
+            Exception: El error de la base de datos si el pedido no se pudo guardar
+        """
+        futuro = Future()
+        self._cola.put((pedido, futuro))
+        try:
+            return futuro.result(timeout=timeout)
+        except TiempoAgotado:
+            if futuro.cancel():
+                raise
+            # El escritor ya lo está insertando: se espera a su transacción
+            return futuro.result()
+
+    def _armar_grupo(self) -> List[Tuple[PedidoCono, Future]]:
+        grupo = [self._cola.get()]
+        limite = time.monotonic() + self.max_espera
+        while len(grupo) < self.max_filas:
+            restante = limite - time.monotonic()
+            try:
+                if restante > 0:
+                    grupo.append(self._cola.get(timeout=restante))
+                else:
+                    grupo.append(self._cola.get_nowait())
+            except queue.Empty:
+                break
+        return grupo
+
+    def _escritor(self):
+        """
+        Bucle del hilo escritor: arma grupos y los confirma
+
+        Un error inesperado solo hace fallar a los pedidos de su grupo; el
+        hilo sigue atendiendo la cola.
+        """
+        while True:
+            grupo = self._armar_grupo()
+            try:
+                self._confirmar(grupo)
+            except Exception as e:
+                obtener_logger().registrar_operacion(
+                    tipo_operacion='ingesta',
+                    detalle=f'Error al confirmar un grupo de {len(grupo)} pedidos: {e}',
+                    datos_extra={'pedidos': len(grupo), 'error': repr(e)},
+                    nivel=ERROR
+                )
+                for _, futuro in grupo:
+                    try:
+                        futuro.set_exception(e)
+                    except InvalidStateError:
+                        # Cancelado o ya resuelto
+                        pass
+
+    def _confirmar(self, grupo: List[Tuple[PedidoCono, Future]]):
+        """
+        Inserta un grupo en una transacción; si falla, reintenta pedido por pedido
+
+        Los pedidos cuya petición ya se rindió (futuro cancelado) no se insertan.
+        """
+        grupo = [(pedido, futuro) for pedido, futuro in grupo if futuro.set_running_or_notify_cancel()]
+        if not grupo:
+            return
+        connection.close_if_unusable_or_obsolete()
+        pedidos = [pedido for pedido, _ in grupo]
+        try:
+            with transaction.atomic():
+                if connection.features.can_return_rows_from_bulk_insert:
+                    PedidoCono.objects.bulk_create(pedidos)
+                else:
+                    for pedido in pedidos:
+                        pedido.save(validar=False)
+                if self.al_insertar is not None:
+                    self.al_insertar(pedidos)
+        except Exception:
+            # Aislar el pedido problemático para no hacer fallar a todo el grupo
+            for pedido in pedidos:
+                pedido.pk = None
+                pedido._state.adding = True
+            self._confirmar_individualmente(grupo)
+            return
+
+        for pedido, futuro in grupo:
+            futuro.set_result(pedido)
+
+    def _confirmar_individualmente(self, grupo: List[Tuple[PedidoCono, Future]]):
+        for pedido, futuro in grupo:
+            try:
+                with transaction.atomic():
+                    pedido.save(validar=False)
+                    if self.al_insertar is not None:
+                        self.al_insertar([pedido])
+            except Exception as e:
+                futuro.set_exception(e)
+            else:
+                futuro.set_result(pedido)
+
+_cola_ingesta = None
+_lock_cola = threading.Lock()
+
+def obtener_cola_ingesta() -> ColaIngesta:
+    """
+    Obtiene la cola de ingesta del proceso (el hilo escritor se inicia en el primer uso)
+
+    Returns:
+        ColaIngesta: Instancia única de la cola
+    """
+    global _cola_ingesta
+    if _cola_ingesta is None:
+        with _lock_cola:
+            if _cola_ingesta is None:
+                configuracion = obtener_configuracion_ingesta()
+                _cola_ingesta = ColaIngesta(
+                    max_filas=configuracion['MAX_FILAS'],
+                    max_espera_ms=configuracion['MAX_ESPERA_MS'],
+                    al_insertar=registrar_creados
+                )
+    return _cola_ingesta
@@ -0,0 +1,142 @@
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+from .catalogo import _serializar
+from .logger import DEBUG, obtener_logger
+from .models import PedidoCono
+from .precios import obtener_construccion
+
+# Columnas leídas con values_list, en el orden de los campos del modelo
+CAMPOS_LISTADO = (
+    'id', 'cliente', 'variante', 'toppings', 'tamanio_cono', 'fecha_pedido', 'snapshot_precio'
+)
+
+def serializar_json(datos) -> bytes:
+    """
+    Serializa igual que el JSONRenderer de DRF, con orjson si está instalado
+
+    Ambos producen JSON compacto en UTF-8 sin escapar unicode; como DRF, se
+    escapan U+2028 y U+2029 para que la salida sea JavaScript válido.
+    """
+    if orjson is None:
+        contenido = _serializar(datos)
+    else:
+        contenido = orjson.dumps(datos)
+    if b'\xe2\x80' in contenido:
+        contenido = contenido.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return contenido
+
+def _recetas(catalogo) -> Dict[str, Tuple]:
+    """(tipo_base, variante, ingredientes_base) de cada variante del catálogo"""
+    recetas = {}
+    for variante, info in catalogo.variantes.items():
+        nombre_clase = info['clase'].__name__
+        recetas[variante] = (nombre_clase, nombre_clase.replace('Cono', ''), list(info['ingredientes_base']))
+    return recetas
+
+def _fila_serializador(fila: Tuple) -> Dict:
+    """Serializa una fila con PedidoConoSerializer (pedidos sin receta o con datos inesperados)"""
+    from .serializers import PedidoConoSerializer
+    pedido = PedidoCono(**dict(zip(CAMPOS_LISTADO, fila)))
+    return PedidoConoSerializer(pedido).data
+
+def filas_listado(filas: Iterable[Tuple], catalogo) -> List[Dict]:
+    """
+    Convierte filas de values_list(*CAMPOS_LISTADO) en el esquema del listado
+
+    Produce los mismos campos y valores que PedidoConoSerializer, pero los
+    precios e ingredientes salen del snapshot de precios de cada pedido y de
+    las recetas del catálogo, sin instanciar modelos ni campos de DRF. Los
+    pedidos sin snapshot se construyen una vez por composición distinta.
+    Los cálculos se registran en el log con una entrada por tipo.
+
+    Args:
+        filas (Iterable[tuple]): Filas de PedidoCono en el orden de CAMPOS_LISTADO
+        catalogo (SnapshotCatalogo): Snapshot vigente del catálogo
+
+    Returns:
+        list: Diccionarios con el esquema de PedidoConoSerializer
+    """
+    recetas = _recetas(catalogo)
+    construidos = {}
+    resultado = []
+    agregar = resultado.append
+    ids = []
+
+    for fila in filas:
+        pedido_id, cliente, variante, toppings, tamanio, fecha, snapshot = fila
+        try:
+            if snapshot:
+                tipo_base, nombre, ingredientes_base = recetas[variante]
+                agregados = list(snapshot['toppings'])
+                precio_base = snapshot['precio_base']
+                precio_toppings = snapshot['precio_toppings']
+                precio_total = snapshot['precio_total']
+            else:
+                clave = (variante, tamanio, tuple(toppings or ()))
+                construido = construidos.get(clave)
+                if construido is None:
+                    construido = construidos[clave] = obtener_construccion(
+                        PedidoCono(variante=variante, tamanio_cono=tamanio, toppings=toppings),
+                        catalogo
+                    )
+                tipo_base, nombre = construido.tipo_base, construido.variante
+                ingredientes_base = list(construido.ingredientes_base)
+                agregados = list(construido.toppings_agregados)
+                precio_base = construido.precio_base
+                precio_toppings = construido.precio_toppings
+                precio_total = construido.precio_total
+        except Exception:
+            agregar(_fila_serializador(fila))
+            continue
+
+        ids.append(pedido_id)
+        ingredientes = ingredientes_base + agregados
+        agregar({
+            'id': pedido_id,
+            'cliente': cliente,
+            'variante': variante,
+            'toppings': toppings,
+            'tamanio_cono': tamanio,
+            'fecha_pedido': fecha.isoformat(),
+            'precio_final': round(precio_total, 2),
+            'ingredientes_finales': ingredientes,
+            'resumen_construccion': {
+                'tipo_base': tipo_base,
+                'variante': nombre,
+                'tamanio': tamanio,
+                'precio_base': precio_base,
+                'precio_toppings': precio_toppings,
+                'precio_total': precio_total,
+                'total_ingredientes': len(ingredientes),
+                'total_toppings': len(agregados)
+            }
+        })
+
+    _registrar_listado(ids)
+    return resultado
+
+def _registrar_listado(ids: List[int]):
+    """
+    Registra los cálculos del listado con una entrada por tipo
+
+    Los contadores por tipo suman un cálculo por pedido, igual que al
+    serializar pedido por pedido (los pedidos que pasan por el serializador
+    ya registran los suyos).
+    """
+    if not ids:
+        return
+    logger = obtener_logger()
+    cantidad = len(ids)
+    for tipo_operacion, detalle in (
+        ('precio_final', f'Cálculo de precio para {cantidad} pedidos del listado'),
+        ('ingredientes_finales', f'Cálculo de ingredientes para {cantidad} pedidos del listado'),
+        ('personalizacion', f'Construcción completa del cono para {cantidad} pedidos del listado'),
+    ):
+        logger.registrar_lote(
+            tipo_operacion, cantidad, detalle, datos_extra=lambda: {'pedido_ids': ids}, nivel=DEBUG
+        )
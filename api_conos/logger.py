@@ -1,11 +1,77 @@
+import os
+import random
+import tempfile
 import threading
 from datetime import datetime
-from typing import List, Dict
+from typing import Callable, Dict, List, Union
+
+from .logs_compartidos import RegistroCompartido, RegistroMemoria
+
+# Niveles de log (mismos valores que el módulo logging)
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+NIVELES = {'DEBUG': DEBUG, 'INFO': INFO, 'WARNING': WARNING, 'ERROR': ERROR}
+_NOMBRES_NIVEL = {valor: nombre for nombre, valor in NIVELES.items()}
+
+# Tipos de operación con contador en obtener_estadisticas()
+TIPOS_CONTADOS = ('precio_final', 'ingredientes_finales', 'creacion_cono', 'personalizacion')
+
+CONFIGURACION_POR_DEFECTO = {
+    'NIVEL': 'INFO',
+    'MUESTREO': {},
+    # 'memoria': logs y contadores del proceso; 'compartido': archivo mapeado
+    # en memoria común a todos los procesos (workers) que usen la misma RUTA
+    'BACKEND': 'memoria',
+    'RUTA': None,
+    'CAPACIDAD': 10000,
+    'TAMANIO_ENTRADA': 1024,
+    # Filas de la tabla de procesos del backend compartido (None: según las CPU)
+    'MAX_PROCESOS': None,
+}
+
+def _ruta_por_defecto() -> str:
+    return os.path.join(tempfile.gettempdir(), 'api_conos_logs_operaciones.mmap')
+
+def _crear_registro(configuracion: Dict):
+    """Crea el almacenamiento de logs y contadores indicado en la configuración"""
+    if configuracion['BACKEND'] == 'compartido':
+        return RegistroCompartido(
+            configuracion['RUTA'] or _ruta_por_defecto(),
+            TIPOS_CONTADOS,
+            capacidad=configuracion['CAPACIDAD'],
+            tamanio_entrada=configuracion['TAMANIO_ENTRADA'],
+            max_procesos=configuracion['MAX_PROCESOS'],
+        )
+    if configuracion['BACKEND'] != 'memoria':
+        raise ValueError(f"Backend de logs desconocido: {configuracion['BACKEND']}")
+    return RegistroMemoria(TIPOS_CONTADOS)
+
+def _configuracion_settings() -> Dict:
+    """Configuración del logger (settings.LOGGER_OPERACIONES sobre los valores por defecto)"""
+    try:
+        from django.conf import settings
+        return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'LOGGER_OPERACIONES', {})}
+    except Exception:
+        # Sin Django configurado (scripts y procesos auxiliares)
+        return dict(CONFIGURACION_POR_DEFECTO)
 
 class LoggerSingleton:
     """
     Singleton para mantener un registro centralizado de logs del sistema
     Implementación thread-safe
+
+    Cada operación tiene un nivel y cada tipo de operación una tasa de
+    muestreo. Los contadores por tipo se incrementan siempre; el mensaje y
+    los datos extra (que pueden pasarse como funciones para construirlos
+    solo si hacen falta) se guardan solo si el nivel está habilitado y la
+    operación sale sorteada.
+
+    Con BACKEND='compartido' los logs (un buffer circular de CAPACIDAD
+    entradas) y los contadores viven en un archivo mapeado en memoria, y
+    todos los procesos ven la misma vista global.
     """
     
     _instance = None
@@ -22,38 +88,96 @@ class LoggerSingleton:
     
     def _inicializar(self):
         """Inicializa el logger (solo se ejecuta una vez)"""
-        self._logs = []
-        self._operaciones_contador = {
-            'precio_final': 0,
-            'ingredientes_finales': 0,
-            'creacion_cono': 0,
-            'personalizacion': 0
+        self._registro = _crear_registro(_configuracion_settings())
+        self.configurar()
+    
+    def configurar(self, nivel: Union[str, int] = None, muestreo: Dict[str, float] = None):
+        """
+        Configura el nivel mínimo y las tasas de muestreo por tipo de operación
+        
+        Args:
+            nivel (str | int): Nivel mínimo a guardar (por defecto el de settings)
+            muestreo (dict): Fracción (0 a 1) de operaciones guardadas por tipo;
+                los tipos ausentes se guardan siempre. No se aplica desde WARNING.
+        """
+        configuracion = _configuracion_settings()
+        if nivel is None:
+            nivel = configuracion['NIVEL']
+        if muestreo is None:
+            muestreo = configuracion['MUESTREO']
+        self._nivel = NIVELES[nivel.upper()] if isinstance(nivel, str) else int(nivel)
+        self._muestreo = {tipo: float(tasa) for tipo, tasa in muestreo.items() if float(tasa) < 1.0}
+    
+    def habilitado(self, tipo_operacion: str, nivel: int = INFO) -> bool:
+        """
+        Indica si una operación debe guardarse (nivel habilitado y sorteo de muestreo)
+        
+        Args:
+            tipo_operacion (str): Tipo de operación
+            nivel (int): Nivel de la operación
+        
+        Returns:
+            bool: True si la operación se guarda en el log
+        """
+        if nivel < self._nivel:
+            return False
+        if nivel >= WARNING:
+            return True
+        tasa = self._muestreo.get(tipo_operacion)
+        return tasa is None or random.random() < tasa
+    
+    def _contar(self, tipo_operacion: str, cantidad: int):
+        self._registro.contar(tipo_operacion, cantidad)
+    
+    def _guardar(self, tipo_operacion: str, nivel: int, detalle, datos_extra):
+        """Construye (si son funciones) y guarda el mensaje y los datos extra"""
+        if callable(detalle):
+            detalle = detalle()
+        if callable(datos_extra):
+            datos_extra = datos_extra()
+        log_entry = {
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'tipo_operacion': tipo_operacion,
+            'nivel': _NOMBRES_NIVEL.get(nivel, str(nivel)),
+            'detalle': detalle,
+            'datos_extra': datos_extra or {}
         }
-        self._lock_logs = threading.Lock()
+        self._registro.agregar(log_entry)
     
-    def registrar_operacion(self, tipo_operacion: str, detalle: str, datos_extra: Dict = None):
+    def registrar_operacion(self, tipo_operacion: str, detalle: Union[str, Callable[[], str]],
+                            datos_extra: Union[Dict, Callable[[], Dict]] = None, nivel: int = INFO):
         """
         Registra una operación en el log
         
         Args:
             tipo_operacion (str): Tipo de operación realizada
-            detalle (str): Descripción detallada de la operación
-            datos_extra (dict): Datos adicionales de la operación
-        """
-        with self._lock_logs:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            log_entry = {
-                'timestamp': timestamp,
-                'tipo_operacion': tipo_operacion,
-                'detalle': detalle,
-                'datos_extra': datos_extra or {}
-            }
-            self._logs.append(log_entry)
-            
-            # Incrementar contador
-            if tipo_operacion in self._operaciones_contador:
-                self._operaciones_contador[tipo_operacion] += 1
-    
+            detalle (str | callable): Descripción detallada de la operación, o
+                función que la construye
+            datos_extra (dict | callable): Datos adicionales de la operación, o
+                función que los construye
+            nivel (int): Nivel de la operación (DEBUG, INFO, WARNING, ERROR)
+        """
+        # El contador es exacto aunque la operación no se guarde
+        self._contar(tipo_operacion, 1)
+        if self.habilitado(tipo_operacion, nivel):
+            self._guardar(tipo_operacion, nivel, detalle, datos_extra)
+
+    def registrar_lote(self, tipo_operacion: str, cantidad: int, detalle: Union[str, Callable[[], str]],
+                       datos_extra: Union[Dict, Callable[[], Dict]] = None, nivel: int = INFO):
+        """
+        Registra en una sola entrada la misma operación aplicada a varios pedidos
+
+        Args:
+            tipo_operacion (str): Tipo de operación realizada
+            cantidad (int): Cantidad de operaciones (se suma al contador del tipo)
+            detalle (str | callable): Descripción detallada de la operación
+            datos_extra (dict | callable): Datos adicionales de la operación
+            nivel (int): Nivel de la operación (DEBUG, INFO, WARNING, ERROR)
+        """
+        self._contar(tipo_operacion, cantidad)
+        if self.habilitado(tipo_operacion, nivel):
+            self._guardar(tipo_operacion, nivel, detalle, datos_extra)
+
     def obtener_logs(self, limite: int = None) -> List[Dict]:
         """
         Obtiene los logs registrados
@@ -64,10 +188,7 @@ class LoggerSingleton:
         Returns:
             List[Dict]: Lista de logs
         """
-        with self._lock_logs:
-            if limite:
-                return self._logs[-limite:]
-            return self._logs.copy()
+        return self._registro.entradas(limite)
     
     def obtener_estadisticas(self) -> Dict:
         """
@@ -76,23 +197,16 @@ class LoggerSingleton:
         Returns:
             Dict: Estadísticas del sistema
         """
-        with self._lock_logs:
-            return {
-                'total_logs': len(self._logs),
-                'operaciones_por_tipo': self._operaciones_contador.copy(),
-                'ultimo_log': self._logs[-1] if self._logs else None
-            }
+        ultimo = self._registro.entradas(1)
+        return {
+            'total_logs': self._registro.total(),
+            'operaciones_por_tipo': self._registro.contadores(),
+            'ultimo_log': ultimo[-1] if ultimo else None
+        }
     
     def limpiar_logs(self):
         """Limpia todos los logs registrados"""
-        with self._lock_logs:
-            self._logs.clear()
-            self._operaciones_contador = {
-                'precio_final': 0,
-                'ingredientes_finales': 0,
-                'creacion_cono': 0,
-                'personalizacion': 0
-            }
+        self._registro.limpiar()
     
     def obtener_logs_por_tipo(self, tipo_operacion: str) -> List[Dict]:
         """
@@ -104,8 +218,7 @@ class LoggerSingleton:
         Returns:
             List[Dict]: Logs filtrados
         """
-        with self._lock_logs:
-            return [log for log in self._logs if log['tipo_operacion'] == tipo_operacion]
+        return [log for log in self._registro.entradas() if log['tipo_operacion'] == tipo_operacion]
     
     def obtener_logs_recientes(self, minutos: int = 60) -> List[Dict]:
         """
@@ -117,17 +230,16 @@ class LoggerSingleton:
         Returns:
             List[Dict]: Logs recientes
         """
-        with self._lock_logs:
-            from datetime import datetime, timedelta
-            limite_tiempo = datetime.now() - timedelta(minutes=minutos)
-            
-            logs_recientes = []
-            for log in self._logs:
-                log_time = datetime.strptime(log['timestamp'], '%Y-%m-%d %H:%M:%S')
-                if log_time >= limite_tiempo:
-                    logs_recientes.append(log)
-            
-            return logs_recientes
+        from datetime import datetime, timedelta
+        limite_tiempo = datetime.now() - timedelta(minutes=minutos)
+        
+        logs_recientes = []
+        for log in self._registro.entradas():
+            log_time = datetime.strptime(log['timestamp'], '%Y-%m-%d %H:%M:%S')
+            if log_time >= limite_tiempo:
+                logs_recientes.append(log)
+        
+        return logs_recientes
 
 # Función de conveniencia para obtener la instancia del logger
 def obtener_logger():
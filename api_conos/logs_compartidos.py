@@ -0,0 +1,322 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+# Este módulo no importa Django: lo usa LoggerSingleton en cualquier proceso
+
+MAGIA = b'CONOLOG1'
+# La cabecera (con la tabla de procesos) ocupa un múltiplo de este tamaño
+ALINEACION_CABECERA = 4096
+
+# Cabecera: magia, capacidad, tamaño de entrada, secuencia, máximo de
+# procesos y cantidad de contadores
+_CABECERA = struct.Struct('<8sIIQII')
+_OFFSET_SECUENCIA = 16
+_OFFSET_PROCESOS = 64
+_I64 = struct.Struct('<q')
+_U64 = struct.Struct('<Q')
+_U32 = struct.Struct('<I')
+
+def procesos_por_defecto() -> int:
+    """
+    Filas de la tabla de procesos cuando no se configuran
+
+    Los workers de gunicorn.conf.py (2 * CPU + 1), el doble para los
+    reinicios en caliente (conviven los workers viejos y los nuevos) y
+    margen para el maestro y los comandos de gestión.
+    """
+    return 2 * (2 * (os.cpu_count() or 1) + 1) + 8
+
+class RegistroMemoria:
+    """Registro de logs y contadores en la memoria del proceso"""
+
+    def __init__(self, tipos_contados: Iterable[str]):
+        self._tipos = tuple(tipos_contados)
+        self._logs = []
+        self._contadores = dict.fromkeys(self._tipos, 0)
+        self._lock = threading.Lock()
+
+    def contar(self, tipo_operacion: str, cantidad: int):
+        with self._lock:
+            if tipo_operacion in self._contadores:
+                self._contadores[tipo_operacion] += cantidad
+
+    def agregar(self, entrada: Dict):
+        with self._lock:
+            self._logs.append(entrada)
+
+    def entradas(self, limite: int = None) -> List[Dict]:
+        with self._lock:
+            if limite:
+                return self._logs[-limite:]
+            return self._logs.copy()
+
+    def contadores(self) -> Dict[str, int]:
+        with self._lock:
+            return self._contadores.copy()
+
+    def total(self) -> int:
+        return len(self._logs)
+
+    def limpiar(self):
+        with self._lock:
+            self._logs.clear()
+            self._contadores = dict.fromkeys(self._tipos, 0)
+
+class RegistroCompartido:
+    """
+    Registro de logs y contadores compartido entre procesos mediante un archivo mapeado
+
+    - Contadores: cada proceso escribe solo en su propia fila de la tabla de
+      procesos (sin locks entre procesos); la vista global es la suma de
+      todas las filas. Las filas de procesos terminados se reutilizan
+      conservando sus cuentas. Si la tabla está llena, el proceso cuenta en
+      su memoria: sus cuentas solo aparecen en su propia vista.
+    - Logs: buffer circular de CAPACIDAD entradas de tamaño fijo. Cada
+      escritura reserva el siguiente número de secuencia con un lock POSIX
+      sobre el archivo (append atómico). Las lecturas no toman locks: cada
+      entrada guarda su secuencia al inicio y al final, y se descartan las
+      que se están sobrescribiendo.
+
+    Requiere un sistema POSIX (fcntl). El archivo se comparte también entre
+    procesos que no son hijos del mismo maestro.
+    """
+
+    def __init__(self, ruta: str, tipos_contados: Iterable[str],
+                 capacidad: int = 10000, tamanio_entrada: int = 1024,
+                 max_procesos: Optional[int] = None):
+        """
+        Args:
+            ruta (str): Archivo compartido (se crea si no existe)
+            tipos_contados (Iterable[str]): Tipos de operación con contador
+            capacidad (int): Entradas del buffer circular
+            tamanio_entrada (int): Bytes por entrada (las más largas se recortan)
+            max_procesos (int): Filas de la tabla de procesos (por defecto
+                procesos_por_defecto())
+        """
+        import fcntl
+        self._fcntl = fcntl
+        self._tipos = tuple(tipos_contados)
+        self._indice_tipo = {tipo: i for i, tipo in enumerate(self._tipos)}
+        self._contador = struct.Struct(f'<{len(self._tipos)}q')
+        self._tamanio_fila = _I64.size + self._contador.size
+
+        self._fd = os.open(str(ruta), os.O_RDWR | os.O_CREAT, 0o644)
+        with self._bloqueo_archivo():
+            self._capacidad, self._tamanio_entrada, self._max_procesos = self._preparar_archivo(
+                capacidad, tamanio_entrada, max(1, max_procesos or procesos_por_defecto())
+            )
+        self._cabecera = self._tamanio_cabecera(self._max_procesos)
+        self._mmap = mmap.mmap(self._fd, self._cabecera + self._capacidad * self._tamanio_entrada)
+        self._lock = threading.Lock()
+        self._fila = None
+        self._pid = None
+        self._locales = dict.fromkeys(self._tipos, 0)
+        os.register_at_fork(after_in_child=self._despues_de_fork)
+
+    # --- Archivo ---
+
+    @contextmanager
+    def _bloqueo_archivo(self):
+        """Lock exclusivo entre procesos (lockf es por proceso: se combina con self._lock)"""
+        self._fcntl.lockf(self._fd, self._fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            self._fcntl.lockf(self._fd, self._fcntl.LOCK_UN)
+
+    def _tamanio_cabecera(self, max_procesos: int) -> int:
+        tamanio = _OFFSET_PROCESOS + max_procesos * self._tamanio_fila
+        return -(-tamanio // ALINEACION_CABECERA) * ALINEACION_CABECERA
+
+    def _preparar_archivo(self, capacidad: int, tamanio_entrada: int, max_procesos: int):
+        """Inicializa la cabecera si el archivo es nuevo o incompatible (con el lock tomado)"""
+        cabecera = os.pread(self._fd, _CABECERA.size, 0)
+        if len(cabecera) == _CABECERA.size:
+            magia, capacidad_archivo, tamanio_archivo, _, procesos, tipos = _CABECERA.unpack(cabecera)
+            if magia == MAGIA and procesos and tipos == len(self._tipos):
+                # El archivo existente define el formato para todos los procesos
+                return capacidad_archivo, tamanio_archivo, procesos
+
+        tamanio_entrada = max(64, tamanio_entrada)
+        os.ftruncate(self._fd, 0)
+        os.ftruncate(self._fd, self._tamanio_cabecera(max_procesos) + capacidad * tamanio_entrada)
+        os.pwrite(self._fd, _CABECERA.pack(
+            MAGIA, capacidad, tamanio_entrada, 0, max_procesos, len(self._tipos)
+        ), 0)
+        return capacidad, tamanio_entrada, max_procesos
+
+    def _despues_de_fork(self):
+        # El hijo hereda el mapeo compartido pero necesita su propia fila y lock
+        self._lock = threading.Lock()
+        self._fila = None
+        self._pid = None
+        self._locales = dict.fromkeys(self._tipos, 0)
+
+    # --- Contadores ---
+
+    def _offset_fila(self, fila: int) -> int:
+        return _OFFSET_PROCESOS + fila * self._tamanio_fila
+
+    def _obtener_fila(self) -> Optional[int]:
+        """
+        Fila de la tabla de procesos del proceso actual (se asigna en el primer uso)
+
+        Returns:
+            int: Fila del proceso, o None si la tabla está llena
+        """
+        pid = os.getpid()
+        if self._pid == pid:
+            return self._fila
+        with self._bloqueo_archivo():
+            libre = None
+            for fila in range(self._max_procesos):
+                duenio, = _I64.unpack_from(self._mmap, self._offset_fila(fila))
+                if duenio == pid:
+                    libre = fila
+                    break
+                if libre is None and (duenio == 0 or not _proceso_vivo(duenio)):
+                    libre = fila
+            if libre is not None:
+                # La fila reutilizada conserva las cuentas del proceso terminado
+                _I64.pack_into(self._mmap, self._offset_fila(libre), pid)
+        self._fila, self._pid = libre, pid
+        return libre
+
+    def contar(self, tipo_operacion: str, cantidad: int):
+        indice = self._indice_tipo.get(tipo_operacion)
+        if indice is None:
+            return
+        with self._lock:
+            fila = self._obtener_fila()
+            if fila is None:
+                self._locales[tipo_operacion] += cantidad
+                return
+            offset = self._offset_fila(fila) + _I64.size + indice * 8
+            valor, = _I64.unpack_from(self._mmap, offset)
+            _I64.pack_into(self._mmap, offset, valor + cantidad)
+
+    def contadores(self) -> Dict[str, int]:
+        totales = list(self._locales.values())
+        for fila in range(self._max_procesos):
+            offset = self._offset_fila(fila)
+            duenio, = _I64.unpack_from(self._mmap, offset)
+            if duenio:
+                for i, valor in enumerate(self._contador.unpack_from(self._mmap, offset + _I64.size)):
+                    totales[i] += valor
+        return dict(zip(self._tipos, totales))
+
+    # --- Buffer circular de logs ---
+
+    def _codificar(self, entrada: Dict) -> bytes:
+        """
+        Serializa una entrada para que entre en TAMANIO_ENTRADA
+
+        Si no entra se reemplazan sus datos extra y, si hace falta, se recorta
+        el detalle antes de serializar, de modo que el JSON siempre es válido.
+        """
+        disponible = self._tamanio_entrada - 2 * _U64.size - _U32.size
+        contenido = _serializar(entrada)
+        if len(contenido) <= disponible:
+            return contenido
+        recortada = dict(entrada, datos_extra={'truncado': True})
+        contenido = _serializar(recortada)
+        if len(contenido) > disponible:
+            # Búsqueda binaria del detalle más largo que entra (cada carácter
+            # ocupa al menos un byte, así que no pueden entrar más que `disponible`)
+            detalle = str(recortada.get('detalle', ''))
+            bajo, alto = 0, min(len(detalle), disponible)
+            while bajo < alto:
+                medio = (bajo + alto + 1) // 2
+                recortada['detalle'] = detalle[:medio]
+                if len(_serializar(recortada)) <= disponible:
+                    bajo = medio
+                else:
+                    alto = medio - 1
+            recortada['detalle'] = detalle[:bajo]
+            contenido = _serializar(recortada)
+        if len(contenido) > disponible:
+            # Ni sin detalle entra: solo el tipo y el nivel, o la marca de
+            # recorte (que entra en el tamaño mínimo de entrada)
+            contenido = _serializar({
+                'tipo_operacion': entrada.get('tipo_operacion'),
+                'nivel': entrada.get('nivel'),
+                'datos_extra': {'truncado': True}
+            })
+            if len(contenido) > disponible:
+                contenido = _serializar({'datos_extra': {'truncado': True}})
+        return contenido
+
+    def agregar(self, entrada: Dict):
+        contenido = self._codificar(entrada)
+        with self._lock, self._bloqueo_archivo():
+            secuencia, = _U64.unpack_from(self._mmap, _OFFSET_SECUENCIA)
+            inicio = self._cabecera + (secuencia % self._capacidad) * self._tamanio_entrada
+            fin = inicio + self._tamanio_entrada - _U64.size
+            # Invalidar la entrada, escribirla y publicarla (ver _leer_entrada)
+            _U64.pack_into(self._mmap, inicio, 0)
+            _U64.pack_into(self._mmap, fin, 0)
+            _U32.pack_into(self._mmap, inicio + _U64.size, len(contenido))
+            datos = inicio + _U64.size + _U32.size
+            self._mmap[datos:datos + len(contenido)] = contenido
+            _U64.pack_into(self._mmap, fin, secuencia + 1)
+            _U64.pack_into(self._mmap, inicio, secuencia + 1)
+            _U64.pack_into(self._mmap, _OFFSET_SECUENCIA, secuencia + 1)
+
+    def _leer_entrada(self, secuencia: int) -> Optional[Dict]:
+        """Lee la entrada con número de secuencia dado, o None si fue sobrescrita"""
+        inicio = self._cabecera + (secuencia % self._capacidad) * self._tamanio_entrada
+        fin = inicio + self._tamanio_entrada - _U64.size
+        if _U64.unpack_from(self._mmap, inicio)[0] != secuencia + 1:
+            return None
+        longitud, = _U32.unpack_from(self._mmap, inicio + _U64.size)
+        datos = inicio + _U64.size + _U32.size
+        contenido = self._mmap[datos:datos + longitud]
+        if _U64.unpack_from(self._mmap, fin)[0] != secuencia + 1:
+            return None
+        try:
+            return json.loads(contenido)
+        except ValueError:
+            return None
+
+    def total(self) -> int:
+        return _U64.unpack_from(self._mmap, _OFFSET_SECUENCIA)[0]
+
+    def entradas(self, limite: int = None) -> List[Dict]:
+        secuencia = self.total()
+        cantidad = min(secuencia, self._capacidad)
+        if limite:
+            cantidad = min(cantidad, limite)
+        entradas = []
+        for numero in range(secuencia - cantidad, secuencia):
+            entrada = self._leer_entrada(numero)
+            if entrada is not None:
+                entradas.append(entrada)
+        return entradas
+
+    def limpiar(self):
+        with self._lock, self._bloqueo_archivo():
+            self._locales = dict.fromkeys(self._tipos, 0)
+            for fila in range(self._max_procesos):
+                offset = self._offset_fila(fila) + _I64.size
+                self._mmap[offset:offset + self._contador.size] = bytes(self._contador.size)
+            # Invalidar las entradas existentes y reiniciar la secuencia
+            for numero in range(self._capacidad):
+                _U64.pack_into(self._mmap, self._cabecera + numero * self._tamanio_entrada, 0)
+            _U64.pack_into(self._mmap, _OFFSET_SECUENCIA, 0)
+
+def _serializar(entrada: Dict) -> bytes:
+    return json.dumps(entrada, ensure_ascii=False, default=str).encode('utf-8')
+
+def _proceso_vivo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
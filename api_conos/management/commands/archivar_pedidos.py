@@ -0,0 +1,53 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api_conos.archivo import archivar_lote, fecha_corte, obtener_configuracion_archivo
+from api_conos.logger import obtener_logger
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve los pedidos más antiguos que el horizonte configurado a tablas de '
+        'archivo mensuales, en lotes transaccionales (se puede interrumpir y reanudar)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizonte-dias', type=int,
+            help='Días que permanecen en la tabla principal (por defecto ARCHIVO_PEDIDOS["HORIZONTE_DIAS"])'
+        )
+        parser.add_argument('--lote', type=int, help='Pedidos por lote (por defecto ARCHIVO_PEDIDOS["LOTE"])')
+        parser.add_argument('--max-lotes', type=int, help='Detenerse después de N lotes')
+
+    def handle(self, *args, **options):
+        configuracion = obtener_configuracion_archivo()
+        lote = max(1, options['lote'] or configuracion['LOTE'])
+        if options['horizonte_dias'] is not None:
+            corte = timezone.localdate() - timedelta(days=options['horizonte_dias'])
+        else:
+            corte = fecha_corte()
+
+        self.stdout.write(f'Archivando pedidos anteriores a {corte.isoformat()}...')
+        inicio = time.perf_counter()
+        archivados = 0
+        lotes = 0
+        while options['max_lotes'] is None or lotes < options['max_lotes']:
+            movidos = archivar_lote(corte, lote)
+            if not movidos:
+                break
+            archivados += movidos
+            lotes += 1
+            self.stdout.write(f'  lote {lotes}: {movidos} pedidos ({archivados} en total)')
+        duracion = time.perf_counter() - inicio
+
+        obtener_logger().registrar_operacion(
+            tipo_operacion='archivado',
+            detalle=f'{archivados} pedidos archivados en {lotes} lotes',
+            datos_extra={'fecha_corte': corte.isoformat(), 'pedidos': archivados, 'lotes': lotes}
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{archivados} pedidos archivados en {duracion:.2f} s'
+        ))
@@ -0,0 +1,406 @@
+import http.client
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api_conos.catalogo import obtener_catalogo
+from api_conos.clientes import registrar_pedidos_cliente
+from api_conos.models import PedidoCono
+from api_conos.precios import construir_cono, crear_snapshot_precio
+
+NOMBRES = [
+    'Jorge', 'María', 'Luis', 'Ana', 'Carlos', 'Lucía', 'Pedro', 'Sofía',
+    'Diego', 'Valeria', 'Miguel', 'Camila', 'José', 'Daniela', 'Juan', 'Paola'
+]
+
+APELLIDOS = [
+    'Choque', 'Mamani', 'Quispe', 'Flores', 'Rojas', 'Vargas', 'Gutiérrez',
+    'Rodríguez', 'López', 'Pérez', 'Fernández', 'Castro', 'Torres', 'Ríos'
+]
+
+PATRON_ID = re.compile(r'/\d+/')
+
+
+def parsear_pesos(texto, opciones_validas):
+    """
+    Convierte una cadena 'Opcion=peso,Opcion=peso' en un diccionario de pesos
+
+    Args:
+        texto (str): Distribución en formato 'clave=peso' separada por comas
+        opciones_validas (list): Claves aceptadas
+
+    Returns:
+        dict: Pesos por opción (las opciones no indicadas tienen peso 0)
+    """
+    pesos = {opcion: 0.0 for opcion in opciones_validas}
+    for parte in texto.split(','):
+        if not parte.strip():
+            continue
+        clave, _, peso = parte.partition('=')
+        clave = clave.strip()
+        if clave not in pesos:
+            raise CommandError(
+                f"Opción '{clave}' no válida. Opciones válidas: {', '.join(opciones_validas)}"
+            )
+        try:
+            pesos[clave] = float(peso)
+        except ValueError:
+            raise CommandError(f"Peso inválido para '{clave}': {peso!r}")
+    if sum(pesos.values()) <= 0:
+        raise CommandError('La distribución debe tener al menos un peso positivo')
+    return pesos
+
+
+def muestrear_poisson(rng, media):
+    """Muestrea un entero con distribución de Poisson (algoritmo de Knuth)"""
+    limite = math.exp(-media)
+    k = 0
+    p = 1.0
+    while True:
+        p *= rng.random()
+        if p <= limite:
+            return k
+        k += 1
+
+
+def percentil(valores_ordenados, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not valores_ordenados:
+        return 0.0
+    rango = max(1, math.ceil(p / 100 * len(valores_ordenados)))
+    return valores_ordenados[rango - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera carga sintética: siembra pedidos con distribuciones configurables '
+        'y reproduce mezclas de llamadas a la API registradas en JSONL'
+    )
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='modo', required=True)
+
+        sembrar = subparsers.add_parser('sembrar', help='Inserta pedidos sintéticos en PedidoCono')
+        sembrar.add_argument('--pedidos', type=int, default=1000)
+        sembrar.add_argument(
+            '--variantes', default='Carnívoro=5,Vegetariano=3,Saludable=2',
+            help="Pesos por variante, p. ej. 'Carnívoro=5,Vegetariano=3,Saludable=2'"
+        )
+        sembrar.add_argument(
+            '--tamanios', default='Pequeño=2,Mediano=5,Grande=3',
+            help="Pesos por tamaño, p. ej. 'Pequeño=2,Mediano=5,Grande=3'"
+        )
+        sembrar.add_argument(
+            '--toppings-media', type=float, default=2.0,
+            help='Media (Poisson) del número de toppings por pedido'
+        )
+        sembrar.add_argument('--clientes', type=int, default=500, help='Tamaño del universo de clientes')
+        sembrar.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Exponente de Zipf para sesgar los clientes frecuentes (0 = uniforme)'
+        )
+        sembrar.add_argument(
+            '--dias', type=int, default=0,
+            help='Reparte las fechas de pedido uniformemente en los últimos N días'
+        )
+        sembrar.add_argument('--lote', type=int, default=1000)
+        sembrar.add_argument('--semilla', type=int, default=None)
+
+        mezcla = subparsers.add_parser('mezcla', help='Genera una mezcla sintética de llamadas en JSONL')
+        mezcla.add_argument('--archivo', required=True)
+        mezcla.add_argument('--peticiones', type=int, default=1000)
+        mezcla.add_argument(
+            '--proporcion-escritura', type=float, default=0.2,
+            help='Fracción de peticiones POST de creación de pedidos'
+        )
+        mezcla.add_argument('--semilla', type=int, default=None)
+
+        reproducir = subparsers.add_parser('reproducir', help='Reproduce un JSONL de llamadas contra un servidor')
+        reproducir.add_argument('--archivo', required=True)
+        reproducir.add_argument('--url', default='http://127.0.0.1:8000')
+        reproducir.add_argument('--concurrencia', type=int, default=8)
+        reproducir.add_argument('--repeticiones', type=int, default=1)
+        reproducir.add_argument('--timeout', type=float, default=10.0)
+        reproducir.add_argument('--semilla', type=int, default=None)
+
+    def handle(self, *args, **options):
+        modo = options['modo']
+        if modo == 'sembrar':
+            self._sembrar(options)
+        elif modo == 'mezcla':
+            self._generar_mezcla(options)
+        elif modo == 'reproducir':
+            self._reproducir(options)
+
+    # ------------------------------------------------------------------
+    # Siembra de pedidos
+    # ------------------------------------------------------------------
+
+    def _generar_clientes(self, rng, total):
+        """Genera nombres de clientes únicos a partir de nombres y apellidos"""
+        clientes = []
+        vistos = set()
+        while len(clientes) < total:
+            nombre = f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}"
+            if nombre in vistos:
+                nombre = f"{nombre} {len(clientes)}"
+            vistos.add(nombre)
+            clientes.append(nombre)
+        return clientes
+
+    def _crear_pedido_aleatorio(self, rng, catalogo, variantes, pesos_variantes, tamanios,
+                                pesos_tamanios, clientes, pesos_clientes, media_toppings):
+        """Crea una instancia (sin guardar) de PedidoCono con valores muestreados"""
+        n_toppings = min(muestrear_poisson(rng, media_toppings), len(PedidoCono.TOPPINGS_PERMITIDOS))
+        variante = rng.choices(variantes, weights=pesos_variantes)[0]
+        tamanio = rng.choices(tamanios, weights=pesos_tamanios)[0]
+        toppings = rng.sample(PedidoCono.TOPPINGS_PERMITIDOS, n_toppings)
+        construido = construir_cono(variante, tamanio, toppings, catalogo)
+        return PedidoCono(
+            cliente=rng.choices(clientes, cum_weights=pesos_clientes)[0],
+            variante=variante,
+            tamanio_cono=tamanio,
+            toppings=toppings,
+            precio_final=construido.precio_total,
+            snapshot_precio=crear_snapshot_precio(variante, construido, catalogo),
+        )
+
+    def _sembrar(self, options):
+        rng = random.Random(options['semilla'])
+        total = options['pedidos']
+        lote = max(1, options['lote'])
+
+        pesos_var = parsear_pesos(options['variantes'], [v for v, _ in PedidoCono.VARIANTES_CHOICES])
+        pesos_tam = parsear_pesos(options['tamanios'], [t for t, _ in PedidoCono.TAMANIOS_CHOICES])
+        variantes, pesos_variantes = list(pesos_var), list(pesos_var.values())
+        tamanios, pesos_tamanios = list(pesos_tam), list(pesos_tam.values())
+
+        clientes = self._generar_clientes(rng, max(1, options['clientes']))
+        acumulado = 0.0
+        pesos_clientes = []
+        for rango in range(1, len(clientes) + 1):
+            acumulado += 1.0 / (rango ** options['zipf'])
+            pesos_clientes.append(acumulado)
+
+        catalogo = obtener_catalogo()
+        inicio = time.perf_counter()
+        creados = 0
+        ids_creados = []
+        while creados < total:
+            tamanio_lote = min(lote, total - creados)
+            pedidos = [
+                self._crear_pedido_aleatorio(
+                    rng, catalogo, variantes, pesos_variantes, tamanios, pesos_tamanios,
+                    clientes, pesos_clientes, options['toppings_media']
+                )
+                for _ in range(tamanio_lote)
+            ]
+            # Los valores se generan desde las opciones permitidas, por lo que
+            # no es necesario pasar por save()/clean() fila a fila
+            with transaction.atomic():
+                pedidos = PedidoCono.objects.bulk_create(pedidos)
+                registrar_pedidos_cliente(pedidos)
+            if options['dias'] > 0:
+                ids_creados.extend(p.id for p in pedidos)
+            creados += tamanio_lote
+
+        if options['dias'] > 0:
+            self._repartir_fechas(rng, ids_creados, options['dias'], lote)
+
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{creados} pedidos sembrados en {duracion:.2f}s '
+            f'({creados / duracion if duracion else 0:.0f} pedidos/s)'
+        ))
+
+    def _repartir_fechas(self, rng, ids, dias, lote):
+        """Reasigna fechas de pedido en los últimos N días (auto_now_add fija la fecha de hoy)"""
+        hoy = timezone.localdate()
+        por_fecha = defaultdict(list)
+        for pedido_id in ids:
+            por_fecha[hoy - timedelta(days=rng.randrange(dias))].append(pedido_id)
+        for fecha, ids_fecha in por_fecha.items():
+            for i in range(0, len(ids_fecha), lote):
+                PedidoCono.objects.filter(id__in=ids_fecha[i:i + lote]).update(fecha_pedido=fecha)
+
+    # ------------------------------------------------------------------
+    # Mezcla sintética de llamadas
+    # ------------------------------------------------------------------
+
+    def _generar_mezcla(self, options):
+        rng = random.Random(options['semilla'])
+        proporcion_escritura = options['proporcion_escritura']
+        lecturas = [
+            ('listar', 'GET', '/api/pedidos_conos/', 50),
+            ('detalle', 'GET', '/api/pedidos_conos/{id}/', 20),
+            ('detalle_construccion', 'GET', '/api/pedidos_conos/{id}/detalle_construccion/', 10),
+            ('tipos_disponibles', 'GET', '/api/pedidos_conos/tipos_disponibles/', 8),
+            ('toppings_disponibles', 'GET', '/api/pedidos_conos/toppings_disponibles/', 8),
+            ('estadisticas', 'GET', '/api/pedidos_conos/estadisticas/', 4),
+        ]
+        pesos_lectura = [peso for *_, peso in lecturas]
+
+        with open(options['archivo'], 'w', encoding='utf-8') as archivo:
+            for _ in range(options['peticiones']):
+                if rng.random() < proporcion_escritura:
+                    n_toppings = min(muestrear_poisson(rng, 2.0), len(PedidoCono.TOPPINGS_PERMITIDOS))
+                    registro = {
+                        'endpoint': 'crear',
+                        'metodo': 'POST',
+                        'ruta': '/api/pedidos_conos/',
+                        'cuerpo': {
+                            'cliente': f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}",
+                            'variante': rng.choice(PedidoCono.VARIANTES_CHOICES)[0],
+                            'tamanio_cono': rng.choice(PedidoCono.TAMANIOS_CHOICES)[0],
+                            'toppings': rng.sample(PedidoCono.TOPPINGS_PERMITIDOS, n_toppings),
+                        }
+                    }
+                else:
+                    endpoint, metodo, ruta, _ = rng.choices(lecturas, weights=pesos_lectura)[0]
+                    registro = {'endpoint': endpoint, 'metodo': metodo, 'ruta': ruta}
+                archivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Mezcla de {options['peticiones']} peticiones escrita en {options['archivo']}"
+        ))
+
+    # ------------------------------------------------------------------
+    # Reproducción de tráfico
+    # ------------------------------------------------------------------
+
+    def _cargar_mezcla(self, ruta_archivo):
+        peticiones = []
+        try:
+            with open(ruta_archivo, encoding='utf-8') as archivo:
+                for numero, linea in enumerate(archivo, start=1):
+                    linea = linea.strip()
+                    if not linea:
+                        continue
+                    try:
+                        registro = json.loads(linea)
+                    except json.JSONDecodeError as e:
+                        raise CommandError(f'Línea {numero} inválida en {ruta_archivo}: {e}')
+                    if 'ruta' not in registro:
+                        raise CommandError(f"Línea {numero}: falta el campo 'ruta'")
+                    registro.setdefault('metodo', 'GET')
+                    registro.setdefault(
+                        'endpoint',
+                        f"{registro['metodo']} {PATRON_ID.sub('/{id}/', registro['ruta'])}"
+                    )
+                    peticiones.append(registro)
+        except OSError as e:
+            raise CommandError(f'No se pudo leer {ruta_archivo}: {e}')
+        return peticiones
+
+    def _ejecutar_peticion(self, base_url, registro, ids, rng, lock_rng, timeout):
+        """Ejecuta una petición y retorna (endpoint, exito, latencia_segundos)"""
+        ruta = registro['ruta']
+        if '{id}' in ruta:
+            with lock_rng:
+                ruta = ruta.replace('{id}', str(rng.choice(ids)))
+
+        datos = None
+        cabeceras = {'Accept': 'application/json'}
+        if registro.get('cuerpo') is not None:
+            datos = json.dumps(registro['cuerpo']).encode('utf-8')
+            cabeceras['Content-Type'] = 'application/json'
+        cabeceras.update(registro.get('cabeceras', {}))
+
+        peticion = urllib.request.Request(
+            base_url + ruta, data=datos, headers=cabeceras, method=registro['metodo']
+        )
+        inicio = time.perf_counter()
+        try:
+            with urllib.request.urlopen(peticion, timeout=timeout) as respuesta:
+                respuesta.read()
+                exito = respuesta.status < 400
+        except urllib.error.HTTPError as e:
+            e.read()
+            exito = False
+        except (OSError, http.client.HTTPException):
+            # URLError y los cortes de conexión son OSError; las respuestas
+            # truncadas o mal formadas, HTTPException
+            exito = False
+        return registro['endpoint'], exito, time.perf_counter() - inicio
+
+    def _reproducir(self, options):
+        peticiones = self._cargar_mezcla(options['archivo']) * max(1, options['repeticiones'])
+        if not peticiones:
+            raise CommandError('La mezcla no contiene peticiones')
+
+        base_url = options['url'].rstrip('/')
+        rng = random.Random(options['semilla'])
+        lock_rng = threading.Lock()
+        ids = list(PedidoCono.objects.values_list('id', flat=True)[:10000])
+        if not ids:
+            # Sin pedidos no se pueden formar las rutas con {id}: se omiten en
+            # lugar de contarlas como errores de 0 ms
+            omitidas = Counter(registro['endpoint'] for registro in peticiones if '{id}' in registro['ruta'])
+            if omitidas:
+                self.stdout.write(self.style.WARNING(
+                    f'Se omiten {sum(omitidas.values())} peticiones que necesitan el id de un '
+                    f'pedido y la base de datos no tiene pedidos (ver generar_carga sembrar):'
+                ))
+                for endpoint, cantidad in sorted(omitidas.items()):
+                    self.stdout.write(f'  {endpoint:<28} {cantidad:>7}')
+                peticiones = [registro for registro in peticiones if '{id}' not in registro['ruta']]
+                if not peticiones:
+                    raise CommandError('Ninguna petición de la mezcla se puede reproducir sin pedidos')
+
+        self.stdout.write(
+            f"Reproduciendo {len(peticiones)} peticiones contra {base_url} "
+            f"con concurrencia {options['concurrencia']}..."
+        )
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, options['concurrencia'])) as executor:
+            resultados = list(executor.map(
+                lambda registro: self._ejecutar_peticion(
+                    base_url, registro, ids, rng, lock_rng, options['timeout']
+                ),
+                peticiones
+            ))
+        duracion = time.perf_counter() - inicio
+
+        self._reportar(resultados, duracion)
+
+    def _reportar(self, resultados, duracion):
+        por_endpoint = defaultdict(lambda: {'latencias': [], 'errores': 0})
+        for endpoint, exito, latencia in resultados:
+            por_endpoint[endpoint]['latencias'].append(latencia)
+            if not exito:
+                por_endpoint[endpoint]['errores'] += 1
+
+        total = len(resultados)
+        errores = sum(datos['errores'] for datos in por_endpoint.values())
+        self.stdout.write(
+            f'\nTotal: {total} peticiones en {duracion:.2f}s - '
+            f'{total / duracion if duracion else 0:.1f} req/s - '
+            f'errores {errores} ({100 * errores / total:.2f}%)\n'
+        )
+        self.stdout.write(
+            f"{'endpoint':<28} {'n':>7} {'req/s':>8} {'error%':>7} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        for endpoint in sorted(por_endpoint):
+            datos = por_endpoint[endpoint]
+            latencias = sorted(datos['latencias'])
+            n = len(latencias)
+            self.stdout.write(
+                f'{endpoint:<28} {n:>7} {n / duracion if duracion else 0:>8.1f} '
+                f"{100 * datos['errores'] / n:>7.2f} "
+                f'{percentil(latencias, 50) * 1000:>8.2f} '
+                f'{percentil(latencias, 95) * 1000:>8.2f} '
+                f'{percentil(latencias, 99) * 1000:>8.2f}'
+            )
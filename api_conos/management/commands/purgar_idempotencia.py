@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api_conos.idempotencia import obtener_configuracion_idempotencia, purgar_claves_expiradas
+
+
+class Command(BaseCommand):
+    help = 'Borra las claves de idempotencia cuyo TTL ya venció'
+
+    def handle(self, *args, **options):
+        borradas = purgar_claves_expiradas()
+        ttl = obtener_configuracion_idempotencia()['TTL_S']
+        self.stdout.write(self.style.SUCCESS(
+            f'{borradas} claves de idempotencia borradas (TTL {ttl} s)'
+        ))
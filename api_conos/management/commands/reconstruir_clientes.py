@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api_conos.clientes import reconstruir_resumenes
+from api_conos.logger import obtener_logger
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula desde cero los totales de por vida de cada cliente (ResumenCliente) '
+        'con los pedidos y el archivo (la migración 0008 ya los carga al desplegar)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sin-archivo', action='store_true', help='No recorrer las particiones del archivo')
+        parser.add_argument('--lote', type=int, default=1000, help='Resúmenes por INSERT')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        totales = reconstruir_resumenes(not options['sin_archivo'], options['lote'])
+
+        total_pedidos = sum(pedidos for pedidos, _ in totales.values())
+        obtener_logger().registrar_operacion(
+            tipo_operacion='resumen_clientes',
+            detalle=f'Totales de {len(totales)} clientes reconstruidos con {total_pedidos} pedidos',
+            datos_extra={'clientes': len(totales), 'pedidos': total_pedidos}
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Totales de {len(totales)} clientes reconstruidos con {total_pedidos} pedidos '
+            f'en {time.perf_counter() - inicio:.2f} s'
+        ))
@@ -0,0 +1,58 @@
+import time
+from datetime import datetime, time as hora
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api_conos.archivo import queryset_particion
+from api_conos.logger import obtener_logger
+from api_conos.models import ParticionArchivo, PedidoCono
+from api_conos.tendencias import TendenciasPedidos, obtener_configuracion_tendencias, reemplazar_base
+
+CAMPOS = ('cliente', 'variante', 'tamanio_cono', 'toppings', 'fecha_pedido')
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye las tendencias acumuladas (tendencias-base.json) recorriendo los '
+        'pedidos y el archivo; ejecutar con los workers detenidos o en el primer despliegue'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sin-archivo', action='store_true', help='No recorrer las particiones del archivo')
+
+    def _registrar(self, tendencias, queryset):
+        """Registra los pedidos de un queryset agrupados por día (a las 00:00 hora local)"""
+        total = 0
+        pedidos = queryset.only(*CAMPOS).order_by('fecha_pedido').iterator(chunk_size=2000)
+        for fecha, grupo in groupby(pedidos, key=lambda pedido: pedido.fecha_pedido):
+            grupo = list(grupo)
+            instante = timezone.make_aware(datetime.combine(fecha, hora.min)).timestamp()
+            tendencias.registrar(grupo, instante=instante)
+            total += len(grupo)
+        return total
+
+    def handle(self, *args, **options):
+        configuracion = obtener_configuracion_tendencias()
+        tendencias = TendenciasPedidos(configuracion)
+        inicio = time.perf_counter()
+
+        total = self._registrar(tendencias, PedidoCono.objects.all())
+        if not options['sin_archivo']:
+            for particion in ParticionArchivo.objects.all():
+                total += self._registrar(tendencias, queryset_particion(particion))
+
+        vivos = reemplazar_base(tendencias, configuracion)
+        for ruta in vivos:
+            self.stdout.write(self.style.WARNING(
+                f'{ruta} pertenece a un proceso en ejecución: sus pedidos se cuentan dos veces'
+            ))
+        obtener_logger().registrar_operacion(
+            tipo_operacion='tendencias',
+            detalle=f'Tendencias reconstruidas con {total} pedidos',
+            datos_extra={'pedidos': total, 'directorio': str(configuracion['DIRECTORIO'])}
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Tendencias reconstruidas con {total} pedidos en {time.perf_counter() - inicio:.2f} s'
+        ))
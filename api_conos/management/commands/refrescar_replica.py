@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api_conos.replica import obtener_configuracion_replica, refrescar_replica
+
+
+class Command(BaseCommand):
+    help = (
+        'Refresca la réplica de lectura copiando la base principal con la API de '
+        'backup de SQLite, una vez o de forma periódica'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo', type=float,
+            help='Segundos entre copias (por defecto REPLICA_LECTURA["INTERVALO_S"])'
+        )
+        parser.add_argument('--una-vez', action='store_true', help='Hace una sola copia y termina')
+        parser.add_argument('--paginas', type=int, default=4096, help='Páginas copiadas por paso')
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo']
+        if intervalo is None:
+            intervalo = obtener_configuracion_replica()['INTERVALO_S']
+
+        while True:
+            try:
+                resultado = refrescar_replica(paginas=options['paginas'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(
+                f'Réplica refrescada en {resultado["duracion_s"]:.3f} s '
+                f'({resultado["tamanio_bytes"] / 1024:.0f} KiB)'
+            )
+            if options['una_vez']:
+                return
+            time.sleep(max(0.0, intervalo - resultado['duracion_s']))
@@ -0,0 +1,115 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api_conos.catalogo import CatalogoConos
+from api_conos.clientes import aplicar_totales, diferencia_totales, totales_por_cliente
+from api_conos.logger import obtener_logger
+from api_conos.models import PedidoCono
+from api_conos.precios import repreciar_filas
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula en bloque el precio y el snapshot de precios de los pedidos con '
+        'el catálogo vigente, en bloques procesados en paralelo'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Fecha de pedido mínima (AAAA-MM-DD)')
+        parser.add_argument('--hasta', help='Fecha de pedido máxima (AAAA-MM-DD)')
+        parser.add_argument(
+            '--solo-sin-snapshot', action='store_true',
+            help='Solo pedidos que aún no tienen snapshot de precios'
+        )
+        parser.add_argument('--bloque', type=int, default=2000, help='Pedidos por bloque')
+        parser.add_argument('--procesos', type=int, default=4, help='Procesos de cálculo en paralelo')
+        parser.add_argument(
+            '--simular', action='store_true',
+            help='Calcula los precios sin guardar los cambios'
+        )
+
+    def handle(self, *args, **options):
+        bloque = max(1, options['bloque'])
+        procesos = max(1, options['procesos'])
+
+        queryset = PedidoCono.objects.all()
+        if options['desde']:
+            queryset = queryset.filter(fecha_pedido__gte=options['desde'])
+        if options['hasta']:
+            queryset = queryset.filter(fecha_pedido__lte=options['hasta'])
+        if options['solo_sin_snapshot']:
+            queryset = queryset.filter(snapshot_precio__isnull=True)
+
+        # Recargar el catálogo desde la base de datos antes de repreciar
+        catalogo = CatalogoConos.reconstruir()
+        self.stdout.write(f'Repreciando con el catálogo v{catalogo.version}...')
+
+        inicio = time.perf_counter()
+        actualizados = 0
+        omitidos = 0
+        ultimo_id = 0
+        # Se inicializa Django en cada proceso por si la plataforma usa 'spawn'
+        with ProcessPoolExecutor(max_workers=procesos, initializer=django.setup) as executor:
+            while True:
+                # Paginación por clave: cada ronda lee hasta `procesos` bloques
+                filas = list(
+                    queryset.filter(id__gt=ultimo_id)
+                    .order_by('id')
+                    .values_list('id', 'variante', 'tamanio_cono', 'toppings')[:bloque * procesos]
+                )
+                if not filas:
+                    break
+                ultimo_id = filas[-1][0]
+
+                bloques = [filas[i:i + bloque] for i in range(0, len(filas), bloque)]
+                for filas_bloque, resultados in zip(
+                    bloques, executor.map(repreciar_filas, [catalogo] * len(bloques), bloques)
+                ):
+                    omitidos += len(filas_bloque) - len(resultados)
+                    if not options['simular']:
+                        self._guardar(resultados)
+                    actualizados += len(resultados)
+
+                self.stdout.write(f'  {actualizados} pedidos repreciados (último id {ultimo_id})')
+
+        duracion = time.perf_counter() - inicio
+        if actualizados and not options['simular']:
+            obtener_logger().registrar_operacion(
+                tipo_operacion='repreciado',
+                detalle=f'{actualizados} pedidos repreciados con el catálogo v{catalogo.version}',
+                datos_extra={
+                    'pedidos_actualizados': actualizados,
+                    'pedidos_omitidos': omitidos,
+                    'version_catalogo': catalogo.version
+                }
+            )
+
+        if omitidos:
+            self.stderr.write(f'{omitidos} pedidos omitidos por variante o toppings inválidos')
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Simulados' if options['simular'] else 'Actualizados'} {actualizados} pedidos "
+            f'en {duracion:.2f}s ({actualizados / duracion if duracion else 0:.0f} pedidos/s)'
+        ))
+
+    def _guardar(self, resultados):
+        """Guarda un bloque de precios recalculados y el cambio de gasto de sus clientes en una transacción"""
+        if not resultados:
+            return
+        pedidos = [
+            PedidoCono(id=pedido_id, precio_final=precio_final, snapshot_precio=snapshot)
+            for pedido_id, precio_final, snapshot in resultados
+        ]
+        try:
+            with transaction.atomic():
+                bloque = PedidoCono.objects.filter(id__in=[pedido.id for pedido in pedidos])
+                antes = totales_por_cliente(bloque)
+                PedidoCono.objects.bulk_update(
+                    pedidos, ['precio_final', 'snapshot_precio'], batch_size=500
+                )
+                aplicar_totales(diferencia_totales(totales_por_cliente(bloque), antes))
+        except Exception as e:
+            raise CommandError(f'Error al guardar el bloque de pedidos: {e}')
@@ -0,0 +1,166 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api_conos.cocina import PedidoCocina, flujo_registrado, obtener_configuracion_cocina, simular
+from api_conos.management.commands.generar_carga import muestrear_poisson, parsear_pesos
+from api_conos.models import PedidoCono
+
+
+def flujo_sintetico(rng, pedidos, tasa_por_minuto, variantes, tamanios, toppings_media):
+    """
+    Llegadas de Poisson (intervalos exponenciales) con la composición de generar_carga
+
+    Returns:
+        list: PedidoCocina con la llegada en segundos desde el inicio
+    """
+    nombres_variantes, pesos_variantes = zip(*variantes.items())
+    nombres_tamanios, pesos_tamanios = zip(*tamanios.items())
+    flujo = []
+    llegada = 0.0
+    for numero in range(1, pedidos + 1):
+        llegada += rng.expovariate(tasa_por_minuto / 60)
+        cantidad = min(muestrear_poisson(rng, toppings_media), len(PedidoCono.TOPPINGS_PERMITIDOS))
+        flujo.append(PedidoCocina(
+            numero,
+            rng.choices(nombres_variantes, pesos_variantes)[0],
+            rng.choices(nombres_tamanios, pesos_tamanios)[0],
+            frozenset(rng.sample(PedidoCono.TOPPINGS_PERMITIDOS, cantidad)),
+            llegada
+        ))
+    return flujo
+
+
+def leer_flujo(ruta):
+    """Lee un flujo JSONL: una línea por pedido con llegada_s, variante, tamanio_cono y toppings"""
+    flujo = []
+    with open(ruta, encoding='utf-8') as archivo:
+        for numero, linea in enumerate(archivo, start=1):
+            if not linea.strip():
+                continue
+            try:
+                datos = json.loads(linea)
+                flujo.append(PedidoCocina(
+                    datos.get('id', numero), datos['variante'], datos['tamanio_cono'],
+                    frozenset(datos.get('toppings', ())), float(datos['llegada_s'])
+                ))
+            except (ValueError, KeyError, TypeError) as e:
+                raise CommandError(f'{ruta}:{numero}: pedido inválido ({e})')
+    return flujo
+
+
+def guardar_flujo(ruta, flujo):
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        for pedido in flujo:
+            archivo.write(json.dumps({
+                'id': pedido.id,
+                'llegada_s': round(pedido.llegada, 3),
+                'variante': pedido.variante,
+                'tamanio_cono': pedido.tamanio,
+                'toppings': sorted(pedido.toppings)
+            }, ensure_ascii=False) + '\n')
+
+
+class Command(BaseCommand):
+    help = (
+        'Simula la cocina con un flujo de pedidos sintético o registrado y compara '
+        'la preparación por lotes con el orden de llegada (FIFO)'
+    )
+
+    def add_arguments(self, parser):
+        origen = parser.add_mutually_exclusive_group()
+        origen.add_argument('--archivo', help='Flujo JSONL (llegada_s, variante, tamanio_cono, toppings)')
+        origen.add_argument(
+            '--registrado', action='store_true',
+            help='Reproduce las llegadas registradas en la cola de cocina (PreparacionCocina)'
+        )
+        parser.add_argument('--desde', help='Con --registrado: instante inicial (ISO 8601)')
+        parser.add_argument('--hasta', help='Con --registrado: instante final (ISO 8601)')
+
+        parser.add_argument('--pedidos', type=int, default=2000, help='Pedidos del flujo sintético')
+        parser.add_argument(
+            '--tasa', type=float, default=1.5, help='Llegadas por minuto del flujo sintético'
+        )
+        parser.add_argument('--variantes', default='Carnívoro=5,Vegetariano=3,Saludable=2')
+        parser.add_argument('--tamanios', default='Pequeño=2,Mediano=5,Grande=3')
+        parser.add_argument('--toppings-media', type=float, default=2.0)
+        parser.add_argument('--semilla', type=int, default=None)
+        parser.add_argument('--guardar-flujo', help='Guarda el flujo sintético en JSONL para repetir la simulación')
+
+        parser.add_argument('--estaciones', type=int, help='Sobrescribe COCINA["ESTACIONES"]')
+        parser.add_argument('--max-lote', type=int, help='Sobrescribe COCINA["MAX_LOTE"]')
+        parser.add_argument('--max-espera', type=float, help='Sobrescribe COCINA["MAX_ESPERA_S"]')
+        parser.add_argument('--json', action='store_true', help='Imprime los resultados en JSON')
+
+    def handle(self, *args, **options):
+        configuracion = obtener_configuracion_cocina()
+        for opcion, clave in (('estaciones', 'ESTACIONES'), ('max_lote', 'MAX_LOTE'), ('max_espera', 'MAX_ESPERA_S')):
+            if options[opcion] is not None:
+                if options[opcion] <= 0:
+                    raise CommandError(f'--{opcion.replace("_", "-")} debe ser mayor que 0')
+                configuracion[clave] = options[opcion]
+
+        flujo = self._flujo(options)
+        if not flujo:
+            raise CommandError('El flujo no tiene pedidos')
+
+        resultados = [simular(flujo, configuracion, politica) for politica in ('fifo', 'lotes')]
+        if options['json']:
+            self.stdout.write(json.dumps(resultados, indent=2, ensure_ascii=False))
+            return
+
+        duracion = max(pedido.llegada for pedido in flujo) - min(pedido.llegada for pedido in flujo)
+        self.stdout.write(
+            f'{len(flujo)} pedidos en {duracion / 60:.1f} min '
+            f'({len(flujo) / duracion * 3600 if duracion else 0:.1f} llegadas/h), '
+            f'{configuracion["ESTACIONES"]} estaciones, lotes de hasta {configuracion["MAX_LOTE"]}, '
+            f'espera máxima {configuracion["MAX_ESPERA_S"]} s'
+        )
+        filas = (
+            ('pedidos por hora', lambda r: r['pedidos_por_hora']),
+            ('pedidos por lote', lambda r: r['pedidos_por_lote']),
+            ('utilización', lambda r: r['utilizacion']),
+            ('espera p50 (s)', lambda r: r['espera_s']['p50']),
+            ('espera p95 (s)', lambda r: r['espera_s']['p95']),
+            ('espera p99 (s)', lambda r: r['espera_s']['p99']),
+            ('espera máx (s)', lambda r: r['espera_s']['max']),
+            ('en cocina p50 (s)', lambda r: r['en_cocina_s']['p50']),
+            ('en cocina p95 (s)', lambda r: r['en_cocina_s']['p95']),
+            ('en cocina p99 (s)', lambda r: r['en_cocina_s']['p99']),
+            ('sobre espera máx', lambda r: r['sobre_max_espera']),
+        )
+        self.stdout.write(f'  {"":<20} {"fifo":>12} {"lotes":>12}')
+        for nombre, valor in filas:
+            self.stdout.write(f'  {nombre:<20} {valor(resultados[0]):>12} {valor(resultados[1]):>12}')
+
+    def _flujo(self, options):
+        if options['archivo']:
+            return leer_flujo(options['archivo'])
+        if options['registrado']:
+            limites = {}
+            for nombre in ('desde', 'hasta'):
+                if options[nombre]:
+                    instante = parse_datetime(options[nombre])
+                    if instante is None:
+                        raise CommandError(f'--{nombre}: se esperaba un instante ISO 8601')
+                    if timezone.is_naive(instante):
+                        instante = timezone.make_aware(instante)
+                    limites[nombre] = instante
+            return flujo_registrado(**limites)
+
+        if options['pedidos'] <= 0 or options['tasa'] <= 0:
+            raise CommandError('--pedidos y --tasa deben ser mayores que 0')
+        flujo = flujo_sintetico(
+            random.Random(options['semilla']),
+            options['pedidos'],
+            options['tasa'],
+            parsear_pesos(options['variantes'], [v for v, _ in PedidoCono.VARIANTES_CHOICES]),
+            parsear_pesos(options['tamanios'], [t for t, _ in PedidoCono.TAMANIOS_CHOICES]),
+            options['toppings_media']
+        )
+        if options['guardar_flujo']:
+            guardar_flujo(options['guardar_flujo'], flujo)
+        return flujo
@@ -0,0 +1,114 @@
+# Generated by Django 5.2.3 on 2026-10-18 23:53
+
+from django.db import migrations, models
+
+PRECIOS_VARIANTES = [
+    ('Carnívoro', 18.0),
+    ('Vegetariano', 15.0),
+    ('Saludable', 16.0),
+]
+
+MULTIPLICADORES_TAMANIO = [
+    ('Pequeño', 0.8),
+    ('Mediano', 1.0),
+    ('Grande', 1.3),
+]
+
+PRECIOS_TOPPINGS = [
+    ('queso_extra', 2.5),
+    ('papas_al_hilo', 3.0),
+    ('salchicha_extra', 4.0),
+    ('bacon', 4.5),
+    ('cebolla_caramelizada', 2.0),
+    ('guacamole', 3.5),
+    ('jalapeños', 1.5),
+    ('tomate_cherry', 2.0),
+    ('aguacate', 3.0),
+    ('pollo_desmenuzado', 4.0),
+    ('champiñones', 2.5),
+    ('pimiento_asado', 2.0),
+    ('salsa_chipotle', 1.0),
+    ('salsa_ranch', 1.0),
+    ('salsa_barbacoa', 1.0),
+]
+
+
+def cargar_catalogo_inicial(apps, schema_editor):
+    """Carga en la base de datos los precios que antes estaban en el código"""
+    PrecioVariante = apps.get_model('api_conos', 'PrecioVariante')
+    MultiplicadorTamanio = apps.get_model('api_conos', 'MultiplicadorTamanio')
+    PrecioTopping = apps.get_model('api_conos', 'PrecioTopping')
+    VersionCatalogo = apps.get_model('api_conos', 'VersionCatalogo')
+
+    PrecioVariante.objects.bulk_create(
+        [PrecioVariante(variante=v, precio_base=p) for v, p in PRECIOS_VARIANTES]
+    )
+    MultiplicadorTamanio.objects.bulk_create(
+        [MultiplicadorTamanio(tamanio=t, multiplicador=m) for t, m in MULTIPLICADORES_TAMANIO]
+    )
+    PrecioTopping.objects.bulk_create(
+        [PrecioTopping(topping=t, precio=p) for t, p in PRECIOS_TOPPINGS]
+    )
+    VersionCatalogo.objects.create(pk=1, version=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_conos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MultiplicadorTamanio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tamanio', models.CharField(max_length=20, unique=True)),
+                ('multiplicador', models.FloatField()),
+            ],
+            options={
+                'verbose_name': 'Multiplicador de Tamaño',
+                'verbose_name_plural': 'Multiplicadores de Tamaño',
+                'ordering': ['multiplicador'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PrecioTopping',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topping', models.CharField(max_length=50, unique=True)),
+                ('precio', models.FloatField()),
+            ],
+            options={
+                'verbose_name': 'Precio de Topping',
+                'verbose_name_plural': 'Precios de Toppings',
+                'ordering': ['topping'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PrecioVariante',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('variante', models.CharField(max_length=20, unique=True)),
+                ('precio_base', models.FloatField()),
+            ],
+            options={
+                'verbose_name': 'Precio de Variante',
+                'verbose_name_plural': 'Precios de Variantes',
+                'ordering': ['variante'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VersionCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=1)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Versión del Catálogo',
+                'verbose_name_plural': 'Versión del Catálogo',
+            },
+        ),
+        migrations.RunPython(cargar_catalogo_inicial, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 23:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_conos', '0002_catalogo_precios'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedidocono',
+            name='precio_final',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='pedidocono',
+            name='snapshot_precio',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-19 00:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_conos', '0003_snapshot_precio_pedido'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClaveIdempotencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=255, unique=True)),
+                ('huella', models.CharField(max_length=64)),
+                ('codigo_estado', models.PositiveSmallIntegerField(null=True)),
+                ('respuesta', models.JSONField(null=True)),
+                ('creada', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('pedido', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api_conos.pedidocono')),
+            ],
+            options={
+                'verbose_name': 'Clave de Idempotencia',
+                'verbose_name_plural': 'Claves de Idempotencia',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-19 00:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_conos', '0004_claves_idempotencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticionArchivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(unique=True)),
+                ('tabla', models.CharField(max_length=63, unique=True)),
+                ('fecha_min', models.DateField()),
+                ('fecha_max', models.DateField()),
+                ('id_min', models.BigIntegerField()),
+                ('id_max', models.BigIntegerField()),
+                ('total_pedidos', models.PositiveIntegerField(default=0)),
+                ('resumen', models.JSONField(default=dict)),
+                ('actualizada', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Partición de Archivo',
+                'verbose_name_plural': 'Particiones de Archivo',
+                'ordering': ['mes'],
+            },
+        ),
+    ]
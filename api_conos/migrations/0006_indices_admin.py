@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-19 00:35
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_conos', '0005_particiones_archivo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedidocono',
+            index=models.Index(fields=['fecha_pedido', 'id'], name='pedido_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedidocono',
+            index=models.Index(fields=['variante', 'fecha_pedido', 'id'], name='pedido_variante_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedidocono',
+            index=models.Index(fields=['tamanio_cono', 'fecha_pedido', 'id'], name='pedido_tamanio_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedidocono',
+            index=models.Index(django.db.models.functions.text.Lower('cliente'), models.F('fecha_pedido'), models.F('id'), name='pedido_cliente_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-19 00:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_conos', '0006_indices_admin'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PreparacionCocina',
+            fields=[
+                ('pedido', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='preparacion', serialize=False, to='api_conos.pedidocono')),
+                ('recibido', models.DateTimeField(default=django.utils.timezone.now)),
+                ('preparado', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Preparación en Cocina',
+                'verbose_name_plural': 'Preparaciones en Cocina',
+                'ordering': ['recibido'],
+                'indexes': [models.Index(condition=models.Q(('preparado__isnull', True)), fields=['recibido'], name='cocina_pendientes_idx'), models.Index(fields=['recibido'], name='cocina_recibido_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-19 00:51
+
+from django.db import migrations, models
+
+
+def cargar_resumenes(apps, schema_editor):
+    """Calcula los totales de los clientes con los pedidos ya guardados y el archivo"""
+    from api_conos.clientes import reconstruir_resumenes
+
+    reconstruir_resumenes(using=schema_editor.connection.alias, apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_conos', '0007_preparacion_cocina'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenCliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cliente', models.CharField(max_length=100, unique=True)),
+                ('total_pedidos', models.IntegerField(default=0)),
+                ('gasto_total', models.FloatField(default=0.0)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Cliente',
+                'verbose_name_plural': 'Resúmenes de Clientes',
+                'ordering': ['cliente'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='pedidocono',
+            index=models.Index(fields=['cliente', 'fecha_pedido', 'id'], name='pedido_cliente_historial_idx'),
+        ),
+        migrations.RunPython(cargar_resumenes, migrations.RunPython.noop),
+    ]
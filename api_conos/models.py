@@ -1,6 +1,9 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 import json
+from .validacion import obtener_validador
 
 class PedidoCono(models.Model):
     VARIANTES_CHOICES = [
@@ -15,7 +18,7 @@ class PedidoCono(models.Model):
         ('Grande', 'Grande'),
     ]
     
-    # Toppings predefinidos permitidos
+    # Toppings predefinidos (los permitidos son los del catálogo, ver api_conos/validacion.py)
     TOPPINGS_PERMITIDOS = [
         'queso_extra',
         'papas_al_hilo',
@@ -40,10 +43,26 @@ class PedidoCono(models.Model):
     tamanio_cono = models.CharField(max_length=20, choices=TAMANIOS_CHOICES)
     fecha_pedido = models.DateField(auto_now_add=True)
     
+    # Snapshot de precios tomado al crear el pedido (ver api_conos/precios.py)
+    precio_final = models.FloatField(null=True, blank=True, editable=False)
+    snapshot_precio = models.JSONField(null=True, blank=True, editable=False)
+    
     class Meta:
         verbose_name = "Pedido de Cono"
         verbose_name_plural = "Pedidos de Conos"
         ordering = ['-fecha_pedido']
+        # Índices del listado del admin (ver api_conos/admin.py): orden por
+        # fecha, filtros por variante y tamaño, y búsqueda por prefijo del cliente
+        # (con la fecha y el id, para ordenar los resultados sin leer las filas)
+        indexes = [
+            models.Index(fields=['fecha_pedido', 'id'], name='pedido_fecha_id_idx'),
+            models.Index(fields=['variante', 'fecha_pedido', 'id'], name='pedido_variante_fecha_idx'),
+            models.Index(fields=['tamanio_cono', 'fecha_pedido', 'id'], name='pedido_tamanio_fecha_idx'),
+            models.Index(Lower('cliente'), models.F('fecha_pedido'), models.F('id'), name='pedido_cliente_fecha_idx'),
+            # Historial de un cliente exacto, del más reciente al más antiguo (api_conos/clientes.py);
+            # no es de solo índice: las columnas del historial se leen de la tabla
+            models.Index(fields=['cliente', 'fecha_pedido', 'id'], name='pedido_cliente_historial_idx'),
+        ]
     
     def clean(self):
         """Validación personalizada para los toppings"""
@@ -51,20 +70,25 @@ class PedidoCono(models.Model):
         
         if self.toppings:
             # Verificar que todos los toppings estén en la lista permitida
-            toppings_invalidos = []
-            for topping in self.toppings:
-                if topping not in self.TOPPINGS_PERMITIDOS:
-                    toppings_invalidos.append(topping)
+            validador = obtener_validador()
+            toppings_invalidos = validador.toppings_rechazados(self.toppings)
             
             if toppings_invalidos:
                 raise ValidationError({
-                    'toppings': f'Los siguientes toppings no están permitidos: {", ".join(toppings_invalidos)}. '
-                              f'Toppings permitidos: {", ".join(self.TOPPINGS_PERMITIDOS)}'
+                    'toppings': f'Los siguientes toppings no están permitidos: {", ".join(map(str, toppings_invalidos))}. '
+                              f'Toppings permitidos: {", ".join(validador.toppings_permitidos)}'
                 })
     
-    def save(self, *args, **kwargs):
-        """Override save para ejecutar validaciones"""
-        self.clean()
+    def save(self, *args, validar=True, **kwargs):
+        """
+        Override save para ejecutar validaciones
+        
+        Args:
+            validar (bool): Si es False se omite clean(), para rutas que ya
+                validaron el pedido (serializador, cargas masivas)
+        """
+        if validar:
+            self.clean()
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -75,4 +99,189 @@ class PedidoCono(models.Model):
         """Propiedad para mostrar los toppings de forma legible"""
         if not self.toppings:
             return "Sin toppings extra"
-        return ", ".join(self.toppings)
\ No newline at end of file
+        return ", ".join(self.toppings)
+
+class PrecioVariante(models.Model):
+    """Precio base vigente de cada variante de cono"""
+    
+    variante = models.CharField(max_length=20, unique=True)
+    precio_base = models.FloatField()
+    
+    class Meta:
+        verbose_name = "Precio de Variante"
+        verbose_name_plural = "Precios de Variantes"
+        ordering = ['variante']
+    
+    def __str__(self):
+        return f"{self.variante}: {self.precio_base}"
+
+
+class MultiplicadorTamanio(models.Model):
+    """Multiplicador de precio vigente para cada tamaño de cono"""
+    
+    tamanio = models.CharField(max_length=20, unique=True)
+    multiplicador = models.FloatField()
+    
+    class Meta:
+        verbose_name = "Multiplicador de Tamaño"
+        verbose_name_plural = "Multiplicadores de Tamaño"
+        ordering = ['multiplicador']
+    
+    def __str__(self):
+        return f"{self.tamanio}: x{self.multiplicador}"
+
+
+class PrecioTopping(models.Model):
+    """Precio vigente de cada topping adicional"""
+    
+    topping = models.CharField(max_length=50, unique=True)
+    precio = models.FloatField()
+    
+    class Meta:
+        verbose_name = "Precio de Topping"
+        verbose_name_plural = "Precios de Toppings"
+        ordering = ['topping']
+    
+    def __str__(self):
+        return f"{self.topping}: {self.precio}"
+
+
+class VersionCatalogo(models.Model):
+    """
+    Fila única con la versión del catálogo de precios
+    
+    Cada cambio en los precios incrementa la versión; los workers la consultan
+    periódicamente para saber si deben recargar su caché del catálogo.
+    """
+    
+    version = models.PositiveBigIntegerField(default=1)
+    actualizado = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Versión del Catálogo"
+        verbose_name_plural = "Versión del Catálogo"
+    
+    def __str__(self):
+        return f"Catálogo v{self.version}"
+    
+    @classmethod
+    def obtener_version(cls):
+        """Obtiene la versión actual del catálogo (0 si aún no existe la fila)"""
+        version = cls.objects.filter(pk=1).values_list('version', flat=True).first()
+        return version or 0
+    
+    @classmethod
+    def incrementar(cls):
+        """Incrementa la versión del catálogo de forma atómica en la base de datos"""
+        actualizadas = cls.objects.filter(pk=1).update(
+            version=models.F('version') + 1, actualizado=timezone.now()
+        )
+        if not actualizadas:
+            cls.objects.get_or_create(pk=1, defaults={'version': 1})
+
+
+class ClaveIdempotencia(models.Model):
+    """
+    Respuesta original de un POST enviado con la cabecera Idempotency-Key
+    
+    La fila se inserta en la misma transacción que el pedido y su respuesta:
+    mientras la petición original está en curso, el índice único de la clave
+    hace esperar a los reintentos de otros procesos.
+    """
+    
+    clave = models.CharField(max_length=255, unique=True)
+    huella = models.CharField(max_length=64)
+    codigo_estado = models.PositiveSmallIntegerField(null=True)
+    respuesta = models.JSONField(null=True)
+    pedido = models.ForeignKey(PedidoCono, on_delete=models.SET_NULL, null=True, related_name='+')
+    creada = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        verbose_name = "Clave de Idempotencia"
+        verbose_name_plural = "Claves de Idempotencia"
+    
+    def __str__(self):
+        return self.clave
+
+
+class ParticionArchivo(models.Model):
+    """
+    Partición mensual del archivo de pedidos
+    
+    Cada partición es una tabla con el mismo esquema que PedidoCono (ver
+    api_conos/archivo.py). Esta fila registra su rango de fechas e ids, para
+    decidir qué particiones consultar, y un resumen que mantiene exactas las
+    estadísticas después de archivar.
+    """
+    
+    mes = models.DateField(unique=True)
+    tabla = models.CharField(max_length=63, unique=True)
+    fecha_min = models.DateField()
+    fecha_max = models.DateField()
+    id_min = models.BigIntegerField()
+    id_max = models.BigIntegerField()
+    total_pedidos = models.PositiveIntegerField(default=0)
+    resumen = models.JSONField(default=dict)
+    actualizada = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Partición de Archivo"
+        verbose_name_plural = "Particiones de Archivo"
+        ordering = ['mes']
+    
+    def __str__(self):
+        return f"{self.tabla} ({self.total_pedidos} pedidos)"
+
+
+class PreparacionCocina(models.Model):
+    """
+    Paso de un pedido por la cocina (ver api_conos/cocina.py)
+    
+    Se crea al confirmar el pedido; mientras `preparado` es nulo el pedido
+    está pendiente y entra en el plan de la cola de cocina. Las filas ya
+    preparadas son el flujo registrado que reproduce el simulador.
+    """
+    
+    pedido = models.OneToOneField(
+        PedidoCono, on_delete=models.CASCADE, primary_key=True, related_name='preparacion'
+    )
+    recibido = models.DateTimeField(default=timezone.now)
+    preparado = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = "Preparación en Cocina"
+        verbose_name_plural = "Preparaciones en Cocina"
+        ordering = ['recibido']
+        indexes = [
+            # Solo los pendientes: el índice no crece con el histórico preparado
+            models.Index(
+                fields=['recibido'], condition=models.Q(preparado__isnull=True), name='cocina_pendientes_idx'
+            ),
+            models.Index(fields=['recibido'], name='cocina_recibido_idx'),
+        ]
+    
+    def __str__(self):
+        estado = 'preparado' if self.preparado else 'pendiente'
+        return f"Pedido {self.pedido_id} ({estado})"
+
+
+class ResumenCliente(models.Model):
+    """
+    Totales de por vida de un cliente (ver api_conos/clientes.py)
+    
+    Se actualizan con incrementos en cada escritura de sus pedidos, en la
+    misma transacción, e incluyen los pedidos archivados. El comando
+    reconstruir_clientes los recalcula desde cero.
+    """
+    
+    cliente = models.CharField(max_length=100, unique=True)
+    total_pedidos = models.IntegerField(default=0)
+    gasto_total = models.FloatField(default=0.0)
+    
+    class Meta:
+        verbose_name = "Resumen de Cliente"
+        verbose_name_plural = "Resúmenes de Clientes"
+        ordering = ['cliente']
+    
+    def __str__(self):
+        return f"{self.cliente}: {self.total_pedidos} pedidos"
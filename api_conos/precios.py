@@ -0,0 +1,128 @@
+from typing import Dict, Iterable, List, Tuple
+from .builder import ConoConstruido, ConoDirector, ConoPersonalizadoBuilder
+from .factory import ConoFactory
+
+# Este módulo no importa Django para que sus funciones puedan ejecutarse en
+# procesos auxiliares (ver el comando repreciar_pedidos)
+
+def construir_cono(variante, tamanio, toppings, catalogo=None) -> ConoConstruido:
+    """
+    Construye un cono personalizado con los patrones Factory y Builder
+    
+    Args:
+        variante (str): Variante del cono
+        tamanio (str): Tamaño del cono
+        toppings (list): Toppings solicitados
+        catalogo (SnapshotCatalogo): Snapshot de precios a utilizar
+    
+    Returns:
+        ConoConstruido: Resultado de la construcción
+    """
+    cono_base = ConoFactory.crear_cono_base(variante, tamanio)
+    director = ConoDirector(ConoPersonalizadoBuilder(cono_base, catalogo))
+    return director.construir_cono_personalizado(toppings or [])
+
+def crear_snapshot_precio(variante, construido: ConoConstruido, catalogo) -> Dict:
+    """
+    Crea el snapshot compacto de precios de un cono construido
+    
+    Args:
+        variante (str): Variante del pedido
+        construido (ConoConstruido): Resultado de la construcción
+        catalogo (SnapshotCatalogo): Snapshot de precios usado en la construcción
+    
+    Returns:
+        dict: Versión del catálogo, precio unitario, multiplicador, precio de cada
+            topping agregado y totales
+    """
+    precios_toppings = catalogo.precios_toppings
+    return {
+        'version': catalogo.version,
+        'precio_unitario': catalogo.variantes[variante]['precio_base'],
+        'multiplicador': catalogo.multiplicadores.get(construido.tamanio, 1.0),
+        'precio_base': construido.precio_base,
+        'toppings': {topping: precios_toppings[topping] for topping in construido.toppings_agregados},
+        'precio_toppings': construido.precio_toppings,
+        'precio_total': construido.precio_total
+    }
+
+def capturar_precio(variante, tamanio, toppings, catalogo) -> Dict:
+    """
+    Construye el cono con el catálogo indicado y captura su snapshot de precios
+    
+    Returns:
+        dict: Valores de precio_final y snapshot_precio para guardar en el pedido
+    """
+    construido = construir_cono(variante, tamanio, toppings, catalogo)
+    return {
+        'precio_final': construido.precio_total,
+        'snapshot_precio': crear_snapshot_precio(variante, construido, catalogo)
+    }
+
+def construccion_desde_snapshot(pedido, catalogo) -> ConoConstruido:
+    """
+    Reconstruye el resultado de la construcción a partir del snapshot guardado
+    
+    Los precios provienen del snapshot tomado al crear el pedido; los
+    ingredientes base se toman de la receta vigente de la variante.
+    
+    Args:
+        pedido (PedidoCono): Pedido con snapshot_precio
+        catalogo (SnapshotCatalogo): Snapshot vigente del catálogo
+    
+    Returns:
+        ConoConstruido: Resultado de la construcción
+    """
+    snapshot = pedido.snapshot_precio
+    info = catalogo.variantes[pedido.variante]
+    nombre_clase = info['clase'].__name__
+    ingredientes_base = info['ingredientes_base']
+    toppings = tuple(snapshot['toppings'])
+    return ConoConstruido(
+        tipo_base=nombre_clase,
+        variante=nombre_clase.replace('Cono', ''),
+        tamanio=pedido.tamanio_cono,
+        ingredientes_base=ingredientes_base,
+        toppings_agregados=toppings,
+        toppings_rechazados=(),
+        ingredientes_finales=ingredientes_base + toppings,
+        precio_base=snapshot['precio_base'],
+        precio_toppings=snapshot['precio_toppings'],
+        precio_total=snapshot['precio_total']
+    )
+
+def obtener_construccion(pedido, catalogo) -> ConoConstruido:
+    """
+    Obtiene la construcción de un pedido, desde su snapshot si lo tiene
+    
+    Los pedidos anteriores a los snapshots de precio se calculan con el
+    catálogo vigente.
+    """
+    if pedido.snapshot_precio:
+        return construccion_desde_snapshot(pedido, catalogo)
+    return construir_cono(pedido.variante, pedido.tamanio_cono, pedido.toppings, catalogo)
+
+def repreciar_filas(catalogo, filas: Iterable[Tuple]) -> List[Tuple]:
+    """
+    Recalcula precio y snapshot de un bloque de pedidos
+    
+    Args:
+        catalogo (SnapshotCatalogo): Snapshot de precios a aplicar
+        filas (Iterable[tuple]): Tuplas (id, variante, tamanio_cono, toppings)
+    
+    Returns:
+        List[tuple]: Tuplas (id, precio_final, snapshot_precio); los pedidos que
+            no se pueden construir se omiten
+    """
+    resultados = []
+    for pedido_id, variante, tamanio, toppings in filas:
+        try:
+            construido = construir_cono(variante, tamanio, toppings, catalogo)
+        except (ValueError, TypeError):
+            continue
+        resultados.append((
+            pedido_id,
+            construido.precio_total,
+            crear_snapshot_precio(variante, construido, catalogo)
+        ))
+    return resultados
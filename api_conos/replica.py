@@ -0,0 +1,176 @@
+import os
+import sqlite3
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Cookie con el instante de la última escritura del cliente (read-your-writes)
+COOKIE_ULTIMA_ESCRITURA = 'pedidos_ultima_escritura'
+CABECERA_RETRASO = 'X-Replica-Retraso'
+
+CONFIGURACION_POR_DEFECTO = {
+    'HABILITADA': False,
+    'ALIAS': 'replica',
+    'INTERVALO_S': 5,
+    'MAX_RETRASO_S': 60,
+}
+
+# Modelos del catálogo de precios: siempre se leen de la base principal. El
+# catálogo en memoria es del proceso, y recargarlo desde una réplica atrasada
+# dejaría precios viejos también para las escrituras
+MODELOS_PRINCIPAL = frozenset({
+    'api_conos.versioncatalogo',
+    'api_conos.preciovariante',
+    'api_conos.multiplicadortamanio',
+    'api_conos.preciotopping',
+})
+
+# Alias de base de datos para las lecturas de la petición en curso
+_alias_lectura = ContextVar('alias_lectura', default=None)
+
+def obtener_configuracion_replica():
+    """Configuración de la réplica de lectura (settings.REPLICA_LECTURA sobre los valores por defecto)"""
+    return {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'REPLICA_LECTURA', {})}
+
+def instante_replica(alias: str) -> Optional[float]:
+    """
+    Instante (epoch) en que se tomó la copia vigente de la réplica
+
+    La copia se publica con la fecha de modificación igual al inicio de la
+    copia, por lo que basta un stat del archivo, sin abrir la base de datos.
+
+    Returns:
+        float: Instante de la copia, o None si la réplica aún no existe
+    """
+    try:
+        return os.stat(settings.DATABASES[alias]['NAME']).st_mtime
+    except (KeyError, OSError):
+        return None
+
+def estado_replica() -> Dict:
+    """
+    Estado de la réplica de lectura
+
+    Returns:
+        dict: Configuración, instante de la última copia y retraso en segundos
+    """
+    configuracion = obtener_configuracion_replica()
+    alias = configuracion['ALIAS']
+    instante = instante_replica(alias)
+    retraso = None if instante is None else round(max(0.0, time.time() - instante), 3)
+    return {
+        'habilitada': configuracion['HABILITADA'] and alias in settings.DATABASES,
+        'alias': alias,
+        'ultima_copia': instante,
+        'retraso_s': retraso,
+        'max_retraso_s': configuracion['MAX_RETRASO_S'],
+        'disponible': retraso is not None and retraso <= configuracion['MAX_RETRASO_S']
+    }
+
+def elegir_alias_lectura(ultima_escritura: Optional[str]) -> Optional[str]:
+    """
+    Decide si las lecturas de una petición pueden ir a la réplica
+
+    Args:
+        ultima_escritura (str): Valor de la cookie de última escritura del cliente
+
+    Returns:
+        str: Alias de la réplica, o None si se debe leer de la base principal
+            (réplica deshabilitada, inexistente, demasiado atrasada, o anterior
+            a la última escritura del cliente)
+    """
+    configuracion = obtener_configuracion_replica()
+    alias = configuracion['ALIAS']
+    if not configuracion['HABILITADA'] or alias not in settings.DATABASES:
+        return None
+
+    instante = instante_replica(alias)
+    if instante is None or time.time() - instante > configuracion['MAX_RETRASO_S']:
+        return None
+
+    if ultima_escritura:
+        try:
+            if float(ultima_escritura) >= instante:
+                return None
+        except ValueError:
+            pass
+    return alias
+
+def activar_lectura(alias: Optional[str]):
+    """Dirige las lecturas del contexto actual al alias indicado; devuelve el token para restaurarlo"""
+    return _alias_lectura.set(alias)
+
+def restaurar_lectura(token):
+    """Restaura el alias de lectura anterior a activar_lectura()"""
+    _alias_lectura.reset(token)
+
+class RouterReplica:
+    """
+    Router de base de datos para la réplica de lectura
+
+    Las lecturas van a la réplica solo dentro de las acciones de solo lectura
+    que la activan con activar_lectura(), salvo las del catálogo de precios
+    (MODELOS_PRINCIPAL); las escrituras y las migraciones siempre van a la
+    base principal.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _alias_lectura.get()
+        if alias is not None and model._meta.label_lower in MODELOS_PRINCIPAL:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # Explícito para que los objetos leídos de la réplica se guarden en la principal
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        alias = obtener_configuracion_replica()['ALIAS']
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, alias}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema con cada copia
+        if db == obtener_configuracion_replica()['ALIAS']:
+            return False
+        return None
+
+def refrescar_replica(paginas: int = 4096) -> Dict:
+    """
+    Copia la base principal sobre la réplica con la API de backup de SQLite
+
+    El backup bloquea la réplica mientras escribe, por lo que las lecturas
+    nunca ven una copia a medias (esperan el timeout de SQLite) y las
+    conexiones abiertas a la réplica ven la copia nueva sin reconectarse.
+
+    Args:
+        paginas (int): Páginas copiadas por paso del backup
+
+    Returns:
+        dict: Instante de la copia, duración y tamaño del archivo
+    """
+    alias = obtener_configuracion_replica()['ALIAS']
+    origen = connections[DEFAULT_DB_ALIAS]
+    if origen.vendor != 'sqlite' or connections[alias].vendor != 'sqlite':
+        raise ValueError('La réplica por copia solo está disponible para SQLite')
+
+    destino_ruta = str(settings.DATABASES[alias]['NAME'])
+    inicio = time.time()
+    origen.ensure_connection()
+    destino = sqlite3.connect(destino_ruta)
+    try:
+        origen.connection.backup(destino, pages=paginas)
+    finally:
+        destino.close()
+    # La fecha de modificación marca el inicio de la copia (ver instante_replica)
+    os.utime(destino_ruta, (inicio, inicio))
+
+    return {
+        'ultima_copia': inicio,
+        'duracion_s': round(time.time() - inicio, 3),
+        'tamanio_bytes': os.path.getsize(destino_ruta)
+    }
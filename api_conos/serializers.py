@@ -1,9 +1,10 @@
 # api_conos/serializers.py
 from rest_framework import serializers
 from .models import PedidoCono
-from .factory import ConoFactory
-from .builder import ConoPersonalizadoBuilder, ConoDirector
-from .logger import obtener_logger
+from .logger import DEBUG, ERROR, obtener_logger
+from .catalogo import obtener_catalogo
+from .validacion import obtener_validador
+from .precios import obtener_construccion
 
 class PedidoConoSerializer(serializers.ModelSerializer):
     """Serializador para el modelo PedidoCono con atributos calculados"""
@@ -28,9 +29,43 @@ class PedidoConoSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['fecha_pedido']
     
+    def validate_toppings(self, value):
+        """
+        Valida los toppings con el validador precompilado compartido
+        
+        Los toppings desconocidos se reportan explícitamente en lugar de
+        descartarse en silencio durante la construcción del cono.
+        
+        Args:
+            value (list): Toppings solicitados
+        
+        Returns:
+            list: Toppings validados
+        """
+        validador = obtener_validador()
+        errores = validador.errores_toppings(value)
+        if errores is not None:
+            if isinstance(errores, dict):
+                errores['toppings_permitidos'] = list(validador.toppings_permitidos)
+            raise serializers.ValidationError(errores)
+        return value
+    
+    def create(self, validated_data):
+        """Crea el pedido sin repetir en save() la validación ya realizada"""
+        instance = PedidoCono(**validated_data)
+        instance.save(validar=False)
+        return instance
+    
+    def update(self, instance, validated_data):
+        """Actualiza el pedido sin repetir en save() la validación ya realizada"""
+        for campo, valor in validated_data.items():
+            setattr(instance, campo, valor)
+        instance.save(validar=False)
+        return instance
+    
     def get_precio_final(self, obj):
         """
-        Calcula el precio final del cono utilizando los patrones Factory y Builder
+        Obtiene el precio final del cono desde el snapshot de precios del pedido
         
         Args:
             obj (PedidoCono): Instancia del pedido
@@ -41,31 +76,27 @@ class PedidoConoSerializer(serializers.ModelSerializer):
         logger = obtener_logger()
         
         try:
-            # Paso 1: Usar Factory para crear el cono base
-            cono_base = ConoFactory.crear_cono_base(obj.variante, obj.tamanio_cono)
-            
-            # Paso 2: Usar Builder para personalizar el cono
-            builder = ConoPersonalizadoBuilder(cono_base)
-            director = ConoDirector(builder)
+            # Usar el snapshot de precios tomado al crear el pedido o, en pedidos
+            # anteriores a los snapshots, los patrones Factory y Builder
+            cono_personalizado = obtener_construccion(obj, obtener_catalogo())
             
-            # Construir el cono personalizado con los toppings
-            cono_personalizado = director.construir_cono_personalizado(obj.toppings or [])
+            precio_final = cono_personalizado.precio_total
             
-            precio_final = cono_personalizado['precio_total']
-            
-            # Registrar la operación en el log
+            # Registrar la operación en el log (el mensaje solo se construye
+            # si el nivel DEBUG está habilitado y la operación sale sorteada)
             logger.registrar_operacion(
                 tipo_operacion='precio_final',
-                detalle=f'Cálculo de precio para pedido {obj.id} - Cliente: {obj.cliente}',
-                datos_extra={
+                detalle=lambda: f'Cálculo de precio para pedido {obj.id} - Cliente: {obj.cliente}',
+                datos_extra=lambda: {
                     'pedido_id': obj.id,
                     'variante': obj.variante,
                     'tamanio': obj.tamanio_cono,
                     'toppings': obj.toppings,
-                    'precio_base': cono_personalizado['precio_base'],
-                    'precio_toppings': cono_personalizado['precio_toppings'],
+                    'precio_base': cono_personalizado.precio_base,
+                    'precio_toppings': cono_personalizado.precio_toppings,
                     'precio_final': precio_final
-                }
+                },
+                nivel=DEBUG
             )
             
             return round(precio_final, 2)
@@ -74,13 +105,14 @@ class PedidoConoSerializer(serializers.ModelSerializer):
             logger.registrar_operacion(
                 tipo_operacion='precio_final',
                 detalle=f'Error al calcular precio para pedido {obj.id}: {str(e)}',
-                datos_extra={'pedido_id': obj.id, 'error': str(e)}
+                datos_extra={'pedido_id': obj.id, 'error': str(e)},
+                nivel=ERROR
             )
             return 0.0
     
     def get_ingredientes_finales(self, obj):
         """
-        Calcula los ingredientes finales del cono utilizando los patrones Factory y Builder
+        Obtiene los ingredientes finales del cono
         
         Args:
             obj (PedidoCono): Instancia del pedido
@@ -91,31 +123,26 @@ class PedidoConoSerializer(serializers.ModelSerializer):
         logger = obtener_logger()
         
         try:
-            # Paso 1: Usar Factory para crear el cono base
-            cono_base = ConoFactory.crear_cono_base(obj.variante, obj.tamanio_cono)
+            # Usar el snapshot de precios tomado al crear el pedido o, en pedidos
+            # anteriores a los snapshots, los patrones Factory y Builder
+            cono_personalizado = obtener_construccion(obj, obtener_catalogo())
             
-            # Paso 2: Usar Builder para personalizar el cono
-            builder = ConoPersonalizadoBuilder(cono_base)
-            director = ConoDirector(builder)
-            
-            # Construir el cono personalizado con los toppings
-            cono_personalizado = director.construir_cono_personalizado(obj.toppings or [])
-            
-            ingredientes_finales = cono_personalizado['ingredientes_finales']
+            ingredientes_finales = cono_personalizado.ingredientes_finales
             
             # Registrar la operación en el log
             logger.registrar_operacion(
                 tipo_operacion='ingredientes_finales',
-                detalle=f'Cálculo de ingredientes para pedido {obj.id} - Cliente: {obj.cliente}',
-                datos_extra={
+                detalle=lambda: f'Cálculo de ingredientes para pedido {obj.id} - Cliente: {obj.cliente}',
+                datos_extra=lambda: {
                     'pedido_id': obj.id,
                     'variante': obj.variante,
                     'tamanio': obj.tamanio_cono,
                     'toppings': obj.toppings,
-                    'ingredientes_base': cono_personalizado['ingredientes_base'],
-                    'toppings_agregados': cono_personalizado['toppings_agregados'],
+                    'ingredientes_base': cono_personalizado.ingredientes_base,
+                    'toppings_agregados': cono_personalizado.toppings_agregados,
                     'ingredientes_finales': ingredientes_finales
-                }
+                },
+                nivel=DEBUG
             )
             
             return ingredientes_finales
@@ -124,7 +151,8 @@ class PedidoConoSerializer(serializers.ModelSerializer):
             logger.registrar_operacion(
                 tipo_operacion='ingredientes_finales',
                 detalle=f'Error al calcular ingredientes para pedido {obj.id}: {str(e)}',
-                datos_extra={'pedido_id': obj.id, 'error': str(e)}
+                datos_extra={'pedido_id': obj.id, 'error': str(e)},
+                nivel=ERROR
             )
             return []
     
@@ -141,42 +169,38 @@ class PedidoConoSerializer(serializers.ModelSerializer):
         logger = obtener_logger()
         
         try:
-            # Paso 1: Usar Factory para crear el cono base
-            cono_base = ConoFactory.crear_cono_base(obj.variante, obj.tamanio_cono)
-            
-            # Paso 2: Usar Builder para personalizar el cono
-            builder = ConoPersonalizadoBuilder(cono_base)
-            director = ConoDirector(builder)
-            
-            # Construir el cono personalizado con los toppings
-            cono_personalizado = director.construir_cono_personalizado(obj.toppings or [])
+            # Usar el snapshot de precios tomado al crear el pedido o, en pedidos
+            # anteriores a los snapshots, los patrones Factory y Builder
+            cono_personalizado = obtener_construccion(obj, obtener_catalogo())
             
             # Registrar la operación en el log
             logger.registrar_operacion(
                 tipo_operacion='personalizacion',
-                detalle=f'Construcción completa del cono para pedido {obj.id}',
-                datos_extra={
+                detalle=lambda: f'Construcción completa del cono para pedido {obj.id}',
+                datos_extra=lambda: {
                     'pedido_id': obj.id,
-                    'construccion_completa': cono_personalizado
-                }
+                    'construccion_completa': cono_personalizado._asdict()
+                },
+                nivel=DEBUG
             )
             
             return {
-                'tipo_base': cono_personalizado['tipo_base'],
-                'variante': cono_personalizado['variante'],
-                'tamanio': cono_personalizado['tamanio'],
-                'precio_base': cono_personalizado['precio_base'],
-                'precio_toppings': cono_personalizado['precio_toppings'],
-                'precio_total': cono_personalizado['precio_total'],
-                'total_ingredientes': len(cono_personalizado['ingredientes_finales']),
-                'total_toppings': len(cono_personalizado['toppings_agregados'])
+                'tipo_base': cono_personalizado.tipo_base,
+                'variante': cono_personalizado.variante,
+                'tamanio': cono_personalizado.tamanio,
+                'precio_base': cono_personalizado.precio_base,
+                'precio_toppings': cono_personalizado.precio_toppings,
+                'precio_total': cono_personalizado.precio_total,
+                'total_ingredientes': len(cono_personalizado.ingredientes_finales),
+                'total_toppings': len(cono_personalizado.toppings_agregados)
             }
             
         except Exception as e:
             logger.registrar_operacion(
                 tipo_operacion='personalizacion',
                 detalle=f'Error en construcción del cono para pedido {obj.id}: {str(e)}',
-                datos_extra={'pedido_id': obj.id, 'error': str(e)}
+                datos_extra={'pedido_id': obj.id, 'error': str(e)},
+                nivel=ERROR
             )
             return {
                 'error': 'No se pudo construir el resumen',
@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalogo import CatalogoConos
+from .models import MultiplicadorTamanio, PrecioTopping, PrecioVariante, VersionCatalogo
+
+@receiver([post_save, post_delete], sender=PrecioVariante)
+@receiver([post_save, post_delete], sender=MultiplicadorTamanio)
+@receiver([post_save, post_delete], sender=PrecioTopping)
+def incrementar_version_catalogo(sender, **kwargs):
+    """
+    Incrementa la versión del catálogo en la misma transacción del cambio de precio
+
+    Los demás workers detectan la nueva versión en su próxima verificación;
+    el worker actual invalida su caché en cuanto se confirma la transacción.
+    """
+    VersionCatalogo.incrementar()
+    transaction.on_commit(CatalogoConos.invalidar)
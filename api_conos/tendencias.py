@@ -0,0 +1,632 @@
+import atexit
+import base64
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from array import array
+from contextlib import contextmanager
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+
+# Dimensiones resumidas por cada pedido creado
+DIMENSIONES = ('toppings', 'pares_toppings', 'variante_tamanio', 'cliente')
+
+CONFIGURACION_POR_DEFECTO = {
+    'HABILITADAS': True,
+    'DIRECTORIO': None,
+    'DURACION_PERIODO_S': 3600,
+    'MAX_PERIODOS': 168,
+    'ANCHO': 512,
+    'PROFUNDIDAD': 4,
+    'CAPACIDAD_TOP': 128,
+    'INTERVALO_GUARDADO_S': 30,
+}
+
+FORMATO = 1
+ARCHIVO_BASE = 'tendencias-base.json'
+
+def obtener_configuracion_tendencias():
+    """Configuración de las tendencias (settings.TENDENCIAS sobre los valores por defecto)"""
+    configuracion = {**CONFIGURACION_POR_DEFECTO, **getattr(settings, 'TENDENCIAS', {})}
+    if configuracion['DIRECTORIO'] is None:
+        configuracion['DIRECTORIO'] = os.path.join(settings.BASE_DIR, 'tendencias')
+    return configuracion
+
+_UNIDADES_VENTANA = {'m': 60, 'h': 3600, 'd': 86400}
+
+def parsear_ventana(texto: str) -> Optional[float]:
+    """
+    Convierte una ventana como "30m", "24h" o "7d" en segundos ("total": None)
+
+    Raises:
+        ValueError: Si la ventana no tiene el formato esperado
+    """
+    texto = texto.strip().lower()
+    if texto == 'total':
+        return None
+    if len(texto) < 2 or texto[-1] not in _UNIDADES_VENTANA or not texto[:-1].isdigit() or int(texto[:-1]) <= 0:
+        raise ValueError(f'Ventana inválida: "{texto}". Use por ejemplo 30m, 24h, 7d o total')
+    return int(texto[:-1]) * _UNIDADES_VENTANA[texto[-1]]
+
+def claves_pedido(pedido) -> Dict[str, List[str]]:
+    """
+    Claves de cada dimensión que aporta un pedido
+
+    Cada topping distinto cuenta una vez por pedido; los pares se forman con
+    los toppings en orden alfabético para que "a + b" y "b + a" coincidan.
+    """
+    toppings = sorted(set(pedido.toppings or ()))
+    return {
+        'toppings': toppings,
+        'pares_toppings': [f'{a} + {b}' for a, b in combinations(toppings, 2)],
+        'variante_tamanio': [f'{pedido.variante} / {pedido.tamanio_cono}'],
+        'cliente': [pedido.cliente],
+    }
+
+class ConteoMinimo:
+    """
+    Count-min sketch: estimación de frecuencias en memoria fija
+
+    PROFUNDIDAD filas de ANCHO contadores. La estimación de una clave nunca
+    es menor que su frecuencia real y la supera como mucho en
+    e / ANCHO * total con probabilidad 1 - e^-PROFUNDIDAD.
+    """
+
+    __slots__ = ('ancho', 'profundidad', 'tabla')
+
+    def __init__(self, ancho: int, profundidad: int, tabla: array = None):
+        self.ancho = ancho
+        self.profundidad = profundidad
+        self.tabla = tabla if tabla is not None else array('I', bytes(4 * ancho * profundidad))
+
+    def posiciones(self, clave: str) -> List[int]:
+        """Posición de la clave en cada fila (doble hashing sobre un blake2b estable entre procesos)"""
+        huella = int.from_bytes(hashlib.blake2b(clave.encode('utf-8'), digest_size=8).digest(), 'little')
+        h1, h2 = huella & 0xFFFFFFFF, (huella >> 32) | 1
+        ancho = self.ancho
+        return [fila * ancho + (h1 + fila * h2) % ancho for fila in range(self.profundidad)]
+
+    def agregar(self, posiciones: List[int], cantidad: int = 1):
+        tabla = self.tabla
+        for posicion in posiciones:
+            tabla[posicion] += cantidad
+
+    def estimar(self, posiciones: List[int]) -> int:
+        tabla = self.tabla
+        return min(tabla[posicion] for posicion in posiciones)
+
+    def sumar(self, otro: 'ConteoMinimo'):
+        self.tabla = array('I', map(sum, zip(self.tabla, otro.tabla)))
+
+    def a_texto(self) -> str:
+        return base64.b64encode(zlib.compress(self.tabla.tobytes(), 1)).decode('ascii')
+
+    @classmethod
+    def desde_texto(cls, texto: str, ancho: int, profundidad: int) -> 'ConteoMinimo':
+        tabla = array('I')
+        tabla.frombytes(zlib.decompress(base64.b64decode(texto)))
+        if len(tabla) != ancho * profundidad:
+            raise ValueError('Dimensiones del count-min sketch incompatibles')
+        return cls(ancho, profundidad, tabla)
+
+class ResumenFrecuentes:
+    """
+    Resumen Space-Saving de las claves más frecuentes en memoria fija
+
+    Sigue como mucho CAPACIDAD claves. Una clave nueva con el resumen lleno
+    reemplaza a una de conteo mínimo y hereda ese conteo como error. Toda
+    clave con frecuencia mayor que total / CAPACIDAD está en el resumen; su
+    conteo la sobreestima como mucho en su error. Las claves se agrupan por
+    conteo, así cada actualización es O(1).
+    """
+
+    __slots__ = ('capacidad', 'conteos', 'errores', '_grupos', '_minimo')
+
+    def __init__(self, capacidad: int):
+        self.capacidad = capacidad
+        self.conteos = {}
+        self.errores = {}
+        self._grupos = {}
+        self._minimo = 0
+
+    def agregar(self, clave: str):
+        conteos, grupos = self.conteos, self._grupos
+        conteo = conteos.get(clave)
+        if conteo is None:
+            if len(conteos) < self.capacidad:
+                conteo = 0
+                self.errores[clave] = 0
+            else:
+                grupo_minimo = grupos[self._minimo]
+                victima = next(iter(grupo_minimo))
+                del grupo_minimo[victima], conteos[victima], self.errores[victima]
+                conteo = self._minimo
+                self.errores[clave] = conteo
+        else:
+            del grupos[conteo][clave]
+        if conteo and not grupos[conteo]:
+            del grupos[conteo]
+
+        nuevo = conteo + 1
+        conteos[clave] = nuevo
+        grupos.setdefault(nuevo, {})[clave] = None
+        if nuevo == 1 or (conteo == self._minimo and conteo not in grupos):
+            self._minimo = nuevo
+
+    def _reconstruir(self):
+        self._grupos = {}
+        for clave, conteo in self.conteos.items():
+            self._grupos.setdefault(conteo, {})[clave] = None
+        self._minimo = min(self._grupos) if self._grupos else 0
+
+    def sumar(self, otro: 'ResumenFrecuentes'):
+        """Combina con otro resumen (suma de conteos y errores) y conserva las CAPACIDAD mayores"""
+        conteos, errores = dict(self.conteos), dict(self.errores)
+        for clave, conteo in otro.conteos.items():
+            conteos[clave] = conteos.get(clave, 0) + conteo
+            errores[clave] = errores.get(clave, 0) + otro.errores[clave]
+        mayores = sorted(conteos, key=conteos.get, reverse=True)[:self.capacidad]
+        self.conteos = {clave: conteos[clave] for clave in mayores}
+        self.errores = {clave: errores[clave] for clave in mayores}
+        self._reconstruir()
+
+    def a_lista(self) -> List[list]:
+        return [[clave, conteo, self.errores[clave]] for clave, conteo in self.conteos.items()]
+
+    @classmethod
+    def desde_lista(cls, filas: List[list], capacidad: int) -> 'ResumenFrecuentes':
+        resumen = cls(capacidad)
+        for clave, conteo, error in filas[:capacidad]:
+            resumen.conteos[clave] = conteo
+            resumen.errores[clave] = error
+        resumen._reconstruir()
+        return resumen
+
+class Periodo:
+    """Resúmenes de las cuatro dimensiones para los pedidos de un período"""
+
+    __slots__ = ('pedidos', 'sketches', 'frecuentes')
+
+    def __init__(self, configuracion: Dict):
+        self.pedidos = 0
+        self.sketches = {
+            dimension: ConteoMinimo(configuracion['ANCHO'], configuracion['PROFUNDIDAD'])
+            for dimension in DIMENSIONES
+        }
+        self.frecuentes = {dimension: ResumenFrecuentes(configuracion['CAPACIDAD_TOP']) for dimension in DIMENSIONES}
+
+    def agregar(self, claves: Dict[str, List[str]], posiciones: Dict[str, List[List[int]]]):
+        self.pedidos += 1
+        for dimension in DIMENSIONES:
+            sketch, frecuentes = self.sketches[dimension], self.frecuentes[dimension]
+            for clave, posiciones_clave in zip(claves[dimension], posiciones[dimension]):
+                sketch.agregar(posiciones_clave)
+                frecuentes.agregar(clave)
+
+    def copia(self) -> 'Periodo':
+        periodo = Periodo.__new__(Periodo)
+        periodo.pedidos = self.pedidos
+        periodo.sketches = {
+            dimension: ConteoMinimo(sketch.ancho, sketch.profundidad, array('I', sketch.tabla))
+            for dimension, sketch in self.sketches.items()
+        }
+        periodo.frecuentes = {
+            dimension: ResumenFrecuentes.desde_lista(frecuentes.a_lista(), frecuentes.capacidad)
+            for dimension, frecuentes in self.frecuentes.items()
+        }
+        return periodo
+
+    def sumar(self, otro: 'Periodo'):
+        self.pedidos += otro.pedidos
+        for dimension in DIMENSIONES:
+            self.sketches[dimension].sumar(otro.sketches[dimension])
+            self.frecuentes[dimension].sumar(otro.frecuentes[dimension])
+
+    def a_dict(self) -> Dict:
+        return {
+            'pedidos': self.pedidos,
+            'dimensiones': {
+                dimension: {
+                    'sketch': self.sketches[dimension].a_texto(),
+                    'top': self.frecuentes[dimension].a_lista(),
+                }
+                for dimension in DIMENSIONES
+            }
+        }
+
+    @classmethod
+    def desde_dict(cls, datos: Dict, configuracion: Dict) -> 'Periodo':
+        periodo = cls.__new__(cls)
+        periodo.pedidos = datos['pedidos']
+        periodo.sketches, periodo.frecuentes = {}, {}
+        for dimension in DIMENSIONES:
+            resumen = datos['dimensiones'][dimension]
+            periodo.sketches[dimension] = ConteoMinimo.desde_texto(
+                resumen['sketch'], configuracion['ANCHO'], configuracion['PROFUNDIDAD']
+            )
+            periodo.frecuentes[dimension] = ResumenFrecuentes.desde_lista(
+                resumen['top'], configuracion['CAPACIDAD_TOP']
+            )
+        return periodo
+
+class TendenciasPedidos:
+    """
+    Resúmenes en streaming de los pedidos creados
+
+    Un período por cada DURACION_PERIODO_S segundos (se conservan los últimos
+    MAX_PERIODOS) más un período acumulado desde el inicio. Cada período
+    tiene, por dimensión, un count-min sketch para estimar la frecuencia de
+    cualquier clave y un resumen Space-Saving con las más frecuentes, por lo
+    que la memoria está acotada y registrar un pedido cuesta O(1).
+    """
+
+    def __init__(self, configuracion: Dict):
+        self.configuracion = configuracion
+        self.total = Periodo(configuracion)
+        self.periodos: Dict[int, Periodo] = {}
+        self.cambios = False
+        self._lock = threading.Lock()
+
+    def _periodo_actual(self, instante: float) -> int:
+        return int(instante // self.configuracion['DURACION_PERIODO_S'])
+
+    def _podar(self, actual: int):
+        minimo = actual - self.configuracion['MAX_PERIODOS'] + 1
+        for periodo in [periodo for periodo in self.periodos if periodo < minimo]:
+            del self.periodos[periodo]
+
+    def registrar(self, pedidos: Iterable, instante: float = None):
+        """
+        Agrega pedidos a los resúmenes del período de instante (por defecto, ahora)
+        """
+        actual = self._periodo_actual(time.time() if instante is None else instante)
+        muestra = self.total.sketches[DIMENSIONES[0]]
+        # Las claves y sus posiciones se calculan fuera del lock
+        entradas = []
+        for pedido in pedidos:
+            claves = claves_pedido(pedido)
+            posiciones = {
+                dimension: [muestra.posiciones(clave) for clave in claves[dimension]]
+                for dimension in DIMENSIONES
+            }
+            entradas.append((claves, posiciones))
+        if not entradas:
+            return
+
+        with self._lock:
+            periodo = self.periodos.get(actual)
+            if periodo is None:
+                periodo = self.periodos[actual] = Periodo(self.configuracion)
+                self._podar(actual)
+            for claves, posiciones in entradas:
+                periodo.agregar(claves, posiciones)
+                self.total.agregar(claves, posiciones)
+            self.cambios = True
+
+    def sumar(self, otras: 'TendenciasPedidos'):
+        """Suma los resúmenes de otras tendencias (por ejemplo, de otro proceso)"""
+        with self._lock:
+            self.total.sumar(otras.total)
+            for clave, periodo in otras.periodos.items():
+                if clave in self.periodos:
+                    self.periodos[clave].sumar(periodo)
+                else:
+                    self.periodos[clave] = periodo.copia()
+            if self.periodos:
+                self._podar(max(self.periodos))
+            self.cambios = True
+
+    def seleccionar(self, ventana_s: Optional[float], instante: float = None) -> List[Periodo]:
+        """
+        Copia de los períodos que tocan la ventana, o del acumulado si ventana_s es None
+        """
+        instante = time.time() if instante is None else instante
+        with self._lock:
+            if ventana_s is None:
+                return [self.total.copia()]
+            desde, actual = self._periodo_actual(instante - ventana_s), self._periodo_actual(instante)
+            return [periodo.copia() for clave, periodo in self.periodos.items() if desde <= clave <= actual]
+
+    def a_dict(self) -> Dict:
+        # Se copia con el lock tomado y se codifica fuera de él
+        with self._lock:
+            total = self.total.copia()
+            periodos = {clave: periodo.copia() for clave, periodo in self.periodos.items()}
+        return {
+            'formato': FORMATO,
+            'configuracion': {
+                clave: self.configuracion[clave]
+                for clave in ('DURACION_PERIODO_S', 'ANCHO', 'PROFUNDIDAD', 'CAPACIDAD_TOP')
+            },
+            'total': total.a_dict(),
+            'periodos': {str(clave): periodo.a_dict() for clave, periodo in periodos.items()},
+        }
+
+    @classmethod
+    def desde_dict(cls, datos: Dict, configuracion: Dict) -> 'TendenciasPedidos':
+        compatibles = all(
+            datos['configuracion'][clave] == configuracion[clave]
+            for clave in ('DURACION_PERIODO_S', 'ANCHO', 'PROFUNDIDAD', 'CAPACIDAD_TOP')
+        )
+        if datos.get('formato') != FORMATO or not compatibles:
+            raise ValueError('Archivo de tendencias con otra configuración')
+        tendencias = cls(configuracion)
+        tendencias.total = Periodo.desde_dict(datos['total'], configuracion)
+        tendencias.periodos = {
+            int(clave): Periodo.desde_dict(periodo, configuracion)
+            for clave, periodo in datos['periodos'].items()
+        }
+        if tendencias.periodos:
+            tendencias._podar(tendencias._periodo_actual(time.time()))
+        return tendencias
+
+def _estimar(periodos: List[Periodo], dimension: str, clave: str) -> int:
+    """Estimación del count-min sketch para una clave sumada sobre los períodos"""
+    if not periodos:
+        return 0
+    posiciones = periodos[0].sketches[dimension].posiciones(clave)
+    return sum(periodo.sketches[dimension].estimar(posiciones) for periodo in periodos)
+
+def consultar(fuentes: Iterable[TendenciasPedidos], ventana_s: Optional[float], top: int = 10,
+              estimar: Dict[str, List[str]] = None, instante: float = None) -> Dict:
+    """
+    Combina los resúmenes de varias fuentes para una ventana de tiempo
+
+    Args:
+        fuentes (Iterable[TendenciasPedidos]): Tendencias de cada proceso
+        ventana_s (float): Segundos hacia atrás, o None para el acumulado
+        top (int): Claves más frecuentes por dimensión
+        estimar (dict): Claves por dimensión cuya frecuencia se estima con el sketch
+        instante (float): Fin de la ventana (por defecto, ahora)
+
+    Returns:
+        dict: total_pedidos, top por dimensión (clave, conteo y error_max) y estimaciones
+            del count-min sketch
+    """
+    periodos = [periodo for fuente in fuentes for periodo in fuente.seleccionar(ventana_s, instante)]
+    resultado = {'total_pedidos': sum(periodo.pedidos for periodo in periodos), 'top': {}}
+
+    for dimension in DIMENSIONES:
+        conteos, errores = {}, {}
+        for periodo in periodos:
+            frecuentes = periodo.frecuentes[dimension]
+            for clave, conteo in frecuentes.conteos.items():
+                conteos[clave] = conteos.get(clave, 0) + conteo
+                errores[clave] = errores.get(clave, 0) + frecuentes.errores[clave]
+        # Los candidatos de Space-Saving se acotan con el count-min sketch (ambos
+        # sobreestiman) y se reordenan; conteo - error_max es una cota inferior
+        candidatos = sorted(conteos, key=lambda clave: (-conteos[clave], clave))[:top * 3]
+        filas = []
+        for clave in candidatos:
+            estimacion = min(conteos[clave], _estimar(periodos, dimension, clave))
+            minimo = conteos[clave] - errores[clave]
+            filas.append({'clave': clave, 'conteo': estimacion, 'error_max': max(0, estimacion - minimo)})
+        filas.sort(key=lambda fila: (-fila['conteo'], fila['clave']))
+        resultado['top'][dimension] = filas[:top]
+
+    if estimar:
+        resultado['estimaciones'] = {}
+        for dimension, claves in estimar.items():
+            estimaciones = {}
+            for clave in claves:
+                estimaciones[clave] = _estimar(periodos, dimension, clave)
+            resultado['estimaciones'][dimension] = estimaciones
+    return resultado
+
+# --- Persistencia y vista entre procesos ---
+#
+# Cada proceso guarda sus resúmenes en tendencias-<pid>.json cada
+# INTERVALO_GUARDADO_S segundos y al terminar. Las consultas combinan los
+# resúmenes en memoria del proceso con los archivos de los demás; los de
+# procesos terminados se acumulan en tendencias-base.json, así los conteos
+# sobreviven a los reinicios.
+
+_tendencias = None
+_lock_tendencias = threading.Lock()
+_cache_archivos: Dict[str, tuple] = {}
+
+def _escribir(ruta: str, tendencias: TendenciasPedidos):
+    temporal = f'{ruta}.{os.getpid()}.tmp'
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(tendencias.a_dict(), archivo, separators=(',', ':'))
+    os.replace(temporal, ruta)
+
+def _leer(ruta: str, configuracion: Dict, usar_cache: bool = True) -> Optional[TendenciasPedidos]:
+    """Lee un archivo de tendencias (con caché por fecha de modificación)"""
+    try:
+        modificado = os.stat(ruta).st_mtime_ns
+        guardado = _cache_archivos.get(ruta)
+        if usar_cache and guardado is not None and guardado[0] == modificado:
+            return guardado[1]
+        with open(ruta, encoding='utf-8') as archivo:
+            tendencias = TendenciasPedidos.desde_dict(json.load(archivo), configuracion)
+    except (OSError, ValueError, KeyError):
+        return None
+    if usar_cache:
+        _cache_archivos[ruta] = (modificado, tendencias)
+    return tendencias
+
+@contextmanager
+def _bloqueo_directorio(directorio: str):
+    """Lock entre procesos para compactar los archivos de procesos terminados"""
+    import fcntl
+    with open(os.path.join(directorio, '.lock'), 'a') as archivo:
+        fcntl.lockf(archivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.lockf(archivo, fcntl.LOCK_UN)
+
+def _pid_archivo(ruta: str) -> Optional[int]:
+    nombre = os.path.basename(ruta)
+    try:
+        return int(nombre[len('tendencias-'):-len('.json')])
+    except ValueError:
+        return None
+
+def _proceso_vivo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def compactar(configuracion: Dict = None) -> int:
+    """
+    Acumula en el archivo base los archivos de procesos terminados
+
+    Returns:
+        int: Cantidad de archivos compactados
+    """
+    configuracion = configuracion or obtener_configuracion_tendencias()
+    directorio = configuracion['DIRECTORIO']
+    if not os.path.isdir(directorio):
+        return 0
+    muertos = [
+        ruta for ruta in glob.glob(os.path.join(directorio, 'tendencias-*.json'))
+        if _pid_archivo(ruta) is not None and not _proceso_vivo(_pid_archivo(ruta))
+    ]
+    if not muertos:
+        return 0
+    ruta_base = os.path.join(directorio, ARCHIVO_BASE)
+    with _bloqueo_directorio(directorio):
+        # Sin caché: la base se modifica antes de escribirla
+        base = _leer(ruta_base, configuracion, usar_cache=False) or TendenciasPedidos(configuracion)
+        compactados = 0
+        for ruta in muertos:
+            if not os.path.exists(ruta):
+                continue
+            tendencias = _leer(ruta, configuracion)
+            if tendencias is not None:
+                base.sumar(tendencias)
+            compactados += 1
+        _escribir(ruta_base, base)
+        for ruta in muertos:
+            _cache_archivos.pop(ruta, None)
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+    return compactados
+
+def reemplazar_base(tendencias: TendenciasPedidos, configuracion: Dict = None) -> List[str]:
+    """
+    Reemplaza el acumulado por tendencias reconstruidas y borra los archivos de procesos terminados
+
+    Returns:
+        list: Archivos de procesos vivos que se conservan (sus pedidos se contarían dos veces)
+    """
+    configuracion = configuracion or obtener_configuracion_tendencias()
+    directorio = configuracion['DIRECTORIO']
+    os.makedirs(directorio, exist_ok=True)
+    vivos = []
+    with _bloqueo_directorio(directorio):
+        _escribir(os.path.join(directorio, ARCHIVO_BASE), tendencias)
+        for ruta in glob.glob(os.path.join(directorio, 'tendencias-*.json')):
+            pid = _pid_archivo(ruta)
+            if pid is None:
+                continue
+            if _proceso_vivo(pid):
+                vivos.append(ruta)
+            else:
+                os.remove(ruta)
+    _cache_archivos.clear()
+    return vivos
+
+class _TendenciasProceso(TendenciasPedidos):
+    """Tendencias del proceso actual, guardadas periódicamente en su archivo"""
+
+    def __init__(self, configuracion: Dict):
+        super().__init__(configuracion)
+        self._hilo_guardado = None
+
+    @property
+    def ruta(self) -> str:
+        return os.path.join(self.configuracion['DIRECTORIO'], f'tendencias-{os.getpid()}.json')
+
+    def guardar(self):
+        """Guarda los resúmenes del proceso si cambiaron desde el último guardado"""
+        if not self.cambios:
+            return
+        self.cambios = False
+        os.makedirs(self.configuracion['DIRECTORIO'], exist_ok=True)
+        _escribir(self.ruta, self)
+
+    def registrar(self, pedidos: Iterable, instante: float = None):
+        super().registrar(pedidos, instante)
+        if self._hilo_guardado is None and self.cambios:
+            with self._lock:
+                if self._hilo_guardado is None:
+                    self._hilo_guardado = threading.Thread(
+                        target=self._bucle_guardado, name='tendencias-guardado', daemon=True
+                    )
+                    self._hilo_guardado.start()
+
+    def _bucle_guardado(self):
+        while True:
+            time.sleep(self.configuracion['INTERVALO_GUARDADO_S'])
+            try:
+                self.guardar()
+            except OSError:
+                self.cambios = True
+
+def _guardar_al_salir():
+    if _tendencias is not None:
+        try:
+            _tendencias.guardar()
+        except OSError:
+            pass
+
+atexit.register(_guardar_al_salir)
+
+def _reiniciar_en_hijo():
+    # Cada worker empieza con sus propios resúmenes (y su propio archivo)
+    global _tendencias, _lock_tendencias
+    _tendencias = None
+    _lock_tendencias = threading.Lock()
+
+os.register_at_fork(after_in_child=_reiniciar_en_hijo)
+
+def obtener_tendencias() -> TendenciasPedidos:
+    """
+    Obtiene las tendencias del proceso actual
+
+    Returns:
+        TendenciasPedidos: Resúmenes de los pedidos creados en este proceso
+    """
+    global _tendencias
+    if _tendencias is None:
+        with _lock_tendencias:
+            if _tendencias is None:
+                _tendencias = _TendenciasProceso(obtener_configuracion_tendencias())
+    return _tendencias
+
+def registrar_pedidos(pedidos: Iterable):
+    """Agrega pedidos recién creados a las tendencias (si están habilitadas)"""
+    if obtener_configuracion_tendencias()['HABILITADAS']:
+        obtener_tendencias().registrar(pedidos)
+
+def fuentes_globales() -> List[TendenciasPedidos]:
+    """
+    Tendencias de todos los procesos: las del proceso actual (en memoria) más
+    los archivos de los demás y el acumulado de los procesos terminados
+    """
+    configuracion = obtener_configuracion_tendencias()
+    compactar(configuracion)
+    propias = obtener_tendencias()
+    fuentes = [propias]
+    for ruta in sorted(glob.glob(os.path.join(configuracion['DIRECTORIO'], 'tendencias-*.json'))):
+        if ruta == propias.ruta:
+            continue
+        tendencias = _leer(ruta, configuracion)
+        if tendencias is not None:
+            fuentes.append(tendencias)
+    return fuentes
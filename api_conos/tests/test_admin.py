@@ -0,0 +1,175 @@
+import datetime
+from unittest import mock
+
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api_conos import admin as admin_conos
+from api_conos.admin import PaginadorConteoEstimado, PedidoConoAdmin
+from api_conos.catalogo import CatalogoConos, obtener_catalogo
+from api_conos.models import PedidoCono
+from api_conos.precios import capturar_precio
+
+CHANGELIST = '/admin/api_conos/pedidocono/'
+
+FECHAS = [
+    datetime.date(2023, 12, 31), datetime.date(2024, 1, 5), datetime.date(2024, 1, 5),
+    datetime.date(2024, 3, 1), datetime.date(2024, 3, 20), datetime.date(2025, 7, 4),
+]
+
+
+def crear_pedidos(filas):
+    """Crea pedidos (cliente, variante, fecha, con_precio) sin pasar por save()"""
+    pedidos = []
+    for cliente, variante, _, con_precio in filas:
+        pedido = PedidoCono(cliente=cliente, variante=variante, tamanio_cono='Grande', toppings=['bacon'])
+        if con_precio:
+            for campo, valor in capturar_precio(variante, 'Grande', ['bacon'], obtener_catalogo()).items():
+                setattr(pedido, campo, valor)
+        pedidos.append(pedido)
+    pedidos = PedidoCono.objects.bulk_create(pedidos)
+    # fecha_pedido es auto_now_add: se fija después de insertar
+    for pedido, (_, _, fecha, _) in zip(pedidos, filas):
+        PedidoCono.objects.filter(pk=pedido.pk).update(fecha_pedido=fecha)
+    return pedidos
+
+
+class AdminPedidosTests(TestCase):
+
+    def setUp(self):
+        CatalogoConos.reconstruir()
+        self.addCleanup(CatalogoConos.invalidar)
+        self.pedidos = crear_pedidos([
+            ('Ana', 'Carnívoro', FECHAS[0], True),
+            ('ANDRÉS', 'Vegetariano', FECHAS[1], False),
+            ('Bruno', 'Saludable', FECHAS[2], True),
+            ('Diana', 'Carnívoro', FECHAS[3], False),
+            ('ana maría', 'Vegetariano', FECHAS[4], True),
+            ('Luis', 'Saludable', FECHAS[5], True),
+        ])
+        self.modelo_admin = site._registry[PedidoCono]
+        usuario = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'clave')
+        self.client.force_login(usuario)
+
+    def _consulta(self):
+        return self.modelo_admin.get_queryset(RequestFactory().get(CHANGELIST))
+
+    def _buscar(self, termino):
+        consulta, duplicados = self.modelo_admin.get_search_results(None, self._consulta(), termino)
+        self.assertFalse(duplicados)
+        return set(consulta.values_list('cliente', flat=True))
+
+    def test_dates_coincide_con_el_select_distinct(self):
+        consulta = self._consulta()
+        for tipo in ('year', 'month', 'day'):
+            for orden in ('ASC', 'DESC'):
+                with self.subTest(tipo=tipo, orden=orden):
+                    self.assertEqual(
+                        list(consulta.dates('fecha_pedido', tipo, orden)),
+                        list(PedidoCono.objects.dates('fecha_pedido', tipo, orden))
+                    )
+        filtrada = consulta.filter(variante='Vegetariano')
+        self.assertEqual(
+            list(filtrada.dates('fecha_pedido', 'month')),
+            [datetime.date(2024, 1, 1), datetime.date(2024, 3, 1)]
+        )
+        self.assertEqual(list(consulta.none().dates('fecha_pedido', 'year')), [])
+
+    def test_min_y_max_por_separado(self):
+        consulta = self._consulta()
+        esperado = PedidoCono.objects.aggregate(primera=Min('fecha_pedido'), ultima=Max('fecha_pedido'))
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(consulta.aggregate(primera=Min('fecha_pedido'), ultima=Max('fecha_pedido')), esperado)
+        self.assertEqual(len(consultas), 2)
+        self.assertTrue(all('ORDER BY' in consulta_sql['sql'] for consulta_sql in consultas))
+
+    def test_busqueda_por_prefijo_variante_e_id(self):
+        self.assertEqual(self._buscar('an'), {'Ana', 'ANDRÉS', 'ana maría'})
+        # Cada palabra debe coincidir con el cliente, la variante o el id
+        self.assertEqual(self._buscar('ANA vege'), {'ana maría'})
+        # Prefijo, no subcadena
+        self.assertEqual(self._buscar('uis'), set())
+        self.assertEqual(self._buscar('vege'), {'ANDRÉS', 'ana maría'})
+        self.assertEqual(self._buscar(str(self.pedidos[3].pk)), {'Diana'})
+        self.assertEqual(len(self._buscar('')), 6)
+
+    def test_la_busqueda_no_usa_like(self):
+        consulta, _ = self.modelo_admin.get_search_results(None, self._consulta(), 'ana')
+        self.assertNotIn('LIKE', str(consulta.query).upper())
+
+    def test_indices_del_listado(self):
+        with connection.cursor() as cursor:
+            indices = connection.introspection.get_constraints(cursor, PedidoCono._meta.db_table)
+        for nombre in ('pedido_fecha_id_idx', 'pedido_variante_fecha_idx', 'pedido_cliente_fecha_idx'):
+            with self.subTest(nombre=nombre):
+                self.assertTrue(indices[nombre]['index'])
+
+    def test_changelist_con_precios_y_navegacion_por_fechas(self):
+        respuesta = self.client.get(CHANGELIST)
+        self.assertEqual(respuesta.status_code, 200)
+        listado = respuesta.context['cl']
+        self.assertEqual(listado.result_count, 6)
+        self.assertIsNone(listado.full_result_count)
+        for pedido in listado.result_list:
+            with self.subTest(cliente=pedido.cliente):
+                esperado = capturar_precio(
+                    pedido.variante, pedido.tamanio_cono, pedido.toppings, obtener_catalogo()
+                )['precio_final']
+                self.assertEqual(self.modelo_admin.precio(pedido), round(esperado, 2))
+
+        respuesta = self.client.get(CHANGELIST, {'fecha_pedido__year': 2024, 'fecha_pedido__month': 1})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['cl'].result_count, 2)
+
+        respuesta = self.client.get(CHANGELIST, {'q': 'an'})
+        self.assertEqual(respuesta.context['cl'].result_count, 3)
+
+    def test_un_cono_por_composicion_sin_precio(self):
+        crear_pedidos([(f'Cliente {numero}', 'Carnívoro', FECHAS[5], False) for numero in range(20)])
+        with mock.patch.object(admin_conos, 'construir_cono', wraps=admin_conos.construir_cono) as construir:
+            self.assertEqual(self.client.get(CHANGELIST).status_code, 200)
+        # Carnívoro y Vegetariano sin precio guardado en la página
+        self.assertEqual(construir.call_count, 2)
+
+    def test_las_consultas_no_crecen_con_las_filas(self):
+        with CaptureQueriesContext(connection) as pocas:
+            self.client.get(CHANGELIST)
+        crear_pedidos([(f'Cliente {numero}', 'Saludable', FECHAS[1], False) for numero in range(40)])
+        with CaptureQueriesContext(connection) as muchas:
+            self.client.get(CHANGELIST)
+        self.assertEqual(len(muchas), len(pocas))
+
+
+class PaginadorConteoEstimadoTests(TestCase):
+
+    def setUp(self):
+        crear_pedidos([(f'Cliente {numero}', 'Carnívoro', FECHAS[0], True) for numero in range(12)])
+
+    def test_cuenta_exacto_hasta_el_limite(self):
+        paginador = PaginadorConteoEstimado(PedidoCono.objects.all(), 5)
+        self.assertEqual(paginador.count, 12)
+        self.assertEqual(paginador.num_pages, 3)
+
+    def test_por_encima_del_limite(self):
+        with mock.patch.object(PaginadorConteoEstimado, 'limite_conteo', 5):
+            # Sin filtros, el rango de ids (incluye los huecos de pedidos borrados)
+            PedidoCono.objects.filter(pk=PedidoCono.objects.order_by('pk')[3].pk).delete()
+            self.assertEqual(PaginadorConteoEstimado(PedidoCono.objects.all(), 5).count, 12)
+            # Con filtros se pagina hasta el límite
+            filtrados = PedidoCono.objects.filter(variante='Carnívoro')
+            self.assertEqual(PaginadorConteoEstimado(filtrados, 5).count, 5)
+            self.assertEqual(PaginadorConteoEstimado(filtrados.filter(pk__lt=0), 5).count, 0)
+
+    def test_el_conteo_es_acotado(self):
+        with mock.patch.object(PaginadorConteoEstimado, 'limite_conteo', 5):
+            with CaptureQueriesContext(connection) as consultas:
+                PaginadorConteoEstimado(PedidoCono.objects.filter(variante='Carnívoro'), 5).count
+        self.assertIn('LIMIT 6', consultas[0]['sql'])
+
+    def test_el_admin_usa_el_paginador(self):
+        self.assertIs(PedidoConoAdmin.paginator, PaginadorConteoEstimado)
+        self.assertFalse(PedidoConoAdmin.show_full_result_count)
@@ -0,0 +1,110 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api_conos.archivo import modelo_particion, resumen_archivo
+from api_conos.models import ParticionArchivo, PedidoCono
+
+URL = '/api/pedidos_conos/'
+
+
+def borrar_particiones():
+    """Las tablas de archivo no son de la app: el vaciado entre tests no las borra"""
+    prefijo = f'{PedidoCono._meta.db_table}_'
+    tablas = [tabla for tabla in connection.introspection.table_names() if tabla.startswith(prefijo)]
+    with connection.schema_editor() as editor:
+        for tabla in tablas:
+            editor.delete_model(modelo_particion(tabla))
+
+
+# Las tablas de archivo se crean con el editor de esquema, fuera de transacciones
+@override_settings(TENDENCIAS={'HABILITADAS': False})
+class ArchivoPedidosTests(TransactionTestCase):
+
+    def setUp(self):
+        self.addCleanup(borrar_particiones)
+        hoy = timezone.localdate()
+        self.fechas = {
+            'reciente': hoy - timedelta(days=10),
+            'viejo': hoy - timedelta(days=400),
+            'muy_viejo': hoy - timedelta(days=460),
+        }
+        self.ids = {}
+        for nombre, fecha in self.fechas.items():
+            pedido = PedidoCono.objects.create(
+                cliente=nombre, variante='Carnívoro', tamanio_cono='Mediano', toppings=['bacon'],
+                precio_final=22.5
+            )
+            PedidoCono.objects.filter(pk=pedido.pk).update(fecha_pedido=fecha)
+            self.ids[nombre] = pedido.pk
+
+    def _archivar(self, *argumentos):
+        call_command('archivar_pedidos', '--horizonte-dias', '180', *argumentos, stdout=StringIO())
+
+    def _clientes(self, **parametros):
+        respuesta = APIClient().get(URL, parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        return sorted(pedido['cliente'] for pedido in respuesta.json()['results'])
+
+    def test_mueve_los_pedidos_viejos_a_particiones_mensuales(self):
+        self._archivar('--lote', '1')
+        self.assertEqual(list(PedidoCono.objects.values_list('cliente', flat=True)), ['reciente'])
+        self.assertEqual(ParticionArchivo.objects.count(), 2)
+        for particion in ParticionArchivo.objects.all():
+            self.assertEqual(particion.total_pedidos, 1)
+            self.assertEqual(particion.fecha_min, particion.fecha_max)
+            self.assertEqual(modelo_particion(particion.tabla).objects.count(), 1)
+
+        resumen = resumen_archivo()
+        self.assertEqual(resumen['total'], 2)
+        self.assertEqual(resumen['por_variante'], {'Carnívoro': 2})
+        self.assertAlmostEqual(resumen['ingresos'], 45.0)
+
+    def test_se_puede_interrumpir_y_reanudar(self):
+        self._archivar('--lote', '1', '--max-lotes', '1')
+        self.assertEqual(PedidoCono.objects.count(), 2)
+        self._archivar()
+        self._archivar()
+        self.assertEqual(PedidoCono.objects.count(), 1)
+        self.assertEqual(resumen_archivo()['total'], 2)
+
+    def test_el_listado_une_el_archivo_si_el_rango_lo_alcanza(self):
+        self._archivar()
+        self.assertEqual(self._clientes(), ['reciente'])
+        self.assertEqual(
+            self._clientes(fecha_desde=self.fechas['muy_viejo'].isoformat()),
+            ['muy_viejo', 'reciente', 'viejo']
+        )
+        self.assertEqual(self._clientes(fecha_desde=self.fechas['reciente'].isoformat()), ['reciente'])
+        self.assertEqual(
+            self._clientes(fecha_hasta=self.fechas['viejo'].isoformat()), ['muy_viejo', 'viejo']
+        )
+        self.assertEqual(
+            self._clientes(
+                fecha_desde=self.fechas['viejo'].isoformat(), fecha_hasta=self.fechas['viejo'].isoformat()
+            ),
+            ['viejo']
+        )
+
+    def test_fecha_invalida(self):
+        respuesta = APIClient().get(URL, {'fecha_hasta': '2024-13-01'})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('fecha_hasta', respuesta.json())
+
+    def test_detalle_y_estadisticas_incluyen_los_archivados(self):
+        self._archivar()
+        cliente = APIClient()
+        detalle = cliente.get(f'{URL}{self.ids["viejo"]}/')
+        self.assertEqual(detalle.status_code, 200)
+        self.assertEqual(detalle.json()['cliente'], 'viejo')
+        self.assertEqual(cliente.get(f'{URL}{self.ids["viejo"]}/detalle_construccion/').status_code, 200)
+
+        estadisticas = cliente.get(f'{URL}estadisticas/').json()['estadisticas_pedidos']
+        self.assertEqual(estadisticas['total_pedidos'], 3)
+        self.assertEqual(estadisticas['pedidos_archivados'], 2)
+        self.assertAlmostEqual(estadisticas['ingresos_totales'], 67.5)
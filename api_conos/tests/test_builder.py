@@ -0,0 +1,40 @@
+from django.test import SimpleTestCase
+
+from api_conos.base import ConoCarnivoro, ConoSaludable
+from api_conos.builder import ConoDirector, ConoPersonalizadoBuilder
+
+
+class BuilderToppingsTests(SimpleTestCase):
+
+    def test_los_toppings_repetidos_se_ignoran_y_conservan_el_orden(self):
+        cono = (ConoPersonalizadoBuilder(ConoCarnivoro())
+                .agregar_multiples_toppings(['bacon', 'guacamole', 'bacon', 'queso_extra', 'guacamole'])
+                .construir())
+        self.assertEqual(cono.toppings_agregados, ('bacon', 'guacamole', 'queso_extra'))
+        self.assertAlmostEqual(cono.precio_toppings, 4.5 + 3.5 + 2.5)
+
+    def test_los_toppings_desconocidos_se_registran_como_rechazados(self):
+        cono = (ConoPersonalizadoBuilder(ConoCarnivoro())
+                .agregar_multiples_toppings(['piña', 'bacon', 'piña'])
+                .construir())
+        self.assertEqual(cono.toppings_agregados, ('bacon',))
+        self.assertEqual(cono.toppings_rechazados, ('piña', 'piña'))
+        self.assertAlmostEqual(cono.precio_toppings, 4.5)
+
+    def test_ingredientes_finales_son_la_base_seguida_de_los_toppings(self):
+        cono = (ConoPersonalizadoBuilder(ConoSaludable('Grande'))
+                .agregar_multiples_toppings(['aguacate', 'jalapeños'])
+                .construir())
+        base = ConoSaludable.INGREDIENTES_BASE
+        self.assertEqual(cono.ingredientes_base, base)
+        self.assertEqual(cono.ingredientes_finales, base + ('aguacate', 'jalapeños'))
+        self.assertEqual(cono.ingredientes_finales[len(cono.ingredientes_base):], cono.toppings_agregados)
+        self.assertEqual(cono.variante, 'Saludable')
+        self.assertAlmostEqual(cono.precio_total, 16.0 * 1.3 + 3.0 + 1.5)
+
+    def test_director_construye_las_recetas(self):
+        premium = ConoDirector(ConoPersonalizadoBuilder(ConoCarnivoro())).construir_cono_premium()
+        self.assertEqual(premium.toppings_agregados, ('queso_extra', 'guacamole', 'bacon'))
+        self.assertAlmostEqual(premium.precio_total, 18.0 + 2.5 + 3.5 + 4.5)
+        economico = ConoDirector(ConoPersonalizadoBuilder(ConoCarnivoro('Pequeño'))).construir_cono_economico()
+        self.assertAlmostEqual(economico.precio_total, 18.0 * 0.8 + 2.5 + 1.5)
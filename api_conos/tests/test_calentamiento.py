@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from api_conos import calentamiento
+from api_conos.calentamiento import ETAPAS, calentar_aplicacion, preparar_conexiones
+from api_conos.logger import obtener_logger
+
+
+class CalentamientoTests(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        obtener_logger().limpiar_logs()
+        self.addCleanup(obtener_logger().limpiar_logs)
+
+    def test_mide_cada_etapa(self):
+        tiempos = calentar_aplicacion()
+        self.assertEqual(list(tiempos), [nombre for nombre, _ in ETAPAS])
+        self.assertTrue(all(tiempo >= 0 for tiempo in tiempos.values()))
+        self.assertEqual(obtener_logger().obtener_logs_por_tipo('calentamiento')[-1]['datos_extra'], tiempos)
+
+    def test_una_etapa_fallida_no_detiene_el_arranque(self):
+        etapas = (('rota', mock.Mock(side_effect=RuntimeError('sin catálogo'))), ('bien', mock.Mock()))
+        with mock.patch.object(calentamiento, 'ETAPAS', etapas):
+            tiempos = calentar_aplicacion()
+        self.assertEqual(list(tiempos), ['rota', 'bien'])
+        etapas[1][1].assert_called_once_with()
+        advertencia = obtener_logger().obtener_logs_por_tipo('calentamiento')[0]
+        self.assertEqual(advertencia['nivel'], 'WARNING')
+        self.assertIn('sin catálogo', advertencia['detalle'])
+
+    def test_prepara_las_conexiones_de_cada_alias(self):
+        self.assertEqual(list(preparar_conexiones()), ['default'])
+        with self.settings(REPLICA_LECTURA={'HABILITADA': True, 'ALIAS': 'replica'}):
+            self.assertEqual(list(preparar_conexiones()), ['default', 'replica'])
+
+    @override_settings(CALENTAMIENTO={'HABILITADO': True, 'CONEXIONES': False})
+    def test_sin_preparar_conexiones(self):
+        self.assertEqual(preparar_conexiones(), {})
+
+    @override_settings(CALENTAMIENTO={'HABILITADO': False})
+    def test_deshabilitado(self):
+        self.assertEqual(calentar_aplicacion(), {})
+        self.assertEqual(preparar_conexiones(), {})
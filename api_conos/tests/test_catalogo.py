@@ -0,0 +1,126 @@
+import json
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api_conos.base import ConoBase
+from api_conos.catalogo import CatalogoConos, obtener_catalogo
+from api_conos.factory import ConoFactory
+from api_conos.models import PrecioTopping, PrecioVariante, VersionCatalogo
+from api_conos.validacion import obtener_validador
+
+URL = '/api/pedidos_conos/'
+
+
+class CatalogoMemorizadoTests(TestCase):
+
+    def setUp(self):
+        CatalogoConos.reconstruir()
+
+    def test_el_snapshot_se_reutiliza_sin_consultas(self):
+        catalogo = obtener_catalogo()
+        with self.assertNumQueries(0):
+            for _ in range(100):
+                self.assertIs(obtener_catalogo(), catalogo)
+
+    def test_el_snapshot_es_inmutable(self):
+        catalogo = obtener_catalogo()
+        with self.assertRaises(TypeError):
+            catalogo.precios_toppings['bacon'] = 0.0
+        with self.assertRaises(TypeError):
+            catalogo.variantes['Carnívoro']['precio_base'] = 0.0
+        with self.assertRaises(AttributeError):
+            catalogo.version = 99
+
+    def test_tipos_disponibles_coincide_con_la_informacion_del_factory(self):
+        respuesta = APIClient().get(f'{URL}tipos_disponibles/')
+        self.assertEqual(respuesta.status_code, 200)
+        datos = json.loads(respuesta.content)
+        self.assertEqual(datos['tipos_disponibles'], ConoFactory.obtener_info_tipos())
+        self.assertEqual(datos['total_tipos'], len(ConoFactory.obtener_tipos_disponibles()))
+
+    def test_etag_permite_revalidar_la_cache_del_cliente(self):
+        cliente = APIClient()
+        for ruta in ('tipos_disponibles/', 'toppings_disponibles/'):
+            with self.subTest(ruta=ruta):
+                respuesta = cliente.get(f'{URL}{ruta}')
+                etag = respuesta['ETag']
+                self.assertEqual(respuesta['X-Catalogo-Version'], obtener_catalogo().version_publica)
+                revalidada = cliente.get(f'{URL}{ruta}', HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(revalidada.status_code, 304)
+                self.assertEqual(revalidada.content, b'')
+                self.assertEqual(cliente.get(f'{URL}{ruta}', HTTP_IF_NONE_MATCH='"otro"').status_code, 200)
+
+
+class ConoDulce(ConoBase):
+    """Cono de prueba registrado en tiempo de ejecución"""
+
+    __slots__ = ()
+
+    precio_base = 10.0
+    INGREDIENTES_BASE = ('barquillo', 'helado')
+
+    def preparar_base(self):
+        self.ingredientes = self.INGREDIENTES_BASE
+
+
+class CatalogoEnBaseDeDatosTests(TestCase):
+
+    def setUp(self):
+        CatalogoConos.reconstruir()
+        # Tras deshacer la transacción del test el próximo lector recarga el catálogo
+        self.addCleanup(CatalogoConos.invalidar)
+
+    def test_cambio_de_precio_se_publica_al_confirmar(self):
+        anterior = obtener_catalogo()
+        topping = PrecioTopping.objects.get(topping='bacon')
+        topping.precio = 9.0
+        with self.captureOnCommitCallbacks(execute=True):
+            topping.save()
+
+        catalogo = obtener_catalogo()
+        self.assertIsNot(catalogo, anterior)
+        self.assertEqual(catalogo.version, anterior.version + 1)
+        self.assertEqual(catalogo.precios_toppings['bacon'], 9.0)
+        self.assertNotEqual(catalogo.etag, anterior.etag)
+        self.assertEqual(anterior.precios_toppings['bacon'], 4.5)
+
+    def test_otros_procesos_recargan_en_la_siguiente_verificacion(self):
+        # Cambio hecho por otro proceso: sin señal, solo sube la versión
+        PrecioVariante.objects.filter(variante='Carnívoro').update(precio_base=20.0)
+        VersionCatalogo.incrementar()
+        self.assertEqual(obtener_catalogo().variantes['Carnívoro']['precio_base'], 18.0)
+
+        CatalogoConos.invalidar()
+        self.assertEqual(obtener_catalogo().variantes['Carnívoro']['precio_base'], 20.0)
+
+    def test_el_validador_sigue_los_toppings_del_catalogo(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            PrecioTopping.objects.create(topping='piña', precio=2.0)
+            PrecioTopping.objects.get(topping='bacon').delete()
+
+        validador = obtener_validador()
+        self.assertEqual(validador.toppings_rechazados(['piña', 'bacon']), ['bacon'])
+        self.assertEqual(validador.toppings_permitidos, tuple(obtener_catalogo().precios_toppings))
+
+    def test_registrar_tipo_cambia_la_version_publica(self):
+        tipos, generacion = ConoFactory._tipos_disponibles, CatalogoConos._generacion
+        self.addCleanup(CatalogoConos.reconstruir)
+        self.addCleanup(setattr, CatalogoConos, '_generacion', generacion)
+        self.addCleanup(setattr, ConoFactory, '_tipos_disponibles', tipos)
+        anterior = obtener_catalogo()
+
+        ConoFactory.registrar_tipo('Dulce', ConoDulce)
+
+        catalogo = obtener_catalogo()
+        self.assertEqual(catalogo.version, anterior.version)
+        self.assertEqual(catalogo.version_publica, f'{anterior.version}.{generacion + 1}')
+        self.assertNotEqual(catalogo.etag, anterior.etag)
+        self.assertEqual(catalogo.variantes['Dulce']['precio_base'], 10.0)
+        respuesta = APIClient().get(f'{URL}tipos_disponibles/')
+        self.assertEqual(respuesta['X-Catalogo-Version'], catalogo.version_publica)
+        self.assertIn('Dulce', json.loads(respuesta.content)['tipos_disponibles'])
+
+    def test_registrar_tipo_rechaza_clases_que_no_son_conos(self):
+        with self.assertRaises(ValueError):
+            ConoFactory.registrar_tipo('Dulce', dict)
@@ -0,0 +1,270 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api_conos.catalogo import CatalogoConos, obtener_catalogo
+from api_conos.clientes import CacheHistorial, historial_cliente, obtener_cache_historial, totales_por_cliente
+from api_conos.models import ParticionArchivo, PedidoCono, ResumenCliente
+from api_conos.precios import capturar_precio
+from api_conos.tests.test_archivo import borrar_particiones
+
+URL = '/api/pedidos_conos/'
+
+PEDIDO = {'cliente': 'Ana', 'variante': 'Carnívoro', 'tamanio_cono': 'Grande', 'toppings': ['bacon']}
+
+
+def historial(pedidos):
+    """Datos de historial con `pedidos` pedidos numerados"""
+    return {'cliente': 'Ana', 'total_pedidos': pedidos, 'gasto_total': 0.0, 'pedidos': list(range(pedidos))}
+
+
+class CacheHistorialTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = CacheHistorial(max_entradas=2, ttl=30)
+
+    def _guardar(self, cliente, limite, datos):
+        self.cache.guardar(cliente, limite, datos, self.cache.invalidaciones())
+
+    def test_sirve_limites_menores_o_el_historial_completo(self):
+        self.assertIsNone(self.cache.obtener('Ana', 5))
+        self._guardar('Ana', 5, historial(5))
+        self.assertEqual(self.cache.obtener('Ana', 3)['pedidos'], [0, 1, 2])
+        # Puede haber más de 5 pedidos: hay que leerlos
+        self.assertIsNone(self.cache.obtener('Ana', 10))
+
+        self._guardar('Luis', 5, historial(2))
+        self.assertEqual(self.cache.obtener('Luis', 50)['pedidos'], [0, 1])
+
+    def test_caduca_a_los_ttl_segundos(self):
+        with mock.patch('api_conos.clientes.time.monotonic', return_value=1000.0):
+            self._guardar('Ana', 5, historial(5))
+        with mock.patch('api_conos.clientes.time.monotonic', return_value=1029.0):
+            self.assertIsNotNone(self.cache.obtener('Ana', 5))
+        with mock.patch('api_conos.clientes.time.monotonic', return_value=1030.0):
+            self.assertIsNone(self.cache.obtener('Ana', 5))
+
+    def test_descarta_el_menos_usado(self):
+        self._guardar('Ana', 5, historial(1))
+        self._guardar('Luis', 5, historial(1))
+        self.cache.obtener('Ana', 5)
+        self._guardar('Eva', 5, historial(1))
+        self.assertIsNone(self.cache.obtener('Luis', 5))
+        self.assertIsNotNone(self.cache.obtener('Ana', 5))
+        self.assertIsNotNone(self.cache.obtener('Eva', 5))
+
+    def test_no_guarda_una_lectura_anterior_a_una_invalidacion(self):
+        invalidaciones = self.cache.invalidaciones()
+        # Una escritura se confirma mientras se leía la base de datos
+        self.cache.invalidar(['Luis'])
+        self.cache.guardar('Ana', 5, historial(1), invalidaciones)
+        self.assertIsNone(self.cache.obtener('Ana', 5))
+
+    def test_invalidar_y_limpiar(self):
+        self._guardar('Ana', 5, historial(1))
+        self._guardar('Luis', 5, historial(1))
+        self.cache.invalidar(['Ana', 'Nadie'])
+        self.assertIsNone(self.cache.obtener('Ana', 5))
+        self.assertIsNotNone(self.cache.obtener('Luis', 5))
+        self.cache.limpiar()
+        self.assertIsNone(self.cache.obtener('Luis', 5))
+
+
+@override_settings(TENDENCIAS={'HABILITADAS': False})
+class HistorialClienteTests(TestCase):
+
+    def setUp(self):
+        CatalogoConos.reconstruir()
+        self.addCleanup(CatalogoConos.invalidar)
+        obtener_cache_historial().limpiar()
+        self.addCleanup(obtener_cache_historial().limpiar)
+        self.cliente = APIClient()
+
+    def crear(self, **cambios):
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.cliente.post(URL, {**PEDIDO, **cambios}, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        return respuesta.data['id']
+
+    def test_ultimos_pedidos_del_cliente_exacto(self):
+        ids = [self.crear() for _ in range(4)]
+        self.crear(cliente='Anabel')
+        self.crear(cliente='ana')
+
+        datos = historial_cliente('Ana', 3)
+        self.assertEqual([pedido['id'] for pedido in datos['pedidos']], ids[::-1][:3])
+        self.assertEqual(datos['total_pedidos'], 4)
+        precio = capturar_precio('Carnívoro', 'Grande', ['bacon'], obtener_catalogo())['precio_final']
+        self.assertAlmostEqual(datos['gasto_total'], round(4 * precio, 2))
+        self.assertEqual(datos['pedidos'][0]['precio_final'], round(precio, 2))
+
+    def test_pedidos_sin_snapshot_con_el_precio_del_catalogo(self):
+        composiciones = [('Carnívoro', 'Grande', ['bacon']), ('Saludable', 'Pequeño', [])]
+        PedidoCono.objects.bulk_create([
+            PedidoCono(cliente='Ana', variante=variante, tamanio_cono=tamanio, toppings=toppings)
+            for variante, tamanio, toppings in composiciones
+        ])
+        call_command('reconstruir_clientes', '--sin-archivo', stdout=StringIO())
+        precios = [capturar_precio(*composicion, obtener_catalogo())['precio_final'] for composicion in composiciones]
+
+        datos = historial_cliente('Ana', 10)
+        self.assertEqual(
+            sorted(pedido['precio_final'] for pedido in datos['pedidos']),
+            sorted(round(precio, 2) for precio in precios)
+        )
+        self.assertEqual(datos['total_pedidos'], 2)
+        self.assertAlmostEqual(datos['gasto_total'], round(sum(precios), 2))
+
+    def test_la_segunda_lectura_sale_de_la_cache(self):
+        self.crear()
+        historial_cliente('Ana', 10)
+        with self.assertNumQueries(0):
+            historial_cliente('Ana', 5)
+        # Sin resumen ni pedidos también se guarda
+        historial_cliente('Nadie', 10)
+        with self.assertNumQueries(0):
+            self.assertEqual(historial_cliente('Nadie', 10)['pedidos'], [])
+
+    def test_las_escrituras_invalidan_al_confirmarse(self):
+        pedido_id = self.crear()
+        self.assertEqual(historial_cliente('Ana', 10)['total_pedidos'], 1)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.cliente.post(URL, PEDIDO, format='json')
+        # Antes del commit la caché sigue sirviendo lo confirmado
+        self.assertEqual(historial_cliente('Ana', 10)['total_pedidos'], 1)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(historial_cliente('Ana', 10)['total_pedidos'], 2)
+
+        escrituras = (
+            lambda: self.cliente.patch(f'{URL}{pedido_id}/', {'tamanio_cono': 'Pequeño'}, format='json'),
+            lambda: self.cliente.post(f'{URL}crear_lote/', [PEDIDO], format='json'),
+            lambda: self.cliente.post(
+                f'{URL}actualizar_lote/', {'filtro': {'cliente': 'Ana'}, 'cambios': {'quitar_topping': 'bacon'}},
+                format='json'
+            ),
+            lambda: self.cliente.delete(f'{URL}{pedido_id}/'),
+            lambda: self.cliente.post(f'{URL}eliminar_lote/', {'filtro': {'cliente': 'Ana'}}, format='json'),
+        )
+        for numero, escritura in enumerate(escrituras):
+            with self.subTest(escritura=numero):
+                historial_cliente('Ana', 10)
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.assertLess(escritura().status_code, 300)
+                datos = historial_cliente('Ana', 10)
+                esperados = totales_por_cliente(PedidoCono.objects.filter(cliente='Ana')).get('Ana', [0, 0.0])
+                self.assertEqual(datos['total_pedidos'], esperados[0])
+                self.assertAlmostEqual(datos['gasto_total'], round(esperados[1], 2))
+                self.assertEqual(
+                    [pedido['id'] for pedido in datos['pedidos']],
+                    list(PedidoCono.objects.filter(cliente='Ana').order_by('-fecha_pedido', '-id')
+                         .values_list('id', flat=True))
+                )
+
+    def test_reconstruir_clientes(self):
+        for cliente in ('Ana', 'Ana', 'Luis'):
+            self.crear(cliente=cliente)
+        ResumenCliente.objects.update(total_pedidos=0, gasto_total=0.0)
+        salida = StringIO()
+        call_command('reconstruir_clientes', '--sin-archivo', stdout=salida)
+        self.assertIn('Totales de 2 clientes reconstruidos con 3 pedidos', salida.getvalue())
+        esperados = totales_por_cliente(PedidoCono.objects.all())
+        for resumen in ResumenCliente.objects.all():
+            self.assertEqual(resumen.total_pedidos, esperados[resumen.cliente][0])
+            self.assertAlmostEqual(resumen.gasto_total, esperados[resumen.cliente][1])
+
+    def test_reconstruir_bloquea_antes_de_agregar(self):
+        self.crear()
+        with CaptureQueriesContext(connection) as consultas:
+            call_command('reconstruir_clientes', stdout=StringIO())
+        sentencias = [consulta['sql'] for consulta in consultas]
+        borrado = next(i for i, sql in enumerate(sentencias) if sql.startswith('DELETE') and 'resumencliente' in sql)
+        lecturas = [i for i, sql in enumerate(sentencias) if sql.startswith('SELECT') and 'pedidocono' in sql]
+        # Ningún pedido se lee fuera del bloqueo de escritura de los resúmenes
+        self.assertLess(borrado, min(lecturas))
+        self.assertEqual(ResumenCliente.objects.get(cliente='Ana').total_pedidos, 1)
+
+
+@override_settings(TENDENCIAS={'HABILITADAS': False})
+class HistorialClienteApiTests(TestCase):
+
+    def setUp(self):
+        obtener_cache_historial().limpiar()
+        self.addCleanup(obtener_cache_historial().limpiar)
+        self.cliente = APIClient()
+        for _ in range(4):
+            self.cliente.post(URL, PEDIDO, format='json')
+
+    def test_limite_por_defecto_y_maximo(self):
+        respuesta = self.cliente.get(f'{URL}historial_cliente/', {'cliente': ' Ana '})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['cliente'], 'Ana')
+        self.assertEqual(len(respuesta.data['pedidos']), 4)
+        self.assertEqual(set(respuesta.data['pedidos'][0]), {
+            'id', 'fecha_pedido', 'variante', 'tamanio_cono', 'toppings', 'precio_final'
+        })
+        with self.settings(HISTORIAL_CLIENTES={'LIMITE': 10, 'MAX_LIMITE': 2}):
+            respuesta = self.cliente.get(f'{URL}historial_cliente/', {'cliente': 'Ana', 'limite': 50})
+        self.assertEqual(len(respuesta.data['pedidos']), 2)
+        self.assertEqual(respuesta.data['total_pedidos'], 4)
+
+    def test_parametros_invalidos(self):
+        for parametros in ({}, {'cliente': '  '}, {'cliente': 'Ana', 'limite': 0}, {'cliente': 'Ana', 'limite': 'x'}):
+            with self.subTest(parametros=parametros):
+                respuesta = self.cliente.get(f'{URL}historial_cliente/', parametros)
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertEqual(respuesta.data['error'], 'Parámetros inválidos')
+
+
+# Migra hacia atrás y adelante: el esquema no puede estar dentro de la transacción del test
+class MigracionResumenesTests(TransactionTestCase):
+
+    anterior = [('api_conos', '0007_preparacion_cocina')]
+    actual = [('api_conos', '0008_historial_clientes')]
+
+    def _migrar(self, destino):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(destino)
+
+    def setUp(self):
+        CatalogoConos.reconstruir()
+        self.addCleanup(CatalogoConos.invalidar)
+        self.addCleanup(borrar_particiones)
+        self.addCleanup(self._migrar, self.actual)
+        self._migrar(self.anterior)
+
+    def test_carga_los_totales_de_los_pedidos_y_el_archivo(self):
+        precio = capturar_precio('Carnívoro', 'Grande', ['bacon'], obtener_catalogo())['precio_final']
+        viejo = PedidoCono.objects.create(
+            cliente='Ana', variante='Carnívoro', tamanio_cono='Grande', toppings=['bacon'], precio_final=precio
+        )
+        PedidoCono.objects.filter(pk=viejo.pk).update(fecha_pedido=timezone.localdate() - timedelta(days=400))
+        call_command('archivar_pedidos', '--horizonte-dias', '180', stdout=StringIO())
+        self.assertEqual(ParticionArchivo.objects.count(), 1)
+        # Uno con snapshot y otro anterior a los snapshots
+        PedidoCono.objects.create(
+            cliente='Ana', variante='Carnívoro', tamanio_cono='Grande', toppings=['bacon'], precio_final=precio
+        )
+        PedidoCono.objects.bulk_create([
+            PedidoCono(cliente='Luis', variante='Saludable', tamanio_cono='Pequeño', toppings=[])
+        ])
+
+        self._migrar(self.actual)
+        resumenes = {r.cliente: (r.total_pedidos, r.gasto_total) for r in ResumenCliente.objects.all()}
+        self.assertEqual(set(resumenes), {'Ana', 'Luis'})
+        self.assertEqual(resumenes['Ana'][0], 2)
+        self.assertAlmostEqual(resumenes['Ana'][1], 2 * precio)
+        self.assertEqual(resumenes['Luis'][0], 1)
+        self.assertAlmostEqual(
+            resumenes['Luis'][1], capturar_precio('Saludable', 'Pequeño', [], obtener_catalogo())['precio_final']
+        )
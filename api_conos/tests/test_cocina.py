@@ -0,0 +1,220 @@
+import json
+import os
+import random
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api_conos.cocina import (
+    CONFIGURACION_POR_DEFECTO, PedidoCocina, duracion_lote, planificar, simular
+)
+from api_conos.management.commands.simular_cocina import flujo_sintetico
+from api_conos.models import PreparacionCocina
+
+URL = '/api/pedidos_conos/'
+
+
+def configuracion(**cambios):
+    """Configuración de la cocina para las pruebas"""
+    return {**CONFIGURACION_POR_DEFECTO, **cambios}
+
+
+def pedido(numero, variante='Carnívoro', tamanio='Grande', toppings=(), llegada=0.0):
+    return PedidoCocina(numero, variante, tamanio, frozenset(toppings), llegada)
+
+
+def esperas(lotes):
+    """Espera hasta empezar de cada pedido del plan"""
+    return {pedido.id: lote.inicio - pedido.llegada for lote in lotes for pedido in lote.pedidos}
+
+
+class PlanificarTests(SimpleTestCase):
+
+    def test_duracion_de_un_lote(self):
+        lote = [pedido(1, toppings=['bacon', 'queso_extra']), pedido(2, toppings=['bacon'])]
+        self.assertEqual(duracion_lote(lote, configuracion()), 60 + 2 * 20 + 2 * 10)
+
+    def test_lotes_de_la_misma_receta_hasta_max_lote(self):
+        rng = random.Random(3)
+        pendientes = [
+            pedido(numero, rng.choice(['Carnívoro', 'Saludable']), rng.choice(['Grande', 'Pequeño']),
+                   rng.sample(['bacon', 'guacamole', 'queso_extra'], rng.randrange(3)), numero * 5.0)
+            for numero in range(40)
+        ]
+        lotes = planificar(pendientes, 200.0, configuracion())
+
+        self.assertEqual(sorted(p.id for lote in lotes for p in lote.pedidos), list(range(40)))
+        for lote in lotes:
+            self.assertLessEqual(len(lote.pedidos), 4)
+            self.assertEqual({(p.variante, p.tamanio) for p in lote.pedidos}, {(lote.variante, lote.tamanio)})
+            self.assertEqual(lote.fin - lote.inicio, duracion_lote(lote.pedidos, configuracion()))
+        # Cada estación prepara un lote detrás de otro
+        for estacion in range(2):
+            propios = [lote for lote in lotes if lote.estacion == estacion]
+            for anterior, siguiente in zip(propios, propios[1:]):
+                self.assertEqual(siguiente.inicio, anterior.fin)
+
+    def test_agrupa_por_toppings_compartidos(self):
+        pendientes = [
+            pedido(1, toppings=['bacon']), pedido(2, toppings=['guacamole']),
+            pedido(3, toppings=['bacon']), pedido(4, toppings=['guacamole']),
+        ]
+        lotes = planificar(pendientes, 0.0, configuracion(MAX_LOTE=2))
+        self.assertEqual([sorted(p.id for p in lote.pedidos) for lote in lotes], [[1, 3], [2, 4]])
+
+    def test_ningun_pedido_pasa_de_la_espera_maxima(self):
+        # Un pedido de una receta poco pedida frente a dos lotes de la más pedida
+        pendientes = [pedido(0, variante='Saludable')] + [pedido(numero) for numero in range(1, 9)]
+        ajustes = dict(ESTACIONES=1, MAX_LOTE=4, TIEMPO_TOPPING_S=0)
+
+        lotes = planificar(pendientes, 0.0, configuracion(MAX_ESPERA_S=250, **ajustes))
+        self.assertEqual(esperas(lotes)[0], 140)
+        self.assertLessEqual(max(esperas(lotes).values()), 250)
+
+        # Sin la cota, la receta con más pedidos va siempre primero
+        lotes = planificar(pendientes, 0.0, configuracion(MAX_ESPERA_S=10000, **ajustes))
+        self.assertEqual(esperas(lotes)[0], 2 * 140)
+
+    def test_fifo_prepara_de_a_uno_en_orden(self):
+        pendientes = [pedido(numero, llegada=float(10 - numero)) for numero in range(5)]
+        lotes = planificar(pendientes, 0.0, configuracion(ESTACIONES=1), politica='fifo')
+        self.assertEqual([lote.pedidos[0].id for lote in lotes], [4, 3, 2, 1, 0])
+        self.assertTrue(all(len(lote.pedidos) == 1 for lote in lotes))
+
+
+class SimularTests(SimpleTestCase):
+
+    def _flujo(self, tasa):
+        return flujo_sintetico(
+            random.Random(7), 600, tasa, {'Carnívoro': 5, 'Vegetariano': 3, 'Saludable': 2},
+            {'Pequeño': 2, 'Mediano': 5, 'Grande': 3}, 2.0
+        )
+
+    def test_los_lotes_rinden_mas_que_fifo_en_hora_punta(self):
+        flujo = self._flujo(tasa=3.0)
+        fifo, lotes = simular(flujo, configuracion(), 'fifo'), simular(flujo, configuracion(), 'lotes')
+        self.assertEqual((fifo['pedidos'], lotes['pedidos']), (600, 600))
+        self.assertEqual(fifo['pedidos_por_lote'], 1.0)
+        self.assertGreater(lotes['pedidos_por_lote'], 1.0)
+        self.assertGreater(lotes['pedidos_por_hora'], fifo['pedidos_por_hora'])
+        self.assertLess(lotes['espera_s']['p95'], fifo['espera_s']['p95'])
+        for resultado in (fifo, lotes):
+            distribucion = resultado['espera_s']
+            self.assertLessEqual(distribucion['p50'], distribucion['p95'])
+            self.assertLessEqual(distribucion['p95'], distribucion['p99'])
+            self.assertLessEqual(distribucion['p99'], distribucion['max'])
+            self.assertLessEqual(resultado['utilizacion'], 1.0)
+
+    def test_espera_maxima_segun_la_carga(self):
+        # Con carga moderada nadie pasa de MAX_ESPERA_S
+        resultado = simular(self._flujo(tasa=0.5), configuracion(), 'lotes')
+        self.assertEqual(resultado['sobre_max_espera'], 0)
+        self.assertLessEqual(resultado['espera_s']['max'], 300)
+        # Cuando FIFO se satura, los lotes dejan a pocos pedidos por encima
+        flujo = self._flujo(tasa=1.5)
+        fifo, lotes = simular(flujo, configuracion(), 'fifo'), simular(flujo, configuracion(), 'lotes')
+        self.assertLess(lotes['sobre_max_espera'] * 10, fifo['sobre_max_espera'])
+
+    def test_la_politica_no_conoce_los_pedidos_futuros(self):
+        flujo = [pedido(1, llegada=0.0), pedido(2, llegada=1.0)]
+        resultado = simular(flujo, configuracion(ESTACIONES=1), 'lotes')
+        # El primero empieza solo al llegar; el segundo espera a que se libere la estación
+        self.assertEqual(resultado['lotes'], 2)
+        self.assertEqual(resultado['espera_s']['max'], 80 - 1)
+
+    def test_flujo_vacio(self):
+        resultado = simular([], configuracion())
+        self.assertEqual((resultado['pedidos'], resultado['lotes'], resultado['pedidos_por_hora']), (0, 0, 0.0))
+
+
+@override_settings(TENDENCIAS={'HABILITADAS': False})
+class ColaCocinaApiTests(TestCase):
+
+    def setUp(self):
+        self.cliente = APIClient()
+        self.ids = []
+        for variante, tamanio in [('Carnívoro', 'Grande')] * 3 + [('Saludable', 'Pequeño')] * 2:
+            respuesta = self.cliente.post(
+                URL, {'cliente': 'Ana', 'variante': variante, 'tamanio_cono': tamanio, 'toppings': ['bacon']},
+                format='json'
+            )
+            self.ids.append(respuesta.data['id'])
+
+    def test_plan_de_los_pendientes(self):
+        plan = self.cliente.get(f'{URL}cola_cocina/').data
+        self.assertEqual(plan['pendientes'], 5)
+        self.assertEqual(plan['max_espera_s'], 300)
+        self.assertEqual(
+            sorted((lote['variante'], lote['tamanio_cono'], len(lote['pedidos'])) for lote in plan['lotes']),
+            [('Carnívoro', 'Grande', 3), ('Saludable', 'Pequeño', 2)]
+        )
+        self.assertEqual(sorted(i for lote in plan['lotes'] for i in lote['pedidos']), sorted(self.ids))
+        self.assertLess(plan['duracion_estimada_s'], plan['duracion_fifo_s'])
+        self.assertEqual(self.cliente.get(f'{URL}cola_cocina/', {'limite': 2}).data['pendientes'], 2)
+
+    def test_marcar_preparados(self):
+        respuesta = self.cliente.post(f'{URL}cola_cocina/', {'preparados': self.ids[:2] + [0]}, format='json')
+        self.assertEqual(respuesta.data, {'pedidos_preparados': 2})
+        # Ya preparados: no cambian
+        respuesta = self.cliente.post(f'{URL}cola_cocina/', {'preparados': self.ids[:2]}, format='json')
+        self.assertEqual(respuesta.data, {'pedidos_preparados': 0})
+        self.assertEqual(self.cliente.get(f'{URL}cola_cocina/').data['pendientes'], 3)
+
+    def test_parametros_invalidos(self):
+        for limite in ('0', 'diez'):
+            with self.subTest(limite=limite):
+                self.assertEqual(self.cliente.get(f'{URL}cola_cocina/', {'limite': limite}).status_code, 400)
+        for cuerpo in ({}, {'preparados': 3}, {'preparados': ['1']}, {'preparados': [True]}):
+            with self.subTest(cuerpo=cuerpo):
+                self.assertEqual(self.cliente.post(f'{URL}cola_cocina/', cuerpo, format='json').status_code, 400)
+
+    @override_settings(COCINA={'HABILITADA': False})
+    def test_deshabilitada_no_encola(self):
+        self.cliente.post(
+            URL, {'cliente': 'Luis', 'variante': 'Carnívoro', 'tamanio_cono': 'Grande', 'toppings': []},
+            format='json'
+        )
+        self.assertEqual(PreparacionCocina.objects.count(), 5)
+
+
+class SimularCocinaComandoTests(TestCase):
+
+    def _simular(self, *argumentos):
+        salida = StringIO()
+        call_command('simular_cocina', *argumentos, '--json', stdout=salida)
+        return json.loads(salida.getvalue())
+
+    def test_flujo_sintetico_reproducible_y_guardado(self):
+        descriptor, ruta = tempfile.mkstemp(suffix='.jsonl')
+        os.close(descriptor)
+        self.addCleanup(os.remove, ruta)
+
+        sintetico = self._simular('--pedidos', '150', '--semilla', '4', '--guardar-flujo', ruta)
+        self.assertEqual([resultado['politica'] for resultado in sintetico], ['fifo', 'lotes'])
+        self.assertEqual(self._simular('--archivo', ruta), sintetico)
+
+    def test_flujo_registrado(self):
+        cliente = APIClient()
+        with self.settings(TENDENCIAS={'HABILITADAS': False}):
+            for _ in range(3):
+                cliente.post(
+                    URL, {'cliente': 'Ana', 'variante': 'Carnívoro', 'tamanio_cono': 'Grande', 'toppings': []},
+                    format='json'
+                )
+        resultados = self._simular('--registrado', '--estaciones', '1')
+        self.assertEqual([resultado['pedidos'] for resultado in resultados], [3, 3])
+        # El primero empieza solo; los otros dos llegan mientras se prepara y van juntos
+        self.assertEqual([resultado['lotes'] for resultado in resultados], [3, 2])
+
+    def test_opciones_invalidas(self):
+        descriptor, ruta = tempfile.mkstemp(suffix='.jsonl')
+        with os.fdopen(descriptor, 'w') as archivo:
+            archivo.write('{"variante": "Carnívoro"}\n')
+        self.addCleanup(os.remove, ruta)
+        for argumentos in (['--archivo', ruta], ['--max-lote', '0'], ['--registrado'], ['--registrado', '--desde', 'ayer']):
+            with self.subTest(argumentos=argumentos), self.assertRaises(CommandError):
+                call_command('simular_cocina', *argumentos, stdout=StringIO())
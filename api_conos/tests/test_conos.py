@@ -0,0 +1,44 @@
+from django.test import SimpleTestCase
+
+from api_conos.base import ConoBase, ConoCarnivoro, ConoSaludable, ConoVegetariano
+from api_conos.builder import ConoPersonalizadoBuilder
+from api_conos.factory import ConoFactory
+
+
+class ConosConSlotsTests(SimpleTestCase):
+
+    def test_los_conos_no_tienen_diccionario_de_instancia(self):
+        for clase in (ConoCarnivoro, ConoVegetariano, ConoSaludable):
+            with self.subTest(clase=clase.__name__):
+                cono = clase('Grande')
+                self.assertFalse(hasattr(cono, '__dict__'))
+                with self.assertRaises(AttributeError):
+                    cono.atributo_nuevo = 1
+
+    def test_el_builder_no_tiene_diccionario_de_instancia(self):
+        builder = ConoPersonalizadoBuilder(ConoCarnivoro())
+        self.assertFalse(hasattr(builder, '__dict__'))
+        with self.assertRaises(AttributeError):
+            builder.atributo_nuevo = 1
+
+    def test_los_datos_de_clase_se_comparten_entre_instancias(self):
+        primero, segundo = ConoVegetariano('Pequeño'), ConoVegetariano('Grande')
+        self.assertIs(primero.ingredientes, ConoVegetariano.INGREDIENTES_BASE)
+        self.assertIs(primero.ingredientes, segundo.ingredientes)
+        self.assertIs(primero.MULTIPLICADORES_TAMANIO, ConoBase.MULTIPLICADORES_TAMANIO)
+
+    def test_los_datos_compartidos_son_de_solo_lectura(self):
+        with self.assertRaises(TypeError):
+            ConoBase.MULTIPLICADORES_TAMANIO['Gigante'] = 2.0
+        with self.assertRaises(AttributeError):
+            ConoCarnivoro.INGREDIENTES_BASE.append('piña')
+
+    def test_precio_e_info_por_tamanio(self):
+        cono = ConoFactory.crear_cono_base('Carnívoro', 'Grande')
+        self.assertIsInstance(cono, ConoCarnivoro)
+        self.assertAlmostEqual(cono.calcular_precio_base(), 18.0 * 1.3)
+        info = cono.obtener_info()
+        self.assertEqual(info['tipo'], 'ConoCarnivoro')
+        self.assertEqual(info['ingredientes'], list(ConoCarnivoro.INGREDIENTES_BASE))
+        with self.assertRaises(ValueError):
+            ConoFactory.crear_cono_base('Dulce')
@@ -0,0 +1,245 @@
+import datetime
+from unittest import mock
+
+from django.core import checks
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api_conos.catalogo import CatalogoConos, obtener_catalogo
+from api_conos.clientes import registrar_pedidos_cliente, totales_por_cliente
+from api_conos.correcciones import (
+    RELACIONES_PEDIDO, actualizar_pedidos, eliminar_pedidos, filtrar_pedidos, verificar_relaciones_pedido
+)
+from api_conos.logger import obtener_logger
+from api_conos.models import ClaveIdempotencia, PedidoCono, PrecioTopping, PreparacionCocina, ResumenCliente
+from api_conos.precios import capturar_precio
+
+URL = '/api/pedidos_conos/'
+
+ENERO = datetime.date(2024, 1, 10)
+MARZO = datetime.date(2024, 3, 10)
+
+
+@override_settings(TENDENCIAS={'HABILITADAS': False})
+class CorreccionesTests(TestCase):
+
+    def setUp(self):
+        CatalogoConos.reconstruir()
+        self.addCleanup(CatalogoConos.invalidar)
+        obtener_logger().limpiar_logs()
+        self.addCleanup(obtener_logger().limpiar_logs)
+        self.cliente = APIClient()
+
+    def crear(self, cliente, tamanio='Grande', toppings=('bacon', 'guacamole'), fecha=ENERO, **cabeceras):
+        """Crea un pedido por la API (snapshot, cocina y totales) con la fecha indicada"""
+        datos = {'cliente': cliente, 'variante': 'Carnívoro', 'tamanio_cono': tamanio, 'toppings': list(toppings)}
+        respuesta = self.cliente.post(URL, datos, format='json', **cabeceras)
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        PedidoCono.objects.filter(pk=respuesta.data['id']).update(fecha_pedido=fecha)
+        return PedidoCono.objects.get(pk=respuesta.data['id'])
+
+    def crear_sin_snapshot(self, cliente, tamanio='Grande', toppings=('bacon', 'guacamole'), fecha=ENERO):
+        """Pedido anterior a los snapshots, sumado a los totales de su cliente"""
+        pedido, = PedidoCono.objects.bulk_create([
+            PedidoCono(cliente=cliente, variante='Carnívoro', tamanio_cono=tamanio, toppings=list(toppings))
+        ])
+        PedidoCono.objects.filter(pk=pedido.pk).update(fecha_pedido=fecha)
+        registrar_pedidos_cliente([pedido])
+        return pedido
+
+    def assertTotalesConsistentes(self):
+        """Los resúmenes de los clientes coinciden con recalcularlos desde los pedidos"""
+        esperados = totales_por_cliente(PedidoCono.objects.all())
+        resumenes = {
+            resumen.cliente: [resumen.total_pedidos, resumen.gasto_total]
+            for resumen in ResumenCliente.objects.all()
+            if resumen.total_pedidos or resumen.gasto_total
+        }
+        self.assertEqual(set(resumenes), set(esperados))
+        for cliente, (pedidos, gasto) in esperados.items():
+            with self.subTest(cliente=cliente):
+                self.assertEqual(resumenes[cliente][0], pedidos)
+                self.assertAlmostEqual(resumenes[cliente][1], gasto, places=6)
+
+    def assertPrecioDeComposicion(self, pedido):
+        """precio_final y snapshot coinciden con construir el pedido corregido con el catálogo vigente"""
+        esperado = capturar_precio(pedido.variante, pedido.tamanio_cono, pedido.toppings, obtener_catalogo())
+        snapshot, snapshot_esperado = pedido.snapshot_precio, esperado['snapshot_precio']
+        self.assertAlmostEqual(pedido.precio_final, esperado['precio_final'], places=9)
+        self.assertEqual(snapshot['toppings'], snapshot_esperado['toppings'])
+        for clave in ('multiplicador', 'precio_base', 'precio_toppings', 'precio_total'):
+            self.assertAlmostEqual(snapshot[clave], snapshot_esperado[clave], places=9, msg=clave)
+
+    def test_cambiar_el_tamanio_recalcula_precio_y_snapshot(self):
+        pedidos = [self.crear('Ana'), self.crear('Ana', tamanio='Mediano'), self.crear('Luis', tamanio='Pequeño')]
+        resultado = actualizar_pedidos({'cliente': 'Ana'}, {'tamanio_cono': 'Pequeño'})
+        self.assertEqual(resultado, {'pedidos_actualizados': 2, 'simulado': False})
+        for pedido in PedidoCono.objects.filter(pk__in=[pedido.pk for pedido in pedidos]):
+            with self.subTest(pedido=pedido.pk):
+                self.assertEqual(pedido.tamanio_cono, 'Pequeño')
+                self.assertPrecioDeComposicion(pedido)
+        self.assertTotalesConsistentes()
+
+    def test_quitar_un_topping_en_un_rango_de_fechas(self):
+        enero = self.crear('Ana', fecha=ENERO)
+        solo_bacon = self.crear('Luis', toppings=['bacon'], fecha=ENERO)
+        sin_bacon = self.crear('Luis', toppings=['guacamole'], fecha=ENERO)
+        marzo = self.crear('Ana', fecha=MARZO)
+
+        resultado = actualizar_pedidos(
+            {'fecha_desde': '2024-01-01', 'fecha_hasta': '2024-01-31'}, {'quitar_topping': 'bacon'}
+        )
+        self.assertEqual(resultado['pedidos_actualizados'], 2)
+        enero.refresh_from_db()
+        solo_bacon.refresh_from_db()
+        self.assertEqual(enero.toppings, ['guacamole'])
+        self.assertEqual(solo_bacon.toppings, [])
+        self.assertPrecioDeComposicion(enero)
+        self.assertPrecioDeComposicion(solo_bacon)
+        # Fuera del filtro o sin el topping: sin cambios
+        for pedido in (sin_bacon, marzo):
+            self.assertEqual(PedidoCono.objects.get(pk=pedido.pk).snapshot_precio, pedido.snapshot_precio)
+        self.assertTotalesConsistentes()
+
+    def test_no_reprecia_con_el_catalogo_vigente(self):
+        pedido = self.crear('Ana', toppings=['bacon'])
+        precio_topping = PrecioTopping.objects.get(topping='bacon')
+        precio_topping.precio = 99.0
+        precio_topping.save()
+        CatalogoConos.reconstruir()
+
+        actualizar_pedidos({'ids': [pedido.pk]}, {'tamanio_cono': 'Mediano'})
+        corregido = PedidoCono.objects.get(pk=pedido.pk)
+        self.assertEqual(corregido.snapshot_precio['toppings'], pedido.snapshot_precio['toppings'])
+        self.assertAlmostEqual(
+            corregido.precio_final,
+            pedido.snapshot_precio['precio_unitario'] * obtener_catalogo().multiplicadores['Mediano']
+            + pedido.snapshot_precio['precio_toppings']
+        )
+        self.assertTotalesConsistentes()
+
+    def test_pedidos_sin_snapshot_mantienen_los_totales(self):
+        antiguo = self.crear_sin_snapshot('Ana')
+        self.crear('Ana')
+        actualizar_pedidos({'cliente': 'Ana'}, {'quitar_topping': 'guacamole', 'tamanio_cono': 'Mediano'})
+        antiguo.refresh_from_db()
+        self.assertIsNone(antiguo.precio_final)
+        self.assertEqual((antiguo.tamanio_cono, antiguo.toppings), ('Mediano', ['bacon']))
+        self.assertTotalesConsistentes()
+
+        eliminar_pedidos({'ids': [antiguo.pk]})
+        self.assertTotalesConsistentes()
+
+    def test_simular_no_cambia_nada(self):
+        pedido = self.crear('Ana')
+        self.assertEqual(
+            actualizar_pedidos({'cliente': 'Ana'}, {'tamanio_cono': 'Pequeño'}, simular=True),
+            {'pedidos_actualizados': 1, 'simulado': True}
+        )
+        self.assertEqual(eliminar_pedidos({'cliente': 'Ana'}, simular=True), {'pedidos_eliminados': 1, 'simulado': True})
+        self.assertEqual(PedidoCono.objects.get(pk=pedido.pk).tamanio_cono, 'Grande')
+        self.assertEqual(obtener_logger().obtener_logs_por_tipo('correccion_lote'), [])
+
+    def test_eliminar_resuelve_las_relaciones(self):
+        borrado = self.crear('Ana', HTTP_IDEMPOTENCY_KEY='clave-ana')
+        conservado = self.crear('Luis')
+        self.assertEqual(PreparacionCocina.objects.count(), 2)
+
+        resultado = eliminar_pedidos({'cliente': 'Ana'})
+        self.assertEqual(resultado, {'pedidos_eliminados': 1, 'simulado': False})
+        self.assertFalse(PedidoCono.objects.filter(pk=borrado.pk).exists())
+        self.assertEqual(list(PreparacionCocina.objects.values_list('pedido_id', flat=True)), [conservado.pk])
+        self.assertIsNone(ClaveIdempotencia.objects.get(clave='clave-ana').pedido_id)
+        self.assertEqual(ResumenCliente.objects.get(cliente='Ana').total_pedidos, 0)
+        self.assertTotalesConsistentes()
+
+    def test_relacion_nueva_hacia_los_pedidos(self):
+        self.assertEqual(verificar_relaciones_pedido(), [])
+        self.assertNotIn('api_conos.E001', [error.id for error in checks.run_checks()])
+
+        self.crear('Ana')
+        incompletas = set(RELACIONES_PEDIDO) - {next(iter(RELACIONES_PEDIDO))}
+        with mock.patch('api_conos.correcciones.RELACIONES_PEDIDO', incompletas):
+            self.assertEqual([error.id for error in verificar_relaciones_pedido()], ['api_conos.E001'])
+            with self.assertRaises(RuntimeError):
+                eliminar_pedidos({'cliente': 'Ana'})
+        self.assertEqual(PedidoCono.objects.count(), 1)
+
+    def test_una_entrada_de_log_por_correccion(self):
+        for _ in range(5):
+            self.crear('Ana')
+        obtener_logger().limpiar_logs()
+        actualizar_pedidos({'cliente': 'Ana'}, {'tamanio_cono': 'Mediano'})
+        eliminar_pedidos({'cliente': 'Ana'})
+        correcciones = obtener_logger().obtener_logs_por_tipo('correccion_lote')
+        self.assertEqual(len(correcciones), 1)
+        self.assertEqual(correcciones[0]['datos_extra']['pedidos_actualizados'], 5)
+        self.assertEqual(len(obtener_logger().obtener_logs_por_tipo('eliminacion_lote')), 1)
+        # Sin pedidos afectados no se registra nada
+        actualizar_pedidos({'cliente': 'Nadie'}, {'tamanio_cono': 'Mediano'})
+        self.assertEqual(len(obtener_logger().obtener_logs_por_tipo('correccion_lote')), 1)
+
+    def test_las_consultas_no_dependen_de_los_pedidos(self):
+        consultas = []
+        for cliente, cantidad in (('Ana', 2), ('Luis', 12)):
+            for _ in range(cantidad):
+                self.crear(cliente)
+            with CaptureQueriesContext(connection) as capturadas:
+                actualizar_pedidos({'cliente': cliente}, {'tamanio_cono': 'Mediano'})
+                eliminar_pedidos({'cliente': cliente})
+            consultas.append(len(capturadas))
+        self.assertEqual(consultas[0], consultas[1])
+
+    def test_filtros_invalidos(self):
+        for filtro in (
+            None, {}, {'color': 'rojo'}, {'ids': []}, {'ids': ['1']}, {'ids': [True]},
+            {'fecha_desde': '10/01/2024'}, {'fecha_hasta': '2024-02-30'}, {'variante': 'Dulce'},
+            {'tamanio': 'Enorme'}, {'cliente': '  '}, {'topping': 3},
+        ):
+            with self.subTest(filtro=filtro), self.assertRaises(ValueError):
+                filtrar_pedidos(filtro)
+        for cambios in (None, {}, {'precio_final': 0}, {'tamanio_cono': 'Enorme'}, {'quitar_topping': ''}):
+            with self.subTest(cambios=cambios), self.assertRaises(ValueError):
+                actualizar_pedidos({'cliente': 'Ana'}, cambios)
+
+
+@override_settings(TENDENCIAS={'HABILITADAS': False})
+class CorreccionesApiTests(TestCase):
+
+    def setUp(self):
+        self.cliente = APIClient()
+        for tamanio in ('Grande', 'Mediano'):
+            self.cliente.post(
+                URL, {'cliente': 'Ana', 'variante': 'Carnívoro', 'tamanio_cono': tamanio, 'toppings': ['bacon']},
+                format='json'
+            )
+
+    def test_actualizar_y_eliminar_lote(self):
+        cuerpo = {'filtro': {'cliente': 'Ana'}, 'cambios': {'quitar_topping': 'bacon'}}
+        respuesta = self.cliente.post(f'{URL}actualizar_lote/', {**cuerpo, 'simular': True}, format='json')
+        self.assertEqual(respuesta.data, {'pedidos_actualizados': 2, 'simulado': True})
+        respuesta = self.cliente.post(f'{URL}actualizar_lote/', cuerpo, format='json')
+        self.assertEqual(respuesta.data, {'pedidos_actualizados': 2, 'simulado': False})
+        self.assertEqual(list(PedidoCono.objects.values_list('toppings', flat=True)), [[], []])
+
+        respuesta = self.cliente.post(f'{URL}eliminar_lote/', {'filtro': {'tamanio': 'Grande'}}, format='json')
+        self.assertEqual(respuesta.data, {'pedidos_eliminados': 1, 'simulado': False})
+        self.assertEqual(PedidoCono.objects.count(), 1)
+
+    def test_cuerpos_invalidos(self):
+        casos = (
+            ('actualizar_lote/', {'filtro': {}, 'cambios': {'tamanio_cono': 'Grande'}}, 'Corrección inválida'),
+            ('actualizar_lote/', {'filtro': {'cliente': 'Ana'}}, 'Corrección inválida'),
+            ('actualizar_lote/', {'filtro': {'cliente': 'Ana'}, 'cambios': {'tamanio_cono': 'Grande'},
+                                  'simular': 'si'}, 'Corrección inválida'),
+            ('eliminar_lote/', {'filtro': {'fecha_desde': 'ayer'}}, 'Eliminación inválida'),
+            ('eliminar_lote/', [], 'Eliminación inválida'),
+        )
+        for ruta, cuerpo, error in casos:
+            with self.subTest(ruta=ruta, cuerpo=cuerpo):
+                respuesta = self.cliente.post(f'{URL}{ruta}', cuerpo, format='json')
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertEqual(respuesta.data['error'], error)
+        self.assertEqual(PedidoCono.objects.count(), 2)
@@ -0,0 +1,144 @@
+import gzip
+import json
+import unittest
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APIClient
+
+from api_conos import formatos
+from api_conos.formatos import elegir_codificacion, mascara_a_toppings, toppings_a_mascara
+from api_conos.catalogo import CatalogoConos
+from api_conos.models import PedidoCono, PrecioTopping
+
+URL = '/api/pedidos_conos/'
+PEDIDO = {'cliente': 'Ana', 'variante': 'Carnívoro', 'tamanio_cono': 'Grande', 'toppings': ['guacamole', 'bacon']}
+JSON_BITMASK = 'application/json; toppings=bitmask'
+
+
+class MascaraToppingsTests(TestCase):
+
+    def test_la_mascara_sigue_el_orden_de_toppings_permitidos(self):
+        permitidos = PedidoCono.TOPPINGS_PERMITIDOS
+        mascara = toppings_a_mascara(['guacamole', 'bacon', 'bacon'])
+        self.assertEqual(mascara, 1 << permitidos.index('guacamole') | 1 << permitidos.index('bacon'))
+        self.assertEqual(mascara_a_toppings(mascara), sorted(['guacamole', 'bacon'], key=permitidos.index))
+        self.assertEqual(mascara_a_toppings(0), [])
+
+    def test_mascara_fuera_de_rango(self):
+        for mascara in (-1, 1 << len(PedidoCono.TOPPINGS_PERMITIDOS)):
+            with self.subTest(mascara=mascara), self.assertRaises(ParseError):
+                mascara_a_toppings(mascara)
+
+    def test_los_cambios_del_catalogo_no_mueven_los_bits(self):
+        mascara = toppings_a_mascara(['guacamole', 'bacon'])
+        CatalogoConos.reconstruir()
+        self.addCleanup(CatalogoConos.invalidar)
+        PrecioTopping.objects.filter(topping='queso_extra').delete()
+        PrecioTopping.objects.create(topping='trufa', precio=9.0)
+        CatalogoConos.reconstruir()
+        self.assertEqual(toppings_a_mascara(['guacamole', 'bacon']), mascara)
+        self.assertEqual(mascara_a_toppings(mascara), ['bacon', 'guacamole'])
+        # Un topping sin bit no se puede codificar
+        with self.assertRaises(KeyError):
+            toppings_a_mascara(['trufa'])
+
+
+class ElegirCodificacionTests(SimpleTestCase):
+
+    def test_respeta_las_calidades(self):
+        self.assertEqual(elegir_codificacion('gzip'), 'gzip')
+        self.assertEqual(elegir_codificacion('br;q=0, gzip;q=0.5'), 'gzip')
+        self.assertIsNone(elegir_codificacion('gzip;q=0, identity'))
+        self.assertIsNone(elegir_codificacion(''))
+
+    @unittest.skipIf(formatos.brotli is None, 'brotli no está instalado')
+    def test_prefiere_brotli(self):
+        self.assertEqual(elegir_codificacion('gzip, deflate, br'), 'br')
+
+
+@override_settings(TENDENCIAS={'HABILITADAS': False}, DATA_UPLOAD_MAX_MEMORY_SIZE=64 * 1024)
+class CuerposComprimidosTests(TestCase):
+
+    def _enviar(self, cuerpo, codificacion, content_type='application/json'):
+        return APIClient().generic(
+            'POST', URL, cuerpo, content_type=content_type, HTTP_CONTENT_ENCODING=codificacion
+        )
+
+    def test_cuerpo_gzip(self):
+        respuesta = self._enviar(gzip.compress(json.dumps(PEDIDO).encode()), 'gzip')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(PedidoCono.objects.get().toppings, ['guacamole', 'bacon'])
+
+    def test_bomba_gzip(self):
+        cuerpo = gzip.compress(b'[' + b' ' * (1024 * 1024) + b']')
+        self.assertLess(len(cuerpo), 64 * 1024)
+        self.assertEqual(self._enviar(cuerpo, 'gzip').status_code, 413)
+
+    def test_codificacion_no_soportada_o_invalida(self):
+        self.assertEqual(self._enviar(b'{}', 'compress').status_code, 415)
+        self.assertEqual(self._enviar(b'no es gzip', 'gzip').status_code, 400)
+
+    def test_gzip_truncado_o_con_datos_sobrantes(self):
+        completo = gzip.compress(json.dumps(PEDIDO).encode())
+        for cuerpo in (completo[:-8], completo[:len(completo) // 2], completo + completo, completo + b'basura'):
+            with self.subTest(bytes=len(cuerpo)):
+                self.assertEqual(self._enviar(cuerpo, 'gzip').status_code, 400)
+        self.assertEqual(PedidoCono.objects.count(), 0)
+
+    @unittest.skipIf(formatos.brotli is None, 'brotli no está instalado')
+    def test_cuerpo_brotli(self):
+        brotli = formatos.brotli
+        self.assertEqual(self._enviar(brotli.compress(json.dumps(PEDIDO).encode()), 'br').status_code, 201)
+        bomba = brotli.compress(b'[' + b' ' * (16 * 1024 * 1024) + b']')
+        self.assertEqual(self._enviar(bomba, 'br').status_code, 413)
+        truncado = brotli.compress(json.dumps(PEDIDO).encode() * 50)[:-4]
+        self.assertEqual(self._enviar(truncado, 'br').status_code, 400)
+        self.assertEqual(PedidoCono.objects.count(), 1)
+
+    def test_toppings_como_mascara_en_el_cuerpo(self):
+        cuerpo = json.dumps({**PEDIDO, 'toppings': toppings_a_mascara(['bacon'])}).encode()
+        respuesta = self._enviar(cuerpo, 'identity', content_type=JSON_BITMASK)
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(PedidoCono.objects.get().toppings, ['bacon'])
+
+
+@override_settings(TENDENCIAS={'HABILITADAS': False})
+class RespuestasTests(TestCase):
+
+    def setUp(self):
+        self.cliente = APIClient()
+        for _ in range(10):
+            self.cliente.post(URL, PEDIDO, format='json')
+        self.sin_comprimir = self.cliente.get(URL).content
+
+    def test_respuestas_grandes_comprimidas_con_gzip(self):
+        respuesta = self.cliente.get(URL, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(respuesta['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', respuesta['Vary'])
+        self.assertEqual(gzip.decompress(respuesta.content), self.sin_comprimir)
+
+    def test_respuestas_pequenas_sin_comprimir(self):
+        respuesta = self.cliente.get(f'{URL}{PedidoCono.objects.first().pk}/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(respuesta.has_header('Content-Encoding'))
+
+    def test_etag_debil_al_comprimir(self):
+        with self.settings(COMPRESION_RESPUESTAS={'MIN_BYTES': 0}):
+            respuesta = self.cliente.get(f'{URL}toppings_disponibles/', HTTP_ACCEPT_ENCODING='gzip')
+            self.assertTrue(respuesta['ETag'].startswith('W/"'))
+            revalidada = self.cliente.get(
+                f'{URL}toppings_disponibles/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=respuesta['ETag']
+            )
+        self.assertEqual(revalidada.status_code, 304)
+
+    def test_listado_con_toppings_como_mascara(self):
+        datos = self.cliente.get(URL, HTTP_ACCEPT=JSON_BITMASK).json()
+        self.assertEqual(
+            {pedido['toppings'] for pedido in datos['results']}, {toppings_a_mascara(['bacon', 'guacamole'])}
+        )
+
+    @unittest.skipIf(formatos.msgpack is None, 'msgpack no está instalado')
+    def test_listado_en_messagepack(self):
+        respuesta = self.cliente.get(URL, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(respuesta['Content-Type'], 'application/msgpack')
+        self.assertEqual(formatos.msgpack.unpackb(respuesta.content), json.loads(self.sin_comprimir))
@@ -0,0 +1,130 @@
+import http.client
+import json
+import os
+import random
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from api_conos.management.commands.generar_carga import (
+    Command, muestrear_poisson, parsear_pesos, percentil
+)
+from api_conos.models import PedidoCono, ResumenCliente
+
+# Puerto sin servidor: las peticiones fallan al conectar, sin esperar el timeout
+URL_SIN_SERVIDOR = 'http://127.0.0.1:9'
+
+
+class FuncionesAuxiliaresTests(TestCase):
+
+    def test_parsear_pesos_completa_las_opciones_sin_peso(self):
+        pesos = parsear_pesos('Carnívoro=5, Saludable=2', ['Carnívoro', 'Vegetariano', 'Saludable'])
+        self.assertEqual(pesos, {'Carnívoro': 5.0, 'Vegetariano': 0.0, 'Saludable': 2.0})
+
+    def test_parsear_pesos_rechaza_opciones_y_pesos_invalidos(self):
+        for texto in ('Dulce=1', 'Carnívoro=x', 'Carnívoro=0'):
+            with self.subTest(texto=texto), self.assertRaises(CommandError):
+                parsear_pesos(texto, ['Carnívoro'])
+
+    def test_percentil_por_rango_mas_cercano(self):
+        valores = list(range(1, 101))
+        self.assertEqual(percentil(valores, 50), 50)
+        self.assertEqual(percentil(valores, 99), 99)
+        self.assertEqual(percentil([7], 95), 7)
+        self.assertEqual(percentil([], 50), 0.0)
+
+    def test_muestrear_poisson_respeta_la_media(self):
+        rng = random.Random(1)
+        muestras = [muestrear_poisson(rng, 2.0) for _ in range(5000)]
+        self.assertAlmostEqual(sum(muestras) / len(muestras), 2.0, delta=0.1)
+
+
+class SembrarTests(TestCase):
+
+    def test_siembra_pedidos_con_snapshot_y_totales_de_clientes(self):
+        call_command(
+            'generar_carga', 'sembrar', '--pedidos', '120', '--clientes', '15', '--lote', '50',
+            '--dias', '10', '--semilla', '3', stdout=StringIO()
+        )
+        self.assertEqual(PedidoCono.objects.count(), 120)
+        for pedido in PedidoCono.objects.all():
+            self.assertEqual(pedido.precio_final, pedido.snapshot_precio['precio_total'])
+        self.assertLessEqual(PedidoCono.objects.values('fecha_pedido').distinct().count(), 10)
+
+        resumenes = ResumenCliente.objects.all()
+        self.assertEqual(sum(resumen.total_pedidos for resumen in resumenes), 120)
+        gasto = sum(PedidoCono.objects.values_list('precio_final', flat=True))
+        self.assertAlmostEqual(sum(resumen.gasto_total for resumen in resumenes), gasto, places=6)
+
+    def test_la_semilla_hace_la_siembra_reproducible(self):
+        composiciones = []
+        for _ in range(2):
+            PedidoCono.objects.all().delete()
+            call_command('generar_carga', 'sembrar', '--pedidos', '30', '--semilla', '7', stdout=StringIO())
+            composiciones.append(list(
+                PedidoCono.objects.order_by('id').values_list('cliente', 'variante', 'tamanio_cono', 'toppings')
+            ))
+        self.assertEqual(composiciones[0], composiciones[1])
+
+
+class MezclaYReproduccionTests(TestCase):
+
+    def setUp(self):
+        descriptor, self.archivo = tempfile.mkstemp(suffix='.jsonl')
+        os.close(descriptor)
+        self.addCleanup(os.remove, self.archivo)
+
+    def _escribir(self, registros):
+        with open(self.archivo, 'w', encoding='utf-8') as archivo:
+            for registro in registros:
+                archivo.write(json.dumps(registro) + '\n')
+
+    def test_mezcla_escribe_una_llamada_por_linea(self):
+        call_command(
+            'generar_carga', 'mezcla', '--archivo', self.archivo, '--peticiones', '200',
+            '--proporcion-escritura', '0.25', '--semilla', '1', stdout=StringIO()
+        )
+        with open(self.archivo, encoding='utf-8') as archivo:
+            registros = [json.loads(linea) for linea in archivo]
+        self.assertEqual(len(registros), 200)
+        creaciones = [registro for registro in registros if registro['endpoint'] == 'crear']
+        self.assertTrue(creaciones)
+        for registro in creaciones:
+            self.assertEqual(registro['metodo'], 'POST')
+            self.assertLessEqual(set(registro['cuerpo']['toppings']), set(PedidoCono.TOPPINGS_PERMITIDOS))
+
+    def test_sin_pedidos_omite_las_rutas_con_id(self):
+        self._escribir([
+            {'endpoint': 'listar', 'ruta': '/api/pedidos_conos/'},
+            {'endpoint': 'detalle', 'ruta': '/api/pedidos_conos/{id}/'},
+            {'endpoint': 'detalle', 'ruta': '/api/pedidos_conos/{id}/'},
+        ])
+        salida = StringIO()
+        call_command(
+            'generar_carga', 'reproducir', '--archivo', self.archivo, '--url', URL_SIN_SERVIDOR,
+            '--timeout', '1', stdout=salida
+        )
+        reporte = salida.getvalue()
+        self.assertIn('Se omiten 2 peticiones', reporte)
+        self.assertIn('Total: 1 peticiones', reporte)
+
+    def test_sin_pedidos_y_solo_rutas_con_id_falla(self):
+        self._escribir([{'endpoint': 'detalle', 'ruta': '/api/pedidos_conos/{id}/'}])
+        with self.assertRaises(CommandError):
+            call_command(
+                'generar_carga', 'reproducir', '--archivo', self.archivo, '--url', URL_SIN_SERVIDOR,
+                stdout=StringIO()
+            )
+
+    def test_respuesta_truncada_cuenta_como_error(self):
+        registro = {'endpoint': 'listar', 'metodo': 'GET', 'ruta': '/api/pedidos_conos/'}
+        with mock.patch('urllib.request.urlopen', side_effect=http.client.IncompleteRead(b'')):
+            endpoint, exito, _ = Command()._ejecutar_peticion(
+                URL_SIN_SERVIDOR, registro, [], random.Random(), mock.MagicMock(), 1
+            )
+        self.assertEqual(endpoint, 'listar')
+        self.assertFalse(exito)
@@ -0,0 +1,126 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api_conos.idempotencia import (
+    CABECERA_REPETIDA, MAX_LONGITUD_CLAVE, huella_peticion, obtener_indice_idempotencia,
+    purgar_claves_expiradas
+)
+from api_conos.models import ClaveIdempotencia, PedidoCono, ResumenCliente
+
+URL = '/api/pedidos_conos/'
+PEDIDO = {'cliente': 'Ana', 'variante': 'Vegetariano', 'tamanio_cono': 'Mediano', 'toppings': ['bacon']}
+
+
+def crear(cliente_http, clave, datos=PEDIDO):
+    return cliente_http.post(URL, datos, format='json', HTTP_IDEMPOTENCY_KEY=clave)
+
+
+@override_settings(TENDENCIAS={'HABILITADAS': False})
+class IdempotenciaTests(TestCase):
+
+    def setUp(self):
+        obtener_indice_idempotencia().limpiar()
+        self.addCleanup(obtener_indice_idempotencia().limpiar)
+        self.cliente = APIClient()
+
+    def test_el_reintento_devuelve_la_respuesta_original(self):
+        original = crear(self.cliente, 'clave-1')
+        self.assertEqual(original.status_code, 201)
+        self.assertNotIn(CABECERA_REPETIDA, original)
+
+        with self.assertNumQueries(0):
+            repetida = crear(self.cliente, 'clave-1')
+        self.assertEqual(repetida.status_code, 201)
+        self.assertEqual(repetida[CABECERA_REPETIDA], 'true')
+        self.assertEqual(repetida.data, original.data)
+        self.assertEqual(PedidoCono.objects.count(), 1)
+        self.assertEqual(ResumenCliente.objects.get(cliente='Ana').total_pedidos, 1)
+
+    def test_otro_proceso_repite_desde_la_tabla(self):
+        original = crear(self.cliente, 'clave-1')
+        fila = ClaveIdempotencia.objects.get(clave='clave-1')
+        self.assertEqual(fila.pedido_id, original.data['id'])
+        self.assertEqual(fila.codigo_estado, 201)
+
+        # Un proceso sin la respuesta en memoria la encuentra por el índice único
+        obtener_indice_idempotencia().limpiar()
+        repetida = crear(self.cliente, 'clave-1')
+        self.assertEqual(repetida[CABECERA_REPETIDA], 'true')
+        self.assertEqual(repetida.data['id'], original.data['id'])
+        self.assertEqual(PedidoCono.objects.count(), 1)
+
+    def test_la_misma_clave_con_otro_cuerpo_es_un_conflicto(self):
+        crear(self.cliente, 'clave-1')
+        for limpiar in (False, True):
+            with self.subTest(desde_la_tabla=limpiar):
+                if limpiar:
+                    obtener_indice_idempotencia().limpiar()
+                respuesta = crear(self.cliente, 'clave-1', {**PEDIDO, 'cliente': 'Beto'})
+                self.assertEqual(respuesta.status_code, 422)
+        self.assertEqual(PedidoCono.objects.count(), 1)
+
+    def test_los_errores_no_se_guardan(self):
+        invalida = crear(self.cliente, 'clave-1', {**PEDIDO, 'toppings': ['queso']})
+        self.assertEqual(invalida.status_code, 400)
+        self.assertFalse(ClaveIdempotencia.objects.exists())
+
+        corregida = crear(self.cliente, 'clave-1')
+        self.assertEqual(corregida.status_code, 201)
+        self.assertNotIn(CABECERA_REPETIDA, corregida)
+
+    def test_una_clave_vencida_crea_otro_pedido(self):
+        primero = crear(self.cliente, 'clave-1')
+        ClaveIdempotencia.objects.update(creada=timezone.now() - timedelta(days=2))
+        obtener_indice_idempotencia().limpiar()
+
+        segundo = crear(self.cliente, 'clave-1')
+        self.assertEqual(segundo.status_code, 201)
+        self.assertNotEqual(segundo.data['id'], primero.data['id'])
+        self.assertEqual(ClaveIdempotencia.objects.get().pedido_id, segundo.data['id'])
+
+    def test_una_reserva_sin_respuesta_no_bloquea_la_clave(self):
+        ClaveIdempotencia.objects.create(clave='clave-1', huella=huella_peticion(PEDIDO))
+        respuesta = crear(self.cliente, 'clave-1')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(ClaveIdempotencia.objects.get().codigo_estado, 201)
+
+    def test_clave_demasiado_larga(self):
+        respuesta = crear(self.cliente, 'x' * (MAX_LONGITUD_CLAVE + 1))
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertFalse(PedidoCono.objects.exists())
+
+    def test_purgar_borra_solo_las_claves_vencidas(self):
+        crear(self.cliente, 'vieja')
+        crear(self.cliente, 'nueva', {**PEDIDO, 'cliente': 'Beto'})
+        ClaveIdempotencia.objects.filter(clave='vieja').update(creada=timezone.now() - timedelta(days=2))
+        self.assertEqual(purgar_claves_expiradas(), 1)
+        self.assertEqual(list(ClaveIdempotencia.objects.values_list('clave', flat=True)), ['nueva'])
+        self.assertEqual(PedidoCono.objects.count(), 2)
+
+
+@override_settings(TENDENCIAS={'HABILITADAS': False})
+class IdempotenciaConcurrenteTests(TransactionTestCase):
+
+    def setUp(self):
+        obtener_indice_idempotencia().limpiar()
+        self.addCleanup(obtener_indice_idempotencia().limpiar)
+
+    def test_reintentos_simultaneos_crean_un_solo_pedido(self):
+        def enviar(_):
+            try:
+                return crear(APIClient(), 'clave-concurrente')
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            respuestas = list(executor.map(enviar, range(8)))
+
+        self.assertEqual({respuesta.status_code for respuesta in respuestas}, {201})
+        self.assertEqual(len({respuesta.data['id'] for respuesta in respuestas}), 1)
+        self.assertEqual(sum(CABECERA_REPETIDA in respuesta for respuesta in respuestas), 7)
+        self.assertEqual(PedidoCono.objects.count(), 1)
@@ -0,0 +1,96 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import IntegrityError
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from api_conos import ingesta
+from api_conos.ingesta import ColaIngesta
+from api_conos.models import PedidoCono, PreparacionCocina, ResumenCliente
+
+URL = '/api/pedidos_conos/'
+
+
+def nuevo_pedido(cliente='Ana', **campos):
+    return PedidoCono(cliente=cliente, variante='Carnívoro', tamanio_cono='Mediano', toppings=[], **campos)
+
+
+# El hilo escritor confirma con su propia conexión: sin la transacción de TestCase
+class ColaIngestaTests(TransactionTestCase):
+
+    def test_agrupa_los_pedidos_concurrentes(self):
+        grupos = []
+        cola = ColaIngesta(max_filas=8, max_espera_ms=50, al_insertar=lambda pedidos: grupos.append(len(pedidos)))
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            creados = list(executor.map(
+                lambda indice: cola.encolar(nuevo_pedido(f'cliente-{indice}'), timeout=10), range(40)
+            ))
+
+        self.assertEqual(len({pedido.id for pedido in creados}), 40)
+        self.assertTrue(all(pedido.id for pedido in creados))
+        self.assertEqual(PedidoCono.objects.count(), 40)
+        self.assertEqual(sum(grupos), 40)
+        self.assertLessEqual(max(grupos), 8)
+        self.assertLess(len(grupos), 40)
+
+    def test_un_pedido_invalido_no_hace_fallar_a_su_grupo(self):
+        cola = ColaIngesta(max_filas=8, max_espera_ms=50)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futuros = [
+                executor.submit(cola.encolar, nuevo_pedido(cliente=None if indice == 2 else 'Ana'), 10)
+                for indice in range(4)
+            ]
+            with self.assertRaises(IntegrityError):
+                futuros[2].result()
+            self.assertEqual(sum(1 for futuro in futuros if futuro.exception() is None), 3)
+
+        # El escritor sigue atendiendo la cola
+        self.assertIsNotNone(cola.encolar(nuevo_pedido(), timeout=10).id)
+        self.assertEqual(PedidoCono.objects.count(), 4)
+
+    def test_el_pedido_que_agota_la_espera_no_se_guarda(self):
+        liberar = threading.Event()
+        ocupado = threading.Event()
+
+        def bloquear(pedidos):
+            ocupado.set()
+            liberar.wait(10)
+
+        cola = ColaIngesta(max_filas=1, max_espera_ms=0, al_insertar=bloquear)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            primero = executor.submit(cola.encolar, nuevo_pedido('primero'), 10)
+            self.assertTrue(ocupado.wait(10))
+            with self.assertRaises(TimeoutError):
+                cola.encolar(nuevo_pedido('segundo'), timeout=0.05)
+            liberar.set()
+            primero.result()
+
+        cola.encolar(nuevo_pedido('tercero'), timeout=10)
+        self.assertEqual(
+            sorted(PedidoCono.objects.values_list('cliente', flat=True)), ['primero', 'tercero']
+        )
+
+
+@override_settings(
+    INGESTA_AGRUPADA={'HABILITADA': True, 'MAX_FILAS': 16, 'MAX_ESPERA_MS': 5, 'TIMEOUT_S': 10},
+    TENDENCIAS={'HABILITADAS': False}
+)
+class IngestaApiTests(TransactionTestCase):
+
+    def setUp(self):
+        self.addCleanup(setattr, ingesta, '_cola_ingesta', None)
+
+    def test_post_confirma_el_pedido_con_sus_efectos(self):
+        respuesta = APIClient().post(URL, {
+            'cliente': 'Ana', 'variante': 'Saludable', 'tamanio_cono': 'Mediano', 'toppings': ['bacon']
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertIsNotNone(ingesta._cola_ingesta)
+
+        pedido = PedidoCono.objects.get(pk=respuesta.data['id'])
+        self.assertAlmostEqual(pedido.precio_final, 16.0 + 4.5)
+        self.assertTrue(PreparacionCocina.objects.filter(pedido=pedido, preparado__isnull=True).exists())
+        resumen = ResumenCliente.objects.get(cliente='Ana')
+        self.assertEqual(resumen.total_pedidos, 1)
+        self.assertAlmostEqual(resumen.gasto_total, pedido.precio_final)
@@ -0,0 +1,57 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api_conos.catalogo import CatalogoConos, obtener_catalogo
+from api_conos.listado import CAMPOS_LISTADO, filas_listado, serializar_json
+from api_conos.models import PedidoCono
+from api_conos.serializers import PedidoConoSerializer
+
+URL = '/api/pedidos_conos/'
+
+
+@override_settings(TENDENCIAS={'HABILITADAS': False})
+class ListadoRapidoTests(TestCase):
+
+    def setUp(self):
+        CatalogoConos.reconstruir()
+        cliente = APIClient()
+        for datos in (
+            {'cliente': 'Ana', 'variante': 'Carnívoro', 'tamanio_cono': 'Grande', 'toppings': ['bacon', 'guacamole']},
+            {'cliente': 'José\u2028Ñandú', 'variante': 'Saludable', 'tamanio_cono': 'Pequeño', 'toppings': []},
+        ):
+            self.assertEqual(cliente.post(URL, datos, format='json').status_code, 201)
+        # Pedidos anteriores a los snapshots, uno con una composición que ya no se puede construir
+        PedidoCono.objects.bulk_create([
+            PedidoCono(cliente='Beto', variante='Vegetariano', tamanio_cono='Mediano', toppings=['jalapeños', 'piña']),
+            PedidoCono(cliente='Beto', variante='Vegetariano', tamanio_cono='Mediano', toppings=['jalapeños']),
+            PedidoCono(cliente='Caro', variante='Dulce', tamanio_cono='Mediano'),
+        ])
+
+    def _listar(self, rapido, parametros=None):
+        with self.settings(LISTADO_RAPIDO=rapido):
+            respuesta = APIClient().get(URL, parametros or {})
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta
+
+    def test_filas_iguales_a_las_del_serializador(self):
+        pedidos = PedidoCono.objects.order_by('id')
+        esperado = [PedidoConoSerializer(pedido).data for pedido in pedidos]
+        obtenido = filas_listado(pedidos.values_list(*CAMPOS_LISTADO), obtener_catalogo())
+        self.assertEqual(serializar_json(obtenido), serializar_json(esperado))
+
+    def test_respuesta_identica_byte_a_byte(self):
+        for parametros in ({}, {'variante': 'Vegetariano'}, {'page': 1}, {'cliente': 'josé'}):
+            with self.subTest(parametros=parametros):
+                rapida = self._listar(True, parametros)
+                self.assertEqual(rapida.content, self._listar(False, parametros).content)
+                self.assertEqual(rapida['Content-Type'], 'application/json')
+        self.assertIn(b'\\u2028', rapida.content)
+
+    def test_la_salida_con_indentacion_usa_el_serializador(self):
+        with self.settings(LISTADO_RAPIDO=True):
+            respuesta = APIClient().get(URL, HTTP_ACCEPT='application/json; indent=2')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn(b'\n  ', respuesta.content)
+
+    def test_serializar_json_escapa_los_separadores_de_linea(self):
+        self.assertEqual(serializar_json({'a': 'x\u2028y\u2029ñ'}), '{"a":"x\\u2028y\\u2029ñ"}'.encode('utf-8'))
@@ -0,0 +1,77 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from api_conos.logger import DEBUG, ERROR, INFO, WARNING, LoggerSingleton, _crear_registro, obtener_logger
+
+
+class LoggerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.logger = obtener_logger()
+        self.logger.limpiar_logs()
+        self.addCleanup(self.logger.limpiar_logs)
+        self.addCleanup(self.logger.configurar)
+
+    def test_es_un_singleton(self):
+        self.assertIs(LoggerSingleton(), self.logger)
+
+    def test_el_nivel_filtra_lo_guardado_pero_no_los_contadores(self):
+        self.logger.configurar(nivel='INFO', muestreo={})
+        self.logger.registrar_operacion('precio_final', 'oculto', nivel=DEBUG)
+        self.logger.registrar_operacion('precio_final', 'visible', nivel=INFO)
+
+        self.assertEqual([log['detalle'] for log in self.logger.obtener_logs()], ['visible'])
+        self.assertEqual(self.logger.obtener_logs()[0]['nivel'], 'INFO')
+        self.assertEqual(self.logger.obtener_estadisticas()['operaciones_por_tipo']['precio_final'], 2)
+
+    def test_mensajes_perezosos_solo_se_construyen_si_se_guardan(self):
+        detalle = mock.Mock(return_value='detalle')
+        datos = mock.Mock(return_value={'pedido_id': 1})
+        self.logger.configurar(nivel=INFO, muestreo={})
+        self.logger.registrar_operacion('precio_final', detalle, datos, nivel=DEBUG)
+        detalle.assert_not_called()
+        datos.assert_not_called()
+
+        self.logger.configurar(nivel=DEBUG, muestreo={})
+        self.logger.registrar_operacion('precio_final', detalle, datos, nivel=DEBUG)
+        log = self.logger.obtener_logs()[-1]
+        self.assertEqual((log['detalle'], log['datos_extra']), ('detalle', {'pedido_id': 1}))
+
+    def test_muestreo_por_tipo(self):
+        self.logger.configurar(nivel=INFO, muestreo={'precio_final': 0.25, 'creacion_cono': 1.0})
+        with mock.patch('api_conos.logger.random.random', side_effect=[0.1, 0.9, 0.3, 0.2]):
+            for _ in range(4):
+                self.logger.registrar_operacion('precio_final', 'muestra')
+        for _ in range(3):
+            self.logger.registrar_operacion('creacion_cono', 'siempre')
+
+        self.assertEqual(len(self.logger.obtener_logs_por_tipo('precio_final')), 2)
+        self.assertEqual(len(self.logger.obtener_logs_por_tipo('creacion_cono')), 3)
+        self.assertEqual(self.logger.obtener_estadisticas()['operaciones_por_tipo']['precio_final'], 4)
+
+    def test_advertencias_y_errores_no_se_muestrean(self):
+        self.logger.configurar(nivel=INFO, muestreo={'precio_final': 0.0})
+        self.logger.registrar_operacion('precio_final', 'info')
+        self.logger.registrar_operacion('precio_final', 'advertencia', nivel=WARNING)
+        self.logger.registrar_operacion('precio_final', 'error', nivel=ERROR)
+        self.assertEqual([log['detalle'] for log in self.logger.obtener_logs()], ['advertencia', 'error'])
+
+    def test_registrar_lote_es_una_entrada_con_la_cantidad_en_el_contador(self):
+        self.logger.configurar(nivel=INFO, muestreo={})
+        self.logger.registrar_lote('ingredientes_finales', 50, 'lote')
+        estadisticas = self.logger.obtener_estadisticas()
+        self.assertEqual(estadisticas['total_logs'], 1)
+        self.assertEqual(estadisticas['operaciones_por_tipo']['ingredientes_finales'], 50)
+        self.assertEqual(estadisticas['ultimo_log']['detalle'], 'lote')
+
+    @override_settings(LOGGER_OPERACIONES={'NIVEL': 'WARNING', 'MUESTREO': {'precio_final': 0.5}})
+    def test_configuracion_por_defecto_desde_settings(self):
+        self.logger.configurar()
+        self.assertFalse(self.logger.habilitado('creacion_cono', INFO))
+        self.assertTrue(self.logger.habilitado('creacion_cono', WARNING))
+        self.assertEqual(self.logger._muestreo, {'precio_final': 0.5})
+
+    def test_backend_desconocido(self):
+        with self.assertRaises(ValueError):
+            _crear_registro({'BACKEND': 'redis'})
@@ -0,0 +1,88 @@
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from django.test import SimpleTestCase
+
+from api_conos.logger import CONFIGURACION_POR_DEFECTO, TIPOS_CONTADOS, _crear_registro
+from api_conos.logs_compartidos import _I64, RegistroCompartido
+
+TIPOS = ('precio_final', 'creacion_cono')
+
+
+def _contar_en_hijo(registro, cantidad):
+    registro.contar('precio_final', cantidad)
+
+
+@unittest.skipUnless(os.name == 'posix', 'el registro compartido usa fcntl')
+class RegistroCompartidoTests(SimpleTestCase):
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        self.ruta = os.path.join(directorio, 'logs.mmap')
+
+    def _registro(self, **opciones):
+        return RegistroCompartido(self.ruta, TIPOS, **{'capacidad': 8, 'tamanio_entrada': 256, **opciones})
+
+    def test_los_procesos_ven_los_mismos_contadores_y_logs(self):
+        registro = self._registro()
+        registro.contar('precio_final', 2)
+        registro.agregar({'detalle': 'padre'})
+
+        hijo = multiprocessing.get_context('fork').Process(target=_contar_en_hijo, args=(registro, 5))
+        hijo.start()
+        hijo.join()
+        self.assertEqual(hijo.exitcode, 0)
+
+        otro = self._registro()
+        self.assertEqual(otro.contadores(), {'precio_final': 7, 'creacion_cono': 0})
+        self.assertEqual(otro.entradas(), [{'detalle': 'padre'}])
+
+    def test_la_cabecera_del_archivo_define_el_formato(self):
+        self._registro(capacidad=4, max_procesos=3)
+        otro = self._registro(capacidad=100, max_procesos=50)
+        self.assertEqual((otro._capacidad, otro._max_procesos), (4, 3))
+
+    def test_buffer_circular(self):
+        registro = self._registro(capacidad=4)
+        for numero in range(6):
+            registro.agregar({'numero': numero})
+        self.assertEqual(registro.total(), 6)
+        self.assertEqual([entrada['numero'] for entrada in registro.entradas()], [2, 3, 4, 5])
+        self.assertEqual(registro.entradas(2), [{'numero': 4}, {'numero': 5}])
+
+        registro.limpiar()
+        self.assertEqual(registro.entradas(), [])
+        self.assertEqual(registro.contadores(), {'precio_final': 0, 'creacion_cono': 0})
+
+    def test_las_entradas_largas_se_recortan_sin_romper_el_json(self):
+        registro = self._registro(tamanio_entrada=128)
+        registro.agregar({'tipo_operacion': 'x', 'detalle': 'corto', 'datos_extra': {'ids': list(range(500))}})
+        registro.agregar({'tipo_operacion': 'x', 'detalle': 'ñandú ' * 100, 'datos_extra': {}})
+        registro.agregar({'tipo_operacion': 'x' * 500, 'nivel': 'INFO', 'detalle': '', 'datos_extra': {}})
+
+        primera, segunda, tercera = registro.entradas()
+        self.assertEqual(primera, {'tipo_operacion': 'x', 'detalle': 'corto', 'datos_extra': {'truncado': True}})
+        self.assertTrue(segunda['detalle'])
+        self.assertTrue(('ñandú ' * 100).startswith(segunda['detalle']))
+        self.assertEqual(segunda['datos_extra'], {'truncado': True})
+        self.assertLessEqual(len(json.dumps(segunda, ensure_ascii=False).encode()), 128)
+        self.assertEqual(tercera, {'datos_extra': {'truncado': True}})
+
+    def test_con_la_tabla_de_procesos_llena_cuenta_en_memoria(self):
+        registro = self._registro(max_procesos=1)
+        # La única fila pertenece a otro proceso vivo
+        _I64.pack_into(registro._mmap, registro._offset_fila(0), os.getppid())
+        registro.contar('creacion_cono', 3)
+        self.assertIsNone(registro._fila)
+        self.assertEqual(registro.contadores()['creacion_cono'], 3)
+        self.assertEqual(self._registro().contadores()['creacion_cono'], 0)
+
+    def test_backend_compartido_del_logger(self):
+        registro = _crear_registro({**CONFIGURACION_POR_DEFECTO, 'BACKEND': 'compartido', 'RUTA': self.ruta})
+        self.assertIsInstance(registro, RegistroCompartido)
+        self.assertEqual(tuple(registro.contadores()), TIPOS_CONTADOS)
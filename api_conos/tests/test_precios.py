@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api_conos.catalogo import CatalogoConos, obtener_catalogo
+from api_conos.models import PedidoCono, PrecioTopping
+from api_conos.precios import capturar_precio
+
+URL = '/api/pedidos_conos/'
+PEDIDO = {'cliente': 'Ana', 'variante': 'Carnívoro', 'tamanio_cono': 'Grande', 'toppings': ['bacon', 'guacamole']}
+
+
+def cambiar_precio_topping(topping, precio):
+    """Cambia un precio (la señal sube la versión del catálogo) y publica el catálogo nuevo"""
+    precio_topping = PrecioTopping.objects.get(topping=topping)
+    precio_topping.precio = precio
+    precio_topping.save()
+    CatalogoConos.reconstruir()
+
+
+@override_settings(TENDENCIAS={'HABILITADAS': False})
+class SnapshotPrecioTests(TestCase):
+
+    def setUp(self):
+        CatalogoConos.reconstruir()
+        self.addCleanup(CatalogoConos.invalidar)
+        self.cliente = APIClient()
+
+    def test_capturar_precio_guarda_el_desglose(self):
+        catalogo = obtener_catalogo()
+        precios = capturar_precio('Carnívoro', 'Grande', ['bacon', 'guacamole'], catalogo)
+        snapshot = precios['snapshot_precio']
+        self.assertAlmostEqual(precios['precio_final'], 18.0 * 1.3 + 4.5 + 3.5)
+        self.assertEqual(snapshot['version'], catalogo.version)
+        self.assertEqual(snapshot['multiplicador'], 1.3)
+        self.assertEqual(snapshot['toppings'], {'bacon': 4.5, 'guacamole': 3.5})
+        self.assertEqual(snapshot['precio_total'], precios['precio_final'])
+
+    def test_el_precio_del_pedido_no_cambia_con_el_catalogo(self):
+        respuesta = self.cliente.post(URL, PEDIDO, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        pedido = PedidoCono.objects.get(pk=respuesta.data['id'])
+        self.assertAlmostEqual(pedido.precio_final, 31.4)
+        self.assertEqual(pedido.snapshot_precio['toppings']['bacon'], 4.5)
+
+        cambiar_precio_topping('bacon', 10.0)
+        detalle = self.cliente.get(f'{URL}{pedido.pk}/')
+        self.assertEqual(detalle.data['precio_final'], 31.4)
+        self.assertEqual(detalle.data['resumen_construccion']['precio_toppings'], 8.0)
+
+    def test_cambiar_la_composicion_vuelve_a_capturar_el_precio(self):
+        pedido_id = self.cliente.post(URL, PEDIDO, format='json').data['id']
+        cambiar_precio_topping('bacon', 10.0)
+
+        self.cliente.patch(f'{URL}{pedido_id}/', {'cliente': 'Beto'}, format='json')
+        self.assertAlmostEqual(PedidoCono.objects.get(pk=pedido_id).precio_final, 31.4)
+
+        self.cliente.patch(f'{URL}{pedido_id}/', {'toppings': ['bacon']}, format='json')
+        pedido = PedidoCono.objects.get(pk=pedido_id)
+        self.assertAlmostEqual(pedido.precio_final, 18.0 * 1.3 + 10.0)
+        self.assertEqual(pedido.snapshot_precio['toppings'], {'bacon': 10.0})
+
+    def test_pedidos_sin_snapshot_usan_el_catalogo_vigente(self):
+        pedido = PedidoCono.objects.create(
+            cliente='Ana', variante='Vegetariano', tamanio_cono='Mediano', toppings=['bacon']
+        )
+        self.assertIsNone(pedido.snapshot_precio)
+        cambiar_precio_topping('bacon', 10.0)
+        self.assertEqual(self.cliente.get(f'{URL}{pedido.pk}/').data['precio_final'], 25.0)
+
+    def test_crear_lote_captura_el_precio_de_cada_pedido(self):
+        respuesta = self.cliente.post(f'{URL}crear_lote/', [PEDIDO, {**PEDIDO, 'toppings': []}], format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        precios = PedidoCono.objects.filter(pk__in=respuesta.data['ids']).order_by('id').values_list(
+            'precio_final', flat=True
+        )
+        self.assertEqual([round(precio, 2) for precio in precios], [31.4, 23.4])
+
+
+class SnapshotPrecioAdminTests(TestCase):
+
+    def setUp(self):
+        CatalogoConos.reconstruir()
+        self.addCleanup(CatalogoConos.invalidar)
+        usuario = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'clave')
+        self.client.force_login(usuario)
+
+    def _guardar(self, ruta, **cambios):
+        # toppings tiene un default invocable: el formulario envía su valor inicial oculto
+        datos = {
+            'cliente': 'Ana', 'variante': 'Carnívoro', 'tamanio_cono': 'Grande',
+            'toppings': '["bacon"]', 'initial-toppings': '["bacon"]'
+        }
+        respuesta = self.client.post(ruta, {**datos, **cambios})
+        self.assertEqual(respuesta.status_code, 302, getattr(respuesta, 'context_data', None))
+
+    def test_el_admin_captura_el_precio_al_crear_y_al_cambiar_la_composicion(self):
+        self._guardar('/admin/api_conos/pedidocono/add/')
+        pedido = PedidoCono.objects.get()
+        self.assertAlmostEqual(pedido.precio_final, 18.0 * 1.3 + 4.5)
+        self.assertEqual(pedido.snapshot_precio['toppings'], {'bacon': 4.5})
+
+        cambiar_precio_topping('bacon', 10.0)
+        ruta = f'/admin/api_conos/pedidocono/{pedido.pk}/change/'
+        self._guardar(ruta, cliente='Beto')
+        self.assertAlmostEqual(PedidoCono.objects.get().precio_final, 18.0 * 1.3 + 4.5)
+
+        self._guardar(ruta, tamanio_cono='Mediano')
+        self.assertAlmostEqual(PedidoCono.objects.get().precio_final, 18.0 + 10.0)
@@ -0,0 +1,145 @@
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api_conos.models import MultiplicadorTamanio, PedidoCono, PrecioTopping, PrecioVariante, VersionCatalogo
+from api_conos.replica import (
+    CABECERA_RETRASO, COOKIE_ULTIMA_ESCRITURA, RouterReplica, activar_lectura, elegir_alias_lectura,
+    refrescar_replica, restaurar_lectura
+)
+
+URL = '/api/pedidos_conos/'
+REPLICA = {'HABILITADA': True, 'ALIAS': 'replica', 'INTERVALO_S': 5, 'MAX_RETRASO_S': 60}
+
+
+@contextmanager
+def copia_de_hace(segundos):
+    """Simula una réplica copiada hace `segundos` segundos"""
+    instante = time.time() - segundos
+    with mock.patch('api_conos.replica.instante_replica', return_value=instante), \
+            mock.patch('api_conos.views.instante_replica', return_value=instante):
+        yield
+
+
+@override_settings(REPLICA_LECTURA=REPLICA)
+class ElegirAliasTests(SimpleTestCase):
+
+    def test_lee_de_la_replica_si_esta_al_dia(self):
+        with copia_de_hace(5):
+            self.assertEqual(elegir_alias_lectura(None), 'replica')
+
+    def test_no_lee_de_una_replica_atrasada_o_inexistente(self):
+        with copia_de_hace(120):
+            self.assertIsNone(elegir_alias_lectura(None))
+        with mock.patch('api_conos.replica.instante_replica', return_value=None):
+            self.assertIsNone(elegir_alias_lectura(None))
+
+    def test_no_lee_de_la_replica_si_esta_deshabilitada(self):
+        with copia_de_hace(5), self.settings(REPLICA_LECTURA={**REPLICA, 'HABILITADA': False}):
+            self.assertIsNone(elegir_alias_lectura(None))
+
+    def test_lee_sus_propias_escrituras(self):
+        with copia_de_hace(5):
+            self.assertIsNone(elegir_alias_lectura(f'{time.time():.6f}'))
+            self.assertEqual(elegir_alias_lectura(f'{time.time() - 30:.6f}'), 'replica')
+            self.assertEqual(elegir_alias_lectura('no-es-un-instante'), 'replica')
+
+
+class RouterReplicaTests(SimpleTestCase):
+
+    def test_solo_las_lecturas_activadas_van_a_la_replica(self):
+        router = RouterReplica()
+        self.assertIsNone(router.db_for_read(PedidoCono))
+        token = activar_lectura('replica')
+        try:
+            self.assertEqual(router.db_for_read(PedidoCono), 'replica')
+            self.assertEqual(router.db_for_write(PedidoCono), DEFAULT_DB_ALIAS)
+        finally:
+            restaurar_lectura(token)
+        self.assertIsNone(router.db_for_read(PedidoCono))
+
+    def test_el_catalogo_se_lee_de_la_principal(self):
+        router = RouterReplica()
+        token = activar_lectura('replica')
+        try:
+            for modelo in (VersionCatalogo, PrecioVariante, MultiplicadorTamanio, PrecioTopping):
+                with self.subTest(modelo=modelo.__name__):
+                    self.assertEqual(router.db_for_read(modelo), DEFAULT_DB_ALIAS)
+        finally:
+            restaurar_lectura(token)
+
+    def test_no_migra_la_replica(self):
+        router = RouterReplica()
+        self.assertFalse(router.allow_migrate('replica', 'api_conos'))
+        self.assertIsNone(router.allow_migrate(DEFAULT_DB_ALIAS, 'api_conos'))
+
+
+@override_settings(REPLICA_LECTURA=REPLICA, TENDENCIAS={'HABILITADAS': False})
+class ReplicaApiTests(TransactionTestCase):
+    # La réplica es otra conexión a la base de pruebas: solo ve lo confirmado
+    databases = {'default', 'replica'}
+
+    def test_las_lecturas_informan_el_retraso_y_las_escrituras_marcan_al_cliente(self):
+        cliente = APIClient()
+        with copia_de_hace(5):
+            escritura = cliente.post(URL, {
+                'cliente': 'Ana', 'variante': 'Carnívoro', 'tamanio_cono': 'Mediano'
+            }, format='json')
+            self.assertEqual(escritura.status_code, 201)
+            self.assertIn(COOKIE_ULTIMA_ESCRITURA, escritura.cookies)
+            self.assertNotIn(CABECERA_RETRASO, escritura)
+
+            # La cookie es posterior a la copia: se lee de la principal
+            self.assertNotIn(CABECERA_RETRASO, cliente.get(URL))
+
+            with CaptureQueriesContext(connections['replica']) as consultas:
+                lectura = APIClient().get(URL)
+            self.assertEqual(lectura.status_code, 200)
+            self.assertTrue(consultas.captured_queries)
+            self.assertEqual(lectura.json()['count'], 1)
+            self.assertGreaterEqual(float(lectura[CABECERA_RETRASO]), 5.0)
+
+    def test_las_acciones_que_no_son_de_lectura_usan_la_principal(self):
+        with copia_de_hace(5):
+            respuesta = APIClient().get(f'{URL}toppings_disponibles/')
+        self.assertNotIn(CABECERA_RETRASO, respuesta)
+
+    def test_estado_replica(self):
+        with copia_de_hace(5):
+            datos = APIClient().get(f'{URL}estado_replica/').data
+        self.assertTrue(datos['habilitada'])
+        self.assertTrue(datos['disponible'])
+        self.assertGreaterEqual(datos['retraso_s'], 5.0)
+
+
+@override_settings(REPLICA_LECTURA=REPLICA)
+class RefrescarReplicaTests(TransactionTestCase):
+
+    def setUp(self):
+        descriptor, self.ruta = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(descriptor)
+        self.addCleanup(os.remove, self.ruta)
+
+    def test_copia_la_base_principal(self):
+        PedidoCono.objects.create(cliente='Ana', variante='Carnívoro', tamanio_cono='Mediano')
+        with mock.patch.dict(settings.DATABASES['replica'], {'NAME': self.ruta}):
+            resultado = refrescar_replica()
+            self.assertEqual(elegir_alias_lectura(None), 'replica')
+
+        self.assertAlmostEqual(os.stat(self.ruta).st_mtime, resultado['ultima_copia'], places=3)
+        self.assertEqual(resultado['tamanio_bytes'], os.path.getsize(self.ruta))
+        copia = sqlite3.connect(self.ruta)
+        try:
+            filas = copia.execute(f'SELECT cliente FROM {PedidoCono._meta.db_table}').fetchall()
+        finally:
+            copia.close()
+        self.assertEqual(filas, [('Ana',)])
@@ -0,0 +1,278 @@
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api_conos import tendencias
+from api_conos.models import PedidoCono
+from api_conos.tendencias import (
+    CONFIGURACION_POR_DEFECTO, ConteoMinimo, ResumenFrecuentes, TendenciasPedidos, claves_pedido,
+    compactar, consultar, parsear_ventana, reemplazar_base
+)
+
+URL = '/api/pedidos_conos/'
+
+PEDIDO = {'cliente': 'Ana', 'variante': 'Carnívoro', 'tamanio_cono': 'Grande', 'toppings': ['bacon', 'guacamole']}
+
+# Un instante fijo al inicio de un período de una hora
+INSTANTE = 1_700_000_000 - 1_700_000_000 % 3600
+
+
+def configuracion(directorio=None, **cambios):
+    """Configuración pequeña de tendencias para las pruebas"""
+    return {
+        **CONFIGURACION_POR_DEFECTO, 'ANCHO': 64, 'PROFUNDIDAD': 4, 'CAPACIDAD_TOP': 8,
+        'MAX_PERIODOS': 24, 'DIRECTORIO': directorio, **cambios
+    }
+
+
+def pedido(cliente='Ana', variante='Carnívoro', tamanio='Grande', toppings=('bacon',)):
+    """Pedido sin guardar con los campos que leen las tendencias"""
+    return PedidoCono(cliente=cliente, variante=variante, tamanio_cono=tamanio, toppings=list(toppings))
+
+
+def pid_terminado():
+    """PID de un proceso que ya terminó"""
+    proceso = subprocess.Popen([sys.executable, '-c', 'pass'])
+    proceso.wait()
+    return proceso.pid
+
+
+class ClavesTests(SimpleTestCase):
+
+    def test_parsear_ventana(self):
+        self.assertEqual(parsear_ventana('30m'), 1800)
+        self.assertEqual(parsear_ventana(' 24H '), 86400)
+        self.assertEqual(parsear_ventana('7d'), 7 * 86400)
+        self.assertIsNone(parsear_ventana('total'))
+        for texto in ('', 'h', '0h', '-1d', '2s', '1.5h', 'ayer'):
+            with self.subTest(texto=texto), self.assertRaises(ValueError):
+                parsear_ventana(texto)
+
+    def test_claves_de_un_pedido(self):
+        claves = claves_pedido(pedido(toppings=['queso', 'bacon', 'queso', 'guacamole']))
+        self.assertEqual(claves['toppings'], ['bacon', 'guacamole', 'queso'])
+        self.assertEqual(claves['pares_toppings'], ['bacon + guacamole', 'bacon + queso', 'guacamole + queso'])
+        self.assertEqual(claves['variante_tamanio'], ['Carnívoro / Grande'])
+        self.assertEqual(claves['cliente'], ['Ana'])
+        self.assertEqual(claves_pedido(pedido(toppings=[]))['pares_toppings'], [])
+
+
+class ResumenesTests(SimpleTestCase):
+
+    def test_sin_llenarse_los_conteos_son_exactos(self):
+        resumen = ResumenFrecuentes(capacidad=4)
+        for clave in 'aabbbc':
+            resumen.agregar(clave)
+        self.assertEqual(resumen.conteos, {'a': 2, 'b': 3, 'c': 1})
+        self.assertEqual(set(resumen.errores.values()), {0})
+
+    def test_lleno_las_frecuentes_siguen_y_el_error_acota_el_conteo(self):
+        rng = random.Random(5)
+        claves = ['frecuente'] * 300 + [f'rara-{rng.randrange(200)}' for _ in range(700)]
+        rng.shuffle(claves)
+        resumen = ResumenFrecuentes(capacidad=8)
+        for clave in claves:
+            resumen.agregar(clave)
+
+        reales = Counter(claves)
+        self.assertEqual(len(resumen.conteos), 8)
+        self.assertIn('frecuente', resumen.conteos)
+        self.assertEqual(sum(resumen.conteos.values()), len(claves))
+        for clave, conteo in resumen.conteos.items():
+            with self.subTest(clave=clave):
+                self.assertLessEqual(conteo - resumen.errores[clave], reales[clave])
+                self.assertGreaterEqual(conteo, reales[clave])
+
+    def test_sumar_conserva_las_mayores(self):
+        uno, otro = ResumenFrecuentes(capacidad=2), ResumenFrecuentes(capacidad=2)
+        for clave in 'aab':
+            uno.agregar(clave)
+        for clave in 'bbc':
+            otro.agregar(clave)
+        uno.sumar(otro)
+        self.assertEqual(uno.conteos, {'b': 3, 'a': 2})
+        uno.agregar('d')
+        self.assertNotIn('a', uno.conteos)
+        self.assertEqual(uno.errores['d'], 2)
+
+    def test_el_sketch_nunca_subestima(self):
+        rng = random.Random(9)
+        claves = [f'cliente-{rng.randrange(500)}' for _ in range(3000)]
+        sketch = ConteoMinimo(ancho=32, profundidad=4)
+        for clave in claves:
+            sketch.agregar(sketch.posiciones(clave))
+        for clave, real in Counter(claves).items():
+            self.assertGreaterEqual(sketch.estimar(sketch.posiciones(clave)), real)
+
+    def test_el_sketch_rechaza_otras_dimensiones(self):
+        sketch = ConteoMinimo(ancho=32, profundidad=4)
+        with self.assertRaises(ValueError):
+            ConteoMinimo.desde_texto(sketch.a_texto(), 64, 4)
+
+
+class TendenciasPedidosTests(SimpleTestCase):
+
+    def setUp(self):
+        self.tendencias = TendenciasPedidos(configuracion())
+
+    def test_ventanas_por_periodo(self):
+        self.tendencias.registrar([pedido(toppings=['bacon'])] * 3, instante=INSTANTE - 2 * 86400)
+        self.tendencias.registrar([pedido(toppings=['queso'])] * 2, instante=INSTANTE + 10)
+
+        ultima_hora = consultar([self.tendencias], 3600, instante=INSTANTE + 20)
+        self.assertEqual(ultima_hora['total_pedidos'], 2)
+        self.assertEqual(ultima_hora['top']['toppings'], [{'clave': 'queso', 'conteo': 2, 'error_max': 0}])
+
+        # El período de hace dos días ya se podó (MAX_PERIODOS=24) pero sigue en el acumulado
+        self.assertEqual(consultar([self.tendencias], 7 * 86400, instante=INSTANTE + 20)['total_pedidos'], 2)
+        total = consultar([self.tendencias], None)
+        self.assertEqual(total['total_pedidos'], 5)
+        self.assertEqual([fila['clave'] for fila in total['top']['toppings']], ['bacon', 'queso'])
+
+    def test_conserva_como_mucho_max_periodos(self):
+        for hora in range(30):
+            self.tendencias.registrar([pedido()], instante=INSTANTE + hora * 3600)
+        self.assertEqual(len(self.tendencias.periodos), 24)
+        self.assertEqual(min(self.tendencias.periodos), (INSTANTE + 6 * 3600) // 3600)
+
+    def test_top_y_estimaciones(self):
+        self.tendencias.registrar(
+            [pedido(cliente='Ana')] * 5 + [pedido(cliente='Luis', variante='Saludable', tamanio='Pequeño')] * 2,
+            instante=INSTANTE
+        )
+        resultado = consultar(
+            [self.tendencias], 3600, top=1, estimar={'cliente': ['Ana', 'Nadie']}, instante=INSTANTE
+        )
+        self.assertEqual(resultado['top']['cliente'], [{'clave': 'Ana', 'conteo': 5, 'error_max': 0}])
+        self.assertEqual(resultado['top']['variante_tamanio'][0]['clave'], 'Carnívoro / Grande')
+        self.assertEqual(resultado['estimaciones']['cliente']['Ana'], 5)
+        self.assertLessEqual(resultado['estimaciones']['cliente']['Nadie'], 7)
+
+    def test_combina_varias_fuentes(self):
+        otras = TendenciasPedidos(configuracion())
+        self.tendencias.registrar([pedido(toppings=['bacon'])] * 2, instante=INSTANTE)
+        otras.registrar([pedido(toppings=['bacon'])] * 3, instante=INSTANTE)
+        resultado = consultar([self.tendencias, otras], 3600, instante=INSTANTE)
+        self.assertEqual(resultado['total_pedidos'], 5)
+        self.assertEqual(resultado['top']['toppings'][0]['conteo'], 5)
+
+        self.tendencias.sumar(otras)
+        self.assertEqual(consultar([self.tendencias], 3600, instante=INSTANTE), resultado)
+
+    def test_ida_y_vuelta_por_dict(self):
+        self.tendencias.registrar([pedido(), pedido(cliente='Luis', toppings=['queso'])], instante=INSTANTE)
+        # Los períodos fuera de MAX_PERIODOS respecto de ahora se podan al leer
+        self.tendencias.registrar([pedido()], instante=tendencias.time.time())
+        datos = json.loads(json.dumps(self.tendencias.a_dict()))
+        leidas = TendenciasPedidos.desde_dict(datos, configuracion())
+        self.assertEqual(consultar([leidas], None), consultar([self.tendencias], None))
+        self.assertEqual(len(leidas.periodos), 1)
+
+    def test_rechaza_una_configuracion_incompatible(self):
+        datos = self.tendencias.a_dict()
+        with self.assertRaises(ValueError):
+            TendenciasPedidos.desde_dict(datos, configuracion(ANCHO=128))
+        with self.assertRaises(ValueError):
+            TendenciasPedidos.desde_dict({**datos, 'formato': 0}, configuracion())
+
+
+class PersistenciaTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+        self.configuracion = configuracion(self.directorio)
+
+    def _guardar(self, nombre, cantidad):
+        guardadas = TendenciasPedidos(self.configuracion)
+        guardadas.registrar([pedido()] * cantidad)
+        tendencias._escribir(os.path.join(self.directorio, nombre), guardadas)
+
+    def test_compacta_los_archivos_de_procesos_terminados(self):
+        self._guardar(f'tendencias-{pid_terminado()}.json', 2)
+        self._guardar(f'tendencias-{os.getpid()}.json', 1)
+        self.assertEqual(compactar(self.configuracion), 1)
+        self.assertEqual(compactar(self.configuracion), 0)
+
+        self.assertCountEqual(
+            [nombre for nombre in os.listdir(self.directorio) if nombre.endswith('.json')],
+            ['tendencias-base.json', f'tendencias-{os.getpid()}.json']
+        )
+        base = tendencias._leer(os.path.join(self.directorio, 'tendencias-base.json'), self.configuracion)
+        self.assertEqual(base.total.pedidos, 2)
+
+    def test_reemplazar_base_conserva_los_procesos_vivos(self):
+        self._guardar(f'tendencias-{pid_terminado()}.json', 2)
+        self._guardar(f'tendencias-{os.getpid()}.json', 1)
+        nuevas = TendenciasPedidos(self.configuracion)
+        nuevas.registrar([pedido()] * 7)
+
+        vivos = reemplazar_base(nuevas, self.configuracion)
+        self.assertEqual(vivos, [os.path.join(self.directorio, f'tendencias-{os.getpid()}.json')])
+        base = tendencias._leer(os.path.join(self.directorio, 'tendencias-base.json'), self.configuracion)
+        self.assertEqual(base.total.pedidos, 7)
+        self.assertEqual(len([nombre for nombre in os.listdir(self.directorio) if nombre.endswith('.json')]), 2)
+
+
+class TendenciasApiTests(TestCase):
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        ajustes = override_settings(TENDENCIAS=configuracion(directorio, INTERVALO_GUARDADO_S=3600))
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        # Resúmenes propios de la prueba, que no se guardan al salir
+        tendencias._tendencias = None
+        self.addCleanup(setattr, tendencias, '_tendencias', None)
+        self.cliente = APIClient()
+
+    def test_cuenta_los_pedidos_confirmados(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                self.assertEqual(self.cliente.post(URL, PEDIDO, format='json').status_code, 201)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cliente.post(URL, {**PEDIDO, 'cliente': 'Luis', 'toppings': ['queso_extra']}, format='json')
+
+        respuesta = self.cliente.get(f'{URL}tendencias/', {'ventana': '1h', 'top': 2, 'cliente': 'Luis'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['ventana_s'], 3600)
+        self.assertEqual(respuesta.data['fuentes'], 1)
+        self.assertEqual(respuesta.data['total_pedidos'], 4)
+        self.assertEqual(
+            [(fila['clave'], fila['conteo']) for fila in respuesta.data['top']['toppings']],
+            [('bacon', 3), ('guacamole', 3)]
+        )
+        self.assertEqual(respuesta.data['top']['pares_toppings'][0]['clave'], 'bacon + guacamole')
+        self.assertEqual(respuesta.data['estimaciones']['cliente']['Luis'], 1)
+
+    def test_un_pedido_invalido_no_cuenta(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cliente.post(URL, {**PEDIDO, 'toppings': ['piña']}, format='json')
+        self.assertEqual(self.cliente.get(f'{URL}tendencias/').data['total_pedidos'], 0)
+
+    def test_la_ventana_se_acota_a_lo_retenido(self):
+        respuesta = self.cliente.get(f'{URL}tendencias/', {'ventana': '30d'})
+        self.assertEqual(respuesta.data['ventana_s'], 24 * 3600)
+        self.assertIsNone(self.cliente.get(f'{URL}tendencias/', {'ventana': 'total'}).data['ventana_s'])
+
+    def test_parametros_invalidos(self):
+        for parametros in ({'ventana': 'ayer'}, {'top': 'diez'}):
+            with self.subTest(parametros=parametros):
+                respuesta = self.cliente.get(f'{URL}tendencias/', parametros)
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertEqual(respuesta.data['error'], 'Parámetros inválidos')
+
+    def test_deshabilitadas_no_registran(self):
+        with self.settings(TENDENCIAS=configuracion(HABILITADAS=False)):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.cliente.post(URL, PEDIDO, format='json')
+        self.assertIsNone(tendencias._tendencias)
@@ -0,0 +1,73 @@
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api_conos.models import PedidoCono
+from api_conos.validacion import ValidadorPedidos, obtener_validador
+
+URL = '/api/pedidos_conos/'
+
+
+class ValidadorPedidosTests(TestCase):
+
+    def setUp(self):
+        self.validador = ValidadorPedidos(
+            variantes=['Carnívoro'], tamanios=['Mediano'], toppings=['bacon', 'guacamole'],
+            max_longitud_cliente=10
+        )
+
+    def test_pedido_valido_no_tiene_errores(self):
+        datos = {'cliente': 'Ana', 'variante': 'Carnívoro', 'tamanio_cono': 'Mediano', 'toppings': ['bacon']}
+        self.assertEqual(self.validador.validar(datos), {})
+
+    def test_reporta_todos_los_campos_en_una_pasada(self):
+        errores = self.validador.validar({
+            'cliente': ' ', 'variante': 'Dulce', 'toppings': ['bacon', 'piña', 3]
+        })
+        self.assertEqual(set(errores), {'cliente', 'variante', 'tamanio_cono', 'toppings'})
+        self.assertEqual(errores['toppings']['toppings_rechazados'], ['piña', '3'])
+
+    def test_parcial_ignora_los_campos_ausentes(self):
+        self.assertEqual(self.validador.validar({'variante': 'Carnívoro'}, parcial=True), {})
+        self.assertIn('cliente', self.validador.validar({'cliente': 'x' * 11}, parcial=True))
+
+    def test_toppings_deben_ser_lista(self):
+        self.assertEqual(self.validador.errores_toppings('bacon'), ['Los toppings deben enviarse como una lista.'])
+
+    def test_validar_lote_indexa_por_posicion(self):
+        valido = {'cliente': 'Ana', 'variante': 'Carnívoro', 'tamanio_cono': 'Mediano'}
+        errores = self.validador.validar_lote([valido, {**valido, 'tamanio_cono': 'Grande'}, valido])
+        self.assertEqual(list(errores), [1])
+
+    def test_indices_en_orden_canonico(self):
+        self.assertEqual(self.validador.indices_toppings(['guacamole', 'bacon']), (1, 0))
+
+
+@override_settings(TENDENCIAS={'HABILITADAS': False})
+class ValidacionCompartidaTests(TestCase):
+
+    def test_validador_compartido_usa_las_opciones_del_modelo(self):
+        validador = obtener_validador()
+        self.assertIs(validador, obtener_validador())
+        self.assertEqual(validador.variantes, {variante for variante, _ in PedidoCono.VARIANTES_CHOICES})
+        self.assertEqual(validador.tamanios, {tamanio for tamanio, _ in PedidoCono.TAMANIOS_CHOICES})
+
+    def test_api_reporta_los_toppings_rechazados(self):
+        respuesta = APIClient().post(URL, {
+            'cliente': 'Ana', 'variante': 'Carnívoro', 'tamanio_cono': 'Mediano', 'toppings': ['bacon', 'queso']
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.data['toppings']['toppings_rechazados'], ['queso'])
+        self.assertFalse(PedidoCono.objects.exists())
+
+    def test_lote_invalido_no_inserta_nada(self):
+        valido = {'cliente': 'Ana', 'variante': 'Carnívoro', 'tamanio_cono': 'Mediano'}
+        respuesta = APIClient().post(f'{URL}crear_lote/', [valido, {**valido, 'variante': 'Dulce'}], format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(list(respuesta.data['errores']), ['1'])
+        self.assertFalse(PedidoCono.objects.exists())
+
+    def test_el_modelo_rechaza_toppings_invalidos_al_guardar(self):
+        pedido = PedidoCono(cliente='Ana', variante='Carnívoro', tamanio_cono='Mediano', toppings=['queso'])
+        with self.assertRaises(ValidationError):
+            pedido.save()
@@ -0,0 +1,165 @@
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Optional
+
+class ValidadorPedidos:
+    """
+    Validador precompilado de pedidos de conos
+
+    Compartido por el modelo, el serializador y las cargas masivas para que
+    cada pedido se valide una sola vez con búsquedas O(1) sobre frozensets.
+    """
+
+    __slots__ = (
+        'variantes', 'tamanios', 'toppings_permitidos', 'indice_toppings',
+        '_toppings_set', 'max_longitud_cliente'
+    )
+
+    def __init__(self, variantes: Iterable[str], tamanios: Iterable[str],
+                 toppings: Iterable[str], max_longitud_cliente: int = 100):
+        """
+        Args:
+            variantes (Iterable[str]): Variantes de cono permitidas
+            tamanios (Iterable[str]): Tamaños de cono permitidos
+            toppings (Iterable[str]): Toppings permitidos, en orden canónico
+            max_longitud_cliente (int): Longitud máxima del nombre del cliente
+        """
+        self.variantes = frozenset(variantes)
+        self.tamanios = frozenset(tamanios)
+        self.toppings_permitidos = tuple(toppings)
+        self._toppings_set = frozenset(self.toppings_permitidos)
+        # Posición de cada topping en el orden canónico
+        self.indice_toppings = MappingProxyType(
+            {topping: indice for indice, topping in enumerate(self.toppings_permitidos)}
+        )
+        self.max_longitud_cliente = max_longitud_cliente
+
+    def toppings_rechazados(self, toppings: List) -> List:
+        """
+        Obtiene los toppings que no están permitidos
+
+        Args:
+            toppings (list): Toppings a verificar
+
+        Returns:
+            list: Toppings rechazados, en el orden recibido
+        """
+        permitidos = self._toppings_set
+        return [
+            topping for topping in toppings
+            if not isinstance(topping, str) or topping not in permitidos
+        ]
+
+    def errores_toppings(self, toppings) -> Optional[object]:
+        """
+        Valida una lista de toppings
+
+        Args:
+            toppings (list): Toppings solicitados
+
+        Returns:
+            Errores estructurados del campo, o None si la lista es válida
+        """
+        if not isinstance(toppings, list):
+            return ['Los toppings deben enviarse como una lista.']
+        rechazados = self.toppings_rechazados(toppings)
+        if rechazados:
+            return {
+                'mensaje': 'Algunos toppings no están disponibles.',
+                'toppings_rechazados': [str(topping) for topping in rechazados]
+            }
+        return None
+
+    def indices_toppings(self, toppings: Iterable[str]) -> tuple:
+        """Convierte toppings permitidos en sus posiciones del orden canónico"""
+        indice = self.indice_toppings
+        return tuple(indice[topping] for topping in toppings)
+
+    def validar(self, datos: Dict, parcial: bool = False) -> Dict:
+        """
+        Valida los datos de un pedido en una sola pasada
+
+        Args:
+            datos (dict): Datos del pedido (cliente, variante, tamanio_cono, toppings)
+            parcial (bool): Si es True, los campos ausentes no se consideran error
+
+        Returns:
+            dict: Errores por campo (vacío si el pedido es válido)
+        """
+        if not isinstance(datos, dict):
+            return {'non_field_errors': ['Se esperaba un objeto con los datos del pedido.']}
+
+        errores = {}
+
+        if 'cliente' in datos:
+            cliente = datos['cliente']
+            if not isinstance(cliente, str) or not cliente.strip():
+                errores['cliente'] = ['El cliente debe ser un texto no vacío.']
+            elif len(cliente) > self.max_longitud_cliente:
+                errores['cliente'] = [
+                    f'El cliente no puede tener más de {self.max_longitud_cliente} caracteres.'
+                ]
+        elif not parcial:
+            errores['cliente'] = ['Este campo es obligatorio.']
+
+        for campo, opciones in (('variante', self.variantes), ('tamanio_cono', self.tamanios)):
+            if campo in datos:
+                valor = datos[campo]
+                if not isinstance(valor, str) or valor not in opciones:
+                    errores[campo] = [f'"{valor}" no es una opción válida.']
+            elif not parcial:
+                errores[campo] = ['Este campo es obligatorio.']
+
+        if 'toppings' in datos:
+            errores_toppings = self.errores_toppings(datos['toppings'])
+            if errores_toppings is not None:
+                errores['toppings'] = errores_toppings
+
+        return errores
+
+    def validar_lote(self, lote: Iterable[Dict]) -> Dict[int, Dict]:
+        """
+        Valida un lote de pedidos en una sola pasada
+
+        Args:
+            lote (Iterable[dict]): Datos de los pedidos
+
+        Returns:
+            Dict[int, Dict]: Errores por campo indexados por la posición del pedido
+                en el lote (vacío si todos los pedidos son válidos)
+        """
+        errores = {}
+        for indice, datos in enumerate(lote):
+            errores_pedido = self.validar(datos)
+            if errores_pedido:
+                errores[indice] = errores_pedido
+        return errores
+
+# (snapshot del catálogo, validador construido con él)
+_validador = (None, None)
+
+def obtener_validador() -> ValidadorPedidos:
+    """
+    Obtiene el validador compartido
+
+    Las variantes y tamaños salen de las opciones del modelo y los toppings
+    permitidos (y su orden canónico) del snapshot vigente del catálogo: los
+    que tienen precio. Se reconstruye cuando cambia el snapshot.
+
+    Returns:
+        ValidadorPedidos: Instancia compartida del validador
+    """
+    global _validador
+    from .catalogo import obtener_catalogo
+
+    catalogo = obtener_catalogo()
+    construido_con, validador = _validador
+    if construido_con is not catalogo:
+        from .models import PedidoCono
+        validador = ValidadorPedidos(
+            variantes=[variante for variante, _ in PedidoCono.VARIANTES_CHOICES],
+            tamanios=[tamanio for tamanio, _ in PedidoCono.TAMANIOS_CHOICES],
+            toppings=catalogo.precios_toppings,
+            max_longitud_cliente=PedidoCono._meta.get_field('cliente').max_length
+        )
+        _validador = (catalogo, validador)
+    return validador
@@ -1,12 +1,43 @@
+import time
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
 from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.http import Http404, HttpResponse
+from django.utils.dateparse import parse_date
 from .models import PedidoCono
 from .serializers import PedidoConoSerializer
 from .logger import obtener_logger
-from .factory import ConoFactory
-from .builder import ConoPersonalizadoBuilder
+from .catalogo import obtener_catalogo
+from .validacion import obtener_validador
+from .archivo import buscar_archivado, particiones_en_rango, queryset_particion, resumen_archivo
+from .formatos import (
+    JSONRendererPedidos, MessagePackRenderer, comprimir_respuesta, parsers_disponibles,
+    preparar_respuesta, renderers_disponibles
+)
+from .listado import CAMPOS_LISTADO, filas_listado, serializar_json
+from .ingesta import obtener_cola_ingesta, obtener_configuracion_ingesta, registrar_creados
+from .idempotencia import CABECERA, crear_idempotente
+from .replica import (
+    CABECERA_RETRASO, COOKIE_ULTIMA_ESCRITURA, activar_lectura, elegir_alias_lectura,
+    estado_replica, instante_replica, restaurar_lectura
+)
+from .precios import capturar_precio, obtener_construccion
+from .correcciones import actualizar_pedidos, eliminar_pedidos
+from .cocina import marcar_preparados, plan_cocina
+from .clientes import (
+    historial_cliente, obtener_configuracion_historial, precio_pedido,
+    registrar_cambio_cliente, registrar_pedidos_cliente
+)
+from .tendencias import (
+    consultar, fuentes_globales, obtener_configuracion_tendencias, parsear_ventana, registrar_pedidos
+)
 
 class PedidoConoViewSet(viewsets.ModelViewSet):
     """
@@ -16,33 +47,191 @@ class PedidoConoViewSet(viewsets.ModelViewSet):
     
     queryset = PedidoCono.objects.all()
     serializer_class = PedidoConoSerializer
+    # JSON con toppings=bitmask, cuerpos gzip/br y MessagePack si está instalado
+    renderer_classes = renderers_disponibles(api_settings.DEFAULT_RENDERER_CLASSES)
+    parser_classes = parsers_disponibles(api_settings.DEFAULT_PARSER_CLASSES)
+    
+    # Máximo de pedidos aceptados por petición en crear_lote
+    MAX_PEDIDOS_LOTE = 1000
+    
+    # Acciones de solo lectura que pueden leer de la réplica
+    ACCIONES_REPLICA = frozenset({'list', 'retrieve', 'estadisticas', 'detalle_construccion'})
+    
+    _alias_lectura = None
+    _token_lectura = None
+    
+    def initial(self, request, *args, **kwargs):
+        """
+        Dirige las lecturas de las acciones de solo lectura a la réplica, salvo
+        que el cliente haya escrito después de la última copia
+        """
+        super().initial(request, *args, **kwargs)
+        if self.action in self.ACCIONES_REPLICA:
+            self._alias_lectura = elegir_alias_lectura(request.COOKIES.get(COOKIE_ULTIMA_ESCRITURA))
+            if self._alias_lectura is not None:
+                self._token_lectura = activar_lectura(self._alias_lectura)
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        """
+        Expone el retraso de la réplica en las lecturas servidas desde ella y
+        marca al cliente después de cada escritura (read-your-writes)
+        """
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self._alias_lectura is not None:
+            instante = instante_replica(self._alias_lectura)
+            if instante is not None:
+                response[CABECERA_RETRASO] = f'{max(0.0, time.time() - instante):.3f}'
+        elif request.method not in SAFE_METHODS and status.is_success(response.status_code):
+            response.set_cookie(COOKIE_ULTIMA_ESCRITURA, f'{time.time():.6f}', samesite='Lax')
+        return comprimir_respuesta(request, response)
+    
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._token_lectura is not None:
+                restaurar_lectura(self._token_lectura)
+                self._token_lectura = None
+    
+    def _fecha_parametro(self, nombre):
+        """Lee un parámetro de fecha (AAAA-MM-DD) de la consulta"""
+        valor = self.request.query_params.get(nombre)
+        if not valor:
+            return None
+        try:
+            fecha = parse_date(valor)
+        except ValueError:
+            fecha = None
+        if fecha is None:
+            raise ValidationError({nombre: ['Se esperaba una fecha con formato AAAA-MM-DD.']})
+        return fecha
     
     def get_queryset(self):
         """
         Personaliza el queryset con filtros opcionales
-        """
-        queryset = PedidoCono.objects.all()
         
+        En el listado, si fecha_desde alcanza pedidos ya archivados, se combinan
+        con UNION las particiones del archivo que se solapan con el rango.
+        """
         # Filtros opcionales por parámetros de consulta
         variante = self.request.query_params.get('variante')
         tamanio = self.request.query_params.get('tamanio')
         cliente = self.request.query_params.get('cliente')
+        fecha_desde = self._fecha_parametro('fecha_desde')
+        fecha_hasta = self._fecha_parametro('fecha_hasta')
         
+        filtros = {}
         if variante:
-            queryset = queryset.filter(variante=variante)
+            filtros['variante'] = variante
         if tamanio:
-            queryset = queryset.filter(tamanio_cono=tamanio)
+            filtros['tamanio_cono'] = tamanio
         if cliente:
-            queryset = queryset.filter(cliente__icontains=cliente)
+            filtros['cliente__icontains'] = cliente
+        if fecha_desde:
+            filtros['fecha_pedido__gte'] = fecha_desde
+        if fecha_hasta:
+            filtros['fecha_pedido__lte'] = fecha_hasta
+        
+        queryset = PedidoCono.objects.filter(**filtros)
+        if self.action == 'list':
+            archivados = [
+                queryset_particion(particion).filter(**filtros)
+                for particion in particiones_en_rango(fecha_desde, fecha_hasta)
+            ]
+            if archivados:
+                queryset = queryset.order_by().union(*archivados, all=True)
             
         return queryset.order_by('-fecha_pedido')
     
+    def get_object(self):
+        """
+        Obtiene el pedido; si ya no está en la tabla principal, lo busca en el
+        archivo (solo lectura)
+        """
+        try:
+            return super().get_object()
+        except Http404:
+            if self.action != 'retrieve':
+                raise
+            pedido = buscar_archivado(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+            if pedido is None:
+                raise
+            return pedido
+    
+    def _usar_listado_rapido(self, request):
+        """El listado rápido reemplaza a la salida JSON compacta y a MessagePack"""
+        renderer = request.accepted_renderer
+        if not getattr(settings, 'LISTADO_RAPIDO', True):
+            return False
+        if type(renderer) is JSONRendererPedidos:
+            return renderer.get_indent(request.accepted_media_type, {}) is None
+        return type(renderer) is MessagePackRenderer
+    
+    def list(self, request, *args, **kwargs):
+        """
+        Lista los pedidos
+        
+        En JSON y MessagePack se omite la maquinaria de campos de DRF: las filas
+        se leen con values_list y los atributos calculados salen del snapshot de
+        precios (ver api_conos/listado.py), con la misma salida byte a byte.
+        """
+        if not self._usar_listado_rapido(request):
+            return super().list(request, *args, **kwargs)
+        
+        queryset = self.filter_queryset(self.get_queryset()).values_list(*CAMPOS_LISTADO)
+        page = self.paginate_queryset(queryset)
+        resultados = filas_listado(page if page is not None else queryset, obtener_catalogo())
+        datos = self.get_paginated_response(resultados).data if page is not None else resultados
+        
+        renderer = request.accepted_renderer
+        if isinstance(renderer, MessagePackRenderer):
+            return HttpResponse(
+                renderer.render(datos, request.accepted_media_type), content_type=renderer.media_type
+            )
+        datos = preparar_respuesta(datos, request.accepted_media_type)
+        return HttpResponse(serializar_json(datos), content_type='application/json')
+    
+    def create(self, request, *args, **kwargs):
+        """
+        Crea un pedido; con la cabecera Idempotency-Key los reintentos
+        devuelven la respuesta original sin crear otro pedido
+        """
+        clave = request.headers.get(CABECERA)
+        if not clave:
+            return super().create(request, *args, **kwargs)
+        return crear_idempotente(
+            clave, request.data,
+            lambda: super(PedidoConoViewSet, self).create(request, *args, **kwargs)
+        )
+    
     def perform_create(self, serializer):
         """
-        Registra la creación de un nuevo pedido en el log
+        Captura el snapshot de precios del pedido y registra su creación en el log
         """
         logger = obtener_logger()
-        instance = serializer.save()
+        datos = serializer.validated_data
+        precios = capturar_precio(
+            datos['variante'], datos['tamanio_cono'], datos.get('toppings', []), obtener_catalogo()
+        )
+        
+        configuracion_ingesta = obtener_configuracion_ingesta()
+        # La cola confirma en la transacción de su hilo: dentro de una
+        # transacción de quien llama (la de una Idempotency-Key) se guarda en ella
+        if configuracion_ingesta['HABILITADA'] and not transaction.get_connection().in_atomic_block:
+            # Ingesta agrupada: el hilo escritor confirma el pedido junto con
+            # otros (y sus efectos, ver registrar_creados) y la petición
+            # continúa con el id ya asignado
+            instance = obtener_cola_ingesta().encolar(
+                PedidoCono(**datos, **precios),
+                timeout=configuracion_ingesta['TIMEOUT_S']
+            )
+            serializer.instance = instance
+        else:
+            with transaction.atomic():
+                instance = serializer.save(**precios)
+                registrar_creados([instance])
+        # Solo cuentan en las tendencias los pedidos confirmados
+        transaction.on_commit(lambda: registrar_pedidos([instance]))
         
         logger.registrar_operacion(
             tipo_operacion='creacion_cono',
@@ -56,17 +245,203 @@ class PedidoConoViewSet(viewsets.ModelViewSet):
             }
         )
     
+    def perform_update(self, serializer):
+        """
+        Vuelve a capturar el snapshot de precios si cambia la composición del
+        pedido y ajusta los totales de su cliente
+        """
+        datos = serializer.validated_data
+        instance = serializer.instance
+        anterior = (instance.cliente, precio_pedido(instance))
+        with transaction.atomic():
+            if not {'variante', 'tamanio_cono', 'toppings'} & datos.keys():
+                serializer.save()
+            else:
+                serializer.save(**capturar_precio(
+                    datos.get('variante', instance.variante),
+                    datos.get('tamanio_cono', instance.tamanio_cono),
+                    datos.get('toppings', instance.toppings),
+                    obtener_catalogo()
+                ))
+            registrar_cambio_cliente(anterior, serializer.instance)
+    
+    def perform_destroy(self, instance):
+        """Elimina el pedido y lo descuenta de los totales de su cliente"""
+        with transaction.atomic():
+            instance.delete()
+            registrar_pedidos_cliente([instance], signo=-1)
+    
+    @action(detail=False, methods=['post'])
+    def crear_lote(self, request):
+        """
+        Endpoint para crear múltiples pedidos en una sola petición
+        Valida todo el lote en una pasada y lo inserta en una sola transacción
+        """
+        pedidos = request.data
+        if not isinstance(pedidos, list) or not pedidos:
+            return Response({
+                'error': 'Se esperaba una lista no vacía de pedidos'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(pedidos) > self.MAX_PEDIDOS_LOTE:
+            return Response({
+                'error': f'El lote no puede superar {self.MAX_PEDIDOS_LOTE} pedidos'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        errores = obtener_validador().validar_lote(pedidos)
+        if errores:
+            return Response({
+                'error': 'El lote contiene pedidos inválidos',
+                'errores': {str(indice): errores_pedido for indice, errores_pedido in errores.items()}
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # El lote ya fue validado: bulk_create no vuelve a pasar por save()/clean()
+        catalogo = obtener_catalogo()
+        with transaction.atomic():
+            creados = PedidoCono.objects.bulk_create([
+                PedidoCono(
+                    cliente=datos['cliente'].strip(),
+                    variante=datos['variante'],
+                    tamanio_cono=datos['tamanio_cono'],
+                    toppings=datos.get('toppings', []),
+                    **capturar_precio(
+                        datos['variante'], datos['tamanio_cono'], datos.get('toppings', []), catalogo
+                    )
+                )
+                for datos in pedidos
+            ])
+            registrar_creados(creados)
+        
+        registrar_pedidos(creados)
+        ids = [pedido.id for pedido in creados]
+        logger = obtener_logger()
+        logger.registrar_operacion(
+            tipo_operacion='creacion_cono',
+            detalle=f'Lote de {len(creados)} pedidos creado',
+            datos_extra={'pedido_ids': ids, 'total_pedidos': len(creados)}
+        )
+        
+        return Response({
+            'pedidos_creados': len(creados),
+            'ids': ids
+        }, status=status.HTTP_201_CREATED)
+    
+    def _datos_correccion(self, request):
+        """Lee el cuerpo de una corrección en bloque: {"filtro": {...}, "cambios": {...}, "simular": false}"""
+        datos = request.data
+        if not isinstance(datos, dict):
+            raise ValueError('Se esperaba un objeto con filtro')
+        simular = datos.get('simular', False)
+        if not isinstance(simular, bool):
+            raise ValueError('simular: se esperaba un booleano')
+        return datos.get('filtro'), datos.get('cambios'), simular
+    
+    @action(detail=False, methods=['post'])
+    def actualizar_lote(self, request):
+        """
+        Endpoint para corregir en bloque los pedidos de un filtro
+        
+        Cambia el tamaño o quita un topping de todos los pedidos del filtro con
+        un UPDATE que recalcula también precio_final y el snapshot de precios
+        (ver api_conos/correcciones.py). Con simular=true solo los cuenta.
+        """
+        try:
+            try:
+                filtro, cambios, simular = self._datos_correccion(request)
+                return Response(actualizar_pedidos(filtro, cambios, simular=simular))
+            except ValueError as e:
+                return Response({
+                    'error': 'Corrección inválida',
+                    'detalle': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'error': 'Error al corregir los pedidos',
+                'detalle': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['post'])
+    def eliminar_lote(self, request):
+        """
+        Endpoint para eliminar en bloque los pedidos de un filtro
+        
+        Con simular=true solo cuenta los pedidos que se eliminarían.
+        """
+        try:
+            try:
+                filtro, _, simular = self._datos_correccion(request)
+                return Response(eliminar_pedidos(filtro, simular=simular))
+            except ValueError as e:
+                return Response({
+                    'error': 'Eliminación inválida',
+                    'detalle': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'error': 'Error al eliminar los pedidos',
+                'detalle': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['get', 'post'])
+    def cola_cocina(self, request):
+        """
+        Endpoint de la cola de cocina
+        
+        GET devuelve el plan de los pedidos pendientes agrupados en lotes por
+        receta base y toppings compartidos (ver api_conos/cocina.py), con el
+        parámetro opcional limite. POST con {"preparados": [ids]} los marca
+        como preparados.
+        """
+        try:
+            if request.method == 'GET':
+                try:
+                    limite = request.query_params.get('limite')
+                    limite = int(limite) if limite else None
+                    if limite is not None and limite <= 0:
+                        raise ValueError('limite debe ser mayor que 0')
+                except ValueError as e:
+                    return Response({
+                        'error': 'Parámetros inválidos',
+                        'detalle': str(e)
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                return Response(plan_cocina(limite))
+            
+            ids = request.data.get('preparados') if isinstance(request.data, dict) else None
+            if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+                return Response({
+                    'error': 'Se esperaba {"preparados": [ids]}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'pedidos_preparados': marcar_preparados(ids)})
+        except Exception as e:
+            return Response({
+                'error': 'Error en la cola de cocina',
+                'detalle': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def _respuesta_catalogo(self, request, catalogo, contenido):
+        """
+        Responde con el JSON pre-serializado del catálogo
+        
+        El ETag depende del contenido del catálogo para que los clientes puedan
+        revalidar su caché con If-None-Match.
+        """
+        etag = catalogo.etag
+        # Las respuestas comprimidas llevan el ETag débil (W/)
+        if request.headers.get('If-None-Match') in (etag, 'W/' + etag):
+            respuesta = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            respuesta = HttpResponse(contenido, content_type='application/json')
+        respuesta['ETag'] = etag
+        respuesta['X-Catalogo-Version'] = catalogo.version_publica
+        return respuesta
+    
     @action(detail=False, methods=['get'])
     def tipos_disponibles(self, request):
         """
         Endpoint para obtener los tipos de conos disponibles
         """
         try:
-            tipos = ConoFactory.obtener_info_tipos()
-            return Response({
-                'tipos_disponibles': tipos,
-                'total_tipos': len(tipos)
-            })
+            catalogo = obtener_catalogo()
+            return self._respuesta_catalogo(request, catalogo, catalogo.json_tipos)
         except Exception as e:
             return Response({
                 'error': 'Error al obtener tipos disponibles',
@@ -79,11 +454,8 @@ class PedidoConoViewSet(viewsets.ModelViewSet):
         Endpoint para obtener los toppings disponibles y sus precios
         """
         try:
-            toppings = ConoPersonalizadoBuilder.obtener_precios_toppings()
-            return Response({
-                'toppings_disponibles': toppings,
-                'total_toppings': len(toppings)
-            })
+            catalogo = obtener_catalogo()
+            return self._respuesta_catalogo(request, catalogo, catalogo.json_toppings)
         except Exception as e:
             return Response({
                 'error': 'Error al obtener toppings disponibles',
@@ -99,25 +471,36 @@ class PedidoConoViewSet(viewsets.ModelViewSet):
             logger = obtener_logger()
             stats = logger.obtener_estadisticas()
             
-            # Estadísticas adicionales de pedidos
-            total_pedidos = PedidoCono.objects.count()
+            # Estadísticas adicionales de pedidos (los archivados, desde el
+            # resumen de cada partición)
+            archivo = resumen_archivo()
+            total_pedidos = PedidoCono.objects.count() + archivo['total']
             pedidos_por_variante = {}
             pedidos_por_tamanio = {}
             
             for variante, _ in PedidoCono.VARIANTES_CHOICES:
                 count = PedidoCono.objects.filter(variante=variante).count()
-                pedidos_por_variante[variante] = count
+                pedidos_por_variante[variante] = count + archivo['por_variante'][variante]
             
             for tamanio, _ in PedidoCono.TAMANIOS_CHOICES:
                 count = PedidoCono.objects.filter(tamanio_cono=tamanio).count()
-                pedidos_por_tamanio[tamanio] = count
+                pedidos_por_tamanio[tamanio] = count + archivo['por_tamanio'][tamanio]
+            
+            # Ingresos desde los precios capturados al crear cada pedido
+            ingresos = PedidoCono.objects.aggregate(
+                total=Sum('precio_final'),
+                sin_precio=Count('id', filter=Q(precio_final__isnull=True))
+            )
             
             return Response({
                 'estadisticas_sistema': stats,
                 'estadisticas_pedidos': {
                     'total_pedidos': total_pedidos,
                     'pedidos_por_variante': pedidos_por_variante,
-                    'pedidos_por_tamanio': pedidos_por_tamanio
+                    'pedidos_por_tamanio': pedidos_por_tamanio,
+                    'ingresos_totales': round((ingresos['total'] or 0.0) + archivo['ingresos'], 2),
+                    'pedidos_sin_snapshot_precio': ingresos['sin_precio'] + archivo['sin_precio'],
+                    'pedidos_archivados': archivo['total']
                 }
             })
         except Exception as e:
@@ -126,6 +509,93 @@ class PedidoConoViewSet(viewsets.ModelViewSet):
                 'detalle': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @action(detail=False, methods=['get'])
+    def tendencias(self, request):
+        """
+        Endpoint para obtener los toppings, combinaciones y clientes más frecuentes
+        
+        Se responde desde resúmenes en streaming (api_conos/tendencias.py), sin
+        leer los pedidos. Parámetros: ventana (30m, 24h, 7d o total), top y,
+        para estimar claves puntuales, cliente y topping (repetibles).
+        """
+        try:
+            configuracion = obtener_configuracion_tendencias()
+            texto_ventana = request.query_params.get('ventana', '24h')
+            try:
+                ventana = parsear_ventana(texto_ventana)
+                top = int(request.query_params.get('top', 10))
+            except ValueError as e:
+                return Response({
+                    'error': 'Parámetros inválidos',
+                    'detalle': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+            top = max(1, min(top, configuracion['CAPACIDAD_TOP']))
+            
+            estimar = {}
+            if request.query_params.getlist('cliente'):
+                estimar['cliente'] = request.query_params.getlist('cliente')
+            if request.query_params.getlist('topping'):
+                estimar['toppings'] = request.query_params.getlist('topping')
+            
+            fuentes = fuentes_globales()
+            resultado = consultar(fuentes, ventana, top=top, estimar=estimar)
+            retenido = configuracion['DURACION_PERIODO_S'] * configuracion['MAX_PERIODOS']
+            return Response({
+                'ventana': texto_ventana,
+                'ventana_s': ventana if ventana is None else min(ventana, retenido),
+                'fuentes': len(fuentes),
+                **resultado
+            })
+        except Exception as e:
+            return Response({
+                'error': 'Error al obtener tendencias',
+                'detalle': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['get'])
+    def historial_cliente(self, request):
+        """
+        Endpoint para obtener los últimos pedidos de un cliente y su gasto de por vida
+        
+        El cliente se compara exacto (no icontains), con el índice
+        (cliente, fecha_pedido, id); los totales se mantienen en ResumenCliente
+        y el historial se guarda en una caché del proceso (ver
+        api_conos/clientes.py). Parámetros: cliente y limite.
+        """
+        try:
+            configuracion = obtener_configuracion_historial()
+            cliente = request.query_params.get('cliente', '').strip()
+            try:
+                if not cliente:
+                    raise ValueError('cliente es obligatorio')
+                limite = int(request.query_params.get('limite', configuracion['LIMITE']))
+                if limite <= 0:
+                    raise ValueError('limite debe ser mayor que 0')
+            except ValueError as e:
+                return Response({
+                    'error': 'Parámetros inválidos',
+                    'detalle': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+            return Response(historial_cliente(cliente, min(limite, configuracion['MAX_LIMITE'])))
+        except Exception as e:
+            return Response({
+                'error': 'Error al obtener el historial del cliente',
+                'detalle': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['get'])
+    def estado_replica(self, request):
+        """
+        Endpoint para observar el retraso de la réplica de lectura
+        """
+        try:
+            return Response(estado_replica())
+        except Exception as e:
+            return Response({
+                'error': 'Error al obtener el estado de la réplica',
+                'detalle': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
     @action(detail=False, methods=['get'])
     def logs_recientes(self, request):
         """
@@ -152,22 +622,18 @@ class PedidoConoViewSet(viewsets.ModelViewSet):
         Endpoint para obtener el detalle completo de construcción de un pedido específico
         """
         try:
-            pedido = get_object_or_404(PedidoCono, pk=pk)
+            pedido = PedidoCono.objects.filter(pk=pk).first() or buscar_archivado(pk)
+            if pedido is None:
+                raise Http404('No PedidoCono matches the given query.')
             serializer = self.get_serializer(pedido)
             
-            # Obtener información adicional de construcción
-            from .factory import ConoFactory
-            from .builder import ConoPersonalizadoBuilder, ConoDirector
-            
-            cono_base = ConoFactory.crear_cono_base(pedido.variante, pedido.tamanio_cono)
-            builder = ConoPersonalizadoBuilder(cono_base)
-            director = ConoDirector(builder)
-            construccion_completa = director.construir_cono_personalizado(pedido.toppings or [])
+            # Obtener información adicional de construcción (desde el snapshot de precios)
+            construccion_completa = obtener_construccion(pedido, obtener_catalogo())
             
             return Response({
                 'pedido': serializer.data,
-                'construccion_detallada': construccion_completa,
-                'patron_factory': f'Usado para crear cono base: {cono_base.__class__.__name__}',
+                'construccion_detallada': construccion_completa._asdict(),
+                'patron_factory': f'Usado para crear cono base: {construccion_completa.tipo_base}',
                 'patron_builder': f'Usado para personalizar con {len(pedido.toppings or [])} toppings'
             })
         except Exception as e:
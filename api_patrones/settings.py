@@ -46,6 +46,119 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20
 }
 
+# Logger de operaciones: nivel mínimo guardado (los cálculos por pedido de
+# los serializadores son DEBUG) y fracción guardada por tipo de operación.
+# Los contadores por tipo siempre son exactos.
+LOGGER_OPERACIONES = {
+    'NIVEL': 'INFO',
+    'MUESTREO': {},
+    # 'compartido' para que todos los workers vean los mismos logs y contadores
+    'BACKEND': 'memoria',
+    'RUTA': BASE_DIR / 'logs_operaciones.mmap',
+    'CAPACIDAD': 10000,
+    'TAMANIO_ENTRADA': 1024,
+    # Procesos con fila propia en la tabla de contadores (None: según las CPU)
+    'MAX_PROCESOS': None,
+}
+
+# Listado de pedidos en JSON sin la maquinaria de campos de DRF (api_conos/listado.py)
+LISTADO_RAPIDO = True
+
+# Compresión de las respuestas de pedidos según Accept-Encoding (brotli si el
+# paquete opcional está instalado, si no gzip) a partir de MIN_BYTES
+COMPRESION_RESPUESTAS = {
+    'HABILITADA': True,
+    'MIN_BYTES': 1024,
+    'NIVEL_GZIP': 6,
+    'CALIDAD_BROTLI': 5,
+}
+
+# Segundos entre verificaciones de la versión del catálogo de precios
+CATALOGO_INTERVALO_VERIFICACION = 5
+
+# Ingesta agrupada de pedidos: un hilo escritor confirma los POST en grupos
+# de hasta MAX_FILAS pedidos o MAX_ESPERA_MS milisegundos por transacción
+INGESTA_AGRUPADA = {
+    'HABILITADA': False,
+    'MAX_FILAS': 64,
+    'MAX_ESPERA_MS': 5,
+    'TIMEOUT_S': 10,
+}
+
+# Réplica de lectura: las acciones de solo lectura del viewset leen de ALIAS
+# si su copia tiene como mucho MAX_RETRASO_S segundos y el cliente no escribió
+# después de la copia; refrescar_replica copia cada INTERVALO_S segundos
+REPLICA_LECTURA = {
+    'HABILITADA': False,
+    'ALIAS': 'replica',
+    'INTERVALO_S': 5,
+    'MAX_RETRASO_S': 60,
+}
+
+# Archivo de pedidos: archivar_pedidos mueve los pedidos con más de
+# HORIZONTE_DIAS días a tablas mensuales, en lotes de LOTE pedidos
+ARCHIVO_PEDIDOS = {
+    'HORIZONTE_DIAS': 180,
+    'LOTE': 1000,
+}
+
+# Claves de idempotencia de POST /api/pedidos_conos/: validez de la respuesta
+# guardada, máximo de respuestas en memoria por proceso y espera máxima de
+# un reintento concurrente
+IDEMPOTENCIA = {
+    'TTL_S': 24 * 60 * 60,
+    'MAX_ENTRADAS': 10000,
+    'ESPERA_S': 10,
+}
+
+# Tendencias (api_conos/tendencias.py): resúmenes en streaming de toppings,
+# pares de toppings, variante/tamaño y clientes, por períodos de
+# DURACION_PERIODO_S segundos (se conservan MAX_PERIODOS). Cada proceso guarda
+# los suyos en DIRECTORIO cada INTERVALO_GUARDADO_S segundos
+TENDENCIAS = {
+    'HABILITADAS': True,
+    'DIRECTORIO': BASE_DIR / 'tendencias',
+    'DURACION_PERIODO_S': 3600,
+    'MAX_PERIODOS': 168,
+    'ANCHO': 512,
+    'PROFUNDIDAD': 4,
+    'CAPACIDAD_TOP': 128,
+    'INTERVALO_GUARDADO_S': 30,
+}
+
+# Calentamiento al cargar la aplicación WSGI (api_conos/calentamiento.py) y
+# conexiones preparadas en cada worker (post_fork en gunicorn.conf.py)
+CALENTAMIENTO = {
+    'HABILITADO': True,
+    'CONEXIONES': True,
+}
+
+# Cola de cocina (api_conos/cocina.py): los pedidos pendientes se preparan en
+# lotes de hasta MAX_LOTE pedidos de la misma variante y tamaño en ESTACIONES
+# estaciones, sin que ninguno espere más de MAX_ESPERA_S si la carga lo permite.
+# Un lote tarda TIEMPO_BASE_S + TIEMPO_PEDIDO_S por pedido + TIEMPO_TOPPING_S
+# por topping distinto
+COCINA = {
+    'HABILITADA': True,
+    'ESTACIONES': 2,
+    'MAX_LOTE': 4,
+    'MAX_ESPERA_S': 300,
+    'TIEMPO_BASE_S': 60,
+    'TIEMPO_PEDIDO_S': 20,
+    'TIEMPO_TOPPING_S': 10,
+    'MAX_PENDIENTES': 500,
+}
+
+# Historial de clientes (api_conos/clientes.py): cada proceso guarda en
+# memoria el historial de hasta MAX_ENTRADAS clientes durante TTL_S segundos.
+# limite por defecto LIMITE pedidos, como máximo MAX_LIMITE
+HISTORIAL_CLIENTES = {
+    'MAX_ENTRADAS': 10000,
+    'TTL_S': 30,
+    'LIMITE': 10,
+    'MAX_LIMITE': 100,
+}
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -83,9 +196,22 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Conservar entre peticiones las conexiones que prepara cada worker
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    },
+    # Copia de solo lectura de 'default' refrescada con `manage.py refrescar_replica`
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
     }
 }
 
+DATABASE_ROUTERS = ['api_conos.replica.RouterReplica']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
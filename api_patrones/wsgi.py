@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_patrones.settings')
 
 application = get_wsgi_application()
+
+# Importar y construir vistas, catálogo y serializadores antes de la primera
+# petición (antes del fork con gunicorn --preload, ver gunicorn.conf.py)
+from api_conos.calentamiento import calentar_aplicacion  # noqa: E402
+
+calentar_aplicacion()
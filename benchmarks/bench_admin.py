@@ -0,0 +1,82 @@
+"""
+Benchmark del listado de pedidos en el administrador de Django
+
+Mide el tiempo y las consultas SQL de las vistas más usadas del changelist
+de PedidoConoAdmin: la primera página, una búsqueda por cliente, un filtro
+por variante, la navegación por fechas (date_hierarchy) y una página
+avanzada. Usa la base de datos configurada; para que los números sean
+representativos debe tener millones de pedidos.
+
+Uso:
+    python benchmarks/bench_admin.py [--rondas 3] [--busqueda "Ana"]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_patrones.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from api_conos.models import PedidoCono  # noqa: E402
+
+URL = '/admin/api_conos/pedidocono/'
+USUARIO = 'bench_admin'
+
+
+def vistas(busqueda):
+    ultima = PedidoCono.objects.order_by('-fecha_pedido').values_list('fecha_pedido', flat=True).first()
+    return (
+        ('primera página', URL),
+        ('búsqueda por cliente', f'{URL}?q={busqueda}'),
+        ('filtro por variante', f'{URL}?variante__exact=Vegetariano'),
+        ('date_hierarchy: año', f'{URL}?fecha_pedido__year={ultima.year}'),
+        ('date_hierarchy: mes', f'{URL}?fecha_pedido__year={ultima.year}&fecha_pedido__month={ultima.month}'),
+        ('página 50', f'{URL}?p=50'),
+    )
+
+
+def medir(cliente, url):
+    with CaptureQueriesContext(connection) as consultas:
+        inicio = time.perf_counter()
+        respuesta = cliente.get(url)
+        duracion = (time.perf_counter() - inicio) * 1000
+    assert respuesta.status_code == 200, (url, respuesta.status_code)
+    return duracion, len(consultas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rondas', type=int, default=3)
+    parser.add_argument('--busqueda', default='Ana')
+    args = parser.parse_args()
+
+    usuario, _ = get_user_model().objects.get_or_create(
+        username=USUARIO, defaults={'is_staff': True, 'is_superuser': True}
+    )
+    cliente = Client()
+    cliente.force_login(usuario)
+
+    print(f'{PedidoCono.objects.order_by().values("id").count():,} pedidos')
+    mejores = {}
+    for _ in range(args.rondas):
+        for nombre, url in vistas(args.busqueda):
+            duracion, consultas = medir(cliente, url)
+            anterior = mejores.get(nombre)
+            if anterior is None or duracion < anterior[0]:
+                mejores[nombre] = (duracion, consultas)
+    for nombre, (duracion, consultas) in mejores.items():
+        print(f'  {nombre:<24} {duracion:>9.1f} ms  {consultas:>3} consultas')
+
+
+if __name__ == '__main__':
+    main()
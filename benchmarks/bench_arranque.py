@@ -0,0 +1,156 @@
+"""
+Benchmark del arranque de un worker: carga de la aplicación y primera petición
+
+Compara, en procesos nuevos:
+- sin calentamiento: el worker carga la aplicación WSGI y construye URLconf,
+  vistas, catálogo, serializadores y conexiones en su primera petición;
+- con precarga: el proceso maestro carga y calienta la aplicación
+  (api_conos/calentamiento.py), hace fork como gunicorn --preload y el worker
+  solo prepara sus conexiones (post_fork) antes de atender.
+
+Para cada caso informa el tiempo de carga, el tiempo de importación medido
+con -X importtime antes y durante las primeras peticiones, y la latencia de
+la primera y la segunda petición a cada endpoint. Usa la base de datos
+configurada, que debe tener pedidos (ver `manage.py generar_carga`).
+
+Uso:
+    python benchmarks/bench_arranque.py [--rondas 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARCA = '--- primera peticion ---'
+CASOS = ('sin calentamiento', 'con precarga')
+
+
+def _peticion(application, ruta):
+    from wsgiref.util import setup_testing_defaults
+    entorno = {'PATH_INFO': ruta, 'REQUEST_METHOD': 'GET', 'HTTP_HOST': 'localhost'}
+    setup_testing_defaults(entorno)
+    estado = []
+    inicio = time.perf_counter()
+    cuerpo = b''.join(application(entorno, lambda status, headers: estado.append(status)))
+    duracion = (time.perf_counter() - inicio) * 1000
+    assert estado[0].startswith('200'), (ruta, estado[0], cuerpo[:200])
+    return duracion
+
+
+def hijo(caso):
+    """Proceso medido: carga la aplicación y atiende las primeras peticiones"""
+    sys.path.insert(0, RAIZ)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_patrones.settings')
+    from django.conf import settings
+    settings.CALENTAMIENTO = {'HABILITADO': caso == 'con precarga', 'CONEXIONES': True}
+
+    inicio = time.perf_counter()
+    from api_patrones.wsgi import application
+    carga = (time.perf_counter() - inicio) * 1000
+
+    from api_conos.models import PedidoCono
+    pk = PedidoCono.objects.values_list('pk', flat=True).first()
+    from django.db import connections
+    connections.close_all()
+    rutas = (
+        '/api/pedidos_conos/',
+        f'/api/pedidos_conos/{pk}/',
+        f'/api/pedidos_conos/{pk}/detalle_construccion/',
+        '/api/pedidos_conos/tipos_disponibles/',
+    )
+
+    lectura, escritura = os.pipe()
+    pid = os.fork()
+    if pid:
+        os.close(escritura)
+        with os.fdopen(lectura) as canal:
+            resultado = json.loads(canal.read())
+        os.waitpid(pid, 0)
+        resultado['carga_ms'] = carga
+        print(json.dumps(resultado))
+        return
+
+    # Worker: solo las conexiones se preparan después del fork
+    os.close(lectura)
+    inicio = time.perf_counter()
+    if caso == 'con precarga':
+        from api_conos.calentamiento import preparar_conexiones
+        preparar_conexiones()
+    post_fork = (time.perf_counter() - inicio) * 1000
+    sys.stderr.write(MARCA + '\n')
+    sys.stderr.flush()
+    primeras = [_peticion(application, ruta) for ruta in rutas]
+    segundas = [_peticion(application, ruta) for ruta in rutas]
+    with os.fdopen(escritura, 'w') as canal:
+        canal.write(json.dumps({
+            'post_fork_ms': post_fork, 'primeras_ms': primeras, 'segundas_ms': segundas, 'rutas': rutas
+        }))
+    os._exit(0)
+
+
+def _importacion(stderr):
+    """Suma de los tiempos acumulados (ms) de las importaciones de primer nivel, antes y después de la marca"""
+    antes, despues = 0.0, 0.0
+    marca_vista = False
+    for linea in stderr.splitlines():
+        if linea.startswith(MARCA):
+            marca_vista = True
+        elif linea.startswith('import time:'):
+            _, acumulado, nombre = linea.split('|', 2)
+            # Las importaciones anidadas se indentan con dos espacios por nivel
+            if not acumulado.strip().isdigit() or nombre.startswith('   '):
+                continue
+            if marca_vista:
+                despues += int(acumulado) / 1000
+            else:
+                antes += int(acumulado) / 1000
+    return antes, despues
+
+
+def medir(caso):
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--hijo', caso],
+        capture_output=True, text=True, check=True, cwd=RAIZ
+    )
+    resultado = json.loads(proceso.stdout.strip().splitlines()[-1])
+    resultado['importacion_ms'] = _importacion(proceso.stderr)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rondas', type=int, default=5)
+    parser.add_argument('--hijo', choices=CASOS)
+    args = parser.parse_args()
+    if args.hijo:
+        hijo(args.hijo)
+        return
+
+    # Mediana por métrica de rondas intercaladas
+    resultados = {caso: [] for caso in CASOS}
+    for _ in range(args.rondas):
+        for caso in CASOS:
+            resultados[caso].append(medir(caso))
+
+    def mediana(valores):
+        valores = sorted(valores)
+        return valores[len(valores) // 2]
+
+    rutas = resultados[CASOS[0]][0]['rutas']
+    for caso, rondas in resultados.items():
+        print(caso)
+        print(f"  carga de la aplicación        {mediana([r['carga_ms'] for r in rondas]):>8.1f} ms")
+        print(f"  importación antes del fork    {mediana([r['importacion_ms'][0] for r in rondas]):>8.1f} ms")
+        print(f"  importación en el worker      {mediana([r['importacion_ms'][1] for r in rondas]):>8.1f} ms")
+        print(f"  post_fork                     {mediana([r['post_fork_ms'] for r in rondas]):>8.1f} ms")
+        for i, ruta in enumerate(rutas):
+            primera = mediana([r['primeras_ms'][i] for r in rondas])
+            segunda = mediana([r['segundas_ms'][i] for r in rondas])
+            print(f'  {ruta:<50} 1.ª {primera:>7.1f} ms   2.ª {segunda:>6.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
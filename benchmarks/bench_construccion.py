@@ -0,0 +1,94 @@
+"""
+Benchmark de asignaciones de memoria al construir conos (Factory + Builder)
+
+Mide con tracemalloc el número de bloques y bytes asignados por construcción,
+el tamaño de las instancias y el tiempo por construcción.
+
+Uso:
+    python benchmarks/bench_construccion.py [--iteraciones 20000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_conos.builder import ConoPersonalizadoBuilder, ConoDirector  # noqa: E402
+from api_conos.factory import ConoFactory  # noqa: E402
+
+PEDIDOS = [
+    ('Carnívoro', 'Grande', ['queso_extra', 'bacon', 'guacamole']),
+    ('Vegetariano', 'Mediano', ['aguacate', 'champiñones']),
+    ('Saludable', 'Pequeño', []),
+    ('Carnívoro', 'Mediano', ['jalapeños', 'salsa_chipotle', 'papas_al_hilo', 'queso_extra']),
+]
+
+
+def construir(variante, tamanio, toppings):
+    cono_base = ConoFactory.crear_cono_base(variante, tamanio)
+    director = ConoDirector(ConoPersonalizadoBuilder(cono_base))
+    return director.construir_cono_personalizado(toppings)
+
+
+def medir_asignaciones(iteraciones):
+    """Cuenta bloques y bytes asignados por construcción manteniendo vivos los resultados"""
+    resultados = []
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    for i in range(iteraciones):
+        resultados.append(construir(*PEDIDOS[i % len(PEDIDOS)]))
+    despues = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    diferencias = despues.compare_to(antes, 'filename')
+    bloques = sum(d.count_diff for d in diferencias)
+    tamanio = sum(d.size_diff for d in diferencias)
+    # Descontar la lista contenedora de resultados
+    tamanio -= sys.getsizeof(resultados)
+    return bloques / iteraciones, tamanio / iteraciones
+
+
+def medir_pico(iteraciones):
+    """Pico medio de memoria transitoria durante una construcción (resultado descartado)"""
+    tracemalloc.start()
+    picos = 0
+    for i in range(iteraciones):
+        actual, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        construir(*PEDIDOS[i % len(PEDIDOS)])
+        _, pico = tracemalloc.get_traced_memory()
+        picos += pico - actual
+    tracemalloc.stop()
+    return picos / iteraciones
+
+
+def medir_tiempo(iteraciones):
+    inicio = time.perf_counter()
+    for i in range(iteraciones):
+        construir(*PEDIDOS[i % len(PEDIDOS)])
+    return (time.perf_counter() - inicio) / iteraciones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iteraciones', type=int, default=20000)
+    args = parser.parse_args()
+
+    cono = ConoFactory.crear_cono_base('Carnívoro', 'Grande')
+    builder = ConoPersonalizadoBuilder(cono)
+    print(f"sizeof(cono):    {sys.getsizeof(cono)} B "
+          f"(__dict__: {'sí' if hasattr(cono, '__dict__') else 'no'})")
+    print(f"sizeof(builder): {sys.getsizeof(builder)} B "
+          f"(__dict__: {'sí' if hasattr(builder, '__dict__') else 'no'})")
+
+    bloques, tamanio = medir_asignaciones(args.iteraciones)
+    print(f'Bloques retenidos por construcción: {bloques:.1f}')
+    print(f'Bytes retenidos por construcción:   {tamanio:.0f} B')
+    print(f'Pico transitorio por construcción:  {medir_pico(args.iteraciones):.0f} B')
+    print(f'Tiempo por construcción:            {medir_tiempo(args.iteraciones) * 1e6:.2f} µs')
+
+
+if __name__ == '__main__':
+    main()
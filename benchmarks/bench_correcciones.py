@@ -0,0 +1,114 @@
+"""
+Benchmark de las correcciones en bloque frente a una petición por pedido
+
+Para los mismos pedidos (los N más recientes con el topping indicado) mide:
+- quitar el topping con un PATCH por pedido frente a
+  POST /api/pedidos_conos/actualizar_lote/ con la lista de ids;
+- eliminarlos con un DELETE por pedido frente a
+  POST /api/pedidos_conos/eliminar_lote/.
+
+Cada medición se ejecuta dentro de una transacción que se revierte, por lo
+que la base de datos configurada no cambia. Debe tener pedidos (ver
+`manage.py generar_carga`).
+
+Uso:
+    python benchmarks/bench_correcciones.py [--pedidos 500] [--topping bacon]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_patrones.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from api_conos.correcciones import ContieneTopping  # noqa: E402
+from api_conos.models import PedidoCono  # noqa: E402
+
+URL = '/api/pedidos_conos/'
+
+
+def por_pedido_patch(cliente, pedidos, topping):
+    for pedido_id, toppings in pedidos:
+        respuesta = cliente.patch(
+            f'{URL}{pedido_id}/', {'toppings': [t for t in toppings if t != topping]}, format='json'
+        )
+        assert respuesta.status_code == 200, respuesta.content
+
+
+def en_bloque_patch(cliente, pedidos, topping):
+    respuesta = cliente.post(f'{URL}actualizar_lote/', {
+        'filtro': {'ids': [pedido_id for pedido_id, _ in pedidos]},
+        'cambios': {'quitar_topping': topping}
+    }, format='json')
+    assert respuesta.status_code == 200 and respuesta.data['pedidos_actualizados'] == len(pedidos), respuesta.data
+
+
+def por_pedido_delete(cliente, pedidos, topping):
+    for pedido_id, _ in pedidos:
+        respuesta = cliente.delete(f'{URL}{pedido_id}/')
+        assert respuesta.status_code == 204, respuesta.content
+
+
+def en_bloque_delete(cliente, pedidos, topping):
+    respuesta = cliente.post(
+        f'{URL}eliminar_lote/', {'filtro': {'ids': [pedido_id for pedido_id, _ in pedidos]}}, format='json'
+    )
+    assert respuesta.status_code == 200 and respuesta.data['pedidos_eliminados'] == len(pedidos), respuesta.data
+
+
+CASOS = (
+    ('quitar topping: PATCH por pedido', por_pedido_patch),
+    ('quitar topping: actualizar_lote', en_bloque_patch),
+    ('eliminar: DELETE por pedido', por_pedido_delete),
+    ('eliminar: eliminar_lote', en_bloque_delete),
+)
+
+
+def medir(funcion, cliente, pedidos, topping):
+    """Ejecuta un caso dentro de una transacción revertida"""
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            funcion(cliente, pedidos, topping)
+            duracion = (time.perf_counter() - inicio) * 1000
+        transaction.set_rollback(True)
+    return duracion, len(consultas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pedidos', type=int, default=500)
+    parser.add_argument('--topping', default='bacon')
+    parser.add_argument('--rondas', type=int, default=3)
+    args = parser.parse_args()
+
+    pedidos = list(
+        PedidoCono.objects.filter(ContieneTopping('toppings', args.topping))
+        .order_by('-id').values_list('id', 'toppings')[:args.pedidos]
+    )
+    if not pedidos:
+        sys.exit(f'No hay pedidos con el topping {args.topping}')
+    print(f'{len(pedidos)} pedidos con {args.topping}')
+
+    cliente = APIClient()
+    mejores = {}
+    for _ in range(args.rondas):
+        for nombre, funcion in CASOS:
+            duracion, consultas = medir(funcion, cliente, pedidos, args.topping)
+            if nombre not in mejores or duracion < mejores[nombre][0]:
+                mejores[nombre] = (duracion, consultas)
+    for nombre, (duracion, consultas) in mejores.items():
+        print(f'  {nombre:<34} {duracion:>9.1f} ms  {consultas:>5} consultas')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Comparación de tamaño y latencia de los formatos de respuesta de pedidos
+
+Genera un listado sintético de N pedidos (10000 por defecto) con el esquema
+del listado y mide, para JSON y MessagePack, con y sin toppings como máscara
+de bits y con y sin compresión gzip/brotli: tamaño del cuerpo, tiempo de
+codificación (render + compresión) y tiempo de decodificación en el cliente.
+Los formatos cuyo paquete opcional (orjson, msgpack, brotli) no esté
+instalado se omiten.
+
+Uso:
+    python benchmarks/bench_formatos.py [--pedidos 10000] [--rondas 5]
+"""
+import argparse
+import datetime
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_patrones.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from api_conos import formatos, listado  # noqa: E402
+from api_conos.catalogo import obtener_catalogo  # noqa: E402
+from api_conos.models import PedidoCono  # noqa: E402
+from api_conos.precios import construir_cono, crear_snapshot_precio  # noqa: E402
+
+COMPRESIONES = [('', None), ('+gzip', 'gzip')] + ([('+br', 'br')] if formatos.brotli else [])
+
+
+def generar_listado(pedidos):
+    """Listado sintético con el mismo esquema que GET /api/pedidos_conos/"""
+    catalogo = obtener_catalogo()
+    aleatorio = random.Random(42)
+    variantes = [variante for variante, _ in PedidoCono.VARIANTES_CHOICES]
+    tamanios = [tamanio for tamanio, _ in PedidoCono.TAMANIOS_CHOICES]
+    fecha = datetime.date(2025, 7, 1)
+    filas = []
+    for pedido_id in range(1, pedidos + 1):
+        variante = aleatorio.choice(variantes)
+        tamanio = aleatorio.choice(tamanios)
+        toppings = aleatorio.sample(PedidoCono.TOPPINGS_PERMITIDOS, aleatorio.randint(0, 4))
+        construido = construir_cono(variante, tamanio, toppings, catalogo)
+        filas.append((
+            pedido_id, f'cliente_{aleatorio.randint(1, 500)}', variante, toppings, tamanio,
+            fecha, crear_snapshot_precio(variante, construido, catalogo)
+        ))
+    resultados = listado.filas_listado(filas, catalogo)
+    return {'count': pedidos, 'next': None, 'previous': None, 'results': resultados}
+
+
+def codificadores():
+    """(nombre, codificar(datos) -> bytes, decodificar(bytes))"""
+    def json_estandar(datos):
+        return json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    lista = [('json', json_estandar, json.loads)]
+    if listado.orjson is not None:
+        lista.append(('json (orjson)', listado.orjson.dumps, listado.orjson.loads))
+    if formatos.msgpack is not None:
+        msgpack = formatos.msgpack
+        lista.append(('msgpack', msgpack.packb, lambda contenido: msgpack.unpackb(contenido, raw=False)))
+    return lista
+
+
+def descomprimir(contenido, codificacion):
+    if codificacion == 'gzip':
+        return gzip.decompress(contenido)
+    if codificacion == 'br':
+        return formatos.brotli.decompress(contenido)
+    return contenido
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pedidos', type=int, default=10000)
+    parser.add_argument('--rondas', type=int, default=5)
+    args = parser.parse_args()
+
+    datos = generar_listado(args.pedidos)
+    configuracion = formatos.obtener_configuracion_compresion()
+    casos = []
+    for nombre, codificar, decodificar in codificadores():
+        for etiqueta_mascara, mascara in (('', False), (' bitmask', True)):
+            for etiqueta_compresion, codificacion in COMPRESIONES:
+                casos.append((
+                    f'{nombre}{etiqueta_mascara}{etiqueta_compresion}',
+                    codificar, decodificar, mascara, codificacion
+                ))
+
+    referencia = None
+    print(f'{args.pedidos} pedidos (gzip nivel {configuracion["NIVEL_GZIP"]}, '
+          f'brotli calidad {configuracion["CALIDAD_BROTLI"]})')
+    print(f'{"formato":<30} {"KiB":>9} {"%":>6} {"codificar ms":>13} {"decodificar ms":>15}')
+    for nombre, codificar, decodificar, mascara, codificacion in casos:
+        codificar_ms = decodificar_ms = float('inf')
+        for _ in range(args.rondas):
+            inicio = time.perf_counter()
+            contenido = codificar(formatos._codificar_toppings(datos) if mascara else datos)
+            if codificacion:
+                contenido = formatos.comprimir(contenido, codificacion, configuracion)
+            codificar_ms = min(codificar_ms, (time.perf_counter() - inicio) * 1000)
+
+            inicio = time.perf_counter()
+            decodificar(descomprimir(contenido, codificacion))
+            decodificar_ms = min(decodificar_ms, (time.perf_counter() - inicio) * 1000)
+        if referencia is None:
+            referencia = len(contenido)
+        print(f'{nombre:<30} {len(contenido) / 1024:>9.1f} {len(contenido) * 100 / referencia:>6.1f} '
+              f'{codificar_ms:>13.1f} {decodificar_ms:>15.1f}')
+
+
+if __name__ == '__main__':
+    main()
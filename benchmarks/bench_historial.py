@@ -0,0 +1,123 @@
+"""
+Benchmark del historial de un cliente
+
+Compara, para los clientes con más pedidos:
+- el listado filtrado GET /api/pedidos_conos/?cliente=... (icontains y
+  precio por fila en el serializador) más el gasto con una suma sobre sus
+  pedidos, como se consultaba antes;
+- GET /api/pedidos_conos/historial_cliente/ sin caché (índice
+  (cliente, fecha_pedido, id) y ResumenCliente) y con caché;
+- historial_cliente() directamente, sin la capa HTTP, con caché.
+
+Imprime además el plan de SQLite de las consultas sin caché. Usa la base de
+datos configurada; para que los números sean representativos debe tener
+millones de pedidos.
+
+Uso:
+    python benchmarks/bench_historial.py [--clientes 20] [--limite 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_patrones.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.db.models import Count, Sum  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from api_conos.clientes import CAMPOS_HISTORIAL, historial_cliente, obtener_cache_historial  # noqa: E402
+from api_conos.models import PedidoCono, ResumenCliente  # noqa: E402
+
+URL = '/api/pedidos_conos/'
+
+
+def antes(cliente_http, cliente, limite):
+    respuesta = cliente_http.get(URL, {'cliente': cliente, 'page_size': limite})
+    assert respuesta.status_code == 200, respuesta.content
+    PedidoCono.objects.filter(cliente__icontains=cliente).aggregate(Count('pk'), Sum('precio_final'))
+
+
+def historial_http(cliente_http, cliente, limite):
+    respuesta = cliente_http.get(f'{URL}historial_cliente/', {'cliente': cliente, 'limite': limite})
+    assert respuesta.status_code == 200, respuesta.content
+
+
+def historial_http_frio(cliente_http, cliente, limite):
+    obtener_cache_historial().limpiar()
+    historial_http(cliente_http, cliente, limite)
+
+
+def historial_funcion(cliente_http, cliente, limite):
+    historial_cliente(cliente, limite)
+
+
+CASOS = (
+    ('antes: listado icontains + suma', antes),
+    ('historial_cliente sin caché', historial_http_frio),
+    ('historial_cliente con caché', historial_http),
+    ('historial_cliente() con caché', historial_funcion),
+)
+
+
+def medir(funcion, cliente_http, clientes, limite, rondas):
+    """Mejor tiempo medio por cliente (ms) entre las rondas y consultas por cliente"""
+    mejor = None
+    for _ in range(rondas):
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            for cliente in clientes:
+                funcion(cliente_http, cliente, limite)
+            duracion = (time.perf_counter() - inicio) * 1000 / len(clientes)
+        if mejor is None or duracion < mejor[0]:
+            mejor = (duracion, len(consultas) / len(clientes))
+    return mejor
+
+
+def mostrar_plan(cliente, limite):
+    consultas = (
+        ResumenCliente.objects.filter(cliente=cliente).values_list('total_pedidos', 'gasto_total'),
+        PedidoCono.objects.filter(cliente=cliente).order_by('-fecha_pedido', '-id').values(*CAMPOS_HISTORIAL)[:limite],
+    )
+    for consulta in consultas:
+        sql, parametros = consulta.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', parametros)
+            for fila in cursor.fetchall():
+                print(f'  {fila[-1]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clientes', type=int, default=20)
+    parser.add_argument('--limite', type=int, default=10)
+    parser.add_argument('--rondas', type=int, default=3)
+    args = parser.parse_args()
+
+    clientes = list(
+        ResumenCliente.objects.order_by('-total_pedidos').values_list('cliente', flat=True)[:args.clientes]
+    )
+    if not clientes:
+        sys.exit('No hay resúmenes de clientes (ver manage.py reconstruir_clientes)')
+    total = ResumenCliente.objects.filter(cliente__in=clientes).aggregate(Sum('total_pedidos'))
+    print(f'{len(clientes)} clientes con {total["total_pedidos__sum"]:,} pedidos, últimos {args.limite}')
+    if connection.vendor == 'sqlite':
+        mostrar_plan(clientes[0], args.limite)
+
+    cliente_http = APIClient()
+    historial_funcion(cliente_http, clientes[0], args.limite)
+    for nombre, funcion in CASOS:
+        duracion, consultas = medir(funcion, cliente_http, clientes, args.limite, args.rondas)
+        tiempo = f'{duracion * 1000:>9.1f} µs' if duracion < 1 else f'{duracion:>9.2f} ms'
+        print(f'  {nombre:<34} {tiempo}  {consultas:>4.1f} consultas')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark de ingesta de pedidos: una transacción por petición vs commits agrupados
+
+Lanza varios hilos cliente que crean pedidos con POST /api/pedidos_conos/
+contra una base SQLite temporal y reporta pedidos/s sostenidos y latencias
+p50/p99 para cada modo.
+
+Uso:
+    python benchmarks/bench_ingesta.py [--clientes 16] [--pedidos 200]
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_patrones.settings')
+
+from django.conf import settings  # noqa: E402
+
+DIRECTORIO = tempfile.mkdtemp(prefix='bench_ingesta_')
+settings.DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(DIRECTORIO, 'db.sqlite3'),
+    'OPTIONS': {'timeout': 60},
+}
+settings.ALLOWED_HOSTS = ['*']
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from api_conos.models import PedidoCono  # noqa: E402
+
+PEDIDO = {
+    'cliente': 'Cliente Benchmark',
+    'variante': 'Carnívoro',
+    'tamanio_cono': 'Grande',
+    'toppings': ['queso_extra', 'bacon'],
+}
+
+
+def percentil(valores_ordenados, p):
+    rango = max(1, math.ceil(p / 100 * len(valores_ordenados)))
+    return valores_ordenados[rango - 1]
+
+
+def cliente(pedidos, latencias, errores, barrera):
+    api = APIClient()
+    barrera.wait()
+    for _ in range(pedidos):
+        inicio = time.perf_counter()
+        respuesta = api.post('/api/pedidos_conos/', PEDIDO, format='json')
+        latencias.append(time.perf_counter() - inicio)
+        if respuesta.status_code != 201:
+            errores.append(respuesta.status_code)
+    connection.close()
+
+
+def ejecutar(nombre, clientes, pedidos):
+    PedidoCono.objects.all().delete()
+    latencias, errores = [], []
+    barrera = threading.Barrier(clientes + 1)
+    hilos = [
+        threading.Thread(target=cliente, args=(pedidos, latencias, errores, barrera))
+        for _ in range(clientes)
+    ]
+    for hilo in hilos:
+        hilo.start()
+    barrera.wait()
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    total = len(latencias)
+    print(
+        f'{nombre:<26} {total / duracion:>10.1f} {percentil(latencias, 50) * 1000:>9.2f} '
+        f'{percentil(latencias, 99) * 1000:>9.2f} {len(errores):>8} '
+        f'{PedidoCono.objects.count():>8}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clientes', type=int, default=16)
+    parser.add_argument('--pedidos', type=int, default=200, help='Pedidos por cliente')
+    parser.add_argument('--max-filas', type=int, default=64)
+    parser.add_argument('--max-espera-ms', type=float, default=5)
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+    print(f'{args.clientes} clientes x {args.pedidos} pedidos (SQLite en {DIRECTORIO})')
+    print(f"{'modo':<26} {'pedidos/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errores':>8} {'filas':>8}")
+
+    with override_settings(INGESTA_AGRUPADA={'HABILITADA': False}):
+        ejecutar('una transacción/petición', args.clientes, args.pedidos)
+    with override_settings(INGESTA_AGRUPADA={
+        'HABILITADA': True, 'MAX_FILAS': args.max_filas, 'MAX_ESPERA_MS': args.max_espera_ms
+    }):
+        ejecutar('commits agrupados', args.clientes, args.pedidos)
+
+
+if __name__ == '__main__':
+    main()
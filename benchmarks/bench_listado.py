@@ -0,0 +1,91 @@
+"""
+Benchmark del listado de pedidos: PedidoConoSerializer vs listado rápido
+
+Serializa páginas de 20, 500 y 5000 pedidos (consulta incluida) con el
+serializador de DRF y con el listado rápido (values_list + snapshot de
+precios), con orjson y con el módulo json estándar, y verifica que las
+salidas sean idénticas byte a byte. Usa la base de datos configurada, que
+debe tener al menos tantos pedidos como la página más grande (ver
+`manage.py generar_carga sembrar`).
+
+Uso:
+    python benchmarks/bench_listado.py [--tamanios 20,500,5000] [--rondas 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_patrones.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from api_conos import listado  # noqa: E402
+from api_conos.catalogo import obtener_catalogo  # noqa: E402
+from api_conos.logger import obtener_logger  # noqa: E402
+from api_conos.models import PedidoCono  # noqa: E402
+from api_conos.serializers import PedidoConoSerializer  # noqa: E402
+
+ORJSON = listado.orjson
+
+
+def con_serializador(tamanio):
+    pedidos = list(PedidoCono.objects.order_by('-fecha_pedido', 'id')[:tamanio])
+    return JSONRenderer().render(PedidoConoSerializer(pedidos, many=True).data)
+
+
+def con_listado_rapido(tamanio):
+    filas = PedidoCono.objects.order_by('-fecha_pedido', 'id').values_list(*listado.CAMPOS_LISTADO)[:tamanio]
+    return listado.serializar_json(listado.filas_listado(filas, obtener_catalogo()))
+
+
+def medir(funcion, tamanio, encoder):
+    listado.orjson = encoder
+    obtener_logger().limpiar_logs()
+    inicio = time.perf_counter()
+    contenido = funcion(tamanio)
+    return time.perf_counter() - inicio, contenido
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tamanios', default='20,500,5000')
+    parser.add_argument('--rondas', type=int, default=5)
+    args = parser.parse_args()
+
+    tamanios = [int(tamanio) for tamanio in args.tamanios.split(',')]
+    total = PedidoCono.objects.count()
+    if total < max(tamanios):
+        sys.exit(f'La base de datos tiene {total} pedidos; se necesitan al menos {max(tamanios)}')
+
+    variantes = [('serializador DRF', con_serializador, ORJSON), ('listado rápido (json)', con_listado_rapido, None)]
+    if ORJSON is not None:
+        variantes.append(('listado rápido (orjson)', con_listado_rapido, ORJSON))
+
+    print(f'{"variante":<26} {"página":>7} {"ms":>9} {"pedidos/s":>12} {"KiB":>8}')
+    for tamanio in tamanios:
+        mejores = {}
+        salidas = {}
+        # Rondas intercaladas para que todas las variantes sufran el mismo ruido
+        for _ in range(args.rondas):
+            for nombre, funcion, encoder in variantes:
+                duracion, salidas[nombre] = medir(funcion, tamanio, encoder)
+                mejores[nombre] = min(mejores.get(nombre, duracion), duracion)
+        referencia = salidas['serializador DRF']
+        for nombre, duracion in mejores.items():
+            if salidas[nombre] != referencia:
+                sys.exit(f'La salida de "{nombre}" difiere del serializador con {tamanio} pedidos')
+            print(
+                f'{nombre:<26} {tamanio:>7} {duracion * 1000:>9.2f} '
+                f'{tamanio / duracion:>12,.0f} {len(salidas[nombre]) / 1024:>8.1f}'
+            )
+    listado.orjson = ORJSON
+
+
+if __name__ == '__main__':
+    main()
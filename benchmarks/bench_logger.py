@@ -0,0 +1,74 @@
+"""
+Benchmark del costo del logger de operaciones en el listado de pedidos
+
+Mide peticiones por segundo de GET /api/pedidos_conos/ guardando todas las
+operaciones (nivel DEBUG, comportamiento anterior), con muestreo del 1% y
+con el nivel por defecto (INFO, solo contadores para los cálculos por
+pedido), tanto con el serializador como con el listado rápido. Usa la base
+de datos configurada, que debe tener pedidos (ver `manage.py generar_carga`).
+
+Uso:
+    python benchmarks/bench_logger.py [--peticiones 200] [--rondas 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_patrones.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import override_settings  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from api_conos.logger import obtener_logger  # noqa: E402
+
+CONFIGURACIONES = (
+    ('DEBUG, sin muestreo', {'nivel': 'DEBUG', 'muestreo': {}}),
+    ('DEBUG, muestreo 1%', {'nivel': 'DEBUG', 'muestreo': {
+        'precio_final': 0.01, 'ingredientes_finales': 0.01, 'personalizacion': 0.01
+    }}),
+    ('INFO (por defecto)', {'nivel': 'INFO', 'muestreo': {}}),
+)
+
+
+def medir(cliente, peticiones, paginas):
+    inicio = time.perf_counter()
+    for i in range(peticiones):
+        respuesta = cliente.get(f'/api/pedidos_conos/?page={i % paginas + 1}')
+        assert respuesta.status_code == 200, respuesta.status_code
+    return peticiones / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--peticiones', type=int, default=200)
+    parser.add_argument('--rondas', type=int, default=5)
+    parser.add_argument('--paginas', type=int, default=50)
+    args = parser.parse_args()
+
+    cliente = APIClient()
+    logger = obtener_logger()
+    for listado_rapido in (False, True):
+        print('listado rápido' if listado_rapido else 'serializador DRF')
+        mejores = {}
+        with override_settings(LISTADO_RAPIDO=listado_rapido):
+            medir(cliente, 20, args.paginas)
+            # Rondas intercaladas para que todas las configuraciones sufran el mismo ruido
+            for _ in range(args.rondas):
+                for nombre, configuracion in CONFIGURACIONES:
+                    logger.limpiar_logs()
+                    logger.configurar(**configuracion)
+                    throughput = medir(cliente, args.peticiones, args.paginas)
+                    mejores[nombre] = max(mejores.get(nombre, 0.0), throughput)
+        for nombre, throughput in mejores.items():
+            print(f'  {nombre:<22} {throughput:>9,.0f} peticiones/s')
+    logger.configurar()
+
+
+if __name__ == '__main__':
+    main()
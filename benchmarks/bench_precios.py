@@ -0,0 +1,73 @@
+"""
+Benchmark de throughput de precios: precios por defecto vs catálogo en caché
+
+Compara el cálculo de precios con los diccionarios definidos en el código
+contra el snapshot del catálogo cargado desde la base de datos, incluyendo
+el costo de obtener el snapshot vigente en cada cálculo.
+
+Uso:
+    python benchmarks/bench_precios.py [--iteraciones 200000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_patrones.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from api_conos.builder import ConoPersonalizadoBuilder, ConoDirector  # noqa: E402
+from api_conos.catalogo import obtener_catalogo  # noqa: E402
+from api_conos.factory import ConoFactory  # noqa: E402
+
+PEDIDOS = [
+    ('Carnívoro', 'Grande', ['queso_extra', 'bacon', 'guacamole']),
+    ('Vegetariano', 'Mediano', ['aguacate', 'champiñones']),
+    ('Saludable', 'Pequeño', []),
+    ('Carnívoro', 'Mediano', ['jalapeños', 'salsa_chipotle', 'papas_al_hilo', 'queso_extra']),
+]
+
+
+def precio_por_defecto(variante, tamanio, toppings):
+    cono_base = ConoFactory.crear_cono_base(variante, tamanio)
+    director = ConoDirector(ConoPersonalizadoBuilder(cono_base))
+    return director.construir_cono_personalizado(toppings).precio_total
+
+
+def precio_catalogo(variante, tamanio, toppings):
+    cono_base = ConoFactory.crear_cono_base(variante, tamanio)
+    director = ConoDirector(ConoPersonalizadoBuilder(cono_base, obtener_catalogo()))
+    return director.construir_cono_personalizado(toppings).precio_total
+
+
+def medir(funcion, iteraciones):
+    inicio = time.perf_counter()
+    for i in range(iteraciones):
+        funcion(*PEDIDOS[i % len(PEDIDOS)])
+    return iteraciones / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iteraciones', type=int, default=100000)
+    parser.add_argument('--rondas', type=int, default=10)
+    args = parser.parse_args()
+
+    catalogo = obtener_catalogo()
+    print(f'Catálogo v{catalogo.version} ({len(catalogo.precios_toppings)} toppings)')
+    funciones = (('precios por defecto', precio_por_defecto), ('catálogo en caché', precio_catalogo))
+    # Rondas intercaladas para que ambas variantes sufran el mismo ruido
+    mejores = {nombre: 0.0 for nombre, _ in funciones}
+    for _ in range(args.rondas):
+        for nombre, funcion in funciones:
+            mejores[nombre] = max(mejores[nombre], medir(funcion, args.iteraciones))
+    for nombre, throughput in mejores.items():
+        print(f'{nombre:<22} {throughput:>12,.0f} precios/s')
+
+
+if __name__ == '__main__':
+    main()
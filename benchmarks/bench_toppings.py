@@ -0,0 +1,61 @@
+"""
+Benchmark de escalabilidad del builder con catálogos grandes de toppings
+
+Construye conos agregando todos los toppings de catálogos personalizados de
+distintos tamaños (más una ronda de duplicados y toppings desconocidos) y
+reporta el tiempo por construcción. Con estructuras lineales el tiempo por
+topping debe mantenerse aproximadamente constante.
+
+Uso:
+    python benchmarks/bench_toppings.py [--tamanios 100,1000,10000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_conos.builder import ConoPersonalizadoBuilder  # noqa: E402
+from api_conos.factory import ConoFactory  # noqa: E402
+
+
+def crear_builder_con_catalogo(n_toppings):
+    """Crea una subclase del builder con un catálogo de n toppings sintéticos"""
+    catalogo = {f'topping_{i}': 1.0 + (i % 7) * 0.5 for i in range(n_toppings)}
+
+    class BuilderCatalogoGrande(ConoPersonalizadoBuilder):
+        __slots__ = ()
+        _precios_toppings = catalogo
+
+    return BuilderCatalogoGrande, list(catalogo)
+
+
+def medir(n_toppings, repeticiones):
+    builder_cls, toppings = crear_builder_con_catalogo(n_toppings)
+    # Todos los toppings, luego duplicados y algunos desconocidos
+    solicitud = toppings + toppings[: n_toppings // 2] + [f'desconocido_{i}' for i in range(10)]
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        builder = builder_cls(ConoFactory.crear_cono_base('Carnívoro', 'Grande'))
+        resultado = builder.agregar_multiples_toppings(solicitud).construir()
+    duracion = (time.perf_counter() - inicio) / repeticiones
+    assert len(resultado.toppings_agregados) == n_toppings
+    return duracion, len(solicitud)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tamanios', default='100,1000,10000')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'catálogo':>10} {'solicitados':>12} {'ms/construcción':>16} {'µs/topping':>11}")
+    for n in (int(valor) for valor in args.tamanios.split(',')):
+        duracion, solicitados = medir(n, args.repeticiones)
+        print(f'{n:>10} {solicitados:>12} {duracion * 1000:>16.2f} {duracion * 1e6 / solicitados:>11.3f}')
+
+
+if __name__ == '__main__':
+    main()
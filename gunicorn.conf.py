@@ -0,0 +1,28 @@
+"""
+Configuración de gunicorn para api_patrones
+
+Uso:
+    gunicorn api_patrones.wsgi -c gunicorn.conf.py
+
+Con preload_app la aplicación se carga (y se calienta, ver
+api_conos/calentamiento.py) una sola vez en el proceso maestro; los workers
+la heredan al hacer fork y solo abren sus conexiones de base de datos.
+"""
+import gc
+import multiprocessing
+
+bind = '127.0.0.1:8000'
+workers = multiprocessing.cpu_count() * 2 + 1
+preload_app = True
+
+def when_ready(server):
+    # Los objetos creados al cargar la aplicación pasan a la generación
+    # permanente: el recolector no los recorre en los workers y sus páginas
+    # siguen compartidas copy-on-write
+    gc.collect()
+    gc.freeze()
+
+def post_fork(server, worker):
+    from api_conos.calentamiento import preparar_conexiones
+    tiempos = preparar_conexiones()
+    server.log.info('Worker %s: conexiones preparadas %s', worker.pid, tiempos)